@@ -54,6 +54,14 @@ from app.models.storefront import (
 )
 from app.models.integration import IntegrationSource, IntegrationSyncRun, IntegrationRecordLink
 from app.models.storefront_newsletter import StorefrontNewsletterSubscription
+from app.models.sales_rollup import SalesDailyRollup, SalesProductDailyRollup, ReturnDailyRollup
+from app.models.export_job import ExportJob
+from app.models.inventory_snapshot import InventoryProductSnapshot, InventoryBranchSnapshot
+from app.models.import_job import ImportJob
+from app.models.product_deletion_job import ProductDeletionJob
+from app.models.image_derivative import ImageDerivative
+from app.models.stored_asset import StoredAsset, StoredAssetSource
+from app.models.effective_price import EffectivePrice
 
 from app.core.config import settings
 
@@ -0,0 +1,45 @@
+"""link app webhook deliveries to their outbox event
+
+Revision ID: fj9b0c1d2e3f
+Revises: fi8a9b0c1d2e
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "fj9b0c1d2e3f"
+down_revision = "fi8a9b0c1d2e"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "app_webhook_deliveries",
+        sa.Column("outbox_event_id", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    op.create_foreign_key(
+        "fk_app_webhook_deliveries_outbox_event_id",
+        "app_webhook_deliveries",
+        "outbox_events",
+        ["outbox_event_id"],
+        ["id"],
+    )
+    op.create_unique_constraint(
+        "uq_app_webhook_deliveries_outbox_event_id",
+        "app_webhook_deliveries",
+        ["outbox_event_id"],
+    )
+    op.create_index(
+        "ix_app_webhook_deliveries_install_created",
+        "app_webhook_deliveries",
+        ["install_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_app_webhook_deliveries_install_created", table_name="app_webhook_deliveries")
+    op.drop_constraint("uq_app_webhook_deliveries_outbox_event_id", "app_webhook_deliveries", type_="unique")
+    op.drop_constraint("fk_app_webhook_deliveries_outbox_event_id", "app_webhook_deliveries", type_="foreignkey")
+    op.drop_column("app_webhook_deliveries", "outbox_event_id")
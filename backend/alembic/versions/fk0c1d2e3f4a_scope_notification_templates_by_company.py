@@ -0,0 +1,57 @@
+"""scope notification templates by company
+
+Revision ID: fk0c1d2e3f4a
+Revises: fj9b0c1d2e3f
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "fk0c1d2e3f4a"
+down_revision = "fj9b0c1d2e3f"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("notification_templates", sa.Column("company_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column(
+        "notification_templates",
+        sa.Column("updated_at", sa.DateTime(), nullable=True, server_default=sa.text("now()")),
+    )
+    op.create_foreign_key(
+        "fk_notification_templates_company_id",
+        "notification_templates",
+        "companies",
+        ["company_id"],
+        ["id"],
+    )
+    op.create_index("ix_notification_templates_company_id", "notification_templates", ["company_id"])
+    # Existing rows become platform defaults; codes are now unique per company.
+    op.drop_index("ix_notification_templates_code", table_name="notification_templates")
+    op.create_index("ix_notification_templates_code", "notification_templates", ["code"])
+    op.create_unique_constraint(
+        "uq_notification_template_company_code",
+        "notification_templates",
+        ["company_id", "code"],
+    )
+    op.create_index(
+        "uq_notification_template_platform_code",
+        "notification_templates",
+        ["code"],
+        unique=True,
+        postgresql_where=sa.text("company_id IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM notification_templates WHERE company_id IS NOT NULL")
+    op.drop_index("uq_notification_template_platform_code", table_name="notification_templates")
+    op.drop_constraint("uq_notification_template_company_code", "notification_templates", type_="unique")
+    op.drop_index("ix_notification_templates_code", table_name="notification_templates")
+    op.create_index("ix_notification_templates_code", "notification_templates", ["code"], unique=True)
+    op.drop_index("ix_notification_templates_company_id", table_name="notification_templates")
+    op.drop_constraint("fk_notification_templates_company_id", "notification_templates", type_="foreignkey")
+    op.drop_column("notification_templates", "updated_at")
+    op.drop_column("notification_templates", "company_id")
@@ -0,0 +1,82 @@
+"""add sales daily rollups
+
+Revision ID: fl1d2e3f4a5b
+Revises: fk0c1d2e3f4a
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "fl1d2e3f4a5b"
+down_revision = "fk0c1d2e3f4a"
+branch_labels = depends_on = None
+
+
+def _bucket_columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("company_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("companies.id"), nullable=False),
+        sa.Column("branch_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("branches.id"), nullable=True),
+        sa.Column("day", sa.Date(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sales_daily_rollups",
+        *_bucket_columns(),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("sales_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("gross_sales", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("payments_cash", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("payments_card", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("payments_credit", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("items_revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("items_cost", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_sales_daily_rollups_company_day", "sales_daily_rollups", ["company_id", "day"])
+
+    op.create_table(
+        "sales_product_daily_rollups",
+        *_bucket_columns(),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column(
+            "product_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("products.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("category_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("quantity", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("cost", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ix_sales_product_daily_rollups_company_day", "sales_product_daily_rollups", ["company_id", "day"]
+    )
+    op.create_index(
+        "ix_sales_product_daily_rollups_company_product", "sales_product_daily_rollups", ["company_id", "product_id"]
+    )
+
+    op.create_table(
+        "return_daily_rollups",
+        *_bucket_columns(),
+        sa.Column("returns_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_refunds", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_return_daily_rollups_company_day", "return_daily_rollups", ["company_id", "day"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_return_daily_rollups_company_day", table_name="return_daily_rollups")
+    op.drop_table("return_daily_rollups")
+    op.drop_index("ix_sales_product_daily_rollups_company_product", table_name="sales_product_daily_rollups")
+    op.drop_index("ix_sales_product_daily_rollups_company_day", table_name="sales_product_daily_rollups")
+    op.drop_table("sales_product_daily_rollups")
+    op.drop_index("ix_sales_daily_rollups_company_day", table_name="sales_daily_rollups")
+    op.drop_table("sales_daily_rollups")
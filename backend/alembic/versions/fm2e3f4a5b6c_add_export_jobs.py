@@ -0,0 +1,58 @@
+"""add background export jobs
+
+Revision ID: fm2e3f4a5b6c
+Revises: fl1d2e3f4a5b
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "fm2e3f4a5b6c"
+down_revision = "fl1d2e3f4a5b"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "export_jobs",
+        sa.Column("requested_by_user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("resource", sa.String(30), nullable=False),
+        sa.Column("format", sa.String(10), nullable=False),
+        sa.Column("filters", sa.JSON(), nullable=False),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("total_records", sa.Integer(), nullable=True),
+        sa.Column("processed_records", sa.Integer(), nullable=False),
+        sa.Column("rows_written", sa.Integer(), nullable=True),
+        sa.Column("queued_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("file_name", sa.String(), nullable=True),
+        sa.Column("file_path", sa.String(), nullable=True),
+        sa.Column("file_size", sa.Integer(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_by_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("updated_by_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("company_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("companies.id"), nullable=True),
+    )
+    op.create_index("ix_export_jobs_requested_by_user_id", "export_jobs", ["requested_by_user_id"])
+    op.create_index("ix_export_jobs_company_fingerprint", "export_jobs", ["company_id", "fingerprint"])
+    op.create_index("ix_export_jobs_status_queued", "export_jobs", ["status", "queued_at"])
+    op.create_index(
+        "uq_export_jobs_active_fingerprint",
+        "export_jobs",
+        ["company_id", "fingerprint"],
+        unique=True,
+        postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("export_jobs")
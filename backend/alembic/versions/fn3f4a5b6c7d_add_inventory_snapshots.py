@@ -0,0 +1,79 @@
+"""add inventory snapshots
+
+Revision ID: fn3f4a5b6c7d
+Revises: fm2e3f4a5b6c
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "fn3f4a5b6c7d"
+down_revision = "fm2e3f4a5b6c"
+branch_labels = depends_on = None
+
+
+def _snapshot_columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("company_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("companies.id"), nullable=False),
+        sa.Column(
+            "branch_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("branches.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inventory_product_snapshots",
+        *_snapshot_columns(),
+        sa.Column(
+            "product_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("products.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("reserved_quantity", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("value", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "uq_inventory_product_snapshots_key",
+        "inventory_product_snapshots",
+        ["company_id", "branch_id", "product_id", "day"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_inventory_product_snapshots_company_day", "inventory_product_snapshots", ["company_id", "day"]
+    )
+
+    op.create_table(
+        "inventory_branch_snapshots",
+        *_snapshot_columns(),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("value", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("catalog_value", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("low_stock_items", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "uq_inventory_branch_snapshots_key",
+        "inventory_branch_snapshots",
+        ["company_id", "branch_id", "day"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_inventory_branch_snapshots_key", table_name="inventory_branch_snapshots")
+    op.drop_table("inventory_branch_snapshots")
+    op.drop_index("ix_inventory_product_snapshots_company_day", table_name="inventory_product_snapshots")
+    op.drop_index("uq_inventory_product_snapshots_key", table_name="inventory_product_snapshots")
+    op.drop_table("inventory_product_snapshots")
@@ -0,0 +1,33 @@
+"""add keyset pagination indexes
+
+Revision ID: fo4a5b6c7d8e
+Revises: fn3f4a5b6c7d
+"""
+
+from alembic import op
+
+
+revision = "fo4a5b6c7d8e"
+down_revision = "fn3f4a5b6c7d"
+branch_labels = depends_on = None
+
+INDEXES = (
+    ("ix_sales_company_created_at_id", "sales", ["company_id", "created_at", "id"]),
+    ("ix_audit_logs_company_created_at_id", "audit_logs", ["company_id", "created_at", "id"]),
+    ("ix_notifications_user_created_at_id", "notifications", ["user_id", "created_at", "id"]),
+    ("ix_inventory_movements_branch_created_at_id", "inventory_movements", ["branch_id", "created_at", "id"]),
+    ("ix_inventory_movements_product_created_at_id", "inventory_movements", ["product_id", "created_at", "id"]),
+)
+
+
+def upgrade() -> None:
+    # These tables are the largest in the schema; build without blocking writes.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
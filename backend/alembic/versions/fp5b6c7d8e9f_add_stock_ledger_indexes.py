@@ -0,0 +1,55 @@
+"""add stock ledger indexes
+
+Revision ID: fp5b6c7d8e9f
+Revises: fo4a5b6c7d8e
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "fp5b6c7d8e9f"
+down_revision = "fo4a5b6c7d8e"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    # The ledger filters by company; older movements only carry their branch.
+    op.execute(
+        sa.text(
+            "UPDATE inventory_movements AS m SET company_id = b.company_id "
+            "FROM branches AS b WHERE m.branch_id = b.id AND m.company_id IS NULL"
+        )
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_inventory_movements_ledger",
+            "inventory_movements",
+            ["company_id", "product_id", "variant_id", "branch_id", "warehouse_id", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_inventory_movements_created_at_brin",
+            "inventory_movements",
+            ["created_at"],
+            postgresql_using="brin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_inventory_movements_created_at_brin",
+            table_name="inventory_movements",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_inventory_movements_ledger",
+            table_name="inventory_movements",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,27 @@
+"""add chunked upload state to import jobs
+
+Revision ID: fr7d8e9f0a1b
+Revises: fq6c7d8e9f0a
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "fr7d8e9f0a1b"
+down_revision = "fq6c7d8e9f0a"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("import_jobs", sa.Column("options", sa.JSON(), nullable=False, server_default="{}"))
+    op.add_column("import_jobs", sa.Column("file_size", sa.BigInteger(), nullable=True))
+    op.add_column("import_jobs", sa.Column("received_bytes", sa.BigInteger(), nullable=False, server_default="0"))
+    op.alter_column("import_jobs", "options", server_default=None)
+    op.alter_column("import_jobs", "received_bytes", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("import_jobs", "received_bytes")
+    op.drop_column("import_jobs", "file_size")
+    op.drop_column("import_jobs", "options")
@@ -0,0 +1,48 @@
+"""add background product deletion jobs
+
+Revision ID: fs8e9f0a1b2c
+Revises: fr7d8e9f0a1b
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "fs8e9f0a1b2c"
+down_revision = "fr7d8e9f0a1b"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_deletion_jobs",
+        sa.Column("requested_by_user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("scope", sa.String(20), nullable=False),
+        sa.Column("params", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("total_products", sa.Integer(), nullable=True),
+        sa.Column("processed_products", sa.Integer(), nullable=False),
+        sa.Column("cursor", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("summary", sa.JSON(), nullable=False),
+        sa.Column("queued_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_by_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("updated_by_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("company_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("companies.id"), nullable=True),
+    )
+    op.create_index(
+        "ix_product_deletion_jobs_requested_by_user_id", "product_deletion_jobs", ["requested_by_user_id"]
+    )
+    op.create_index("ix_product_deletion_jobs_status_queued", "product_deletion_jobs", ["status", "queued_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("product_deletion_jobs")
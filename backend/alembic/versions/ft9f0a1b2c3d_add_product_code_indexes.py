@@ -0,0 +1,95 @@
+"""index product and variant codes for exact resolution
+
+Revision ID: ft9f0a1b2c3d
+Revises: fs8e9f0a1b2c
+"""
+
+import logging
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "ft9f0a1b2c3d"
+down_revision = "fs8e9f0a1b2c"
+branch_labels = depends_on = None
+
+LOGGER = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Blank codes become NULL, so they neither match scans nor collide in
+    # the unique index.
+    for table in ("products", "product_variants"):
+        for column in ("sku", "barcode"):
+            op.execute(f"UPDATE {table} SET {column} = NULL WHERE trim({column}) = ''")
+    # Variants added through the product form were saved without a company;
+    # code lookups filter variants by company.
+    op.execute(
+        """
+        UPDATE product_variants AS variant
+        SET company_id = product.company_id
+        FROM products AS product
+        WHERE variant.product_id = product.id AND variant.company_id IS NULL
+        """
+    )
+
+    # Active products sharing a SKU would break the unique index. The oldest
+    # keeps it; the others get their id's first characters appended, so no
+    # product is archived and every change can be traced in the log.
+    renamed = bind.execute(sa.text(
+        """
+        WITH ranked AS (
+            SELECT id, sku,
+                   row_number() OVER (
+                       PARTITION BY company_id, lower(trim(sku)) ORDER BY created_at NULLS LAST, id
+                   ) AS position
+            FROM products
+            WHERE is_active AND sku IS NOT NULL
+        )
+        UPDATE products
+        SET sku = trim(ranked.sku) || '-' || left(products.id::text, 8)
+        FROM ranked
+        WHERE ranked.id = products.id AND ranked.position > 1
+        RETURNING products.id, products.company_id, ranked.sku AS previous_sku, products.sku
+        """
+    )).all()
+    for row in renamed:
+        LOGGER.warning(
+            "Duplicate SKU %r of product %s (company %s) renamed to %r",
+            row.previous_sku, row.id, row.company_id, row.sku,
+        )
+
+    op.create_index(
+        "uq_products_company_sku_active",
+        "products",
+        ["company_id", sa.text("lower(trim(sku))")],
+        unique=True,
+        postgresql_where=sa.text("is_active AND sku IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_products_company_barcode",
+        "products",
+        ["company_id", sa.text("trim(barcode)")],
+        postgresql_where=sa.text("barcode IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_product_variants_company_sku",
+        "product_variants",
+        ["company_id", sa.text("lower(trim(sku))")],
+        postgresql_where=sa.text("sku IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_product_variants_company_barcode",
+        "product_variants",
+        ["company_id", sa.text("trim(barcode)")],
+        postgresql_where=sa.text("barcode IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_variants_company_barcode", table_name="product_variants")
+    op.drop_index("ix_product_variants_company_sku", table_name="product_variants")
+    op.drop_index("ix_products_company_barcode", table_name="products")
+    op.drop_index("uq_products_company_sku_active", table_name="products")
@@ -0,0 +1,36 @@
+"""store each product's variant count
+
+Revision ID: fu0a1b2c3d4e
+Revises: ft9f0a1b2c3d
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "fu0a1b2c3d4e"
+down_revision = "ft9f0a1b2c3d"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "products",
+        sa.Column("variant_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        UPDATE products AS product
+        SET variant_count = counted.variants
+        FROM (
+            SELECT product_id, count(*) AS variants
+            FROM product_variants
+            GROUP BY product_id
+        ) AS counted
+        WHERE counted.product_id = product.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("products", "variant_count")
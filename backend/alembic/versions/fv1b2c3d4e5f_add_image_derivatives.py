@@ -0,0 +1,34 @@
+"""resized image derivatives
+
+Revision ID: fv1b2c3d4e5f
+Revises: fu0a1b2c3d4e
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "fv1b2c3d4e5f"
+down_revision = "fu0a1b2c3d4e"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "image_derivatives",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("source_url", sa.String(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=True),
+        sa.Column("height", sa.Integer(), nullable=True),
+        sa.Column("renditions", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.UniqueConstraint("source_url", name="uq_image_derivatives_source_url"),
+    )
+    op.create_index("ix_image_derivatives_content_hash", "image_derivatives", ["content_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_image_derivatives_content_hash", table_name="image_derivatives")
+    op.drop_table("image_derivatives")
@@ -0,0 +1,59 @@
+"""content-addressed image store with reference counts
+
+Revision ID: fw2c3d4e5f6a
+Revises: fv1b2c3d4e5f
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "fw2c3d4e5f6a"
+down_revision = "fv1b2c3d4e5f"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stored_assets",
+        sa.Column("content_hash", sa.String(length=64), primary_key=True),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("content_type", sa.String(length=50), nullable=True),
+        sa.Column("size_bytes", sa.Integer(), nullable=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("unreferenced_since", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.UniqueConstraint("url", name="stored_assets_url_key"),
+    )
+    op.create_index(
+        "ix_stored_assets_unreferenced",
+        "stored_assets",
+        ["unreferenced_since"],
+        postgresql_where=sa.text("ref_count = 0"),
+    )
+    op.create_table(
+        "stored_asset_sources",
+        sa.Column("source_key", sa.String(length=64), primary_key=True),
+        sa.Column(
+            "content_hash",
+            sa.String(length=64),
+            sa.ForeignKey("stored_assets.content_hash", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+    )
+    op.create_index("ix_stored_asset_sources_content_hash", "stored_asset_sources", ["content_hash"])
+
+    op.create_index("ix_products_image_url", "products", ["image_url"], postgresql_using="hash")
+    op.create_index("ix_product_images_image_url", "product_images", ["image_url"], postgresql_using="hash")
+    op.create_index("ix_store_collections_image_url", "store_collections", ["image_url"], postgresql_using="hash")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_store_collections_image_url", table_name="store_collections")
+    op.drop_index("ix_product_images_image_url", table_name="product_images")
+    op.drop_index("ix_products_image_url", table_name="products")
+    op.drop_index("ix_stored_asset_sources_content_hash", table_name="stored_asset_sources")
+    op.drop_table("stored_asset_sources")
+    op.drop_index("ix_stored_assets_unreferenced", table_name="stored_assets")
+    op.drop_table("stored_assets")
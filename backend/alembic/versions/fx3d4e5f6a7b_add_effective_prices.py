@@ -0,0 +1,113 @@
+"""effective prices per product, variant and channel
+
+Revision ID: fx3d4e5f6a7b
+Revises: fw2c3d4e5f6a
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "fx3d4e5f6a7b"
+down_revision = "fw2c3d4e5f6a"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "effective_prices",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()")),
+        sa.Column(
+            "product_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("products.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "variant_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("product_variants.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column(
+            "published_product_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("published_products.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column(
+            "pricelist_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("price_lists.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("price", sa.Float(), nullable=False),
+    )
+    # Same rules as app.services.pricing.refresh_prices_statements.
+    op.execute(
+        """
+        WITH priced AS (
+            SELECT products.id AS product_id,
+                   product_variants.id AS variant_id,
+                   coalesce(products.price, 0) AS base,
+                   CASE
+                       WHEN product_variants.id IS NULL THEN coalesce(products.price, 0)
+                       WHEN product_variants.price IS NOT NULL THEN product_variants.price
+                       ELSE coalesce(products.price, 0) + coalesce(product_variants.price_extra, 0)
+                   END AS price
+            FROM products
+            LEFT JOIN product_variants ON product_variants.product_id = products.id
+        ),
+        unit_items AS (
+            SELECT DISTINCT ON (pricelist_items.pricelist_id, pricelist_items.product_id)
+                   pricelist_items.pricelist_id, pricelist_items.product_id, pricelist_items.price
+            FROM pricelist_items
+            JOIN price_lists ON price_lists.id = pricelist_items.pricelist_id
+            WHERE price_lists.active IS TRUE
+              AND price_lists.type = 'SALE'
+              AND coalesce(pricelist_items.min_quantity, 0) <= 1
+            ORDER BY pricelist_items.pricelist_id, pricelist_items.product_id,
+                     coalesce(pricelist_items.min_quantity, 0) DESC, pricelist_items.price ASC
+        )
+        INSERT INTO effective_prices (product_id, variant_id, published_product_id, pricelist_id, price)
+        SELECT product_id, variant_id, NULL, NULL, price FROM priced
+        UNION ALL
+        SELECT priced.product_id, priced.variant_id, published_products.id, NULL,
+               CASE
+                   WHEN published_products.price_override IS NULL THEN priced.price
+                   WHEN priced.base <> 0 THEN published_products.price_override + priced.price - priced.base
+                   ELSE published_products.price_override
+               END
+        FROM priced
+        JOIN published_products ON published_products.product_id = priced.product_id
+        UNION ALL
+        SELECT priced.product_id, priced.variant_id, NULL, unit_items.pricelist_id,
+               CASE
+                   WHEN unit_items.price IS NULL THEN priced.price
+                   WHEN priced.base <> 0 THEN unit_items.price + priced.price - priced.base
+                   ELSE unit_items.price
+               END
+        FROM priced
+        JOIN unit_items ON unit_items.product_id = priced.product_id
+        """
+    )
+    op.create_index(
+        "uq_effective_prices_channel",
+        "effective_prices",
+        ["product_id", "variant_id", "published_product_id", "pricelist_id"],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+    )
+    op.create_index(
+        "ix_effective_prices_published_price",
+        "effective_prices",
+        ["published_product_id", "price"],
+        postgresql_where=sa.text("published_product_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_effective_prices_published_price", table_name="effective_prices")
+    op.drop_index("uq_effective_prices_channel", table_name="effective_prices")
+    op.drop_table("effective_prices")
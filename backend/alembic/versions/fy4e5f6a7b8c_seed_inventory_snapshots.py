@@ -0,0 +1,66 @@
+"""seed inventory snapshots of branches without any
+
+Revision ID: fy4e5f6a7b8c
+Revises: fx3d4e5f6a7b
+"""
+
+from alembic import op
+
+
+revision = "fy4e5f6a7b8c"
+down_revision = "fx3d4e5f6a7b"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    # Same figures as app.services.inventory_snapshots.snapshot_company, for
+    # today (UTC), so valuation does not read empty tables after the upgrade.
+    # Branches that already have snapshots are left alone.
+    op.execute(
+        """
+        INSERT INTO inventory_product_snapshots
+            (id, company_id, branch_id, product_id, day, quantity, reserved_quantity, value, refreshed_at)
+        SELECT gen_random_uuid(), branches.company_id, inventory.branch_id, inventory.product_id,
+               timezone('utc', now())::date,
+               coalesce(sum(inventory.quantity), 0),
+               coalesce(sum(inventory.reserved_quantity), 0),
+               coalesce(sum(inventory.quantity * inventory.average_cost), 0),
+               timezone('utc', now())
+        FROM inventory
+        JOIN branches ON branches.id = inventory.branch_id
+        WHERE branches.company_id IS NOT NULL
+          AND inventory.product_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM inventory_branch_snapshots WHERE inventory_branch_snapshots.branch_id = branches.id
+          )
+        GROUP BY branches.company_id, inventory.branch_id, inventory.product_id
+        ON CONFLICT (company_id, branch_id, product_id, day) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO inventory_branch_snapshots
+            (id, company_id, branch_id, day, quantity, value, catalog_value, low_stock_items, refreshed_at)
+        SELECT gen_random_uuid(), branches.company_id, branches.id,
+               timezone('utc', now())::date,
+               coalesce(sum(inventory.quantity), 0),
+               coalesce(sum(inventory.quantity * inventory.average_cost), 0),
+               coalesce(sum(inventory.quantity * coalesce(products.cost, products.price, 0)), 0),
+               count(inventory.id) FILTER (WHERE inventory.quantity <= products.min_stock),
+               timezone('utc', now())
+        FROM branches
+        LEFT JOIN inventory ON inventory.branch_id = branches.id
+        LEFT JOIN products ON products.id = inventory.product_id
+        WHERE branches.company_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM inventory_branch_snapshots WHERE inventory_branch_snapshots.branch_id = branches.id
+          )
+        GROUP BY branches.id, branches.company_id
+        ON CONFLICT (company_id, branch_id, day) DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    # Seeded rows are indistinguishable from the worker's; they stay.
+    pass
@@ -0,0 +1,110 @@
+"""seed sales rollups of days without any
+
+Revision ID: fz5f6a7b8c9d
+Revises: fy4e5f6a7b8c
+"""
+
+from alembic import op
+
+
+revision = "fz5f6a7b8c9d"
+down_revision = "fy4e5f6a7b8c"
+branch_labels = depends_on = None
+
+
+def upgrade() -> None:
+    # Same figures as app.services.sales_rollups.refresh_sales_rollups, so
+    # reports and dashboard charts do not read empty tables after the upgrade.
+    # Days the worker already rebuilt are left alone.
+    op.execute(
+        """
+        WITH sales_totals AS (
+            SELECT company_id, date(created_at) AS day, branch_id, status::text AS status,
+                   count(id) AS sales_count, coalesce(sum(total), 0) AS gross_sales
+            FROM sales
+            WHERE company_id IS NOT NULL
+            GROUP BY company_id, date(created_at), branch_id, status
+        ),
+        payment_totals AS (
+            SELECT sales.company_id, date(sales.created_at) AS day, sales.branch_id, sales.status::text AS status,
+                   coalesce(sum(payments.amount) FILTER (WHERE payments.method = 'CASH'), 0) AS cash,
+                   coalesce(sum(payments.amount) FILTER (WHERE payments.method = 'CARD'), 0) AS card,
+                   coalesce(sum(payments.amount) FILTER (WHERE payments.method = 'CREDIT'), 0) AS credit
+            FROM payments
+            JOIN sales ON sales.id = payments.sale_id
+            WHERE sales.company_id IS NOT NULL
+            GROUP BY sales.company_id, date(sales.created_at), sales.branch_id, sales.status
+        ),
+        item_totals AS (
+            SELECT sales.company_id, date(sales.created_at) AS day, sales.branch_id, sales.status::text AS status,
+                   coalesce(sum(sale_items.total), 0) AS revenue,
+                   coalesce(sum(sale_items.quantity * coalesce(products.cost, 0)), 0) AS cost
+            FROM sale_items
+            JOIN sales ON sales.id = sale_items.sale_id
+            JOIN products ON products.id = sale_items.product_id
+            WHERE sales.company_id IS NOT NULL
+            GROUP BY sales.company_id, date(sales.created_at), sales.branch_id, sales.status
+        )
+        INSERT INTO sales_daily_rollups
+            (id, company_id, branch_id, day, status, sales_count, gross_sales, payments_cash, payments_card,
+             payments_credit, items_revenue, items_cost, refreshed_at)
+        SELECT gen_random_uuid(), s.company_id, s.branch_id, s.day, s.status, s.sales_count, s.gross_sales,
+               coalesce(p.cash, 0), coalesce(p.card, 0), coalesce(p.credit, 0),
+               coalesce(i.revenue, 0), coalesce(i.cost, 0), timezone('utc', now())
+        FROM sales_totals s
+        LEFT JOIN payment_totals p
+               ON p.company_id = s.company_id AND p.day = s.day AND p.status = s.status
+              AND p.branch_id IS NOT DISTINCT FROM s.branch_id
+        LEFT JOIN item_totals i
+               ON i.company_id = s.company_id AND i.day = s.day AND i.status = s.status
+              AND i.branch_id IS NOT DISTINCT FROM s.branch_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM sales_daily_rollups r WHERE r.company_id = s.company_id AND r.day = s.day
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO sales_product_daily_rollups
+            (id, company_id, branch_id, day, status, product_id, category_id, quantity, revenue, cost, refreshed_at)
+        SELECT gen_random_uuid(), sales.company_id, sales.branch_id, date(sales.created_at), sales.status::text,
+               sale_items.product_id, products.category_id,
+               coalesce(sum(sale_items.quantity), 0),
+               coalesce(sum(sale_items.total), 0),
+               coalesce(sum(sale_items.quantity * coalesce(products.cost, 0)), 0),
+               timezone('utc', now())
+        FROM sale_items
+        JOIN sales ON sales.id = sale_items.sale_id
+        JOIN products ON products.id = sale_items.product_id
+        WHERE sales.company_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM sales_product_daily_rollups r
+              WHERE r.company_id = sales.company_id AND r.day = date(sales.created_at)
+          )
+        GROUP BY sales.company_id, sales.branch_id, date(sales.created_at), sales.status,
+                 sale_items.product_id, products.category_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO return_daily_rollups
+            (id, company_id, branch_id, day, returns_count, total_refunds, refreshed_at)
+        SELECT gen_random_uuid(), return_orders.company_id, sales.branch_id, date(return_orders.approved_at),
+               count(return_orders.id), coalesce(sum(return_orders.total_refund), 0), timezone('utc', now())
+        FROM return_orders
+        JOIN sales ON sales.id = return_orders.sale_id
+        WHERE return_orders.company_id IS NOT NULL
+          AND return_orders.status = 'APPROVED'
+          AND return_orders.approved_at IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM return_daily_rollups r
+              WHERE r.company_id = return_orders.company_id AND r.day = date(return_orders.approved_at)
+          )
+        GROUP BY return_orders.company_id, sales.branch_id, date(return_orders.approved_at)
+        """
+    )
+
+
+def downgrade() -> None:
+    # Seeded rows are indistinguishable from the worker's; they stay.
+    pass
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from app.api.v1.endpoints import (
-    login, products, categories, inventory, pos, companies, reports, clients, users, roles, audit, suppliers, purchases, pricelists, sales, admin, branches, logistics, plans, brands, units_of_measure, upload, dashboard, admin_users, system, notifications, notification_admin, apps, search, stock_take, returns, storefront, invoices, procurement, opportunities, manufacturing, accounting, inventory_locations, storefront_coupons, warehouses, integrations
+    login, products, categories, inventory, pos, companies, reports, clients, users, roles, audit, suppliers, purchases, pricelists, sales, admin, branches, logistics, plans, brands, units_of_measure, upload, dashboard, admin_users, system, notifications, notification_admin, apps, search, stock_take, returns, storefront, invoices, procurement, opportunities, manufacturing, accounting, inventory_locations, storefront_coupons, warehouses, integrations, exports, imports
 )
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
@@ -44,3 +44,5 @@ api_router.include_router(inventory_locations.router, prefix="/inventory/locatio
 api_router.include_router(warehouses.router, prefix="/warehouses", tags=["warehouses"])
 api_router.include_router(storefront_coupons.router, prefix="/storefront/coupons", tags=["storefront coupons"])
 api_router.include_router(integrations.router, prefix="/integrations", tags=["integrations"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
@@ -1,10 +1,6 @@
-import asyncio
-import json
 import uuid
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from typing import Any, List
-from urllib import error as urlerror
-from urllib import request as urlrequest
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
@@ -19,7 +15,6 @@ from app.core.app_security import (
     generate_api_key,
     generate_webhook_secret,
     hash_api_key,
-    sign_webhook_payload,
 )
 from app.core.database import get_db
 from app.core.permissions import PermissionChecker
@@ -30,6 +25,7 @@ from app.models.app_webhook_delivery import AppWebhookDelivery
 from app.models.company_app_install import CompanyAppInstall
 from app.models.user import User
 from app.schemas import app_marketplace as schemas
+from app.services.app_webhooks import enqueue_app_webhook
 
 router = APIRouter()
 
@@ -114,74 +110,6 @@ async def _log_install_event(
     )
 
 
-def _post_webhook_sync(endpoint: str, body: bytes, headers: dict[str, str]) -> tuple[bool, int | None, str | None]:
-    req = urlrequest.Request(endpoint, data=body, headers=headers, method="POST")
-    try:
-        with urlrequest.urlopen(req, timeout=8) as response:
-            status_code = response.getcode()
-            return 200 <= status_code < 300, status_code, None
-    except urlerror.HTTPError as exc:
-        return False, exc.code, f"http_error:{exc.code}"
-    except Exception as exc:  # pragma: no cover - defensive fallback
-        return False, None, str(exc)
-
-
-async def _dispatch_signed_webhook(
-    db: AsyncSession,
-    install: CompanyAppInstall,
-    app: AppDefinition,
-    company_id: Any,
-    event_name: str,
-    payload: dict[str, Any],
-    attempt_number: int = 1,
-) -> dict[str, Any]:
-    endpoint = install.webhook_url or (install.settings or {}).get("webhook_url")
-    if not endpoint:
-        return {"delivered": False, "reason": "webhook_url_missing"}
-    if not install.webhook_secret:
-        return {"delivered": False, "reason": "webhook_secret_missing", "endpoint": endpoint}
-
-    envelope = {
-        "event": event_name,
-        "app_slug": app.slug,
-        "company_id": str(company_id),
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "payload": payload,
-    }
-    body = json.dumps(envelope, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
-    signature = sign_webhook_payload(install.webhook_secret, body)
-    headers = {
-        "Content-Type": "application/json",
-        "X-Lumefy-Event": event_name,
-        "X-Lumefy-Signature": signature,
-    }
-
-    delivered, status_code, reason = await asyncio.to_thread(_post_webhook_sync, endpoint, body, headers)
-    delivery = AppWebhookDelivery(
-        company_id=company_id,
-        app_id=app.id,
-        install_id=install.id,
-        event_name=event_name,
-        endpoint=endpoint,
-        request_payload=envelope,
-        signature=signature,
-        success=delivered,
-        status_code=status_code,
-        error_message=reason,
-        attempt_number=attempt_number,
-    )
-    db.add(delivery)
-    await db.flush()
-    return {
-        "delivered": delivered,
-        "endpoint": endpoint,
-        "status_code": status_code,
-        "signature": signature,
-        "reason": reason,
-        "delivery_id": str(delivery.id),
-    }
-
-
 async def _load_install_by_slug(
     db: AsyncSession,
     company_id: Any,
@@ -690,14 +618,16 @@ async def retry_webhook_delivery(
         raise HTTPException(status_code=404, detail="Entrega webhook no encontrada")
 
     next_attempt = max(1, int(delivery.attempt_number or 1) + 1)
-    payload = (delivery.request_payload or {}).get("payload") or {}
-    result = await _dispatch_signed_webhook(
-        db=db,
-        install=install,
-        app=app,
-        company_id=current_user.company_id,
-        event_name=delivery.event_name,
-        payload=payload,
+    envelope = delivery.request_payload or {}
+    # A manual retry is a new logical delivery: it gets its own id so it never
+    # collides with an automatic retry still queued for the original one.
+    result = enqueue_app_webhook(
+        db,
+        install,
+        app,
+        current_user.company_id,
+        delivery.event_name,
+        envelope.get("payload") or {},
         attempt_number=next_attempt,
     )
     await _log_install_event(
@@ -723,13 +653,13 @@ async def send_test_webhook(
     install, app = await _load_install_by_slug(db, current_user.company_id, slug)
     _require_capability(app, "webhook_consumer", "webhooks")
 
-    result = await _dispatch_signed_webhook(
-        db=db,
-        install=install,
-        app=app,
-        company_id=current_user.company_id,
-        event_name="app.webhook_test",
-        payload={"triggered_by": str(current_user.id)},
+    result = enqueue_app_webhook(
+        db,
+        install,
+        app,
+        current_user.company_id,
+        "app.webhook_test",
+        {"triggered_by": str(current_user.id)},
     )
     await _log_install_event(
         db=db,
@@ -820,17 +750,17 @@ async def install_app(
         triggered_by_user_id=current_user.id,
         payload={"granted_scopes": granted_scopes, "installed_version": installed_version},
     )
-    await db.commit()
-    await db.refresh(install)
-
     if _has_capability(app, "webhook_consumer"):
-        webhook_result = await _dispatch_signed_webhook(
-            db=db,
-            install=install,
-            app=app,
-            company_id=current_user.company_id,
-            event_name="app.installed",
-            payload={"installed_version": install.installed_version},
+        # Flush assigns the id of a new install; the webhook is queued in the
+        # same transaction and delivered by the webhook worker.
+        await db.flush()
+        webhook_result = enqueue_app_webhook(
+            db,
+            install,
+            app,
+            current_user.company_id,
+            "app.installed",
+            {"installed_version": install.installed_version},
         )
         await _log_install_event(
             db=db,
@@ -840,7 +770,8 @@ async def install_app(
             triggered_by_user_id=current_user.id,
             payload=webhook_result,
         )
-        await db.commit()
+    await db.commit()
+    await db.refresh(install)
     return _serialize_install(install, app, new_api_key=generated_api_key)
 
 
@@ -863,17 +794,14 @@ async def uninstall_app(
         triggered_by_user_id=current_user.id,
         payload={"installed_version": install.installed_version},
     )
-    await db.commit()
-    await db.refresh(install)
-
     if _has_capability(app, "webhook_consumer"):
-        webhook_result = await _dispatch_signed_webhook(
-            db=db,
-            install=install,
-            app=app,
-            company_id=current_user.company_id,
-            event_name="app.uninstalled",
-            payload={"installed_version": install.installed_version},
+        webhook_result = enqueue_app_webhook(
+            db,
+            install,
+            app,
+            current_user.company_id,
+            "app.uninstalled",
+            {"installed_version": install.installed_version},
         )
         await _log_install_event(
             db=db,
@@ -883,7 +811,8 @@ async def uninstall_app(
             triggered_by_user_id=current_user.id,
             payload=webhook_result,
         )
-        await db.commit()
+    await db.commit()
+    await db.refresh(install)
     return _serialize_install(install, app)
 
 
@@ -910,17 +839,14 @@ async def update_app_config(
         triggered_by_user_id=current_user.id,
         payload={"settings_keys": list((payload.settings or {}).keys())},
     )
-    await db.commit()
-    await db.refresh(install)
-
     if _has_capability(app, "webhook_consumer"):
-        webhook_result = await _dispatch_signed_webhook(
-            db=db,
-            install=install,
-            app=app,
-            company_id=current_user.company_id,
-            event_name="app.config_updated",
-            payload={"settings_keys": list((payload.settings or {}).keys())},
+        webhook_result = enqueue_app_webhook(
+            db,
+            install,
+            app,
+            current_user.company_id,
+            "app.config_updated",
+            {"settings_keys": list((payload.settings or {}).keys())},
         )
         await _log_install_event(
             db=db,
@@ -930,5 +856,6 @@ async def update_app_config(
             triggered_by_user_id=current_user.id,
             payload=webhook_result,
         )
-        await db.commit()
+    await db.commit()
+    await db.refresh(install)
     return _serialize_install(install, app)
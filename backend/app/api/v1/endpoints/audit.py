@@ -1,11 +1,10 @@
 from typing import Any, List, Optional
 from uuid import UUID
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select, desc
-from sqlalchemy.orm import joinedload
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core import auth
+from app.core import auth, pagination
 from app.core.database import get_db
 from app.models.audit import AuditLog
 from app.models.user import User
@@ -16,9 +15,12 @@ router = APIRouter()
 
 @router.get("/", response_model=List[schemas.AuditLog])
 async def read_audit_logs(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    estimate_total: bool = False,
     user_id: Optional[UUID] = None,
     action: Optional[str] = None,
     entity_type: Optional[str] = None,
@@ -27,16 +29,18 @@ async def read_audit_logs(
     current_user: User = Depends(PermissionChecker("view_reports"))
 ) -> Any:
     """
-    Retrieve audit logs with optional filters.
+    Retrieve audit logs with optional filters, newest first.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next one.
     """
-    if current_user.is_superuser:
-        query = select(AuditLog)
-    else:
-        query = select(AuditLog).where(AuditLog.company_id == current_user.company_id)
-    
-    # Eager load user
-    query = query.options(joinedload(AuditLog.user))
-    
+    query = select(
+        *pagination.projection(AuditLog, schemas.AuditLog),
+        User.email.label("user_email"),
+        User.full_name.label("user_full_name"),
+    ).outerjoin(User, AuditLog.user_id == User.id)
+    if not current_user.is_superuser:
+        query = query.where(AuditLog.company_id == current_user.company_id)
+
     if user_id:
         query = query.where(AuditLog.user_id == user_id)
     if action:
@@ -58,11 +62,19 @@ async def read_audit_logs(
             query = query.where(AuditLog.created_at <= parsed)
         except ValueError:
             pass
-        
-    query = query.order_by(desc(AuditLog.created_at)).offset(skip).limit(limit)
-    
-    result = await db.execute(query)
-    logs = result.scalars().all()
-    
-    return logs
+
+    result = await db.execute(pagination.keyset(query, AuditLog.created_at, AuditLog.id, cursor, limit, skip))
+    rows, next_cursor = pagination.page(result.all(), limit)
+    total = await pagination.estimate_count(db, query) if estimate_total else None
+    pagination.set_page_headers(response, next_cursor, total)
+    return [
+        {
+            **row._mapping,
+            "user": (
+                {"id": row.user_id, "email": row.user_email, "full_name": row.user_full_name}
+                if row.user_email else None
+            ),
+        }
+        for row in rows
+    ]
 
@@ -10,6 +10,8 @@ from app.models.user import User
 from app.schemas import branch as schemas
 from app.core.permissions import PermissionChecker
 from app.core.plan_limits import PlanLimitChecker
+from app.core.cache import reference_cache, tenant_tag
+from app.services.reference_cache import BRANCHES
 
 router = APIRouter()
 
@@ -29,9 +31,16 @@ async def read_branches(
          # Actually, better to stick to current_user.company_id for now.
          pass
     
-    query = select(Branch).where(Branch.company_id == current_user.company_id).offset(skip).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    async def load() -> list[dict]:
+        query = select(Branch).where(Branch.company_id == current_user.company_id).offset(skip).limit(limit)
+        result = await db.execute(query)
+        return [schemas.Branch.model_validate(branch).model_dump(mode="json") for branch in result.scalars().all()]
+
+    return await reference_cache.get_or_load(
+        f"company:{current_user.company_id}:branches:{skip}:{limit}",
+        [tenant_tag(current_user.company_id, BRANCHES)],
+        load,
+    )
 
 @router.post("/", response_model=schemas.Branch)
 async def create_branch(
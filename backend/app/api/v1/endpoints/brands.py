@@ -9,6 +9,8 @@ from app.models.product import Product
 from app.models.user import User
 from app.core.permissions import PermissionChecker
 from app.core.audit import log_activity
+from app.core.cache import reference_cache, tenant_tag
+from app.services.reference_cache import BRANDS
 from app.schemas import brand as schemas
 
 router = APIRouter()
@@ -18,12 +20,17 @@ async def list_brands(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(PermissionChecker("view_products")),
 ) -> Any:
-    query = select(Brand).where(
-        Brand.company_id == current_user.company_id,
-        Brand.is_active == True
+    async def load() -> list[dict]:
+        query = select(Brand).where(
+            Brand.company_id == current_user.company_id,
+            Brand.is_active == True
+        )
+        result = await db.execute(query)
+        return [schemas.Brand.model_validate(brand).model_dump(mode="json") for brand in result.scalars().all()]
+
+    return await reference_cache.get_or_load(
+        f"company:{current_user.company_id}:brands", [tenant_tag(current_user.company_id, BRANDS)], load
     )
-    result = await db.execute(query)
-    return result.scalars().all()
 
 @router.post("/", response_model=schemas.Brand)
 async def create_brand(
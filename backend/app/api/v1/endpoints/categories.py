@@ -9,6 +9,8 @@ from app.core.database import get_db
 from app.models.category import Category
 from app.models.user import User
 from app.core.permissions import PermissionChecker
+from app.core.cache import reference_cache, tenant_tag
+from app.services.reference_cache import CATEGORIES
 
 router = APIRouter()
 
@@ -22,13 +24,19 @@ async def read_categories(
     """
     Retrieve categories.
     """
-    query = select(Category).where(
-        Category.company_id == current_user.company_id,
-        Category.is_active == True
-    ).offset(skip).limit(limit)
-    result = await db.execute(query)
-    categories = result.scalars().all()
-    return categories
+    async def load() -> list[dict]:
+        query = select(Category).where(
+            Category.company_id == current_user.company_id,
+            Category.is_active == True
+        ).offset(skip).limit(limit)
+        result = await db.execute(query)
+        return [schemas.Category.model_validate(category).model_dump(mode="json") for category in result.scalars().all()]
+
+    return await reference_cache.get_or_load(
+        f"company:{current_user.company_id}:categories:{skip}:{limit}",
+        [tenant_tag(current_user.company_id, CATEGORIES)],
+        load,
+    )
 
 @router.post("/", response_model=schemas.Category)
 async def create_category(
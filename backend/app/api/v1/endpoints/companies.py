@@ -4,12 +4,15 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.core.cache import mark_stale, storefront_tag
 from app.core.database import get_db
 from app.core import auth
 from app.core.permissions import PermissionChecker
 from app.models.user import User
 from app.models.company import Company
+from app.models.storefront import Storefront
 from app.schemas import company as schemas
+from app.services.reference_cache import storefront_content_tags
 
 router = APIRouter()
 
@@ -58,6 +61,13 @@ async def update_current_company(
     update_data = company_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(company, field, value)
+
+    # Public storefronts fall back to the company's logo and contact details.
+    storefront_ids = (await db.execute(
+        select(Storefront.id).where(Storefront.company_id == company.id)
+    )).scalars().all()
+    for storefront_id in storefront_ids:
+        mark_stale(db, storefront_tag(storefront_id), *storefront_content_tags(storefront_id))
         
     db.add(company)
     await db.commit()
@@ -1,21 +1,31 @@
+import logging
 from pathlib import Path
 from typing import Any
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func, or_, select, text
 from sqlalchemy.orm import load_only, selectinload
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from alembic.config import Config
 from alembic.script import ScriptDirectory
+from redis.exceptions import RedisError
 
 from app.core.database import get_db
+from app.core.redis_client import get_redis
+from app.core.metrics_batch import MetricsBatch, run_concurrently
 from app.models.user import User
 from app.models.product import Product
 from app.models.company import Company
 from app.models.sale import Sale, SaleStatus, SaleItem
+from app.models.sales_rollup import SalesDailyRollup
+from app.services import live_counters
+from app.services.sales_rollups import UNBOOKED_STATUSES
 from app.core.permissions import PermissionChecker
 from app.schemas import dashboard as schemas
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.get("/", response_model=schemas.DashboardStats)
@@ -58,37 +68,141 @@ async def get_dashboard_stats(
             query = query.where(Sale.branch_id == branch_id)
         return query
 
-    # 1. Card Metrics
-    # Total Users (not filtered by date/branch as it's a count)
-    q_users = select(func.count(User.id)).where(
-        User.company_id == current_user.company_id,
-        or_(User.role_id.is_not(None), User.is_superuser == True),
-    )
-    res_users = await db.execute(q_users)
-    total_users_count = res_users.scalar() or 0
-    
-    # Total Products (not filtered by date/branch)
-    q_products = select(func.count(Product.id)).where(Product.company_id == current_user.company_id)
-    res_products = await db.execute(q_products)
-    total_products_count = res_products.scalar() or 0
-    
-    # Total Orders (Sales) - filtered
-    q_sales_count = select(func.count(Sale.id)).where(Sale.company_id == current_user.company_id)
-    q_sales_count = apply_sale_filters(q_sales_count)
-    res_sales_count = await db.execute(q_sales_count)
-    total_orders_count = res_sales_count.scalar() or 0
-    
-    # Total Revenue - filtered
-    q_revenue = select(func.sum(Sale.total)).where(
-        Sale.company_id == current_user.company_id,
-        Sale.status.notin_([SaleStatus.DRAFT, SaleStatus.QUOTE, SaleStatus.CANCELLED])
-    )
-    q_revenue = apply_sale_filters(q_revenue)
-    res_revenue = await db.execute(q_revenue)
-    total_revenue = res_revenue.scalar() or 0.0
-    
-    company = await db.get(Company, current_user.company_id)
-    currency_symbol = company.currency_symbol if company and company.currency_symbol else "$"
+    # Totals and charts read the daily rollups, whole days at a time.
+    def apply_rollup_filters(query):
+        query = query.where(SalesDailyRollup.company_id == current_user.company_id)
+        if parsed_date_from:
+            query = query.where(SalesDailyRollup.day >= parsed_date_from.date())
+        if parsed_date_to:
+            query = query.where(SalesDailyRollup.day <= parsed_date_to.date())
+        if branch_id:
+            query = query.where(SalesDailyRollup.branch_id == branch_id)
+        return query
+
+    # UTC, the day the live counters and the rollups bucket sales by.
+    today = live_counters.utc_today()
+
+    if parsed_date_from and parsed_date_to:
+        chart_start = parsed_date_from.date() if hasattr(parsed_date_from, 'date') else parsed_date_from
+        chart_end = parsed_date_to.date() if hasattr(parsed_date_to, 'date') else parsed_date_to
+    else:
+        chart_start = today - timedelta(days=6)
+        chart_end = today
+
+    # 0. Live counters: O(1) reads from Redis for whatever the filters allow.
+    # The monthly chart ignores the date filters; everything else needs none.
+    unfiltered = not (parsed_date_from or parsed_date_to or branch_id)
+    counters = None
+    try:
+        counters = await live_counters.read_counters(
+            get_redis(),
+            current_user.company_id,
+            days=[chart_start + timedelta(days=i) for i in range((chart_end - chart_start).days + 1)] if unfiltered else (),
+            year=None if branch_id else today.year,
+        )
+    except RedisError:
+        logger.warning("Live dashboard counters unavailable; aggregating in SQL", exc_info=True)
+
+    # 1. Card Metrics: one-row aggregates, fetched in a single statement
+    batch = MetricsBatch()
+    if counters is None:
+        # Total Users (not filtered by date/branch as it's a count)
+        batch.add("users", select(func.count(User.id).label("count")).where(
+            User.company_id == current_user.company_id,
+            or_(User.role_id.is_not(None), User.is_superuser == True),
+        ))
+        # Total Products (not filtered by date/branch)
+        batch.add("products", select(func.count(Product.id).label("count")).where(
+            Product.company_id == current_user.company_id
+        ))
+    if counters is None or not unfiltered:
+        # Total Orders (Sales) - filtered
+        batch.add("orders", apply_rollup_filters(select(func.sum(SalesDailyRollup.sales_count).label("count"))))
+        # Total Revenue - filtered
+        batch.add("revenue", apply_rollup_filters(
+            select(func.sum(SalesDailyRollup.gross_sales).label("total"))
+            .where(SalesDailyRollup.status.notin_(UNBOOKED_STATUSES))
+        ))
+    batch.add("company", select(func.max(Company.currency_symbol).label("currency_symbol")).where(
+        Company.id == current_user.company_id
+    ))
+
+    # 2. Recent Orders (Sales) - filtered
+    q_recent_orders = select(Sale).options(
+        selectinload(Sale.items)
+        .selectinload(SaleItem.product)
+        .options(load_only(Product.id, Product.name))
+    ).where(
+        Sale.company_id == current_user.company_id
+    ).order_by(Sale.created_at.desc()).limit(5)
+    q_recent_orders = apply_sale_filters(q_recent_orders)
+
+    # 4a. Income Overview (Weekly Sales - Last 7 days or filtered range)
+    q_weekly = select(
+        SalesDailyRollup.day,
+        func.coalesce(func.sum(SalesDailyRollup.gross_sales), 0).label("day_total"),
+    ).where(
+        SalesDailyRollup.company_id == current_user.company_id,
+        SalesDailyRollup.day >= chart_start,
+        SalesDailyRollup.day <= chart_end,
+        SalesDailyRollup.status.notin_(UNBOOKED_STATUSES)
+    ).group_by(SalesDailyRollup.day)
+    if branch_id:
+        q_weekly = q_weekly.where(SalesDailyRollup.branch_id == branch_id)
+
+    # 4b. Monthly Sales (Current Year) - filtered
+    current_year = today.year
+    start_year = date(current_year, 1, 1)
+
+    sale_month = func.extract("month", SalesDailyRollup.day).label("sale_month")
+    q_monthly = select(
+        sale_month,
+        func.coalesce(func.sum(SalesDailyRollup.gross_sales), 0).label("month_total"),
+    ).where(
+        SalesDailyRollup.company_id == current_user.company_id,
+        SalesDailyRollup.day >= start_year,
+        SalesDailyRollup.status.notin_(UNBOOKED_STATUSES)
+    ).group_by(sale_month)
+    if branch_id:
+        q_monthly = q_monthly.where(SalesDailyRollup.branch_id == branch_id)
+
+    # The four reads are independent: run them at once on separate connections.
+    def all_rows(query):
+        async def run(session: AsyncSession):
+            return (await session.execute(query)).all()
+        return run
+
+    async def recent_orders(session: AsyncSession):
+        return (await session.execute(q_recent_orders)).scalars().all()
+
+    reads = {"metrics": batch.execute, "recent": recent_orders}
+    if counters is None or not unfiltered:
+        reads["weekly"] = all_rows(q_weekly)
+    if counters is None or branch_id:
+        reads["monthly"] = all_rows(q_monthly)
+    results = await run_concurrently(reads, db=db)
+    metrics = results["metrics"]
+    if counters is None:
+        total_users_count = metrics["users"].count or 0
+        total_products_count = metrics["products"].count or 0
+    else:
+        total_users_count = counters["users"]
+        total_products_count = counters["products"]
+    if "orders" in metrics:
+        total_orders_count = metrics["orders"].count or 0
+        total_revenue = metrics["revenue"].total or 0.0
+    else:
+        total_orders_count = counters["orders"]
+        total_revenue = counters["revenue"]
+    currency_symbol = metrics["company"].currency_symbol or "$"
+    recent_sales = results["recent"]
+    weekly_sales_rows = results.get("weekly", [])
+    monthly_sales_rows = results.get("monthly", [])
+    if "weekly" not in results:
+        weekly_sales_rows = list(counters["revenue_by_day"].items())
+    if "monthly" not in results:
+        monthly_sales_rows = list(counters["revenue_by_month"].items())
+
     sale_status_labels = {
         SaleStatus.QUOTE: "Cotización",
         SaleStatus.DRAFT: "Borrador",
@@ -145,19 +259,7 @@ async def get_dashboard_stats(
         },
     ]
 
-    # 2. Recent Orders (Sales) - filtered
-    q_recent_orders = select(Sale).options(
-        selectinload(Sale.items)
-        .selectinload(SaleItem.product)
-        .options(load_only(Product.id, Product.name))
-    ).where(
-        Sale.company_id == current_user.company_id
-    ).order_by(Sale.created_at.desc()).limit(5)
-    q_recent_orders = apply_sale_filters(q_recent_orders)
-    
-    res_recent = await db.execute(q_recent_orders)
-    recent_sales = res_recent.scalars().all()
-    
+    # 2. Recent Orders
     recent_orders_data = []
     for sale in recent_sales:
         if sale.items and len(sale.items) > 0:
@@ -195,32 +297,8 @@ async def get_dashboard_stats(
         })
         
     # 4. Charts Data
-    
-    # 4a. Income Overview (Weekly Sales - Last 7 days or filtered range)
-    today = datetime.now().date()
 
-    if parsed_date_from and parsed_date_to:
-        chart_start = parsed_date_from.date() if hasattr(parsed_date_from, 'date') else parsed_date_from
-        chart_end = parsed_date_to.date() if hasattr(parsed_date_to, 'date') else parsed_date_to
-    else:
-        chart_start = today - timedelta(days=6)
-        chart_end = today
-
-    sale_day = func.date(Sale.created_at).label("sale_day")
-    q_weekly = select(
-        sale_day,
-        func.coalesce(func.sum(Sale.total), 0).label("day_total"),
-    ).where(
-        Sale.company_id == current_user.company_id,
-        Sale.created_at >= chart_start,
-        Sale.created_at <= chart_end + timedelta(days=1),
-        Sale.status.notin_([SaleStatus.DRAFT, SaleStatus.QUOTE, SaleStatus.CANCELLED])
-    ).group_by(sale_day)
-    if branch_id:
-        q_weekly = q_weekly.where(Sale.branch_id == branch_id)
-    res_weekly = await db.execute(q_weekly)
-    weekly_sales_rows = res_weekly.all()
-    
+    # 4a. Income Overview
     num_days = (chart_end - chart_start).days + 1
     weekly_map = { (chart_start + timedelta(days=i)): 0.0 for i in range(num_days) }
     
@@ -244,24 +322,7 @@ async def get_dashboard_stats(
         "series": [{"name": "Ingresos", "data": weekly_values}]
     }
 
-    # 4b. Monthly Sales (Current Year) - filtered
-    current_year = today.year
-    start_year = datetime(current_year, 1, 1)
-    
-    sale_month = func.extract("month", Sale.created_at).label("sale_month")
-    q_monthly = select(
-        sale_month,
-        func.coalesce(func.sum(Sale.total), 0).label("month_total"),
-    ).where(
-        Sale.company_id == current_user.company_id,
-        Sale.created_at >= start_year,
-        Sale.status.notin_([SaleStatus.DRAFT, SaleStatus.QUOTE, SaleStatus.CANCELLED])
-    ).group_by(sale_month)
-    if branch_id:
-        q_monthly = q_monthly.where(Sale.branch_id == branch_id)
-    res_monthly = await db.execute(q_monthly)
-    monthly_sales_rows = res_monthly.all()
-    
+    # 4b. Monthly Sales
     monthly_map = { i: 0.0 for i in range(1, 13) }
     for sale_month_value, month_total in monthly_sales_rows:
         monthly_map[int(sale_month_value)] += float(month_total or 0)
@@ -285,6 +346,23 @@ async def get_dashboard_stats(
     }
 
 
+@router.get("/stream")
+async def stream_dashboard_counters(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(PermissionChecker("view_dashboard")),
+) -> StreamingResponse:
+    """Live card counters as server-sent events: a ``snapshot``, then a ``counters`` event per change."""
+    company_id = current_user.company_id
+    # Authentication is done: hand the connection back before streaming for minutes.
+    await db.close()
+    return StreamingResponse(
+        live_counters.counter_events(get_redis(), company_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/health", response_model=schemas.DashboardHealth)
 async def get_dashboard_health(
     db: AsyncSession = Depends(get_db),
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import auth
+from app.core.database import get_db
+from app.core.permissions import PermissionChecker
+from app.models.export_job import ExportJob
+from app.models.user import User
+from app.schemas import export_job as schemas
+from app.services.export_definitions import EXPORTS
+from app.services.export_jobs import artifact_path, request_export
+from app.services.export_service import XLSX_MEDIA_TYPE
+
+
+router = APIRouter()
+
+
+def _definition(resource: str, user: User):
+    definition = EXPORTS.get(resource)
+    if not definition:
+        raise HTTPException(status_code=404, detail="Exportación no disponible")
+    # Raises 403 unless the user may read the exported resource.
+    PermissionChecker(definition.permission)(user)
+    return definition
+
+
+async def _get_job(db: AsyncSession, job_id: UUID, user: User) -> ExportJob:
+    job = await db.get(ExportJob, job_id)
+    if not job or not user.company_id or job.company_id != user.company_id:
+        raise HTTPException(status_code=404, detail="Exportación no encontrada")
+    _definition(job.resource, user)
+    return job
+
+
+@router.post("/", response_model=schemas.ExportJobOut, status_code=202)
+async def create_export(
+    payload: schemas.ExportJobCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth.get_current_user),
+) -> schemas.ExportJobOut:
+    """Queue an export, or return the identical one already queued or ready."""
+    _definition(payload.resource, current_user)
+    try:
+        job, reused = await request_export(db, current_user, payload.resource, payload.format, payload.filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Los filtros de la exportación no son válidos") from exc
+    return schemas.ExportJobOut.model_validate(job).model_copy(update={"reused": reused})
+
+
+@router.get("/", response_model=list[schemas.ExportJobOut])
+async def list_exports(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth.get_current_user),
+) -> list[ExportJob]:
+    """The current user's most recent exports."""
+    result = await db.execute(
+        select(ExportJob)
+        .where(
+            ExportJob.company_id == current_user.company_id,
+            ExportJob.requested_by_user_id == current_user.id,
+        )
+        .order_by(ExportJob.queued_at.desc())
+        .limit(20)
+    )
+    return list(result.scalars().all())
+
+
+@router.get("/{job_id}", response_model=schemas.ExportJobOut)
+async def read_export(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth.get_current_user),
+) -> ExportJob:
+    return await _get_job(db, job_id, current_user)
+
+
+@router.get("/{job_id}/download")
+async def download_export(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth.get_current_user),
+) -> FileResponse:
+    job = await _get_job(db, job_id, current_user)
+    if job.status != "COMPLETED" or not job.file_path:
+        raise HTTPException(status_code=409, detail="La exportación todavía no está lista")
+    path = artifact_path(job)
+    if not await asyncio.to_thread(path.is_file):
+        raise HTTPException(status_code=410, detail="El archivo de la exportación ya no está disponible")
+    return FileResponse(
+        path,
+        filename=job.file_name,
+        media_type=XLSX_MEDIA_TYPE if job.format == "excel" else "text/csv",
+    )
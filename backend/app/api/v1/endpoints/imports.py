@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import auth
+from app.core.database import get_db
+from app.core.permissions import PermissionChecker
+from app.models.import_job import ImportJob
+from app.models.user import User
+from app.schemas.import_job import ImportJobOut, ImportUploadCreate
+from app.services.import_jobs import (
+    IMPORTS,
+    UploadOffsetError,
+    append_upload,
+    complete_upload,
+    start_upload,
+)
+
+
+router = APIRouter()
+
+
+@router.get("/", response_model=list[ImportJobOut])
+async def list_imports(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth.get_current_user),
+) -> list[ImportJob]:
+    """The current user's most recent imports."""
+    result = await db.execute(
+        select(ImportJob)
+        .where(
+            ImportJob.company_id == current_user.company_id,
+            ImportJob.requested_by_user_id == current_user.id,
+        )
+        .order_by(ImportJob.queued_at.desc())
+        .limit(20)
+    )
+    return list(result.scalars().all())
+
+
+@router.get("/{job_id}", response_model=ImportJobOut)
+async def read_import(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth.get_current_user),
+) -> ImportJob:
+    job = await db.get(ImportJob, job_id)
+    if not job or not current_user.company_id or job.company_id != current_user.company_id:
+        raise HTTPException(status_code=404, detail="Importación no encontrada")
+    # Raises 403 unless the user may run this kind of import.
+    PermissionChecker(IMPORTS[job.resource].permission)(current_user)
+    return job
+
+
+async def _upload_job(db: AsyncSession, job_id: UUID, current_user: User) -> ImportJob:
+    # Locked so pieces of the same upload cannot be written concurrently.
+    job = (await db.execute(
+        select(ImportJob).where(ImportJob.id == job_id).with_for_update()
+    )).scalars().first()
+    if not job or not current_user.company_id or job.company_id != current_user.company_id:
+        raise HTTPException(status_code=404, detail="Importación no encontrada")
+    PermissionChecker(IMPORTS[job.resource].permission)(current_user)
+    if job.status != "UPLOADING":
+        raise HTTPException(status_code=409, detail="La carga de este archivo ya terminó")
+    return job
+
+
+@router.post("/uploads", response_model=ImportJobOut, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    payload: ImportUploadCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth.get_current_user),
+) -> ImportJob:
+    """Open a chunked upload; send the file with ``PUT /imports/{id}/content``."""
+    definition = IMPORTS.get(payload.resource)
+    if not definition:
+        raise HTTPException(status_code=400, detail="Tipo de importación no soportado")
+    PermissionChecker(definition.permission)(current_user)
+    if not current_user.company_id:
+        raise HTTPException(status_code=400, detail="El usuario no tiene company_id asociado")
+    try:
+        options = await definition.options(db, current_user, payload.options)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Opciones de importación inválidas")
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Tienda no encontrada")
+    try:
+        return await start_upload(
+            db, current_user, payload.resource, payload.file_name, payload.file_size, options
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Archivo no soportado o demasiado grande. Usa .csv, .xls o .xlsx.",
+        )
+
+
+@router.put("/{job_id}/content", response_model=ImportJobOut)
+async def upload_content(
+    job_id: UUID,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth.get_current_user),
+) -> ImportJob:
+    """Store the raw request body at ``Upload-Offset``.
+
+    Answers 409 with the stored byte count when the offset does not match it;
+    the client then continues from ``received_bytes`` of ``GET /imports/{id}``.
+    """
+    job = await _upload_job(db, job_id, current_user)
+    try:
+        return await append_upload(db, job, upload_offset, request.stream())
+    except UploadOffsetError as exc:
+        raise HTTPException(
+            status_code=409,
+            detail="La carga continúa en otra posición",
+            headers={"Upload-Offset": str(exc.received_bytes)},
+        )
+    except ValueError:
+        raise HTTPException(status_code=413, detail="El fragmento excede el tamaño permitido")
+
+
+@router.post("/{job_id}/complete", response_model=ImportJobOut, status_code=status.HTTP_202_ACCEPTED)
+async def finish_upload(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth.get_current_user),
+) -> ImportJob:
+    """Queue the import once every byte of the file arrived."""
+    job = await _upload_job(db, job_id, current_user)
+    try:
+        return await complete_upload(db, job)
+    except UploadOffsetError as exc:
+        raise HTTPException(
+            status_code=409,
+            detail="El archivo aún no se ha recibido completo",
+            headers={"Upload-Offset": str(exc.received_bytes)},
+        )
@@ -1,18 +1,23 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Literal, Optional
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select
+from sqlalchemy import Select, func, select
 from app.core.database import get_db
 from app.models.inventory import Inventory
 from app.models.inventory_lot import InventoryLot
 from app.models.inventory_location import InventoryLocation
 from app.models.inventory_movement import InventoryMovement, MovementType
+from app.models.inventory_snapshot import InventoryBranchSnapshot
 from app.models.branch import Branch
 from app.models.warehouse import Warehouse
+from app.models.product_variant import ProductVariant
 from app.models.user import User
-from app.core import auth
+from app.core import auth, pagination
 from app.core.permissions import PermissionChecker
 from app.schemas import inventory as schemas
+from app.services import stock_ledger
+from app.services.inventory_snapshots import branch_totals_as_of, stock_as_of, utc_today
 import datetime
 
 router = APIRouter()
@@ -120,43 +125,9 @@ async def export_inventory(
     current_user: User = Depends(PermissionChecker("view_inventory")),
 ) -> Any:
     """Export inventory to Excel or CSV."""
-    from app.services.export_service import ExportService
+    from app.services.export_definitions import export_response
 
-    query = select(Inventory).options(
-        selectinload(Inventory.product),
-        selectinload(Inventory.branch),
-    ).join(Branch, Inventory.branch_id == Branch.id).where(
-        Branch.company_id == current_user.company_id
-    )
-    if branch_id:
-        query = query.where(Inventory.branch_id == branch_id)
-
-    result = await db.execute(query)
-    items = result.scalars().all()
-
-    columns = {
-        "product_name": "Producto",
-        "product_sku": "SKU",
-        "branch_name": "Sucursal",
-        "quantity": "Cantidad",
-        "min_quantity": "Stock Mínimo",
-        "max_quantity": "Stock Máximo",
-    }
-
-    rows = []
-    for inv in items:
-        rows.append({
-            "product_name": inv.product.name if inv.product else "",
-            "product_sku": inv.product.sku if inv.product else "",
-            "branch_name": inv.branch.name if inv.branch else "",
-            "quantity": float(inv.quantity) if inv.quantity else 0,
-            "min_quantity": float(inv.min_quantity) if getattr(inv, "min_quantity", None) else 0,
-            "max_quantity": float(inv.max_quantity) if getattr(inv, "max_quantity", None) else 0,
-        })
-
-    if format == "csv":
-        return ExportService.to_csv_response(rows, columns, filename="inventario")
-    return ExportService.to_excel_response(rows, columns, filename="inventario")
+    return await export_response(db, "inventory", current_user.company_id, format, {"branch_id": branch_id})
 
 
 @router.get("/replenishment")
@@ -203,30 +174,26 @@ async def get_replenishment_suggestions(
     return suggestions
 
 
-@router.get("/valuation")
-async def get_inventory_valuation(
-    db: AsyncSession = Depends(get_db),
-    branch_id: str = None,
-    current_user: User = Depends(PermissionChecker("view_inventory")),
-) -> Any:
-    """Return inventory value by branch using the current weighted-average cost."""
+async def _branch_valuation(
+    db: AsyncSession, company_id, day: datetime.date, branch_id: str | None
+) -> list[dict]:
+    latest = branch_totals_as_of(company_id, day).subquery()
     query = (
         select(
             Branch.id,
             Branch.name,
-            func.coalesce(func.sum(Inventory.quantity * Inventory.average_cost), 0.0),
-            func.coalesce(func.sum(Inventory.quantity), 0.0),
+            func.coalesce(latest.c.value, 0.0),
+            func.coalesce(latest.c.quantity, 0.0),
         )
         .select_from(Branch)
-        .outerjoin(Inventory, Inventory.branch_id == Branch.id)
-        .where(Branch.company_id == current_user.company_id)
-        .group_by(Branch.id, Branch.name)
+        .outerjoin(latest, latest.c.branch_id == Branch.id)
+        .where(Branch.company_id == company_id)
         .order_by(Branch.name)
     )
     if branch_id:
         query = query.where(Branch.id == branch_id)
     result = await db.execute(query)
-    branches = [
+    return [
         {
             "branch_id": str(id),
             "branch_name": name,
@@ -235,10 +202,233 @@ async def get_inventory_valuation(
         }
         for id, name, value, quantity in result.all()
     ]
-    return {
+
+
+@router.get("/valuation")
+async def get_inventory_valuation(
+    db: AsyncSession = Depends(get_db),
+    branch_id: str = None,
+    as_of: Optional[datetime.date] = None,
+    compare_to: Optional[datetime.date] = None,
+    current_user: User = Depends(PermissionChecker("view_inventory")),
+) -> Any:
+    """Return inventory value by branch using the weighted-average cost.
+
+    Read from the daily snapshots: the totals at the end of ``as_of`` (today by
+    default), next to those at the end of ``compare_to`` when given.
+    """
+    day = as_of or utc_today()
+    branches = await _branch_valuation(db, current_user.company_id, day, branch_id)
+    valuation = {
+        "as_of": day.isoformat(),
         "branches": branches,
         "total_value": sum(branch["inventory_value"] for branch in branches),
     }
+    if compare_to:
+        previous = {
+            branch["branch_id"]: branch["inventory_value"]
+            for branch in await _branch_valuation(db, current_user.company_id, compare_to, branch_id)
+        }
+        for branch in branches:
+            branch["previous_value"] = previous.get(branch["branch_id"], 0.0)
+            branch["value_change"] = branch["inventory_value"] - branch["previous_value"]
+        valuation["compare_to"] = compare_to.isoformat()
+        valuation["previous_total_value"] = sum(previous.values())
+        valuation["value_change"] = valuation["total_value"] - valuation["previous_total_value"]
+    return valuation
+
+
+@router.get("/valuation/history")
+async def get_inventory_valuation_history(
+    db: AsyncSession = Depends(get_db),
+    start_date: datetime.date = Query(...),
+    end_date: Optional[datetime.date] = None,
+    branch_id: Optional[uuid.UUID] = None,
+    current_user: User = Depends(PermissionChecker("view_inventory")),
+) -> Any:
+    """Daily stock and value totals between two dates, from the daily snapshots."""
+    end_date = end_date or utc_today()
+    if end_date < start_date or (end_date - start_date).days > 366:
+        raise HTTPException(status_code=400, detail="El rango debe ser de máximo un año")
+    # Totals in effect when the range starts, then every row inside it.
+    opening = branch_totals_as_of(current_user.company_id, start_date - datetime.timedelta(days=1), branch_id)
+    in_range = select(InventoryBranchSnapshot).where(
+        InventoryBranchSnapshot.company_id == current_user.company_id,
+        InventoryBranchSnapshot.day >= start_date,
+        InventoryBranchSnapshot.day <= end_date,
+    ).order_by(InventoryBranchSnapshot.day)
+    if branch_id:
+        in_range = in_range.where(InventoryBranchSnapshot.branch_id == branch_id)
+    current = {row.branch_id: row for row in (await db.execute(opening)).scalars().all()}
+    rows = (await db.execute(in_range)).scalars().all()
+
+    history = []
+    index = 0
+    day = start_date
+    while day <= end_date:
+        while index < len(rows) and rows[index].day == day:
+            current[rows[index].branch_id] = rows[index]
+            index += 1
+        history.append({
+            "day": day.isoformat(),
+            "stock_quantity": sum(float(row.quantity) for row in current.values()),
+            "inventory_value": sum(float(row.value) for row in current.values()),
+        })
+        day += datetime.timedelta(days=1)
+    return history
+
+
+@router.get("/valuation/products")
+async def get_inventory_valuation_by_product(
+    db: AsyncSession = Depends(get_db),
+    as_of: Optional[datetime.date] = None,
+    branch_id: Optional[uuid.UUID] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: User = Depends(PermissionChecker("view_inventory")),
+) -> Any:
+    """Stock and value of each product per branch at the end of ``as_of`` (today by default)."""
+    day = as_of or utc_today()
+    snapshot = stock_as_of(current_user.company_id, day, branch_id).subquery()
+    result = await db.execute(
+        select(
+            snapshot.c.product_id,
+            Product.name,
+            Product.sku,
+            snapshot.c.branch_id,
+            Branch.name,
+            snapshot.c.quantity,
+            snapshot.c.value,
+            snapshot.c.day,
+        )
+        .join(Product, Product.id == snapshot.c.product_id)
+        .join(Branch, Branch.id == snapshot.c.branch_id)
+        .where(snapshot.c.quantity != 0)
+        .order_by(snapshot.c.value.desc(), Product.name)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [
+        {
+            "product_id": str(product_id),
+            "product_name": product_name,
+            "sku": sku,
+            "branch_id": str(row_branch_id),
+            "branch_name": branch_name,
+            "stock_quantity": float(quantity),
+            "inventory_value": float(value),
+            "last_change": last_change.isoformat(),
+        }
+        for product_id, product_name, sku, row_branch_id, branch_name, quantity, value, last_change in result.all()
+    ]
+
+
+def _ledger_rows(ledger) -> Select:
+    """Ledger rows of ``ledger`` (a subquery keyed like the ledger) with display names."""
+    return (
+        select(ledger, Product.name.label("product_name"), Product.sku, ProductVariant.name.label("variant_name"),
+               Branch.name.label("branch_name"), Warehouse.name.label("warehouse_name"))
+        .join(Product, Product.id == ledger.c.product_id)
+        .outerjoin(ProductVariant, ProductVariant.id == ledger.c.variant_id)
+        .join(Branch, Branch.id == ledger.c.branch_id)
+        .outerjoin(Warehouse, Warehouse.id == ledger.c.warehouse_id)
+    )
+
+
+def _ledger_key(row) -> dict:
+    return {
+        "product_id": str(row.product_id),
+        "product_name": row.product_name,
+        "sku": row.sku,
+        "variant_id": str(row.variant_id) if row.variant_id else None,
+        "variant_name": row.variant_name,
+        "branch_id": str(row.branch_id),
+        "branch_name": row.branch_name,
+        "warehouse_id": str(row.warehouse_id) if row.warehouse_id else None,
+        "warehouse_name": row.warehouse_name,
+    }
+
+
+@router.get("/ledger/stock")
+async def get_ledger_stock(
+    db: AsyncSession = Depends(get_db),
+    at: datetime.datetime = Query(...),
+    product_id: Optional[uuid.UUID] = None,
+    branch_id: Optional[uuid.UUID] = None,
+    warehouse_id: Optional[uuid.UUID] = None,
+    include_zero: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: User = Depends(PermissionChecker("view_inventory")),
+) -> Any:
+    """Stock of each product, variant and warehouse at an exact moment, from the movement ledger."""
+    ledger = stock_ledger.stock_at(
+        current_user.company_id, at, product_id=product_id, branch_id=branch_id, warehouse_id=warehouse_id
+    ).subquery()
+    query = _ledger_rows(ledger).order_by(Product.name, ProductVariant.name, Branch.name, Warehouse.name)
+    if not include_zero:
+        query = query.where(ledger.c.quantity != 0)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return {
+        "at": stock_ledger.as_utc(at).isoformat(),
+        "items": [
+            {
+                **_ledger_key(row),
+                "stock_quantity": float(row.quantity),
+                "last_movement_at": row.last_movement_at.isoformat(),
+            }
+            for row in result.all()
+        ],
+    }
+
+
+@router.get("/ledger/balances")
+async def get_ledger_balances(
+    db: AsyncSession = Depends(get_db),
+    start_date: datetime.date = Query(...),
+    end_date: datetime.date = Query(...),
+    period: Literal["day", "week", "month"] = "month",
+    product_id: Optional[uuid.UUID] = None,
+    branch_id: Optional[uuid.UUID] = None,
+    warehouse_id: Optional[uuid.UUID] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=2000),
+    current_user: User = Depends(PermissionChecker("view_inventory")),
+) -> Any:
+    """Opening and closing stock with inflows and outflows per product, warehouse and period.
+
+    Periods (UTC days, weeks or months) in which a product did not move are
+    omitted: its stock stayed at the previous closing.
+    """
+    if end_date < start_date or (end_date - start_date).days > 366:
+        raise HTTPException(status_code=400, detail="El rango debe ser de máximo un año")
+    balances = stock_ledger.period_balances(
+        current_user.company_id,
+        datetime.datetime.combine(start_date, datetime.time.min),
+        datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min),
+        period,
+        product_id=product_id,
+        branch_id=branch_id,
+        warehouse_id=warehouse_id,
+    ).subquery()
+    result = await db.execute(
+        _ledger_rows(balances)
+        .order_by(Product.name, ProductVariant.name, Branch.name, Warehouse.name, balances.c.period_start)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [
+        {
+            **_ledger_key(row),
+            "period_start": row.period_start.date().isoformat(),
+            "opening_stock": float(row.opening),
+            "closing_stock": float(row.closing),
+            "inflow": float(row.inflow),
+            "outflow": float(row.outflow),
+            "movements": row.movements,
+        }
+        for row in result.all()
+    ]
 
 
 @router.get("/lots")
@@ -550,38 +740,44 @@ async def create_movement(
     
     return movement
 
-@router.get("/movements", response_model=List[schemas.Movement])
+@router.get("/movements", response_model=List[schemas.MovementListItem])
 async def read_movements(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    product_id: str = None,
-    branch_id: str = None,
-    limit: int = 50,
+    product_id: Optional[uuid.UUID] = None,
+    branch_id: Optional[uuid.UUID] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=pagination.MAX_PAGE_SIZE),
+    estimate_total: bool = False,
     current_user: User = Depends(PermissionChecker("view_inventory")),
 ) -> Any:
     """
-    Get movement history.
+    Get movement history, newest first.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next one.
     """
-    query = select(InventoryMovement).options(
-        selectinload(InventoryMovement.product).options(
-            selectinload(Product.images),
-            selectinload(Product.variants),
-            selectinload(Product.brand),
-            selectinload(Product.unit_of_measure),
-            selectinload(Product.purchase_uom),
-            selectinload(Product.category)
-        ),
-        selectinload(InventoryMovement.variant),
-        selectinload(InventoryMovement.branch),
-        selectinload(InventoryMovement.user)
+    query = select(
+        *pagination.projection(InventoryMovement, schemas.MovementListItem),
+        User.full_name.label("user_full_name"),
+    ).join(Branch, InventoryMovement.branch_id == Branch.id).outerjoin(
+        User, InventoryMovement.user_id == User.id
+    ).where(Branch.company_id == current_user.company_id)
 
-    ).join(Branch, InventoryMovement.branch_id == Branch.id).where(
-        Branch.company_id == current_user.company_id
-    ).order_by(InventoryMovement.created_at.desc()).limit(limit)
-    
     if product_id:
         query = query.where(InventoryMovement.product_id == product_id)
     if branch_id:
         query = query.where(InventoryMovement.branch_id == branch_id)
-        
-    result = await db.execute(query)
-    return result.scalars().all()
+
+    result = await db.execute(
+        pagination.keyset(query, InventoryMovement.created_at, InventoryMovement.id, cursor, limit)
+    )
+    rows, next_cursor = pagination.page(result.all(), limit)
+    total = await pagination.estimate_count(db, query) if estimate_total else None
+    pagination.set_page_headers(response, next_cursor, total)
+    return [
+        {
+            **row._mapping,
+            "user": {"id": row.user_id, "full_name": row.user_full_name} if row.user_id else None,
+        }
+        for row in rows
+    ]
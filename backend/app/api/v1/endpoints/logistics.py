@@ -1,7 +1,11 @@
+import asyncio
+import io
+import zipfile
 from typing import Any, List
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
@@ -10,6 +14,7 @@ from app.core.database import get_db
 from app.models.logistics import PackageType, SalePackage, SalePackageItem
 from app.models.fulfillment_task import FulfillmentTask
 from app.models.warehouse import Warehouse
+from app.models.company import Company
 from app.models.inventory import Inventory
 from app.models.inventory_movement import InventoryMovement, MovementType
 from app.models.sale import Sale, SaleItem, SaleStatus
@@ -17,6 +22,8 @@ from app.models.user import User
 from app.core.permissions import PermissionChecker
 from app.services.inventory_consumption import consume_fifo_lots
 from app.services.outbox import enqueue_outbox_event
+from app.services.document_renderer import company_snapshot, render_combined_pdf, render_many
+from app.services.sale_documents import TooManyDocuments, load_sale_snapshots
 from app.schemas import logistics as schemas
 import uuid
 
@@ -417,6 +424,69 @@ async def get_logistics_board(
     return board
 
 
+DOCUMENT_FILE_PREFIXES = {"invoice": "Factura", "picking": "Picking", "packing": "Packing"}
+
+
+def _zip_documents(files: list[tuple[str, bytes]]) -> bytes:
+    buffer = io.BytesIO()
+    # PDFs are already compressed; storing them keeps the archive cheap to build.
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+@router.post("/board/documents")
+async def download_board_documents(
+    *,
+    db: AsyncSession = Depends(get_db),
+    batch_in: schemas.SaleDocumentBatch,
+    current_user: User = Depends(PermissionChecker("view_sales")),
+) -> Any:
+    """
+    Picking, packing or invoice documents for many sales at once (a wave),
+    as one printable PDF or a zip with one PDF per sale.
+    """
+    try:
+        documents = await load_sale_snapshots(
+            db,
+            current_user.company_id,
+            batch_in.doc_type,
+            sale_ids=batch_in.sale_ids,
+            stage=batch_in.stage,
+            warehouse_id=batch_in.warehouse_id,
+        )
+    except TooManyDocuments as exc:
+        raise HTTPException(status_code=400, detail=f"Selecciona como máximo {exc.args[0]} ventas por lote")
+    if not documents:
+        raise HTTPException(status_code=404, detail="No hay ventas disponibles para este documento")
+    if batch_in.sale_ids is not None and len(documents) != len(set(batch_in.sale_ids)):
+        raise HTTPException(status_code=400, detail="Algunas ventas no existen o su estado no permite este documento")
+
+    result = await db.execute(select(Company).where(Company.id == current_user.company_id))
+    company = company_snapshot(result.scalars().first())
+    prefix = DOCUMENT_FILE_PREFIXES[batch_in.doc_type]
+    stamp = datetime.now().strftime("%Y%m%d_%H%M")
+
+    if batch_in.format == "zip":
+        pdfs = await render_many([(batch_in.doc_type, document) for document in documents], company)
+        archive = await asyncio.to_thread(_zip_documents, [
+            (f"{prefix}_{document['id'][:8]}.pdf", pdf) for document, pdf in zip(documents, pdfs)
+        ])
+        return Response(
+            archive,
+            media_type="application/zip",
+            headers={"Content-Disposition": f"attachment; filename={prefix}_lote_{stamp}.zip"}
+        )
+
+    pdf = await render_combined_pdf(batch_in.doc_type, documents, company)
+    return Response(
+        pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename={prefix}_lote_{stamp}.pdf"}
+    )
+
+
 @router.post("/board/move")
 async def move_sale_stage(
     *,
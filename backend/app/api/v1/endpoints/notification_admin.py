@@ -11,9 +11,17 @@ from app.models.notification import Notification
 from app.models.notification_template import NotificationTemplate
 from app.schemas import notification_template as schemas
 from app.schemas.notification import NotificationType
+from app.services.notification_templates import TemplateSyntaxError, compile_template, invalidate_templates
 
 router = APIRouter()
 
+
+def _validate_template(code: str, title: str, body: str) -> None:
+    try:
+        compile_template(code, title, body)
+    except TemplateSyntaxError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
 @router.get("/templates", response_model=List[schemas.NotificationTemplate])
 async def read_templates(
     db: AsyncSession = Depends(get_db),
@@ -41,8 +49,15 @@ async def create_template(
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not enough permissions")
         
-    # Check if code exists
-    result = await db.execute(select(NotificationTemplate).where(NotificationTemplate.code == template_in.code))
+    _validate_template(template_in.code, template_in.title_template, template_in.body_template)
+
+    # Check if code exists for the same scope (platform or company)
+    scope = (
+        NotificationTemplate.company_id.is_(None)
+        if template_in.company_id is None
+        else NotificationTemplate.company_id == template_in.company_id
+    )
+    result = await db.execute(select(NotificationTemplate).where(NotificationTemplate.code == template_in.code, scope))
     if result.scalars().first():
         raise HTTPException(status_code=400, detail="Template with this code already exists")
         
@@ -50,6 +65,7 @@ async def create_template(
     db.add(template)
     await db.commit()
     await db.refresh(template)
+    await invalidate_templates(template.company_id)
     return template
 
 @router.put("/templates/{id}", response_model=schemas.NotificationTemplate)
@@ -73,12 +89,22 @@ async def update_template(
         raise HTTPException(status_code=404, detail="Template not found")
         
     update_data = template_in.model_dump(exclude_unset=True)
+    _validate_template(
+        template.code,
+        update_data.get("title_template") or template.title_template,
+        update_data.get("body_template") or template.body_template,
+    )
+    previous_company_id = template.company_id
     for field, value in update_data.items():
         setattr(template, field, value)
         
     db.add(template)
     await db.commit()
     await db.refresh(template)
+    await invalidate_templates(template.company_id)
+    if previous_company_id != template.company_id:
+        # The company it moved away from must stop using it as well.
+        await invalidate_templates(previous_company_id)
     return template
 
 @router.post("/send", response_model=dict)
@@ -1,11 +1,11 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from uuid import UUID
 
 from app.core.database import get_db
-from app.core import auth
+from app.core import auth, pagination
 from app.models.user import User
 from app.models.notification import Notification
 from app.schemas import notification as schemas
@@ -30,22 +30,27 @@ async def read_unread_notifications(
 
 @router.get("/", response_model=List[schemas.Notification])
 async def read_notifications(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=pagination.MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth.get_current_user),
 ) -> Any:
     """
-    Get all notifications (paginated).
+    Get all notifications, newest first.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next one.
     """
+    query = select(*pagination.projection(Notification, schemas.Notification)).where(
+        Notification.user_id == current_user.id
+    )
     result = await db.execute(
-        select(Notification)
-        .where(Notification.user_id == current_user.id)
-        .order_by(Notification.created_at.desc())
-        .offset(skip)
-        .limit(limit)
+        pagination.keyset(query, Notification.created_at, Notification.id, cursor, limit, skip)
     )
-    return result.scalars().all()
+    rows, next_cursor = pagination.page(result.all(), limit)
+    pagination.set_page_headers(response, next_cursor)
+    return rows
 
 @router.put("/{id}/read", response_model=schemas.Notification)
 async def mark_notification_read(
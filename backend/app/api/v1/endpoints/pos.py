@@ -17,6 +17,9 @@ from app.models.category import Category
 from app.models.company_app_install import CompanyAppInstall
 from app.models.app_definition import AppDefinition
 from app.core import auth
+from app.services.image_derivatives import derivatives_for
+from app.services.product_codes import resolve_code
+from app.services.pricing import list_price, product_prices
 from app.schemas import pos as schemas
 import uuid
 from datetime import date, datetime, time, timezone
@@ -190,18 +193,18 @@ async def get_pos_config(
     )
 
 
-@router.get("/products", response_model=List[schemas.POSProduct])
-async def get_pos_products(
+async def _pos_products(
+    db: AsyncSession,
+    company_id: uuid.UUID,
     branch_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(check_pos_app)
-) -> Any:
-    """
-    Optimized endpoint to fetch all products and their stock for the POS interface.
-    """
+    product_ids: list[uuid.UUID] | None = None,
+) -> list[dict]:
+    """Active products with their variants, prices and available stock in ``branch_id``."""
     query = select(Product, Category).outerjoin(Category, Category.id == Product.category_id).where(
-        Product.company_id == current_user.company_id, Product.is_active == True
+        Product.company_id == company_id, Product.is_active == True
     ).options(selectinload(Product.variants))
+    if product_ids is not None:
+        query = query.where(Product.id.in_(product_ids))
     result = await db.execute(query)
     rows = result.all()
     product_ids = [product.id for product, _category in rows]
@@ -215,12 +218,14 @@ async def get_pos_products(
     for product_id, variant_id, quantity, reserved_quantity in inventory_result.all():
         key = (product_id, variant_id)
         stock_map[key] = stock_map.get(key, 0.0) + max(0.0, float(quantity or 0) - float(reserved_quantity or 0))
+    derivatives = await derivatives_for(db, (product.image_url for product, _category in rows))
+    prices = await product_prices(db, product_ids)
 
     products = []
     for product, category in rows:
         variant_payload = []
         for variant in product.variants or []:
-            variant_price = float(variant.price) if variant.price is not None else float(product.price or 0) + float(variant.price_extra or 0)
+            variant_price = prices.get((product.id, variant.id), list_price(product, variant))
             variant_payload.append({
                 "id": variant.id,
                 "name": variant.name,
@@ -235,17 +240,47 @@ async def get_pos_products(
             "name": product.name,
             "sku": product.sku,
             "barcode": product.barcode,
-            "price": min((item["price"] for item in variant_payload), default=float(product.price or 0)),
+            "price": min(
+                (item["price"] for item in variant_payload),
+                default=prices.get((product.id, None), list_price(product)),
+            ),
             "stock": product_stock,
             "category_id": product.category_id,
             "category_name": category.name if category else None,
             "image_url": product.image_url,
+            "image_derivatives": derivatives.get(product.image_url, []),
             "variants": variant_payload,
         })
-        
     return products
 
 
+@router.get("/products", response_model=List[schemas.POSProduct])
+async def get_pos_products(
+    branch_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(check_pos_app)
+) -> Any:
+    """
+    Optimized endpoint to fetch all products and their stock for the POS interface.
+    """
+    return await _pos_products(db, current_user.company_id, branch_id)
+
+
+@router.get("/products/lookup", response_model=schemas.POSProductLookup)
+async def lookup_pos_product(
+    branch_id: uuid.UUID,
+    code: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(check_pos_app)
+) -> Any:
+    """Resolve a scanned barcode or SKU of a product or variant."""
+    match = await resolve_code(db, current_user.company_id, code)
+    products = await _pos_products(db, current_user.company_id, branch_id, [match.product_id]) if match else []
+    if not products:
+        raise HTTPException(status_code=404, detail=f"No hay un producto activo con el código '{code.strip()}'.")
+    return {"product": products[0], "variant_id": match.variant_id}
+
+
 @router.get("/sessions/current", response_model=schemas.POSSessionOut | None)
 async def get_current_pos_session(
     branch_id: uuid.UUID,
@@ -716,6 +751,7 @@ async def pos_checkout(
         products = {product.id: product for product in product_result.scalars().all()}
         if len(products) != len({product_id for product_id, _variant_id in quantities_by_product}):
             raise HTTPException(status_code=404, detail="Uno o más productos no pertenecen a la empresa")
+        prices = await product_prices(db, products.keys())
         variant_prices: dict[tuple[uuid.UUID, uuid.UUID | None], float] = {}
         for (product_id, variant_id), quantity in quantities_by_product.items():
             product = products[product_id]
@@ -730,10 +766,7 @@ async def pos_checkout(
                     raise HTTPException(status_code=400, detail=f"La variante no pertenece a '{product.name}'")
             elif variant_id:
                 raise HTTPException(status_code=400, detail=f"El producto '{product.name}' no tiene esa variante")
-            variant_prices[(product_id, variant_id)] = (
-                float(variant.price) if variant and variant.price is not None
-                else float(product.price or 0) + float(variant.price_extra or 0) if variant else float(product.price or 0)
-            )
+            variant_prices[(product_id, variant_id)] = prices.get((product_id, variant_id), list_price(product, variant))
             if next(
                 item.discount for item in checkout_in.items
                 if item.product_id == product_id and item.variant_id == variant_id
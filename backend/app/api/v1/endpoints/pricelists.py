@@ -11,6 +11,8 @@ from app.models.pricelist import PriceList
 from app.models.pricelist_item import PriceListItem
 from app.schemas import pricelist as schemas
 from app.core.audit import log_activity
+from app.core.cache import mark_stale, reference_cache, tenant_tag
+from app.services.reference_cache import PRICELISTS
 
 router = APIRouter()
 
@@ -25,15 +27,22 @@ async def read_pricelists(
     """
     Retrieve price lists.
     """
-    query = select(PriceList).options(selectinload(PriceList.items)).where(
-        PriceList.company_id == current_user.company_id
+    async def load() -> list[dict]:
+        query = select(PriceList).options(selectinload(PriceList.items)).where(
+            PriceList.company_id == current_user.company_id
+        )
+        if type:
+            query = query.where(PriceList.type == type)
+
+        query = query.offset(skip).limit(limit)
+        result = await db.execute(query)
+        return [schemas.PriceList.model_validate(pricelist).model_dump(mode="json") for pricelist in result.scalars().all()]
+
+    return await reference_cache.get_or_load(
+        f"company:{current_user.company_id}:pricelists:{type or 'all'}:{skip}:{limit}",
+        [tenant_tag(current_user.company_id, PRICELISTS)],
+        load,
     )
-    if type:
-        query = query.where(PriceList.type == type)
-    
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
 
 @router.post("/", response_model=schemas.PriceList)
 async def create_pricelist(
@@ -148,6 +157,8 @@ async def add_pricelist_item(
         **item_in.dict()
     )
     db.add(item)
+    # Items carry no company, so the model hooks cannot tag them.
+    mark_stale(db, tenant_tag(current_user.company_id, PRICELISTS))
     await db.commit()
     await db.refresh(item)
     return item
@@ -3,33 +3,31 @@ from uuid import UUID
 from urllib.parse import urljoin, urlsplit
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy import func, or_, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload, load_only, selectinload
-import json
-import re
 
 from app.core.database import get_db
+from app.models.brand import Brand
+from app.models.category import Category
 from app.models.product import Product
 from app.models.product_variant import ProductVariant
-from app.models.storefront import PublishedProduct, StoreCollectionProduct, Storefront
-from app.models.invoice import InvoiceItem
-from app.models.inventory import Inventory
-from app.models.inventory_lot import InventoryLot
-from app.models.inventory_movement import InventoryMovement
-from app.models.manufacturing import BillOfMaterials, BillOfMaterialsLine
-from app.models.pricelist_item import PriceListItem
-from app.models.procurement import PurchaseRequestItem, SupplierQuoteItem
-from app.models.purchase_item import PurchaseOrderItem
-from app.models.return_order import ReturnOrderItem
-from app.models.sale import SaleItem
-from app.models.stock_take import StockTakeItem
+from app.models.product_deletion_job import ProductDeletionJob
+from app.models.storefront import PublishedProduct, Storefront
 from app.schemas import product as schemas
 from app.schemas import product_variant as variant_schemas
+from app.schemas.import_job import ImportJobOut
+from app.schemas.product_deletion_job import ProductDeletionJobOut
 from app.models.user import User
 from app.core.permissions import PermissionChecker
 from app.core.plan_limits import PlanLimitChecker
 from app.core.audit import log_activity
+from app.services.import_jobs import IMPORT_EXTENSIONS, request_import
+from app.services.product_codes import active_product_id_for_sku, active_sku_owners, sku_key
+from app.services.product_listing import cached_product_total
+from app.services.product_bulk_update import bulk_update_products
+from app.services.product_deletion import delete_blocker_detail, find_delete_blockers, request_deletion
+from app.services.storefront_publishing import SlugAllocator, product_slug, publish_products, taken_slugs
 from app.services.integration_service import (
     prune_orphaned_local_assets,
     remove_unreferenced_local_assets,
@@ -38,12 +36,6 @@ from app.services.integration_service import (
 router = APIRouter()
 
 
-def _slugify(value: str) -> str:
-    value = (value or "").strip().lower()
-    value = re.sub(r"[^a-z0-9]+", "-", value)
-    return value.strip("-") or "product"
-
-
 async def _get_primary_storefront(db: AsyncSession, company_id: str | None) -> Storefront | None:
     if not company_id:
         return None
@@ -73,15 +65,7 @@ async def _ensure_unique_sku(
     if not normalized:
         return None
 
-    query = select(Product.id).where(
-        Product.company_id == company_id,
-        Product.is_active.is_(True),
-        Product.sku.is_not(None),
-        func.lower(func.trim(Product.sku)) == normalized.lower(),
-    ).limit(1)
-    if exclude_product_id:
-        query = query.where(Product.id != exclude_product_id)
-    if await db.scalar(query):
+    if await active_product_id_for_sku(db, company_id, normalized, exclude_product_id=exclude_product_id):
         raise HTTPException(
             status_code=409,
             detail=f"Ya existe un producto activo con el SKU '{normalized}' en esta empresa.",
@@ -97,22 +81,14 @@ async def _available_storefront_slug(
     product_name: str,
 ) -> str:
     """Generate a stable, store-local URL without making it editable per channel."""
-    base_slug = _slugify(product_name)
-    candidate = base_slug
-    suffix = 2
-
-    while True:
-        result = await db.execute(
-            select(PublishedProduct.id).where(
-                PublishedProduct.storefront_id == storefront_id,
-                PublishedProduct.slug == candidate,
-                PublishedProduct.product_id != product_id,
-            )
+    taken = await taken_slugs(db, storefront_id, product_slug(product_name))
+    own = await db.scalar(
+        select(PublishedProduct.slug).where(
+            PublishedProduct.storefront_id == storefront_id,
+            PublishedProduct.product_id == product_id,
         )
-        if result.scalar_one_or_none() is None:
-            return candidate
-        candidate = f"{base_slug}-{suffix}"
-        suffix += 1
+    )
+    return SlugAllocator(taken - {own}).allocate(product_name)
 
 
 async def _sync_product_ecommerce(
@@ -178,104 +154,6 @@ def _attach_ecommerce_state(product: Product, published_product: PublishedProduc
     product.visible_in_ecommerce = bool(published_product and published_product.is_published)
 
 
-# A product is historical data once another business document points to it.  These
-# checks keep the bulk operation useful (safe products are still removed) while
-# protecting sales, inventory and accounting history from accidental deletion.
-_PRODUCT_DELETE_RELATIONS = (
-    ("Tiene una orden o venta asociada", SaleItem.product_id),
-    ("Tiene una factura asociada", InvoiceItem.product_id),
-    ("Tiene existencias registradas", Inventory.product_id),
-    ("Tiene lotes de inventario registrados", InventoryLot.product_id),
-    ("Tiene movimientos de inventario registrados", InventoryMovement.product_id),
-    ("Tiene una orden de compra asociada", PurchaseOrderItem.product_id),
-    ("Tiene una solicitud de compra asociada", PurchaseRequestItem.product_id),
-    ("Tiene una cotización de proveedor asociada", SupplierQuoteItem.product_id),
-    ("Tiene una devolución asociada", ReturnOrderItem.product_id),
-    ("Tiene una lista de precios asociada", PriceListItem.product_id),
-    ("Tiene un conteo de inventario asociado", StockTakeItem.product_id),
-    ("Está publicado en ecommerce", PublishedProduct.product_id),
-    ("Está usado como producto terminado en fabricación", BillOfMaterials.product_id),
-    ("Está usado como componente en fabricación", BillOfMaterialsLine.component_id),
-)
-
-
-async def _find_product_delete_blockers(db: AsyncSession, product_ids: list[Any]) -> dict[Any, list[str]]:
-    """Return the historical relations that make each product undeletable."""
-    blockers: dict[Any, list[str]] = {product_id: [] for product_id in product_ids}
-    if not product_ids:
-        return blockers
-    for reason, product_column in _PRODUCT_DELETE_RELATIONS:
-        result = await db.execute(
-            select(product_column).where(product_column.in_(product_ids)).distinct()
-        )
-        for product_id in result.scalars().all():
-            if product_id in blockers and reason not in blockers[product_id]:
-                blockers[product_id].append(reason)
-    return blockers
-
-
-async def _remove_ecommerce_publications(
-    db: AsyncSession,
-    *,
-    company_id: Any,
-    product_ids: list[Any],
-) -> None:
-    """Remove non-historical ecommerce rows before permanently deleting products."""
-    if not product_ids:
-        return
-
-    published_result = await db.execute(
-        select(PublishedProduct.id).where(
-            PublishedProduct.company_id == company_id,
-            PublishedProduct.product_id.in_(product_ids),
-        )
-    )
-    published_ids = published_result.scalars().all()
-    if not published_ids:
-        return
-
-    # Collection rows point to the publication, not directly to the product.
-    # Delete them first because this relationship is not database-cascading in
-    # every deployed schema.
-    await db.execute(
-        delete(StoreCollectionProduct).where(
-            StoreCollectionProduct.published_product_id.in_(published_ids)
-        )
-    )
-    await db.execute(
-        delete(PublishedProduct).where(PublishedProduct.id.in_(published_ids))
-    )
-
-
-async def _purge_inventory_records(
-    db: AsyncSession,
-    *,
-    company_id: Any,
-    product_ids: list[Any],
-) -> None:
-    """Delete inventory state and inventory audit rows for archived products."""
-    if not product_ids:
-        return
-
-    conditions = lambda model: (
-        model.company_id == company_id,
-        model.product_id.in_(product_ids),
-    )
-
-    # Stock-take lines, lots, movements and current balances all reference the
-    # product directly. They must be removed before deleting its variants and
-    # the product itself.
-    for model in (StockTakeItem, InventoryLot, InventoryMovement, Inventory):
-        await db.execute(delete(model).where(*conditions(model)))
-
-
-def _delete_blocker_detail(product: Product, reasons: list[str]) -> str:
-    return (
-        f"No se puede eliminar '{product.name}' porque {', '.join(reasons).lower()}. "
-        "Primero elimina o desvincula esas relaciones."
-    )
-
-
 def _product_filter_conditions(
     *,
     company_id: Any,
@@ -429,25 +307,20 @@ async def read_products_page(
         "product_type": product_type,
         "include_archived": include_archived,
     }
-    # Count only the filtered product rows.  The previous implementation built
-    # the full eager-loaded collection query first, which made every search
-    # execute all relationship options before counting.
-    total = int(
-        (
-            await db.scalar(
-                select(func.count(Product.id)).where(
-                    *_product_filter_conditions(**filters)
-                )
-            )
+
+    async def count_products() -> int:
+        # Count only the filtered product rows, without relationship options.
+        return int(
+            await db.scalar(select(func.count(Product.id)).where(*_product_filter_conditions(**filters))) or 0
         )
-        or 0
-    )
+
+    # Page flips with the same filters reuse the cached total.
+    total = await cached_product_total(current_user.company_id, filters, count_products)
     total_pages = (total + page_size - 1) // page_size if total else 0
     page = min(page, total_pages) if total_pages else 1
 
     result = await db.execute(
-        select(Product, func.count(ProductVariant.id).label("variant_count"))
-        .outerjoin(ProductVariant, ProductVariant.product_id == Product.id)
+        select(Product)
         .options(
             load_only(
                 Product.id,
@@ -464,119 +337,27 @@ async def read_products_page(
                 Product.track_inventory,
                 Product.category_id,
                 Product.brand_id,
+                Product.variant_count,
             ),
-            # Keep these as select-in loads: joinedload would add category and
-            # brand columns to the grouped count query and break PostgreSQL's
-            # GROUP BY validation.
             selectinload(Product.brand),
             selectinload(Product.category),
         )
         .where(*_product_filter_conditions(**filters))
-        .group_by(Product.id)
         .order_by(Product.created_at.desc(), Product.id.desc())
         .offset((page - 1) * page_size)
         .limit(page_size)
     )
-    rows = result.all()
     products = await _attach_published_state(
-        db, [row[0] for row in rows], current_user.company_id
+        db, result.scalars().all(), current_user.company_id
     )
-    items = []
-    for product, row in zip(products, rows):
-        item = schemas.ProductListItem.model_validate(product)
-        item.variant_count = int(row.variant_count or 0)
-        items.append(item)
     return schemas.ProductPage(
-        items=items,
+        items=[schemas.ProductListItem.model_validate(product) for product in products],
         total=total,
         page=page,
         page_size=page_size,
         total_pages=total_pages,
     )
 
-_PRODUCT_EXPORT_COLUMNS = {
-    "product_id": "product_id",
-    "variant_id": "variant_id",
-    "name": "name",
-    "sku": "sku",
-    "barcode": "barcode",
-    "variant_name": "variant_name",
-    "variant_sku": "variant_sku",
-    "variant_barcode": "variant_barcode",
-    "price": "price",
-    "cost": "cost",
-    "price_extra": "price_extra",
-    "cost_extra": "cost_extra",
-    "variant_price": "variant_price",
-    "variant_cost": "variant_cost",
-    "variant_attributes_json": "variant_attributes_json",
-    "variant_weight": "variant_weight",
-    "product_type": "product_type",
-    "category_name": "category_name",
-    "brand_name": "brand_name",
-    "image_url": "image_url",
-    "tax_rate": "tax_rate",
-    "min_stock": "min_stock",
-    "track_inventory": "track_inventory",
-    "sale_ok": "sale_ok",
-    "purchase_ok": "purchase_ok",
-    "is_active": "is_active",
-    "variant_is_active": "variant_is_active",
-}
-
-
-def _product_export_row(product: Product, variant: ProductVariant | None = None) -> dict[str, Any]:
-    """Build one round-trip row for a product or one of its variants.
-
-    IDs are the only stable relation keys.  SKU values are deliberately kept as
-    editable business data and are never used to decide which record to update.
-    """
-    return {
-        "product_id": str(product.id),
-        "variant_id": str(variant.id) if variant else "",
-        "name": product.name or "",
-        "sku": product.sku or "",
-        "barcode": product.barcode or "",
-        "variant_name": variant.name if variant else "",
-        "variant_sku": variant.sku if variant else "",
-        "variant_barcode": variant.barcode if variant else "",
-        "price": float(product.price) if product.price is not None else 0,
-        "cost": float(product.cost) if product.cost is not None else 0,
-        "price_extra": float(variant.price_extra) if variant else 0,
-        "cost_extra": float(variant.cost_extra) if variant else 0,
-        "variant_price": float(variant.price) if variant and variant.price is not None else "",
-        "variant_cost": float(variant.cost) if variant and variant.cost is not None else "",
-        "variant_attributes_json": (
-            json.dumps(variant.attributes or {}, ensure_ascii=False, sort_keys=True)
-            if variant
-            else ""
-        ),
-        "variant_weight": float(variant.weight) if variant and variant.weight is not None else "",
-        "product_type": product.product_type or "",
-        "category_name": product.category.name if product.category else "",
-        "brand_name": product.brand.name if product.brand else "",
-        "image_url": product.image_url or "",
-        "tax_rate": float(product.tax_rate) if product.tax_rate is not None else 0,
-        "min_stock": float(product.min_stock) if product.min_stock is not None else 0,
-        "track_inventory": bool(product.track_inventory),
-        "sale_ok": bool(product.sale_ok),
-        "purchase_ok": bool(product.purchase_ok),
-        "is_active": bool(product.is_active),
-        "variant_is_active": bool(variant.is_active) if variant else "",
-    }
-
-
-def _build_product_export_rows(products: list[Product]) -> list[dict[str, Any]]:
-    """Return one row per variant, or one row for products without variants."""
-    rows: list[dict[str, Any]] = []
-    for product in products:
-        variants = list(product.variants or [])
-        if variants:
-            rows.extend(_product_export_row(product, variant) for variant in variants)
-        else:
-            rows.append(_product_export_row(product))
-    return rows
-
 
 @router.get("/export")
 async def export_products(
@@ -588,41 +369,10 @@ async def export_products(
     current_user: User = Depends(PermissionChecker("view_products")),
 ) -> Any:
     """Export products to Excel or CSV."""
-    from app.services.export_service import ExportService
+    from app.services.export_definitions import export_response
 
-    query = select(Product).options(
-        selectinload(Product.brand),
-        selectinload(Product.category),
-        selectinload(Product.unit_of_measure),
-        selectinload(Product.variants),
-    )
-    if current_user.company_id:
-        query = query.where(Product.company_id == current_user.company_id)
-    if search:
-        search_filter = f"%{search}%"
-        query = query.where(
-            or_(
-                Product.name.ilike(search_filter),
-                Product.sku.ilike(search_filter),
-                Product.variants.any(ProductVariant.name.ilike(search_filter)),
-                Product.variants.any(ProductVariant.sku.ilike(search_filter)),
-                Product.variants.any(ProductVariant.barcode.ilike(search_filter)),
-            )
-        )
-    if category_id:
-        query = query.where(Product.category_id == category_id)
-    if brand_id:
-        query = query.where(Product.brand_id == brand_id)
-
-    result = await db.execute(query)
-    products = result.scalars().all()
-
-    rows = _build_product_export_rows(products)
-    columns = _PRODUCT_EXPORT_COLUMNS
-
-    if format == "csv":
-        return ExportService.to_csv_response(rows, columns, filename="productos")
-    return ExportService.to_excel_response(rows, columns, filename="productos")
+    filters = {"search": search, "category_id": category_id, "brand_id": brand_id}
+    return await export_response(db, "products", current_user.company_id, format, filters)
 
 
 def _complete_relative_image_url(
@@ -748,66 +498,21 @@ async def bulk_publish_products(
             detail="Primero configura y activa una tienda ecommerce.",
         )
 
-    requested_ids = list(dict.fromkeys(product_in.product_ids or []))
-    query = select(Product).where(
-        Product.company_id == current_user.company_id,
-        Product.is_active == True,
-    )
-    if requested_ids:
-        query = query.where(Product.id.in_(requested_ids))
-    query = query.order_by(Product.created_at.asc(), Product.id.asc())
-    result = await db.execute(query)
-    products = result.scalars().all()
-
-    found_ids = {product.id for product in products}
-    not_found = [product_id for product_id in requested_ids if product_id not in found_ids]
-    published_result = await db.execute(
-        select(PublishedProduct).where(
-            PublishedProduct.company_id == current_user.company_id,
-            PublishedProduct.storefront_id == storefront.id,
-        )
-    )
-    existing = {item.product_id: item for item in published_result.scalars().all()}
-    used_slugs = {item.slug for item in existing.values() if item.slug}
-
-    published = 0
-    reactivated = 0
-    already_published = 0
-    for product in products:
-        published_product = existing.get(product.id)
-        if published_product:
-            was_published = bool(published_product.is_active and published_product.is_published)
-            published_product.is_active = True
-            published_product.is_published = True
-            published_product.updated_by_id = current_user.id
-            if was_published:
-                already_published += 1
-            else:
-                reactivated += 1
-            published += 1
-            continue
-
-        base_slug = _slugify(product.name)
-        slug = base_slug
-        suffix = 2
-        while slug in used_slugs:
-            slug = f"{base_slug}-{suffix}"
-            suffix += 1
-        used_slugs.add(slug)
-        db.add(
-            PublishedProduct(
-                storefront_id=storefront.id,
-                product_id=product.id,
-                slug=slug,
-                is_published=True,
-                is_active=True,
-                company_id=current_user.company_id,
-                created_by_id=current_user.id,
-                updated_by_id=current_user.id,
-            )
+    try:
+        outcome = await publish_products(
+            db,
+            company_id=current_user.company_id,
+            storefront_id=storefront.id,
+            user_id=current_user.id,
+            product_ids=product_in.product_ids,
         )
-        published += 1
-
+    except IntegrityError as exc:
+        # Another publication took one of the allocated slugs meanwhile.
+        await db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Otra publicación cambió la tienda al mismo tiempo. Intenta de nuevo.",
+        ) from exc
     await log_activity(
         db,
         action="PUBLISH",
@@ -817,217 +522,94 @@ async def bulk_publish_products(
         company_id=current_user.company_id,
         details={
             "bulk": True,
-            "requested": len(requested_ids) if requested_ids else len(products),
-            "published": published,
+            "requested": outcome.requested,
+            "published": outcome.published,
         },
     )
     await db.commit()
     return schemas.ProductBulkPublishResponse(
-        requested=len(requested_ids) if requested_ids else len(products),
-        published=published,
-        reactivated=reactivated,
-        already_published=already_published,
-        not_found=not_found,
+        requested=outcome.requested,
+        published=outcome.published,
+        reactivated=outcome.reactivated,
+        already_published=outcome.already_published,
+        not_found=outcome.not_found,
     )
 
 
-@router.post("/bulk-delete", response_model=schemas.ProductBulkDeleteResponse)
-async def bulk_delete_products(
+@router.post("/bulk-update", response_model=schemas.ProductBulkUpdateResponse)
+async def bulk_update_products_endpoint(
     *,
-    product_in: schemas.ProductBulkDeleteRequest,
+    update_in: schemas.ProductBulkUpdateRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(PermissionChecker("manage_inventory")),
-) -> schemas.ProductBulkDeleteResponse:
-    """Delete selected products, skipping anything referenced by business history."""
-    # Keep the response deterministic and do not process the same product twice
-    # if a client accidentally submits duplicate checkbox values.
-    product_ids = list(dict.fromkeys(product_in.product_ids))
-    result = await db.execute(
-        select(Product)
-        .options(selectinload(Product.variants), selectinload(Product.images))
-        .where(
-            Product.company_id == current_user.company_id,
-            Product.id.in_(product_ids),
-        )
+) -> schemas.ProductBulkUpdateResponse:
+    """Change prices and attributes of selected products, or of those matching the catalog filters."""
+    changes = update_in.changes
+    if changes.category_id and not await db.scalar(select(Category.id).where(
+        Category.id == changes.category_id, Category.company_id == current_user.company_id,
+    )):
+        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+    if changes.brand_id and not await db.scalar(select(Brand.id).where(
+        Brand.id == changes.brand_id, Brand.company_id == current_user.company_id,
+    )):
+        raise HTTPException(status_code=404, detail="Marca no encontrada")
+
+    if update_in.product_ids is not None:
+        conditions = [Product.id.in_(update_in.product_ids)]
+        selection = {"product_ids": [str(product_id) for product_id in update_in.product_ids]}
+    else:
+        filters = update_in.filters.model_dump(exclude_none=True, exclude={"all"})
+        conditions = _product_filter_conditions(company_id=current_user.company_id, **filters)
+        selection = {"filters": update_in.filters.model_dump(mode="json", exclude_none=True)}
+    outcome = await bulk_update_products(
+        db,
+        company_id=current_user.company_id,
+        user_id=current_user.id,
+        conditions=conditions,
+        changes=changes,
+        selection=selection,
+        requested_ids=update_in.product_ids,
     )
-    products = result.scalars().all()
-    products_by_id = {product.id: product for product in products}
-    not_found = [product_id for product_id in product_ids if product_id not in products_by_id]
-    return await _delete_products_guarded(
-        db=db,
-        product_ids=product_ids,
-        products_by_id=products_by_id,
-        not_found=not_found,
-        current_user=current_user,
-        archive_blocked=bool(product_in.force),
+    await db.commit()
+    return schemas.ProductBulkUpdateResponse(
+        matched=outcome.matched,
+        products_updated=outcome.products_updated,
+        variants_updated=outcome.variants_updated,
+        not_found=outcome.not_found,
     )
 
 
-async def _delete_products_guarded(
+@router.post("/bulk-delete", response_model=ProductDeletionJobOut, status_code=202)
+async def bulk_delete_products(
     *,
-    db: AsyncSession,
-    product_ids: list[Any],
-    products_by_id: dict[Any, Product],
-    not_found: list[Any],
-    current_user: User,
-    archive_blocked: bool = False,
-) -> schemas.ProductBulkDeleteResponse:
-    """Delete eligible products and optionally archive protected history."""
-    blockers = await _find_product_delete_blockers(db, list(products_by_id))
-
-    deleted_ids = []
-    archived_ids = []
-    blocked = []
-    local_asset_urls_to_cleanup: set[str] = set()
-    if archive_blocked:
-        blocked_product_ids = [product_id for product_id, reasons in blockers.items() if reasons]
-        if blocked_product_ids:
-            # Remove archived products from every ecommerce channel in one
-            # statement without touching the orders that reference them.
-            await db.execute(
-                update(PublishedProduct)
-                .where(
-                    PublishedProduct.company_id == current_user.company_id,
-                    PublishedProduct.product_id.in_(blocked_product_ids),
-                )
-                .values(is_active=False, is_published=False)
-            )
-
-    try:
-        for product_id in product_ids:
-            product = products_by_id.get(product_id)
-            if product is None:
-                continue
-
-            reasons = blockers.get(product_id, [])
-            if reasons:
-                if archive_blocked:
-                    # Historical rows keep their product reference, so sales,
-                    # invoices and inventory remain auditable. The product is
-                    # removed from the active catalog and cannot be sold again.
-                    product.is_active = False
-                    product.sale_ok = False
-                    product.purchase_ok = False
-                    for variant in product.variants:
-                        variant.is_active = False
-                    archived_ids.append(product.id)
-                    await log_activity(
-                        db,
-                        action="ARCHIVE",
-                        entity_type="Product",
-                        entity_id=product.id,
-                        user_id=current_user.id,
-                        company_id=current_user.company_id,
-                        details={"bulk": True, "name": product.name, "reason": "force_delete"},
-                    )
-                    continue
-                blocked.append(
-                    schemas.ProductBulkDeleteBlocked(
-                        id=product.id,
-                        name=product.name,
-                        reasons=reasons,
-                    )
-                )
-                continue
-
-            # A savepoint makes an unexpected database-level relation safe: one
-            # problematic row is reported as blocked without rolling back other
-            # products that were eligible for deletion.
-            local_asset_urls_to_cleanup.update(
-                str(value).strip()
-                for value in [
-                    product.image_url,
-                    *(image.image_url for image in product.images),
-                ]
-                if value
-            )
-            try:
-                async with db.begin_nested():
-                    for variant in product.variants:
-                        await db.delete(variant)
-                    await db.delete(product)
-                    await db.flush()
-            except IntegrityError:
-                blocked.append(
-                    schemas.ProductBulkDeleteBlocked(
-                        id=product.id,
-                        name=product.name,
-                        reasons=["Tiene una relación protegida por la base de datos"],
-                    )
-                )
-                continue
-
-            deleted_ids.append(product.id)
-            await log_activity(
-                db,
-                action="DELETE",
-                entity_type="Product",
-                entity_id=product.id,
-                user_id=current_user.id,
-                company_id=current_user.company_id,
-                details={"bulk": True, "name": product.name},
-            )
-
-        await db.commit()
-        await remove_unreferenced_local_assets(db, local_asset_urls_to_cleanup)
-        await prune_orphaned_local_assets(db)
-    except Exception:
-        await db.rollback()
-        raise
+    product_in: schemas.ProductBulkDeleteRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(PermissionChecker("manage_inventory")),
+) -> Any:
+    """Queue the deletion of selected products, skipping anything referenced by business history.
 
-    return schemas.ProductBulkDeleteResponse(
-        requested=len(product_ids),
-        deleted=len(deleted_ids),
-        deleted_ids=deleted_ids,
-        archived=len(archived_ids),
-        archived_ids=archived_ids,
-        blocked=blocked,
-        not_found=not_found,
+    The product deletion worker applies it; follow it with ``GET /products/deletion-jobs/{id}``.
+    """
+    # Keep the result deterministic and do not process the same product twice
+    # if a client accidentally submits duplicate checkbox values.
+    product_ids = [str(product_id) for product_id in dict.fromkeys(product_in.product_ids)]
+    return await request_deletion(
+        db, current_user, "selected", {"product_ids": product_ids, "force": bool(product_in.force)}
     )
 
 
-@router.post("/bulk-delete-all", response_model=schemas.ProductBulkDeleteResponse)
+@router.post("/bulk-delete-all", response_model=ProductDeletionJobOut, status_code=202)
 async def bulk_delete_all_products(
     *,
     product_in: schemas.ProductBulkDeleteAllRequest | None = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(PermissionChecker("manage_inventory")),
-) -> schemas.ProductBulkDeleteResponse:
-    """Delete every product in the company, archiving protected history when forced."""
+) -> Any:
+    """Queue the deletion of every active product, archiving protected history when forced."""
     product_in = product_in or schemas.ProductBulkDeleteAllRequest()
-    query = (
-        select(Product)
-        .options(selectinload(Product.variants), selectinload(Product.images))
-        .where(Product.company_id == current_user.company_id, Product.is_active.is_(True))
-    )
-    if product_in.search:
-        search_filter = f"%{product_in.search}%"
-        query = query.where(
-            or_(
-                Product.name.ilike(search_filter),
-                Product.sku.ilike(search_filter),
-                Product.barcode.ilike(search_filter),
-                Product.internal_reference.ilike(search_filter),
-            )
-        )
-    if product_in.category_id:
-        query = query.where(Product.category_id == product_in.category_id)
-    if product_in.brand_id:
-        query = query.where(Product.brand_id == product_in.brand_id)
-    if product_in.product_type:
-        query = query.where(Product.product_type == product_in.product_type)
-
-    result = await db.execute(query)
-    products = result.scalars().all()
-    products_by_id = {product.id: product for product in products}
-    product_ids = list(products_by_id)
-    return await _delete_products_guarded(
-        db=db,
-        product_ids=product_ids,
-        products_by_id=products_by_id,
-        not_found=[],
-        current_user=current_user,
-        archive_blocked=bool(product_in.force),
+    filters = product_in.model_dump(mode="json", include={"search", "category_id", "brand_id", "product_type"})
+    return await request_deletion(
+        db, current_user, "catalog", {"filters": filters, "force": bool(product_in.force)}
     )
 
 
@@ -1056,6 +638,26 @@ async def bulk_restore_archived_products(
     products_by_id = {product.id: product for product in products}
     not_found = [product_id for product_id in requested_ids if product_id not in products_by_id]
 
+    # Restored products rejoin the unique SKU index: none may take a SKU an
+    # active product holds, nor share one with another restored product.
+    owners = await active_sku_owners(db, current_user.company_id, (product.sku for product in products if product.sku))
+    restoring: dict[str, UUID] = {}
+    conflicts = []
+    for product in products:
+        key = sku_key(product.sku)
+        if not key:
+            continue
+        if key in owners or restoring.setdefault(key, product.id) != product.id:
+            conflicts.append(product.sku.strip())
+    if conflicts:
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                "Ya hay productos activos con estos SKU: "
+                f"{', '.join(sorted(set(conflicts))[:5])}. Cambia el SKU antes de restaurarlos."
+            ),
+        )
+
     for product in products:
         product.is_active = True
         product.sale_ok = True
@@ -1087,66 +689,34 @@ async def bulk_restore_archived_products(
     )
 
 
-@router.post("/bulk-delete-archived", response_model=schemas.ProductBulkDeleteResponse)
+@router.post("/bulk-delete-archived", response_model=ProductDeletionJobOut, status_code=202)
 async def bulk_delete_archived_products(
     *,
     product_in: schemas.ProductBulkDeleteArchivedRequest | None = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(PermissionChecker("manage_inventory")),
-) -> schemas.ProductBulkDeleteResponse:
-    """Permanently delete selected archived products, or all archived products."""
+) -> Any:
+    """Queue the permanent deletion of selected archived products, or all archived products."""
     product_in = product_in or schemas.ProductBulkDeleteArchivedRequest()
-    requested_ids = list(dict.fromkeys(product_in.product_ids))
-    query = (
-        select(Product)
-        .options(selectinload(Product.variants), selectinload(Product.images))
-        .where(
-            Product.company_id == current_user.company_id,
-            Product.is_active.is_(False),
-        )
-    )
-    if requested_ids:
-        query = query.where(Product.id.in_(requested_ids))
-    else:
-        if product_in.exclude_product_ids:
-            query = query.where(Product.id.not_in(product_in.exclude_product_ids))
-        query = query.order_by(Product.created_at.asc(), Product.id.asc()).limit(product_in.limit)
-
-    products = (await db.execute(query)).scalars().all()
-    products_by_id = {product.id: product for product in products}
-    product_ids = list(products_by_id)
-    not_found = [product_id for product_id in requested_ids if product_id not in products_by_id]
-
-    if product_in.purge_inventory:
-        await _purge_inventory_records(
-            db,
-            company_id=current_user.company_id,
-            product_ids=product_ids,
-        )
-
-    # An ecommerce publication is catalog metadata, not business history. It
-    # can be removed for products that have no other protected relation. Keep
-    # it for products that remain blocked by sales, invoices or inventory.
-    blockers = await _find_product_delete_blockers(db, product_ids)
-    publication_only_ids = [
-        product_id
-        for product_id, reasons in blockers.items()
-        if reasons and set(reasons) == {"Está publicado en ecommerce"}
-    ]
-    await _remove_ecommerce_publications(
+    product_ids = [str(product_id) for product_id in dict.fromkeys(product_in.product_ids)]
+    return await request_deletion(
         db,
-        company_id=current_user.company_id,
-        product_ids=publication_only_ids,
+        current_user,
+        "archived",
+        {"product_ids": product_ids, "purge_inventory": bool(product_in.purge_inventory)},
     )
 
-    return await _delete_products_guarded(
-        db=db,
-        product_ids=product_ids,
-        products_by_id=products_by_id,
-        not_found=not_found,
-        current_user=current_user,
-        archive_blocked=False,
-    )
+
+@router.get("/deletion-jobs/{job_id}", response_model=ProductDeletionJobOut)
+async def read_deletion_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(PermissionChecker("manage_inventory")),
+) -> Any:
+    job = await db.get(ProductDeletionJob, job_id)
+    if not job or not current_user.company_id or job.company_id != current_user.company_id:
+        raise HTTPException(status_code=404, detail="Eliminación no encontrada")
+    return job
 
 
 @router.get("/{product_id}", response_model=schemas.Product)
@@ -1292,6 +862,14 @@ async def update_product(
             sku=update_data.get("sku"),
             exclude_product_id=str(product.id),
         )
+    elif update_data.get("is_active") and not product.is_active:
+        # Reactivating puts the product's SKU back in the unique index.
+        await _ensure_unique_sku(
+            db,
+            company_id=current_user.company_id,
+            sku=product.sku,
+            exclude_product_id=str(product.id),
+        )
     
     for field, value in update_data.items():
         setattr(product, field, value)
@@ -1332,7 +910,11 @@ async def update_product(
         ecommerce_data=ecommerce_data,
     )
 
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Ya existe un producto con ese SKU en esta empresa.")
     await db.refresh(product)
     
     await log_activity(db, action="UPDATE", entity_type="Product", entity_id=product.id,
@@ -1381,11 +963,11 @@ async def delete_product(
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
 
-    blockers = await _find_product_delete_blockers(db, [product.id])
+    blockers = await find_delete_blockers(db, [product.id])
     if blockers.get(product.id):
         raise HTTPException(
             status_code=409,
-            detail=_delete_blocker_detail(product, blockers[product.id]),
+            detail=delete_blocker_detail(product.name, blockers[product.id]),
         )
     
     local_asset_urls_to_cleanup = {
@@ -1431,7 +1013,7 @@ async def add_variant(
     if not result.scalars().first():
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     
-    variant = ProductVariant(**variant_in.model_dump(), product_id=product_id)
+    variant = ProductVariant(**variant_in.model_dump(), product_id=product_id, company_id=current_user.company_id)
     db.add(variant)
     await db.commit()
     await db.refresh(variant)
@@ -1490,387 +1072,19 @@ async def delete_variant(
 
 # --- Import ---
 
-_IMPORT_MISSING = object()
-
-
-def _normalize_import_column(value: Any) -> str:
-    """Normalize old Spanish export headers and the new machine headers."""
-    import unicodedata
-
-    text = unicodedata.normalize("NFKD", str(value))
-    text = "".join(char for char in text if not unicodedata.combining(char))
-    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
-
-
-_IMPORT_COLUMN_ALIASES = {
-    "id_producto": "product_id",
-    "producto_id": "product_id",
-    "product_id": "product_id",
-    "id_variante": "variant_id",
-    "variante_id": "variant_id",
-    "variant_id": "variant_id",
-    "nombre": "name",
-    "nombre_producto": "name",
-    "product_name": "name",
-    "name": "name",
-    "sku_producto": "sku",
-    "product_sku": "sku",
-    "sku": "sku",
-    "codigo_barras": "barcode",
-    "barcode": "barcode",
-    "nombre_variante": "variant_name",
-    "variant_name": "variant_name",
-    "sku_variante": "variant_sku",
-    "variant_sku": "variant_sku",
-    "codigo_barras_variante": "variant_barcode",
-    "variant_barcode": "variant_barcode",
-    "precio": "price",
-    "precio_venta": "price",
-    "sale_price": "price",
-    "price": "price",
-    "costo": "cost",
-    "precio_costo": "cost",
-    "cost_price": "cost",
-    "cost": "cost",
-    "precio_extra": "price_extra",
-    "price_extra": "price_extra",
-    "costo_extra": "cost_extra",
-    "cost_extra": "cost_extra",
-    "precio_variante": "variant_price",
-    "variant_price": "variant_price",
-    "costo_variante": "variant_cost",
-    "variant_cost": "variant_cost",
-    "atributos_variante_json": "variant_attributes_json",
-    "variant_attributes_json": "variant_attributes_json",
-    "peso_variante": "variant_weight",
-    "variant_weight": "variant_weight",
-    "tipo": "product_type",
-    "product_type": "product_type",
-    "categoria": "category_name",
-    "categoria_nombre": "category_name",
-    "category_name": "category_name",
-    "marca": "brand_name",
-    "marca_nombre": "brand_name",
-    "brand_name": "brand_name",
-    "imagen": "image_url",
-    "imagen_url": "image_url",
-    "image_url": "image_url",
-    "tasa_impuesto": "tax_rate",
-    "tax_rate": "tax_rate",
-    "stock_minimo": "min_stock",
-    "min_stock": "min_stock",
-    "control_inventario": "track_inventory",
-    "track_inventory": "track_inventory",
-    "venta": "sale_ok",
-    "sale_ok": "sale_ok",
-    "compra": "purchase_ok",
-    "purchase_ok": "purchase_ok",
-    "activo": "is_active",
-    "is_active": "is_active",
-    "variante_activa": "variant_is_active",
-    "variant_is_active": "variant_is_active",
-}
-
-
-def _normalize_import_dataframe(df: Any) -> Any:
-    rename_map = {}
-    for column in df.columns:
-        normalized = _normalize_import_column(column)
-        rename_map[column] = _IMPORT_COLUMN_ALIASES.get(normalized, normalized)
-    return df.rename(columns=rename_map)
-
-
-def _import_row_value(row: Any, key: str) -> Any:
-    if key not in row.index:
-        return _IMPORT_MISSING
-    value = row[key]
-    if value is None:
-        return None
-    try:
-        if bool(__import__("pandas").isna(value)):
-            return None
-    except (TypeError, ValueError):
-        pass
-    if isinstance(value, str):
-        return value.strip() or None
-    return value
-
-
-def _import_text(value: Any, *, default: Any = _IMPORT_MISSING) -> Any:
-    if value is _IMPORT_MISSING:
-        return default
-    if value is None:
-        return None
-    return str(value).strip() or None
-
-
-def _import_float(value: Any, *, default: Any = _IMPORT_MISSING) -> Any:
-    if value is _IMPORT_MISSING or value is None:
-        return default
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        raise ValueError(f"'{value}' no es un número válido")
-
-
-def _import_bool(value: Any, *, default: Any = _IMPORT_MISSING) -> Any:
-    if value is _IMPORT_MISSING or value is None:
-        return default
-    if isinstance(value, bool):
-        return value
-    if isinstance(value, (int, float)):
-        return bool(value)
-    normalized = str(value).strip().lower()
-    if normalized in {"1", "true", "t", "yes", "si", "sí", "x"}:
-        return True
-    if normalized in {"0", "false", "f", "no", "n"}:
-        return False
-    raise ValueError(f"'{value}' no es un booleano válido")
-
-
-def _import_uuid(value: Any, field_name: str) -> UUID | None:
-    if value is _IMPORT_MISSING or value is None:
-        return None
-    try:
-        return UUID(str(value).strip())
-    except (ValueError, AttributeError):
-        raise ValueError(f"{field_name} debe ser un UUID válido")
-
-
-def _import_json(value: Any) -> dict[str, Any] | None:
-    if value is _IMPORT_MISSING or value is None:
-        return None
-    if isinstance(value, dict):
-        return value
-    try:
-        parsed = json.loads(str(value))
-    except (TypeError, json.JSONDecodeError):
-        raise ValueError("variant_attributes_json debe contener JSON válido")
-    if not isinstance(parsed, dict):
-        raise ValueError("variant_attributes_json debe ser un objeto JSON")
-    return parsed
-
-
-async def _get_import_category_id(
-    db: AsyncSession,
-    category_map: dict[str, UUID],
-    category_name: Any,
-    company_id: UUID | None,
-) -> UUID | None:
-    name = _import_text(category_name, default=None)
-    if not name:
-        return None
-    key = name.casefold()
-    if key in category_map:
-        return category_map[key]
-    from app.models.category import Category
-
-    new_category = Category(name=name, company_id=company_id)
-    db.add(new_category)
-    await db.flush()
-    category_map[key] = new_category.id
-    return new_category.id
-
-
-def _apply_product_import_values(product: Product, row: Any) -> None:
-    text_fields = {
-        "name": "name",
-        "sku": "sku",
-        "barcode": "barcode",
-        "product_type": "product_type",
-        "image_url": "image_url",
-    }
-    for column, attribute in text_fields.items():
-        value = _import_row_value(row, column)
-        if value is not _IMPORT_MISSING:
-            setattr(product, attribute, _import_text(value, default=None))
-
-    numeric_fields = {
-        "price": "price",
-        "cost": "cost",
-        "tax_rate": "tax_rate",
-        "min_stock": "min_stock",
-    }
-    for column, attribute in numeric_fields.items():
-        value = _import_float(_import_row_value(row, column), default=_IMPORT_MISSING)
-        if value is not _IMPORT_MISSING:
-            setattr(product, attribute, value)
-
-    for column, attribute in {
-        "track_inventory": "track_inventory",
-        "sale_ok": "sale_ok",
-        "purchase_ok": "purchase_ok",
-        "is_active": "is_active",
-    }.items():
-        value = _import_bool(_import_row_value(row, column), default=_IMPORT_MISSING)
-        if value is not _IMPORT_MISSING:
-            setattr(product, attribute, value)
-
-
-def _apply_variant_import_values(variant: ProductVariant, row: Any) -> None:
-    text_fields = {
-        "variant_name": "name",
-        "variant_sku": "sku",
-        "variant_barcode": "barcode",
-    }
-    for column, attribute in text_fields.items():
-        value = _import_row_value(row, column)
-        if value is not _IMPORT_MISSING:
-            setattr(variant, attribute, _import_text(value, default=None))
-
-    for column, attribute in {
-        "price_extra": "price_extra",
-        "cost_extra": "cost_extra",
-        "variant_price": "price",
-        "variant_cost": "cost",
-        "variant_weight": "weight",
-    }.items():
-        value = _import_float(_import_row_value(row, column), default=_IMPORT_MISSING)
-        if value is not _IMPORT_MISSING:
-            setattr(variant, attribute, value)
-
-    attributes = _import_json(_import_row_value(row, "variant_attributes_json"))
-    if attributes is not None:
-        variant.attributes = attributes
-    active = _import_bool(_import_row_value(row, "variant_is_active"), default=_IMPORT_MISSING)
-    if active is not _IMPORT_MISSING:
-        variant.is_active = active
-
-
-@router.post("/import", response_model=dict)
+@router.post("/import", response_model=ImportJobOut, status_code=202)
 async def import_products(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(PermissionChecker("manage_inventory")),
 ) -> Any:
-    """Create or update products/variants using IDs from the export."""
-    import io
-    import pandas as pd
+    """Queue an import that creates or updates products/variants using IDs from the export.
 
-    filename = (file.filename or "").lower()
-    if not filename.endswith((".csv", ".xls", ".xlsx")):
+    The import worker applies the file; follow it with ``GET /imports/{id}``.
+    """
+    if not (file.filename or "").lower().endswith(IMPORT_EXTENSIONS):
         raise HTTPException(status_code=400, detail="Formato de archivo inválido. Use CSV o Excel.")
-
-    try:
-        content = await file.read()
-        if filename.endswith(".csv"):
-            dataframe = pd.read_csv(io.BytesIO(content))
-        else:
-            dataframe = pd.read_excel(io.BytesIO(content))
-        dataframe = _normalize_import_dataframe(dataframe)
-    except HTTPException:
-        raise
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"No se pudo leer el archivo: {exc}") from exc
-
-    from app.models.category import Category
-
-    result = await db.execute(select(Category).where(Category.company_id == current_user.company_id))
-    category_map = {category.name.casefold(): category.id for category in result.scalars().all()}
-
-    processed = 0
-    products_created = 0
-    products_updated: set[UUID] = set()
-    variants_created = 0
-    variants_updated: set[UUID] = set()
-    errors: list[str] = []
-
-    for index, row in dataframe.iterrows():
-        row_product_created = False
-        row_product_updated: UUID | None = None
-        row_variant_created = False
-        row_variant_updated: UUID | None = None
-        try:
-            async with db.begin_nested():
-                product_id = _import_uuid(_import_row_value(row, "product_id"), "product_id")
-                variant_id = _import_uuid(_import_row_value(row, "variant_id"), "variant_id")
-                if variant_id and not product_id:
-                    raise ValueError("variant_id requiere product_id")
-
-                if product_id:
-                    product_result = await db.execute(
-                        select(Product).where(
-                            Product.id == product_id,
-                            Product.company_id == current_user.company_id,
-                        )
-                    )
-                    product = product_result.scalars().first()
-                    if not product:
-                        raise ValueError("product_id no pertenece a esta empresa o no existe")
-                    row_product_updated = product.id
-                else:
-                    name = _import_text(_import_row_value(row, "name"), default=None)
-                    if not name:
-                        raise ValueError("name es obligatorio para crear un producto")
-                    product = Product(
-                        name=name,
-                        company_id=current_user.company_id,
-                        price=_import_float(_import_row_value(row, "price"), default=0.0),
-                        cost=_import_float(_import_row_value(row, "cost"), default=0.0),
-                        min_stock=_import_float(_import_row_value(row, "min_stock"), default=0.0),
-                        track_inventory=_import_bool(_import_row_value(row, "track_inventory"), default=True),
-                    )
-                    db.add(product)
-                    await db.flush()
-                    row_product_created = True
-
-                _apply_product_import_values(product, row)
-                category_name = _import_row_value(row, "category_name")
-                if category_name is not _IMPORT_MISSING and category_name is not None:
-                    product.category_id = await _get_import_category_id(
-                        db, category_map, category_name, current_user.company_id
-                    )
-
-                if variant_id:
-                    variant_result = await db.execute(
-                        select(ProductVariant).where(
-                            ProductVariant.id == variant_id,
-                            ProductVariant.product_id == product.id,
-                        )
-                    )
-                    variant = variant_result.scalars().first()
-                    if not variant:
-                        raise ValueError("variant_id no pertenece al product_id indicado o no existe")
-                    row_variant_updated = variant.id
-                    _apply_variant_import_values(variant, row)
-                else:
-                    variant_name = _import_text(_import_row_value(row, "variant_name"), default=None)
-                    variant_sku = _import_text(_import_row_value(row, "variant_sku"), default=None)
-                    if variant_name or variant_sku:
-                        if not variant_name:
-                            raise ValueError("variant_name es obligatorio para crear una variante")
-                        variant = ProductVariant(
-                            product_id=product.id,
-                            company_id=current_user.company_id,
-                            name=variant_name,
-                        )
-                        db.add(variant)
-                        await db.flush()
-                        _apply_variant_import_values(variant, row)
-                        row_variant_created = True
-
-            processed += 1
-            products_created += int(row_product_created)
-            if row_product_updated:
-                products_updated.add(row_product_updated)
-            variants_created += int(row_variant_created)
-            if row_variant_updated:
-                variants_updated.add(row_variant_updated)
-        except Exception as exc:
-            errors.append(f"Fila {index + 2}: {exc}")
-
     try:
-        await db.commit()
-    except Exception as exc:
-        await db.rollback()
-        raise HTTPException(status_code=500, detail=f"Importación falló: {exc}") from exc
-
-    return {
-        "success": True,
-        "count": processed,
-        "products_created": products_created,
-        "products_updated": len(products_updated),
-        "variants_created": variants_created,
-        "variants_updated": len(variants_updated),
-        "errors": errors,
-    }
+        return await request_import(db, current_user, "products", file)
+    except ValueError:
+        raise HTTPException(status_code=413, detail="El archivo es demasiado grande. Súbelo por partes.")
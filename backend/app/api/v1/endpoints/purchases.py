@@ -103,41 +103,9 @@ async def export_purchases(
     current_user: User = Depends(PermissionChecker("view_inventory")),
 ) -> Any:
     """Export purchases to Excel or CSV."""
-    from app.services.export_service import ExportService
+    from app.services.export_definitions import export_response
 
-    query = select(PurchaseOrder).options(
-        selectinload(PurchaseOrder.supplier),
-        selectinload(PurchaseOrder.branch),
-    ).where(
-        PurchaseOrder.company_id == current_user.company_id
-    ).order_by(PurchaseOrder.created_at.desc())
-
-    result = await db.execute(query)
-    purchases = result.scalars().all()
-
-    columns = {
-        "order_number": "# Orden",
-        "created_at": "Fecha",
-        "supplier_name": "Proveedor",
-        "branch_name": "Sucursal",
-        "status": "Estado",
-        "total": "Total",
-    }
-
-    rows = []
-    for p in purchases:
-        rows.append({
-            "order_number": getattr(p, "order_number", "") or str(p.id)[:8],
-            "created_at": p.created_at.strftime("%Y-%m-%d %H:%M") if p.created_at else "",
-            "supplier_name": p.supplier.name if p.supplier else "",
-            "branch_name": p.branch.name if p.branch else "",
-            "status": p.status or "",
-            "total": float(p.total) if p.total else 0,
-        })
-
-    if format == "csv":
-        return ExportService.to_csv_response(rows, columns, filename="compras")
-    return ExportService.to_excel_response(rows, columns, filename="compras")
+    return await export_response(db, "purchases", current_user.company_id, format, {})
 
 @router.get("/{purchase_id}", response_model=schemas.PurchaseOrder)
 async def read_purchase(
@@ -368,8 +336,8 @@ async def delete_purchase(
     return {"ok": True, "detail": "Orden de compra eliminada"}
 
 
-from fastapi.responses import StreamingResponse
-from app.services.pdf_service import PDFService
+from fastapi.responses import Response
+from app.services.document_renderer import company_snapshot, purchase_snapshot, render_pdf
 
 @router.get("/{purchase_id}/pdf/order")
 async def download_pdf(
@@ -402,13 +370,11 @@ async def download_pdf(
     result = await db.execute(select(Company).where(Company.id == purchase.company_id))
     company = result.scalars().first()
 
-    service = PDFService()
-    
-    buffer = service.generate_purchase_order(purchase, company)
+    pdf = await render_pdf("purchase_order", purchase_snapshot(purchase), company_snapshot(company))
     filename = f"OrdenCompra_{str(purchase.id)[:8]}.pdf"
-        
-    return StreamingResponse(
-        buffer,
+
+    return Response(
+        pdf,
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -1,21 +1,22 @@
 from typing import Any, List, Optional
 from datetime import date, datetime, time, timedelta
-from sqlalchemy import select, func, desc, case
+from sqlalchemy import select, func, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 import uuid
 
 from app.core.database import get_db
+from app.core.metrics_batch import MetricsBatch
 from app.core import auth
 from app.models.user import User
 from app.core.permissions import PermissionChecker
-from app.models.sale import Sale, SaleItem, Payment
-from app.models.inventory import Inventory
+from app.models.sale import Sale, Payment
 from app.models.product import Product
 from app.models.category import Category
-from app.models.return_order import ReturnOrder, ReturnStatus
 from app.models.pos_session import POSSession, POSSessionStatus
+from app.models.sales_rollup import ReturnDailyRollup, SalesDailyRollup, SalesProductDailyRollup
+from app.services.inventory_snapshots import branch_totals_as_of, stock_as_of, utc_today
 
 router = APIRouter()
 
@@ -132,6 +133,18 @@ def get_date_filter(model, start_date: Optional[datetime], end_date: Optional[da
     return conditions
 
 
+def get_day_filter(model, start_date: Optional[datetime], end_date: Optional[datetime], days: int = 7):
+    """Like ``get_date_filter`` for daily rollups: whole days, both ends inclusive."""
+    if not start_date and not end_date:
+        start_date = datetime.utcnow() - timedelta(days=days)
+    conditions = []
+    if start_date:
+        conditions.append(model.day >= start_date.date())
+    if end_date:
+        conditions.append(model.day <= end_date.date())
+    return conditions
+
+
 @router.get("/daily-close", response_model=DailyCloseSummary)
 async def get_daily_close_summary(
     db: AsyncSession = Depends(get_db),
@@ -148,51 +161,12 @@ async def get_daily_close_summary(
     end_dt = datetime.combine(d, time.max)
 
     sale_conditions = [
-        Sale.company_id == current_user.company_id,
-        Sale.status != "CANCELLED",
-        Sale.created_at >= start_dt,
-        Sale.created_at <= end_dt,
+        SalesDailyRollup.company_id == current_user.company_id,
+        SalesDailyRollup.status != "CANCELLED",
+        SalesDailyRollup.day == d,
     ]
     if branch_id:
-        sale_conditions.append(Sale.branch_id == branch_id)
-
-    sales_agg = await db.execute(
-        select(
-            func.count(Sale.id).label("sales_count"),
-            func.coalesce(func.sum(Sale.total), 0.0).label("gross_sales"),
-        ).where(*sale_conditions)
-    )
-    sales_row = sales_agg.one()
-
-    payments_agg = await db.execute(
-        select(
-            func.coalesce(func.sum(Payment.amount).filter(Payment.method == "CASH"), 0.0).label("cash"),
-            func.coalesce(func.sum(Payment.amount).filter(Payment.method == "CARD"), 0.0).label("card"),
-            func.coalesce(func.sum(Payment.amount).filter(Payment.method == "CREDIT"), 0.0).label("credit"),
-        )
-        .join(Sale, Payment.sale_id == Sale.id)
-        .where(*sale_conditions)
-    )
-    payments_row = payments_agg.one()
-
-    return_conditions = [
-        ReturnOrder.company_id == current_user.company_id,
-        ReturnOrder.status == ReturnStatus.APPROVED,
-        ReturnOrder.approved_at >= start_dt,
-        ReturnOrder.approved_at <= end_dt,
-    ]
-    if branch_id:
-        return_conditions.append(Sale.branch_id == branch_id)
-
-    returns_agg = await db.execute(
-        select(
-            func.count(ReturnOrder.id).label("returns_count"),
-            func.coalesce(func.sum(ReturnOrder.total_refund), 0.0).label("total_refunds"),
-        )
-        .join(Sale, ReturnOrder.sale_id == Sale.id)
-        .where(*return_conditions)
-    )
-    returns_row = returns_agg.one()
+        sale_conditions.append(SalesDailyRollup.branch_id == branch_id)
 
     session_base_conditions = [
         POSSession.company_id == current_user.company_id,
@@ -200,40 +174,55 @@ async def get_daily_close_summary(
     if branch_id:
         session_base_conditions.append(POSSession.branch_id == branch_id)
 
-    sessions_opened_agg = await db.execute(
-        select(
-            func.count(POSSession.id).label("sessions_opened_count"),
-            func.coalesce(func.sum(POSSession.opening_amount), 0.0).label("opening_amount_total"),
-        ).where(
-            *session_base_conditions,
-            POSSession.opened_at >= start_dt,
-            POSSession.opened_at <= end_dt,
-        )
-    )
-    sessions_opened_row = sessions_opened_agg.one()
-
-    sessions_closed_agg = await db.execute(
-        select(
-            func.count(POSSession.id).label("sessions_closed_count"),
-            func.coalesce(func.sum(POSSession.expected_amount), 0.0).label("expected_amount_total"),
-            func.coalesce(func.sum(POSSession.counted_amount), 0.0).label("counted_amount_total"),
-            func.coalesce(func.sum(POSSession.over_short), 0.0).label("over_short_total"),
-        ).where(
-            *session_base_conditions,
-            POSSession.status == POSSessionStatus.CLOSED,
-            POSSession.closed_at >= start_dt,
-            POSSession.closed_at <= end_dt,
-        )
-    )
-    sessions_closed_row = sessions_closed_agg.one()
-
-    open_now_agg = await db.execute(
-        select(func.count(POSSession.id).label("open_sessions_now")).where(
-            *session_base_conditions,
-            POSSession.status == POSSessionStatus.OPEN,
-        )
-    )
-    open_now_row = open_now_agg.one()
+    return_conditions = [
+        ReturnDailyRollup.company_id == current_user.company_id,
+        ReturnDailyRollup.day == d,
+    ]
+    if branch_id:
+        return_conditions.append(ReturnDailyRollup.branch_id == branch_id)
+
+    # Every figure is a one-row aggregate: fetch them in a single statement.
+    batch = MetricsBatch()
+    batch.add("sales", select(
+        func.coalesce(func.sum(SalesDailyRollup.sales_count), 0).label("sales_count"),
+        func.coalesce(func.sum(SalesDailyRollup.gross_sales), 0.0).label("gross_sales"),
+        func.coalesce(func.sum(SalesDailyRollup.payments_cash), 0.0).label("cash"),
+        func.coalesce(func.sum(SalesDailyRollup.payments_card), 0.0).label("card"),
+        func.coalesce(func.sum(SalesDailyRollup.payments_credit), 0.0).label("credit"),
+    ).where(*sale_conditions))
+    batch.add("returns", select(
+        func.coalesce(func.sum(ReturnDailyRollup.returns_count), 0).label("returns_count"),
+        func.coalesce(func.sum(ReturnDailyRollup.total_refunds), 0.0).label("total_refunds"),
+    ).where(*return_conditions))
+    batch.add("sessions_opened", select(
+        func.count(POSSession.id).label("sessions_opened_count"),
+        func.coalesce(func.sum(POSSession.opening_amount), 0.0).label("opening_amount_total"),
+    ).where(
+        *session_base_conditions,
+        POSSession.opened_at >= start_dt,
+        POSSession.opened_at <= end_dt,
+    ))
+    batch.add("sessions_closed", select(
+        func.count(POSSession.id).label("sessions_closed_count"),
+        func.coalesce(func.sum(POSSession.expected_amount), 0.0).label("expected_amount_total"),
+        func.coalesce(func.sum(POSSession.counted_amount), 0.0).label("counted_amount_total"),
+        func.coalesce(func.sum(POSSession.over_short), 0.0).label("over_short_total"),
+    ).where(
+        *session_base_conditions,
+        POSSession.status == POSSessionStatus.CLOSED,
+        POSSession.closed_at >= start_dt,
+        POSSession.closed_at <= end_dt,
+    ))
+    batch.add("open_now", select(func.count(POSSession.id).label("open_sessions_now")).where(
+        *session_base_conditions,
+        POSSession.status == POSSessionStatus.OPEN,
+    ))
+    metrics = await batch.execute(db)
+    sales_row = metrics["sales"]
+    returns_row = metrics["returns"]
+    sessions_opened_row = metrics["sessions_opened"]
+    sessions_closed_row = metrics["sessions_closed"]
+    open_now_row = metrics["open_now"]
 
     gross_sales = float(sales_row.gross_sales or 0.0)
     total_refunds = float(returns_row.total_refunds or 0.0)
@@ -243,9 +232,9 @@ async def get_daily_close_summary(
         branch_id=str(branch_id) if branch_id else None,
         sales_count=int(sales_row.sales_count or 0),
         gross_sales=gross_sales,
-        payments_cash=float(payments_row.cash or 0.0),
-        payments_card=float(payments_row.card or 0.0),
-        payments_credit=float(payments_row.credit or 0.0),
+        payments_cash=float(sales_row.cash or 0.0),
+        payments_card=float(sales_row.card or 0.0),
+        payments_credit=float(sales_row.credit or 0.0),
         returns_count=int(returns_row.returns_count or 0),
         total_refunds=total_refunds,
         net_sales=gross_sales - total_refunds,
@@ -430,23 +419,23 @@ async def get_sales_summary(
     branch_id: Optional[uuid.UUID] = None
 ) -> Any:
     """Get daily sales summary."""
-    conditions = get_date_filter(Sale, start_date, end_date, days)
-    conditions.append(Sale.company_id == current_user.company_id)
+    conditions = get_day_filter(SalesDailyRollup, start_date, end_date, days)
+    conditions.append(SalesDailyRollup.company_id == current_user.company_id)
     # Only completed or delivered? Existing code counted all sales. We'll stick to not CANCELLED
-    conditions.append(Sale.status != "CANCELLED")
+    conditions.append(SalesDailyRollup.status != "CANCELLED")
     
     if branch_id:
-        conditions.append(Sale.branch_id == branch_id)
+        conditions.append(SalesDailyRollup.branch_id == branch_id)
         
     query = (
         select(
-            func.date(Sale.created_at).label("date"),
-            func.sum(Sale.total).label("total"),
-            func.count(Sale.id).label("count")
+            SalesDailyRollup.day.label("date"),
+            func.sum(SalesDailyRollup.gross_sales).label("total"),
+            func.sum(SalesDailyRollup.sales_count).label("count")
         )
         .where(*conditions)
-        .group_by(func.date(Sale.created_at))
-        .order_by(func.date(Sale.created_at))
+        .group_by(SalesDailyRollup.day)
+        .order_by(SalesDailyRollup.day)
     )
     
     result = await db.execute(query)
@@ -473,21 +462,21 @@ async def get_top_products(
     branch_id: Optional[uuid.UUID] = None
 ) -> Any:
     """Get top selling products by quantity."""
-    conditions = get_date_filter(Sale, start_date, end_date, days)
-    conditions.append(Sale.company_id == current_user.company_id)
-    conditions.append(Sale.status != "CANCELLED")
+    conditions = get_day_filter(SalesProductDailyRollup, start_date, end_date, days)
+    conditions.append(SalesProductDailyRollup.company_id == current_user.company_id)
+    conditions.append(SalesProductDailyRollup.status != "CANCELLED")
     
     if branch_id:
-        conditions.append(Sale.branch_id == branch_id)
+        conditions.append(SalesProductDailyRollup.branch_id == branch_id)
         
     query = (
         select(
             Product.name,
-            func.sum(SaleItem.quantity).label("quantity"),
-            func.sum(SaleItem.total).label("revenue")
+            func.sum(SalesProductDailyRollup.quantity).label("quantity"),
+            func.sum(SalesProductDailyRollup.revenue).label("revenue")
         )
-        .join(SaleItem.product)
-        .join(SaleItem.sale)
+        .select_from(SalesProductDailyRollup)
+        .join(Product, SalesProductDailyRollup.product_id == Product.id)
         .where(*conditions)
         .group_by(Product.id, Product.name)
         .order_by(desc("quantity"))
@@ -511,26 +500,15 @@ async def get_top_products(
 async def get_inventory_value(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(PermissionChecker("view_reports")),
-    branch_id: Optional[uuid.UUID] = None
+    branch_id: Optional[uuid.UUID] = None,
+    as_of: Optional[date] = None
 ) -> Any:
-    """Get total inventory value and status."""
-    conditions = [Product.company_id == current_user.company_id]
-    if branch_id:
-        conditions.append(Inventory.branch_id == branch_id)
-        
-    query = (
-        select(
-            func.sum(Inventory.quantity).label("total_items"),
-            func.sum(Inventory.quantity * func.coalesce(Product.cost, Product.price, 0.0)).label("total_value"),
-            func.sum(
-                case(
-                    (Inventory.quantity <= Product.min_stock, 1),
-                    else_=0
-                )
-            ).label("low_stock_items")
-        )
-        .join(Product, Inventory.product_id == Product.id)
-        .where(*conditions)
+    """Get total inventory value and status, from the daily inventory snapshots."""
+    latest = branch_totals_as_of(current_user.company_id, as_of or utc_today(), branch_id).subquery()
+    query = select(
+        func.sum(latest.c.quantity).label("total_items"),
+        func.sum(latest.c.catalog_value).label("total_value"),
+        func.sum(latest.c.low_stock_items).label("low_stock_items"),
     )
     
     result = await db.execute(query)
@@ -556,20 +534,18 @@ async def get_financial_summary(
     branch_id: Optional[uuid.UUID] = None
 ) -> Any:
     """Get revenue, costs, and profit."""
-    conditions = get_date_filter(Sale, start_date, end_date, days)
-    conditions.append(Sale.company_id == current_user.company_id)
-    conditions.append(Sale.status != "CANCELLED")
+    conditions = get_day_filter(SalesDailyRollup, start_date, end_date, days)
+    conditions.append(SalesDailyRollup.company_id == current_user.company_id)
+    conditions.append(SalesDailyRollup.status != "CANCELLED")
     
     if branch_id:
-        conditions.append(Sale.branch_id == branch_id)
+        conditions.append(SalesDailyRollup.branch_id == branch_id)
         
     query = (
         select(
-            func.sum(SaleItem.total).label("revenue"),
-            func.sum(SaleItem.quantity * func.coalesce(Product.cost, 0)).label("cost")
+            func.sum(SalesDailyRollup.items_revenue).label("revenue"),
+            func.sum(SalesDailyRollup.items_cost).label("cost")
         )
-        .join(SaleItem.sale)
-        .join(SaleItem.product)
         .where(*conditions)
     )
     
@@ -601,35 +577,32 @@ async def get_inventory_turnover(
     sort_by: str = "highest"
 ) -> Any:
     """Get products with highest/lowest turnover (sales vs stock)."""
-    conditions = get_date_filter(Sale, start_date, end_date, days)
-    conditions.append(Sale.company_id == current_user.company_id)
-    conditions.append(Sale.status != "CANCELLED")
+    conditions = get_day_filter(SalesProductDailyRollup, start_date, end_date, days)
+    conditions.append(SalesProductDailyRollup.company_id == current_user.company_id)
+    conditions.append(SalesProductDailyRollup.status != "CANCELLED")
     
     if branch_id:
-        conditions.append(Sale.branch_id == branch_id)
+        conditions.append(SalesProductDailyRollup.branch_id == branch_id)
         
     sales_subq = (
         select(
-            SaleItem.product_id,
-            func.sum(SaleItem.quantity).label("sold_quantity")
+            SalesProductDailyRollup.product_id,
+            func.sum(SalesProductDailyRollup.quantity).label("sold_quantity")
         )
-        .join(SaleItem.sale)
         .where(*conditions)
-        .group_by(SaleItem.product_id)
+        .group_by(SalesProductDailyRollup.product_id)
         .subquery()
     )
     
-    inv_conditions = [Inventory.company_id == current_user.company_id]
-    if branch_id:
-        inv_conditions.append(Inventory.branch_id == branch_id)
-        
+    # Stock at the end of the period, from the daily inventory snapshots.
+    stock_day = min(end_date.date(), utc_today()) if end_date else utc_today()
+    stock_subq = stock_as_of(current_user.company_id, stock_day, branch_id).subquery()
     inv_subq = (
         select(
-            Inventory.product_id,
-            func.sum(Inventory.quantity).label("total_stock")
+            stock_subq.c.product_id,
+            func.sum(stock_subq.c.quantity).label("total_stock")
         )
-        .where(*inv_conditions)
-        .group_by(Inventory.product_id)
+        .group_by(stock_subq.c.product_id)
         .subquery()
     )
     
@@ -679,21 +652,20 @@ async def get_sales_by_category(
     branch_id: Optional[uuid.UUID] = None
 ) -> Any:
     """Get revenue grouped by category."""
-    conditions = get_date_filter(Sale, start_date, end_date, days)
-    conditions.append(Sale.company_id == current_user.company_id)
-    conditions.append(Sale.status != "CANCELLED")
+    conditions = get_day_filter(SalesProductDailyRollup, start_date, end_date, days)
+    conditions.append(SalesProductDailyRollup.company_id == current_user.company_id)
+    conditions.append(SalesProductDailyRollup.status != "CANCELLED")
     
     if branch_id:
-        conditions.append(Sale.branch_id == branch_id)
+        conditions.append(SalesProductDailyRollup.branch_id == branch_id)
         
     query = (
         select(
             func.coalesce(Category.name, "Sin Categoría").label("category_name"),
-            func.sum(SaleItem.total).label("revenue")
+            func.sum(SalesProductDailyRollup.revenue).label("revenue")
         )
-        .join(SaleItem.sale)
-        .join(SaleItem.product)
-        .outerjoin(Product.category)
+        .select_from(SalesProductDailyRollup)
+        .outerjoin(Category, SalesProductDailyRollup.category_id == Category.id)
         .where(*conditions)
         .group_by(Category.id, Category.name)
         .order_by(desc("revenue"))
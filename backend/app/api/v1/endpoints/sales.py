@@ -1,9 +1,10 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only, selectinload
 
+from app.core import pagination
 from app.core.database import get_db
 from app.models.sale import Sale, SaleItem, SaleStatus, Payment
 from app.models.audit import AuditLog
@@ -22,7 +23,6 @@ from app.core.audit import log_sale_event
 from app.services.inventory_consumption import consume_fifo_lots
 from app.schemas import sale as schemas
 import uuid
-from datetime import datetime
 
 router = APIRouter()
 
@@ -72,32 +72,39 @@ async def _validate_sale_relations(db: AsyncSession, sale_in: schemas.SaleCreate
 
 @router.get("/", response_model=List[schemas.SaleSummary])
 async def read_sales(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    estimate_total: bool = False,
     status: str = None,
-    client_id: str = None,
+    client_id: uuid.UUID = None,
     current_user: User = Depends(PermissionChecker("view_sales")),
 ) -> Any:
     """
-    Retrieve sales orders.
+    Retrieve sales orders, newest first.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next one.
     """
-    query = select(Sale).options(
-        selectinload(Sale.client),
-        selectinload(Sale.user),
-        selectinload(Sale.branch),
-        selectinload(Sale.storefront_order)
-    ).where(
-        Sale.company_id == current_user.company_id
-    ).offset(skip).limit(limit).order_by(Sale.created_at.desc())
-         
+    query = select(Sale).where(Sale.company_id == current_user.company_id)
     if status:
         query = query.where(Sale.status == status)
     if client_id:
-        query = query.where(Sale.client_id == uuid.UUID(client_id))
-        
-    result = await db.execute(query)
-    sales = result.scalars().all()
+        query = query.where(Sale.client_id == client_id)
+
+    result = await db.execute(
+        pagination.keyset(query, Sale.created_at, Sale.id, cursor, limit, skip).options(
+            load_only(*pagination.projection(Sale, schemas.SaleSummary)),
+            selectinload(Sale.client),
+            selectinload(Sale.user),
+            selectinload(Sale.branch),
+            selectinload(Sale.storefront_order),
+        )
+    )
+    sales, next_cursor = pagination.page(result.scalars().all(), limit)
+    total = await pagination.estimate_count(db, query) if estimate_total else None
+    pagination.set_page_headers(response, next_cursor, total)
     return [_prepare_sale_for_response(sale) for sale in sales]
 
 @router.get("/export")
@@ -110,54 +117,10 @@ async def export_sales(
     current_user: User = Depends(PermissionChecker("view_sales")),
 ) -> Any:
     """Export sales to Excel or CSV."""
-    from app.services.export_service import ExportService
+    from app.services.export_definitions import export_response
 
-    query = select(Sale).options(
-        selectinload(Sale.client),
-        selectinload(Sale.user),
-        selectinload(Sale.branch),
-        selectinload(Sale.storefront_order),
-    ).where(Sale.company_id == current_user.company_id).order_by(Sale.created_at.desc())
-
-    if status:
-        query = query.where(Sale.status == status)
-    if date_from:
-        query = query.where(Sale.created_at >= datetime.fromisoformat(date_from))
-    if date_to:
-        query = query.where(Sale.created_at <= datetime.fromisoformat(date_to))
-
-    result = await db.execute(query)
-    sales = result.scalars().all()
-
-    columns = {
-        "order_number": "# Orden",
-        "created_at": "Fecha",
-        "client_name": "Cliente",
-        "branch_name": "Sucursal",
-        "status": "Estado",
-        "subtotal": "Subtotal",
-        "tax_amount": "Impuesto",
-        "total": "Total",
-        "user_name": "Vendedor",
-    }
-
-    rows = []
-    for s in sales:
-        rows.append({
-            "order_number": s.order_number or "",
-            "created_at": s.created_at.strftime("%Y-%m-%d %H:%M") if s.created_at else "",
-            "client_name": s.client.name if s.client else "Consumidor Final",
-            "branch_name": s.branch.name if s.branch else "",
-            "status": s.status or "",
-            "subtotal": float(s.subtotal) if s.subtotal else 0,
-            "tax_amount": float(s.tax_amount) if s.tax_amount else 0,
-            "total": float(s.total) if s.total else 0,
-            "user_name": s.user.full_name if s.user else "",
-        })
-
-    if format == "csv":
-        return ExportService.to_csv_response(rows, columns, filename="ventas")
-    return ExportService.to_excel_response(rows, columns, filename="ventas")
+    filters = {"status": status, "date_from": date_from, "date_to": date_to}
+    return await export_response(db, "sales", current_user.company_id, format, filters)
 
 
 @router.get("/{id}/timeline", response_model=List[schemas.SaleTimelineEvent])
@@ -321,41 +284,39 @@ async def create_sale(
         
         # --- Notification Trigger ---
         from app.models.notification import Notification
-        from app.models.notification_template import NotificationTemplate
-        from app.schemas.notification import NotificationType
-        
-        # 1. Get Template
-        template_result = await db.execute(select(NotificationTemplate).where(NotificationTemplate.code == 'NEW_SALE'))
-        template = template_result.scalars().first()
-        
-        if template and template.is_active:
+        from app.services.notification_templates import template_cache
+
+        # 1. Render the company's compiled template (cached, no per-sale lookup)
+        rendered = await template_cache.render(
+            db,
+            current_user.company_id,
+            "NEW_SALE",
+            {
+                "order_id": str(sale.id)[:8],
+                "amount": f"{sale.total:,.2f}",
+                "user_name": current_user.full_name or current_user.email,
+            },
+        )
+
+        if rendered:
             # 2. Notify all users in the company
             company_users_result = await db.execute(
-                select(User).where(
+                select(User.id).where(
                     User.company_id == current_user.company_id,
                     User.is_active == True,
                     or_(User.role_id.is_not(None), User.is_superuser == True),
                 )
             )
-            company_users = company_users_result.scalars().all()
-            
-            # 3. Format Message
-            title = template.title_template.format(order_id=str(sale.id)[:8])
-            message = template.body_template.format(
-                order_id=str(sale.id)[:8],
-                amount=f"{sale.total:,.2f}",
-                user_name=current_user.full_name or current_user.email
-            )
-            
-            for user in company_users:
-                notification = Notification(
-                    user_id=user.id,
-                    type=template.type, # Use template type
-                    title=title,
-                    message=message,
+            db.add_all([
+                Notification(
+                    user_id=user_id,
+                    type=rendered.type, # Use template type
+                    title=rendered.title,
+                    message=rendered.body,
                     link=f"/sales/view/{sale.id}"
                 )
-                db.add(notification)
+                for user_id in company_users_result.scalars().all()
+            ])
             await db.commit()
         # ----------------------------
         
@@ -721,8 +682,9 @@ async def delete_sale(
     return {"ok": True, "detail": "Venta eliminada"}
 
 
-from fastapi.responses import StreamingResponse
-from app.services.pdf_service import PDFService
+from fastapi.responses import Response
+from app.services.document_renderer import company_snapshot, render_pdf, sale_snapshot
+from app.services.sale_documents import SALE_DOCUMENT_STATUSES
 
 @router.get("/{id}/pdf/{doc_type}")
 async def download_pdf(
@@ -738,18 +700,11 @@ async def download_pdf(
     if doc_type not in ["invoice", "picking", "packing"]:
         raise HTTPException(status_code=400, detail="Invalid document type")
 
+    # Only what the documents print (see document_renderer.sale_snapshot).
     query = select(Sale).options(
-        selectinload(Sale.items).selectinload(SaleItem.product).options(
-            selectinload(Product.images),
-            selectinload(Product.variants),
-            selectinload(Product.brand),
-            selectinload(Product.unit_of_measure),
-            selectinload(Product.purchase_uom),
-            selectinload(Product.category)
-        ),
+        selectinload(Sale.items).selectinload(SaleItem.product),
         selectinload(Sale.client),
         selectinload(Sale.user),
-        selectinload(Sale.branch),
         selectinload(Sale.storefront_order),
     ).where(
         Sale.id == id,
@@ -764,30 +719,22 @@ async def download_pdf(
     _prepare_sale_for_response(sale)
         
     # Validation logic
-    if doc_type == "picking" and sale.status not in [SaleStatus.CONFIRMED, SaleStatus.PICKING, SaleStatus.PACKING, SaleStatus.DISPATCHED]:
+    if doc_type == "picking" and sale.status not in SALE_DOCUMENT_STATUSES["picking"]:
          raise HTTPException(status_code=400, detail="Picking list only available for Confirmed orders")
          
-    if doc_type == "packing" and sale.status not in [SaleStatus.PACKING, SaleStatus.DISPATCHED, SaleStatus.DELIVERED]:
+    if doc_type == "packing" and sale.status not in SALE_DOCUMENT_STATUSES["packing"]:
          raise HTTPException(status_code=400, detail="Packing list only available for Packed orders")
 
     from app.models.company import Company
     result = await db.execute(select(Company).where(Company.id == sale.company_id))
     company = result.scalars().first()
 
-    service = PDFService()
-    
-    if doc_type == "invoice":
-        buffer = service.generate_invoice(sale, company)
-        filename = f"Factura_{str(sale.id)[:8]}.pdf"
-    elif doc_type == "picking":
-        buffer = service.generate_picking(sale, company)
-        filename = f"Picking_{str(sale.id)[:8]}.pdf"
-    elif doc_type == "packing":
-        buffer = service.generate_packing(sale, company)
-        filename = f"Packing_{str(sale.id)[:8]}.pdf"
-        
-    return StreamingResponse(
-        buffer,
+    pdf = await render_pdf(doc_type, sale_snapshot(sale), company_snapshot(company))
+    prefix = {"invoice": "Factura", "picking": "Picking", "packing": "Packing"}[doc_type]
+    filename = f"{prefix}_{str(sale.id)[:8]}.pdf"
+
+    return Response(
+        pdf,
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
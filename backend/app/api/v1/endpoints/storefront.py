@@ -23,6 +23,7 @@ from sqlalchemy.orm.attributes import set_committed_value
 
 from app.core import auth, security
 from app.core.audit import log_sale_event
+from app.core.cache import mark_stale, reference_cache, storefront_tag
 from app.core.database import get_db
 from app.core.permissions import PermissionChecker
 from app.core.plan_limits import PlanLimitChecker
@@ -44,7 +45,16 @@ from app.models.client import Client
 from app.models.storefront_customer import StorefrontCustomerAccount
 from app.models.storefront_newsletter import StorefrontNewsletterSubscription
 from app.services.email import EmailService
+from app.services.image_derivatives import derivatives_for
 from app.services.outbox import enqueue_outbox_event
+from app.services.pricing import channel_price, published_prices, starting_price
+from app.services.reference_cache import (
+    CATALOG,
+    NAVIGATION,
+    PAYMENT_GATEWAYS,
+    SHIPPING,
+    storefront_content_tags,
+)
 from app.models.storefront import (
     PublishedProduct,
     StoreCollection,
@@ -60,6 +70,8 @@ from app.models.storefront import (
 )
 from app.models.storefront_coupon import StorefrontCoupon
 from app.schemas import storefront as schemas
+from app.schemas.import_job import ImportJobOut
+from app.services.import_jobs import IMPORT_EXTENSIONS, request_import
 from app.services.storefront_shipping import (
     calculate_shipping,
     ensure_default_shipping_configuration,
@@ -599,6 +611,22 @@ def _serialize_public_branding(storefront: Storefront, company: Company | None)
     )
 
 
+def _serialize_public_storefront(storefront: Storefront, company: Company | None) -> schemas.PublicStorefront:
+    return schemas.PublicStorefront(
+        id=storefront.id,
+        name=storefront.name,
+        slug=storefront.slug,
+        subdomain=storefront.subdomain,
+        theme_key=storefront.theme_key,
+        theme_settings=storefront.theme_settings or {},
+        checkout_settings=storefront.checkout_settings or {},
+        seo_settings=storefront.seo_settings or {},
+        currency=storefront.currency,
+        language=storefront.language,
+        branding=_serialize_public_branding(storefront, company),
+    )
+
+
 def _serialize_public_account_user(
     account: StorefrontCustomerAccount,
 ) -> schemas.PublicStorefrontAccountUser:
@@ -905,6 +933,8 @@ def _serialize_public_product(
     stock_map: dict[tuple[uuid.UUID, uuid.UUID | None], float] | None = None,
     *,
     compact: bool = False,
+    derivatives: dict[str, list[dict]] | None = None,
+    prices: dict[tuple[uuid.UUID, uuid.UUID | None], float] | None = None,
 ) -> schemas.PublicProduct:
     title = (published_product.custom_title or product.name or "").strip()
     # Catalog cards do not render descriptions. Some provider descriptions
@@ -918,15 +948,15 @@ def _serialize_public_product(
     )
     base_price = float(product.price or 0)
     stock_map = stock_map or {}
+    # Effective prices come from app.services.pricing; rows not loaded by the
+    # caller are computed with the same rule.
+    prices = prices or {}
     variants: list[schemas.PublicProductVariant] = []
     for variant in product.variants or []:
-        raw_variant_price = float(variant.price) if variant.price is not None else base_price + float(variant.price_extra or 0)
-        variant_price = _safe_float(
-            published_product.price_override,
-            raw_variant_price,
+        variant_price = prices.get(
+            (published_product.id, variant.id),
+            channel_price(product, variant, published_product.price_override),
         )
-        if published_product.price_override is not None and base_price:
-            variant_price = float(published_product.price_override) + (raw_variant_price - base_price)
         variant_stock = max(0.0, _safe_float(stock_map.get((product.id, variant.id), 0.0)))
         variants.append(
             schemas.PublicProductVariant(
@@ -944,7 +974,13 @@ def _serialize_public_product(
                 stock_quantity=variant_stock if product.track_inventory else None,
             )
         )
-    price = min((variant.price for variant in variants), default=_safe_float(published_product.price_override, base_price))
+    price = min(
+        (variant.price for variant in variants),
+        default=prices.get(
+            (published_product.id, None),
+            channel_price(product, None, published_product.price_override),
+        ),
+    )
     image_url = published_product.product.image_url or product.image_url
     gallery: list[str] = []
     seen_gallery: set[str] = set()
@@ -978,6 +1014,11 @@ def _serialize_public_product(
         variants=variants,
         image_url=image_url,
         gallery=gallery,
+        image_derivatives={
+            url: (derivatives or {})[url]
+            for url in (image_url, *gallery)
+            if url in (derivatives or {})
+        },
         price=price,
         base_price=base_price,
         compare_at_price=(
@@ -994,18 +1035,14 @@ def _serialize_public_product(
     )
 
 
-def _public_product_starting_price(published_product: PublishedProduct, product: Product) -> float:
-    """Return the lowest sellable variant price used by catalog filters/sort."""
-    base_price = float(product.price or 0)
-    if not product.variants:
-        return _safe_float(published_product.price_override, base_price)
-    prices: list[float] = []
-    for variant in product.variants:
-        raw_price = float(variant.price) if variant.price is not None else base_price + float(variant.price_extra or 0)
-        if published_product.price_override is not None and base_price:
-            raw_price = float(published_product.price_override) + (raw_price - base_price)
-        prices.append(raw_price)
-    return min(prices, default=_safe_float(published_product.price_override, base_price))
+def _public_image_urls(products: list[Product]) -> list[str]:
+    """Primary and gallery image URLs of ``products``, to load their derivatives at once."""
+    return [
+        url
+        for product in products
+        for url in (product.image_url, *(image.image_url for image in product.images or []))
+        if url
+    ]
 
 
 def _normalize_catalog_sort(value: str | None) -> str:
@@ -1415,6 +1452,7 @@ async def _load_checkout_products(
 
     if len(published_map) != len(published_ids):
         raise HTTPException(status_code=400, detail="One or more products are not available in this storefront")
+    prices = await published_prices(db, published_ids)
 
     rows: list[schemas.PublicCheckoutPreviewItem] = []
     subtotal = 0.0
@@ -1438,13 +1476,7 @@ async def _load_checkout_products(
                 variant_id = variant.id
             else:
                 raise HTTPException(status_code=400, detail=f"Selecciona una variante para '{product.name}'")
-        raw_price = (
-            float(variant.price) if variant and variant.price is not None
-            else _safe_float(product.price) + float(variant.price_extra or 0) if variant else _safe_float(product.price)
-        )
-        unit_price = _safe_float(published.price_override, raw_price)
-        if variant and published.price_override is not None and product.price:
-            unit_price = float(published.price_override) + (raw_price - float(product.price))
+        unit_price = prices.get((published.id, variant_id), channel_price(product, variant, published.price_override))
         line_subtotal = unit_price * quantity
         subtotal += line_subtotal
         rows.append(
@@ -2144,6 +2176,7 @@ async def add_product_to_collection(
         )
     )
     existing_link = result.scalars().first()
+    mark_stale(db, *storefront_content_tags(collection.storefront_id, CATALOG))
     if existing_link:
         existing_link.is_active = True
         existing_link.sort_order = link_in.sort_order
@@ -2191,7 +2224,7 @@ async def remove_product_from_collection(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(PermissionChecker("manage_company")),
 ) -> Any:
-    await _get_collection_or_404(db, collection_id, current_user.company_id)
+    collection = await _get_collection_or_404(db, collection_id, current_user.company_id)
     result = await db.execute(
         select(StoreCollectionProduct).where(
             StoreCollectionProduct.collection_id == collection_id,
@@ -2203,6 +2236,7 @@ async def remove_product_from_collection(
     link = result.scalars().first()
     if not link:
         raise HTTPException(status_code=404, detail="Collection product link not found")
+    mark_stale(db, *storefront_content_tags(collection.storefront_id, CATALOG))
     link.is_active = False
     link.updated_by_id = current_user.id
     db.add(link)
@@ -2519,205 +2553,27 @@ async def create_shipping_destination(
     return destination
 
 
-def _normalize_import_column(value: Any) -> str:
-    text = unicodedata.normalize("NFKD", str(value or ""))
-    text = "".join(char for char in text if not unicodedata.combining(char))
-    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
-
-
-def _import_cell_text(value: Any) -> str:
-    if value is None:
-        return ""
-    try:
-        import pandas as pd
-        if pd.isna(value):
-            return ""
-    except (TypeError, ValueError):
-        pass
-    return str(value).strip()
-
-
-def _import_cell_code(value: Any) -> str:
-    text = _import_cell_text(value)
-    if text.endswith(".0") and text[:-2].isdigit():
-        text = text[:-2]
-    return text
-
-
-def _shipping_destination_name_key(value: str | None) -> str:
-    text = unicodedata.normalize("NFKD", str(value or ""))
-    text = "".join(char for char in text if not unicodedata.combining(char))
-    return re.sub(r"\s+", " ", text).strip().casefold()
-
-
-@router.post("/shipping/destinations/import", response_model=dict)
+@router.post("/shipping/destinations/import", response_model=ImportJobOut, status_code=202)
 async def import_shipping_destinations(
     storefront_id: uuid.UUID,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(PermissionChecker("manage_company")),
 ) -> Any:
-    """Import shipping departments/cities from an Excel or CSV file."""
-    await _get_storefront_or_404(db, storefront_id, current_user.company_id)
+    """Queue an import of shipping departments/cities from an Excel or CSV file.
 
-    filename = (file.filename or "").lower()
-    if not filename.endswith((".csv", ".xls", ".xlsx")):
+    The import worker applies the file; follow it with ``GET /imports/{id}``.
+    Large files can be sent in pieces through ``POST /imports/uploads``.
+    """
+    await _get_storefront_or_404(db, storefront_id, current_user.company_id)
+    if not (file.filename or "").lower().endswith(IMPORT_EXTENSIONS):
         raise HTTPException(status_code=400, detail="Formato inválido. Usa un archivo .xlsx, .xls o .csv.")
-
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="El archivo está vacío.")
-    if len(content) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=413, detail="El archivo no puede superar 10 MB.")
-
-    import io
-    import pandas as pd
-
     try:
-        source = io.BytesIO(content)
-        if filename.endswith(".csv"):
-            dataframe = pd.read_csv(source, dtype=object)
-        else:
-            dataframe = pd.read_excel(source, dtype=object)
-    except Exception as exc:
-        raise HTTPException(status_code=422, detail=f"No se pudo leer el archivo: {exc}") from exc
-
-    if dataframe.empty:
-        raise HTTPException(status_code=422, detail="El archivo no contiene filas para importar.")
-    if len(dataframe.index) > 10000:
-        raise HTTPException(status_code=422, detail="El archivo no puede contener más de 10.000 filas.")
-
-    aliases = {
-        "country_code": {"country_code", "codigo_pais", "pais", "country"},
-        "state_code": {"state_code", "department_code", "departamento_codigo", "codigo_departamento", "depto_codigo", "codigo_depto"},
-        "state_name": {"state_name", "department", "departamento", "department_name", "nombre_departamento", "depto", "depto_nombre"},
-        "city_code": {"city_code", "municipality_code", "municipio_codigo", "codigo_municipio", "codigo_ciudad", "city_id"},
-        "city_name": {"city_name", "city", "municipality", "municipio", "ciudad", "nombre_ciudad", "nombre_municipio"},
-        "destination_type": {"destination_type", "tipo_destino", "tipo"},
-        "sort_order": {"sort_order", "orden", "prioridad"},
-    }
-    normalized_columns = {_normalize_import_column(column): column for column in dataframe.columns}
-    selected_columns: dict[str, Any] = {}
-    for field, field_aliases in aliases.items():
-        source_column = next((normalized_columns[alias] for alias in field_aliases if alias in normalized_columns), None)
-        if source_column is not None:
-            selected_columns[field] = source_column
-    if "state_name" not in selected_columns:
-        raise HTTPException(status_code=422, detail="Falta una columna de departamento. Usa state_name o departamento.")
-
-    existing_result = await db.execute(
-        select(StorefrontShippingDestination).where(
-            StorefrontShippingDestination.storefront_id == storefront_id,
-            StorefrontShippingDestination.company_id == current_user.company_id,
+        return await request_import(
+            db, current_user, "shipping_destinations", file, {"storefront_id": str(storefront_id)}
         )
-    )
-    existing_destinations = existing_result.scalars().all()
-    existing_by_code: dict[tuple[str, str, str, str], StorefrontShippingDestination] = {}
-    existing_by_name: dict[tuple[str, str, str, str], StorefrontShippingDestination] = {}
-
-    def add_existing_index(destination: StorefrontShippingDestination) -> None:
-        country = (destination.country_code or "CO").strip().upper()
-        state_code = (destination.state_code or "").strip().casefold()
-        city_code = (destination.city_code or "").strip().casefold()
-        state_name = _shipping_destination_name_key(destination.state_name)
-        city_name = _shipping_destination_name_key(destination.city_name)
-        if state_code or city_code:
-            existing_by_code[(country, state_code, city_code, destination.destination_type)] = destination
-        existing_by_name[(country, state_name, city_name, destination.destination_type)] = destination
-
-    for existing in existing_destinations:
-        add_existing_index(existing)
-
-    created_count = 0
-    updated_count = 0
-    skipped_count = 0
-    errors: list[str] = []
-
-    for index, row in dataframe.iterrows():
-        row_number = int(index) + 2
-        try:
-            def cell(field: str) -> str:
-                return _import_cell_text(row.get(selected_columns[field])) if field in selected_columns else ""
-
-            state_name = cell("state_name")
-            if not state_name:
-                skipped_count += 1
-                continue
-            country_code = _import_cell_code(cell("country_code")) or "CO"
-            country_code = country_code.upper()
-            state_code = _import_cell_code(cell("state_code"))
-            city_code = _import_cell_code(cell("city_code"))
-            city_name = cell("city_name")
-            destination_type = cell("destination_type").casefold()
-            if destination_type in {"departamento", "department", "depto"}:
-                destination_type = "department"
-            elif destination_type in {"ciudad", "city", "municipio", "municipality"}:
-                destination_type = "city"
-            else:
-                destination_type = "city" if city_name or city_code else "department"
-            if destination_type == "department":
-                city_code = ""
-                city_name = ""
-            elif not city_name and not city_code:
-                raise ValueError("una ciudad requiere city_name/ciudad o city_code/codigo_ciudad")
-
-            sort_order_text = cell("sort_order")
-            sort_order = int(float(sort_order_text)) if sort_order_text else 0
-            identity_code = (country_code, state_code.casefold(), city_code.casefold(), destination_type)
-            identity_name = (
-                country_code,
-                _shipping_destination_name_key(state_name),
-                _shipping_destination_name_key(city_name),
-                destination_type,
-            )
-            destination = existing_by_code.get(identity_code) if (state_code or city_code) else None
-            destination = destination or existing_by_name.get(identity_name)
-            if destination:
-                destination.country_code = country_code
-                destination.state_code = state_code or None
-                destination.state_name = state_name
-                destination.city_code = city_code or None
-                destination.city_name = city_name or None
-                destination.destination_type = destination_type
-                destination.sort_order = sort_order
-                destination.is_active = True
-                destination.updated_by_id = current_user.id
-                updated_count += 1
-            else:
-                destination = StorefrontShippingDestination(
-                    storefront_id=storefront_id,
-                    company_id=current_user.company_id,
-                    created_by_id=current_user.id,
-                    updated_by_id=current_user.id,
-                    country_code=country_code,
-                    state_code=state_code or None,
-                    state_name=state_name,
-                    city_code=city_code or None,
-                    city_name=city_name or None,
-                    destination_type=destination_type,
-                    sort_order=sort_order,
-                )
-                db.add(destination)
-                created_count += 1
-            add_existing_index(destination)
-        except (TypeError, ValueError, OverflowError) as exc:
-            errors.append(f"Fila {row_number}: {exc}")
-
-    try:
-        await db.commit()
-    except IntegrityError as exc:
-        await db.rollback()
-        raise HTTPException(status_code=409, detail="El archivo contiene destinos duplicados o datos en conflicto.") from exc
-
-    return {
-        "success": True,
-        "count": created_count + updated_count,
-        "created": created_count,
-        "updated": updated_count,
-        "skipped": skipped_count,
-        "error_count": len(errors),
-        "errors": errors[:100],
-    }
+    except ValueError:
+        raise HTTPException(status_code=413, detail="El archivo es demasiado grande. Súbelo por partes.")
 
 
 @router.put("/shipping/destinations/{destination_id}", response_model=schemas.StorefrontShippingDestination)
@@ -2925,19 +2781,7 @@ async def read_public_storefront_by_subdomain(
 ) -> Any:
     storefront = await _get_public_storefront_by_subdomain(db, subdomain)
     company = await _get_company_for_storefront(db, storefront)
-    return schemas.PublicStorefront(
-        id=storefront.id,
-        name=storefront.name,
-        slug=storefront.slug,
-        subdomain=storefront.subdomain,
-        theme_key=storefront.theme_key,
-        theme_settings=storefront.theme_settings or {},
-        checkout_settings=storefront.checkout_settings or {},
-        seo_settings=storefront.seo_settings or {},
-        currency=storefront.currency,
-        language=storefront.language,
-        branding=_serialize_public_branding(storefront, company),
-    )
+    return _serialize_public_storefront(storefront, company)
 
 
 @router.get("/public/by-domain/{domain}", response_model=schemas.PublicStorefront)
@@ -2947,19 +2791,7 @@ async def read_public_storefront_by_domain(
 ) -> Any:
     storefront = await _get_public_storefront_by_domain(db, domain)
     company = await _get_company_for_storefront(db, storefront)
-    return schemas.PublicStorefront(
-        id=storefront.id,
-        name=storefront.name,
-        slug=storefront.slug,
-        subdomain=storefront.subdomain,
-        theme_key=storefront.theme_key,
-        theme_settings=storefront.theme_settings or {},
-        checkout_settings=storefront.checkout_settings or {},
-        seo_settings=storefront.seo_settings or {},
-        currency=storefront.currency,
-        language=storefront.language,
-        branding=_serialize_public_branding(storefront, company),
-    )
+    return _serialize_public_storefront(storefront, company)
 
 
 @router.get("/public/certificate-authorization")
@@ -2987,20 +2819,13 @@ async def read_public_storefront(
     storefront_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ) -> Any:
-    storefront = await _get_public_storefront_by_id(db, storefront_id)
-    company = await _get_company_for_storefront(db, storefront)
-    return schemas.PublicStorefront(
-        id=storefront.id,
-        name=storefront.name,
-        slug=storefront.slug,
-        subdomain=storefront.subdomain,
-        theme_key=storefront.theme_key,
-        theme_settings=storefront.theme_settings or {},
-        checkout_settings=storefront.checkout_settings or {},
-        seo_settings=storefront.seo_settings or {},
-        currency=storefront.currency,
-        language=storefront.language,
-        branding=_serialize_public_branding(storefront, company),
+    async def load() -> dict:
+        storefront = await _get_public_storefront_by_id(db, storefront_id)
+        company = await _get_company_for_storefront(db, storefront)
+        return _serialize_public_storefront(storefront, company).model_dump(mode="json")
+
+    return await reference_cache.get_or_load(
+        f"storefront:{storefront_id}:public", [storefront_tag(storefront_id)], load
     )
 
 
@@ -3009,26 +2834,33 @@ async def read_public_shipping_config(
     storefront_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ) -> Any:
-    storefront = await _get_public_storefront_by_id(db, storefront_id)
-    created = await ensure_default_shipping_configuration(db, storefront)
-    if created:
-        await db.commit()
-    destinations_result = await db.execute(
-        select(StorefrontShippingDestination).where(
-            StorefrontShippingDestination.storefront_id == storefront.id,
-            StorefrontShippingDestination.is_active == True,
-        ).order_by(StorefrontShippingDestination.sort_order.asc(), StorefrontShippingDestination.state_name.asc(), StorefrontShippingDestination.city_name.asc())
-    )
-    methods_result = await db.execute(
-        select(StorefrontShippingMethod).where(
-            StorefrontShippingMethod.storefront_id == storefront.id,
-            StorefrontShippingMethod.is_active == True,
-            StorefrontShippingMethod.is_enabled == True,
-        ).order_by(StorefrontShippingMethod.sort_order.asc(), StorefrontShippingMethod.name.asc())
-    )
-    return schemas.PublicShippingConfig(
-        destinations=[schemas.PublicShippingDestination.model_validate(item) for item in destinations_result.scalars().all()],
-        methods=[schemas.PublicShippingMethod.model_validate(item) for item in methods_result.scalars().all()],
+    async def load() -> dict:
+        storefront = await _get_public_storefront_by_id(db, storefront_id)
+        created = await ensure_default_shipping_configuration(db, storefront)
+        if created:
+            await db.commit()
+        destinations_result = await db.execute(
+            select(StorefrontShippingDestination).where(
+                StorefrontShippingDestination.storefront_id == storefront.id,
+                StorefrontShippingDestination.is_active == True,
+            ).order_by(StorefrontShippingDestination.sort_order.asc(), StorefrontShippingDestination.state_name.asc(), StorefrontShippingDestination.city_name.asc())
+        )
+        methods_result = await db.execute(
+            select(StorefrontShippingMethod).where(
+                StorefrontShippingMethod.storefront_id == storefront.id,
+                StorefrontShippingMethod.is_active == True,
+                StorefrontShippingMethod.is_enabled == True,
+            ).order_by(StorefrontShippingMethod.sort_order.asc(), StorefrontShippingMethod.name.asc())
+        )
+        return schemas.PublicShippingConfig(
+            destinations=[schemas.PublicShippingDestination.model_validate(item) for item in destinations_result.scalars().all()],
+            methods=[schemas.PublicShippingMethod.model_validate(item) for item in methods_result.scalars().all()],
+        ).model_dump(mode="json")
+
+    return await reference_cache.get_or_load(
+        f"storefront:{storefront_id}:shipping-config",
+        [storefront_tag(storefront_id), storefront_tag(storefront_id, SHIPPING)],
+        load,
     )
 
 
@@ -3435,26 +3267,33 @@ async def read_public_navigation(
     storefront_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ) -> Any:
-    await _get_public_storefront_by_id(db, storefront_id)
-    result = await db.execute(
-        select(StoreNavigationItem).where(
-            StoreNavigationItem.storefront_id == storefront_id,
-            StoreNavigationItem.is_active == True,
-            StoreNavigationItem.is_visible == True,
-        ).order_by(StoreNavigationItem.sort_order.asc(), StoreNavigationItem.created_at.asc())
-    )
-    return [
-        schemas.PublicStoreNavigationItem(
-            id=item.id,
-            parent_id=item.parent_id,
-            label=item.label,
-            item_type=item.item_type,
-            reference_id=item.reference_id,
-            url=item.url,
-            sort_order=item.sort_order,
+    async def load() -> list[dict]:
+        await _get_public_storefront_by_id(db, storefront_id)
+        result = await db.execute(
+            select(StoreNavigationItem).where(
+                StoreNavigationItem.storefront_id == storefront_id,
+                StoreNavigationItem.is_active == True,
+                StoreNavigationItem.is_visible == True,
+            ).order_by(StoreNavigationItem.sort_order.asc(), StoreNavigationItem.created_at.asc())
         )
-        for item in result.scalars().all()
-    ]
+        return [
+            schemas.PublicStoreNavigationItem(
+                id=item.id,
+                parent_id=item.parent_id,
+                label=item.label,
+                item_type=item.item_type,
+                reference_id=item.reference_id,
+                url=item.url,
+                sort_order=item.sort_order,
+            ).model_dump(mode="json")
+            for item in result.scalars().all()
+        ]
+
+    return await reference_cache.get_or_load(
+        f"storefront:{storefront_id}:navigation",
+        [storefront_tag(storefront_id), storefront_tag(storefront_id, NAVIGATION)],
+        load,
+    )
 
 
 @router.get("/public/{storefront_id}/payment-gateways", response_model=List[schemas.PublicStorePaymentGateway])
@@ -3462,34 +3301,41 @@ async def read_public_payment_gateways(
     storefront_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ) -> Any:
-    await _get_public_storefront_by_id(db, storefront_id)
-    result = await db.execute(
-        select(StorePaymentGateway).where(
-            StorePaymentGateway.storefront_id == storefront_id,
-            StorePaymentGateway.is_active == True,
-            StorePaymentGateway.is_enabled == True,
-            StorePaymentGateway.provider.in_(SUPPORTED_PUBLIC_PAYMENT_PROVIDERS),
-        ).order_by(StorePaymentGateway.sort_order.asc(), StorePaymentGateway.display_name.asc())
-    )
-    gateways = result.scalars().all()
-    return [
-        schemas.PublicStorePaymentGateway(
-            id=gateway.id,
-            provider=gateway.provider,
-            display_name=gateway.display_name,
-            is_sandbox=gateway.is_sandbox,
-            sort_order=gateway.sort_order,
-            checkout_flow=_gateway_checkout_flow(gateway.provider, gateway.extra_config or {}),
-            public_config={
-                "redirect_url": (gateway.extra_config or {}).get("redirect_url"),
-                "checkout_url": (gateway.extra_config or {}).get("checkout_url"),
-                "checkout_icon_url": (gateway.extra_config or {}).get("checkout_icon_url"),
-                "checkout_description": (gateway.extra_config or {}).get("checkout_description"),
-                "checkout_accent": (gateway.extra_config or {}).get("checkout_accent"),
-            },
+    async def load() -> list[dict]:
+        await _get_public_storefront_by_id(db, storefront_id)
+        result = await db.execute(
+            select(StorePaymentGateway).where(
+                StorePaymentGateway.storefront_id == storefront_id,
+                StorePaymentGateway.is_active == True,
+                StorePaymentGateway.is_enabled == True,
+                StorePaymentGateway.provider.in_(SUPPORTED_PUBLIC_PAYMENT_PROVIDERS),
+            ).order_by(StorePaymentGateway.sort_order.asc(), StorePaymentGateway.display_name.asc())
         )
-        for gateway in gateways
-    ]
+        gateways = result.scalars().all()
+        return [
+            schemas.PublicStorePaymentGateway(
+                id=gateway.id,
+                provider=gateway.provider,
+                display_name=gateway.display_name,
+                is_sandbox=gateway.is_sandbox,
+                sort_order=gateway.sort_order,
+                checkout_flow=_gateway_checkout_flow(gateway.provider, gateway.extra_config or {}),
+                public_config={
+                    "redirect_url": (gateway.extra_config or {}).get("redirect_url"),
+                    "checkout_url": (gateway.extra_config or {}).get("checkout_url"),
+                    "checkout_icon_url": (gateway.extra_config or {}).get("checkout_icon_url"),
+                    "checkout_description": (gateway.extra_config or {}).get("checkout_description"),
+                    "checkout_accent": (gateway.extra_config or {}).get("checkout_accent"),
+                },
+            ).model_dump(mode="json")
+            for gateway in gateways
+        ]
+
+    return await reference_cache.get_or_load(
+        f"storefront:{storefront_id}:payment-gateways",
+        [storefront_tag(storefront_id), storefront_tag(storefront_id, PAYMENT_GATEWAYS)],
+        load,
+    )
 
 
 @router.get("/public/{storefront_id}/collections", response_model=List[schemas.PublicCollection])
@@ -3557,6 +3403,11 @@ async def read_public_collection_detail(
         [link.published_product.product_id for link in links if link.published_product and link.published_product.product],
     )
 
+    derivatives = await derivatives_for(db, _public_image_urls(
+        [link.published_product.product for link in links if link.published_product and link.published_product.product]
+    ))
+    prices = await published_prices(db, (link.published_product_id for link in links))
+
     products: list[schemas.PublicProduct] = []
     for link in links:
         published_product = link.published_product
@@ -3573,6 +3424,8 @@ async def read_public_collection_detail(
                 published_product,
                 published_product.product,
                 stock_map,
+                derivatives=derivatives,
+                prices=prices,
             )
         )
     return schemas.PublicCollection(
@@ -3673,7 +3526,7 @@ async def read_public_products(
         # select-in loading here used to fan out into dozens of 500-row
         # queries for a 3k-product catalog. Variants, brands, categories and
         # collection links are loaded in one compact query each below.
-        select(PublishedProduct, Product)
+        select(PublishedProduct, Product, starting_price())
         .options(
             load_only(*published_product_columns),
             load_only(*product_columns),
@@ -3687,9 +3540,9 @@ async def read_public_products(
         )
     )
     # Apply the inexpensive, index-backed filters before loading variants and
-    # collections. The remaining facet filters (size, color and effective
-    # variant price) still run in Python because they depend on JSON variant
-    # attributes and storefront overrides.
+    # collections. The remaining facet filters (size, color and price) still
+    # run in Python over the loaded rows; the lowest effective price of each
+    # publication comes precomputed with them.
     if selected_categories:
         published_query = published_query.where(Product.category_id.in_(selected_categories))
     if selected_types:
@@ -3738,13 +3591,15 @@ async def read_public_products(
     published_rows = published_result.all()
     published_products: list[PublishedProduct] = []
     products_by_id: dict[uuid.UUID, Product] = {}
-    for published_product, product in published_rows:
+    starting_prices: dict[uuid.UUID, float | None] = {}
+    for published_product, product, lowest_price in published_rows:
         # Attach the already selected product without marking the relationship
         # dirty. This keeps the existing serializer API while avoiding lazy
         # queries during facet calculation.
         set_committed_value(published_product, "product", product)
         published_products.append(published_product)
         products_by_id[product.id] = product
+        starting_prices[published_product.id] = lowest_price
 
     product_ids = list(products_by_id)
     variant_by_product: dict[uuid.UUID, list[ProductVariant]] = {}
@@ -3840,7 +3695,14 @@ async def read_public_products(
             "brand_name": brand_name,
             "brand_normalized": _normalize_catalog_text(brand_name),
             "product_type": (product.product_type or "").upper(),
-            "unit_price": _public_product_starting_price(published_product, product),
+            "unit_price": (
+                starting_prices[published_product.id]
+                if starting_prices.get(published_product.id) is not None
+                else min(
+                    channel_price(product, variant, published_product.price_override)
+                    for variant in product.variants or [None]
+                )
+            ),
             "search_values": (
                 _normalize_catalog_text(product.name),
                 _normalize_catalog_text(published_product.custom_title),
@@ -4062,6 +3924,11 @@ async def read_public_products(
         if slug_value in collection_name_map
     ) or None
 
+    derivatives = await derivatives_for(db, _public_image_urls(
+        [published_product.product for published_product in paginated_products if published_product.product]
+    ))
+    prices = await published_prices(db, (published_product.id for published_product in paginated_products))
+
     return schemas.PublicCatalogResponse(
         items=[
             _serialize_public_product(
@@ -4069,6 +3936,8 @@ async def read_public_products(
                 published_product.product,
                 stock_map,
                 compact=True,
+                derivatives=derivatives,
+                prices=prices,
             )
             for published_product in paginated_products
             if published_product.product
@@ -4143,10 +4012,13 @@ async def read_public_product_detail(
     storefront = await _get_public_storefront_by_id(db, storefront_id)
     published_product = await _get_public_published_product_or_404(db, storefront_id, slug)
     stock_map = await _get_storefront_stock_map(db, storefront, [published_product.product_id])
+    derivatives = await derivatives_for(db, _public_image_urls([published_product.product]))
     return _serialize_public_product(
         published_product,
         published_product.product,
         stock_map,
+        derivatives=derivatives,
+        prices=await published_prices(db, [published_product.id]),
     )
 
 
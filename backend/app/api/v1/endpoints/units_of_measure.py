@@ -9,6 +9,8 @@ from app.models.product import Product
 from app.models.user import User
 from app.core.permissions import PermissionChecker
 from app.core.audit import log_activity
+from app.core.cache import reference_cache, tenant_tag
+from app.services.reference_cache import UNITS
 from app.schemas import unit_of_measure as schemas
 
 router = APIRouter()
@@ -18,12 +20,17 @@ async def list_units(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(PermissionChecker("view_products")),
 ) -> Any:
-    query = select(UnitOfMeasure).where(
-        UnitOfMeasure.company_id == current_user.company_id,
-        UnitOfMeasure.is_active == True
+    async def load() -> list[dict]:
+        query = select(UnitOfMeasure).where(
+            UnitOfMeasure.company_id == current_user.company_id,
+            UnitOfMeasure.is_active == True
+        )
+        result = await db.execute(query)
+        return [schemas.UnitOfMeasure.model_validate(unit).model_dump(mode="json") for unit in result.scalars().all()]
+
+    return await reference_cache.get_or_load(
+        f"company:{current_user.company_id}:units", [tenant_tag(current_user.company_id, UNITS)], load
     )
-    result = await db.execute(query)
-    return result.scalars().all()
 
 @router.post("/", response_model=schemas.UnitOfMeasure)
 async def create_unit(
@@ -7,9 +7,13 @@ import uuid
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from PIL import Image, UnidentifiedImageError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import get_db
 from app.models.user import User
 from app.core.permissions import PermissionChecker
+from app.services.asset_store import store_asset
+from app.services.image_derivatives import ensure_derivatives
 
 router = APIRouter()
 
@@ -57,13 +61,23 @@ def validated_image_extension(content: bytes) -> str:
         )
     return extension
 
-async def _save_image_upload(file: UploadFile) -> dict[str, str]:
-    """Validate and persist an image in the shared static asset volume."""
+async def _save_image_upload(file: UploadFile, db: AsyncSession | None = None) -> dict[str, Any]:
+    """Validate and persist an image in the shared static asset volume.
+
+    With ``db`` (catalog images) the image goes to the content-addressed
+    asset store, so re-uploading it reuses the stored file, and its
+    thumbnails and WebP/AVIF copies are returned under ``derivatives``.
+    """
     try:
         content = await file.read(MAX_IMAGE_BYTES + 1)
         file_ext = validated_image_extension(content)
+        if db is not None:
+            url = await store_asset(db, content, file_ext)
+            derivatives = await ensure_derivatives(db, {url: content})
+            await db.commit()
+            return {"url": url, "derivatives": derivatives.get(url, [])}
+
         file_name = f"{uuid.uuid4()}{file_ext}"
-        
         upload_dir = Path(__file__).resolve().parents[4] / "static" / "uploads"
         upload_dir.mkdir(parents=True, exist_ok=True)
         file_path = upload_dir / file_name
@@ -80,7 +94,7 @@ async def _save_image_upload(file: UploadFile) -> dict[str, str]:
             if os.path.exists(temporary_path):
                 os.unlink(temporary_path)
             raise
-            
+
         # A root-relative URL preserves HTTPS on admin and storefront domains.
         return {"url": f"/static/uploads/{file_name}"}
     except HTTPException:
@@ -94,16 +108,17 @@ async def _save_image_upload(file: UploadFile) -> dict[str, str]:
 @router.post("/", response_model=dict)
 async def upload_file(
     file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(PermissionChecker("manage_inventory")), # Or any authenticated user
 ) -> Any:
     """Upload a catalog image and return its URL."""
-    return await _save_image_upload(file)
+    return await _save_image_upload(file, db)
 
 
 @router.post("/storefront-logo", response_model=dict)
 async def upload_storefront_logo(
     file: UploadFile = File(...),
     current_user: User = Depends(PermissionChecker("manage_company")),
-) -> dict[str, str]:
+) -> dict[str, Any]:
     """Upload a storefront logo for users who manage company branding."""
     return await _save_image_upload(file)
@@ -121,25 +121,20 @@ async def create_user(
 
         # --- Welcome Notification ---
         from app.models.notification import Notification
-        from app.models.notification_template import NotificationTemplate
-        from app.schemas.notification import NotificationType
-        
-        # 1. Get Template
-        template_result = await db.execute(select(NotificationTemplate).where(NotificationTemplate.code == 'WELCOME'))
-        template = template_result.scalars().first()
-        
-        if template and template.is_active:
-             # 3. Format Message
-            title = template.title_template
-            message = template.body_template.format(
-                user_name=user.full_name or 'Usuario'
-            )
-            
+        from app.services.notification_templates import template_cache
+
+        rendered = await template_cache.render(
+            db,
+            user.company_id,
+            "WELCOME",
+            {"user_name": user.full_name or 'Usuario'},
+        )
+        if rendered:
             notification = Notification(
                 user_id=user.id,
-                type=template.type,
-                title=title,
-                message=message,
+                type=rendered.type,
+                title=rendered.title,
+                message=rendered.body,
                 link="/dashboard"
             )
             db.add(notification)
@@ -5,12 +5,14 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import mark_stale, reference_cache, tenant_tag
 from app.core.database import get_db
 from app.core.permissions import PermissionChecker
 from app.models.branch import Branch
 from app.models.user import User
 from app.models.warehouse import Warehouse
 from app.schemas import warehouse as schemas
+from app.services.reference_cache import WAREHOUSES
 
 router = APIRouter()
 
@@ -26,10 +28,18 @@ async def _get_warehouse(db: AsyncSession, warehouse_id: UUID, company_id: UUID)
 
 @router.get("/", response_model=List[schemas.Warehouse])
 async def list_warehouses(branch_id: UUID | None = None, db: AsyncSession = Depends(get_db), current_user: User = Depends(PermissionChecker("view_inventory"))):
-    query = select(Warehouse).join(Branch).where(Branch.company_id == current_user.company_id, Warehouse.is_active.is_(True))
-    if branch_id:
-        query = query.where(Warehouse.branch_id == branch_id)
-    return (await db.execute(query.order_by(Warehouse.is_default.desc(), Warehouse.name))).scalars().all()
+    async def load() -> list[dict]:
+        query = select(Warehouse).join(Branch).where(Branch.company_id == current_user.company_id, Warehouse.is_active.is_(True))
+        if branch_id:
+            query = query.where(Warehouse.branch_id == branch_id)
+        warehouses = (await db.execute(query.order_by(Warehouse.is_default.desc(), Warehouse.name))).scalars().all()
+        return [schemas.Warehouse.model_validate(warehouse).model_dump(mode="json") for warehouse in warehouses]
+
+    return await reference_cache.get_or_load(
+        f"company:{current_user.company_id}:warehouses:{branch_id or 'all'}",
+        [tenant_tag(current_user.company_id, WAREHOUSES)],
+        load,
+    )
 
 
 @router.post("/", response_model=schemas.Warehouse)
@@ -42,6 +52,7 @@ async def create_warehouse(data: schemas.WarehouseCreate, db: AsyncSession = Dep
         raise HTTPException(status_code=409, detail="El código de bodega ya existe en esta sucursal")
     if data.is_default:
         await db.execute(update(Warehouse).where(Warehouse.branch_id == branch.id).values(is_default=False))
+        mark_stale(db, tenant_tag(current_user.company_id, WAREHOUSES))
     warehouse = Warehouse(**data.model_dump(exclude={"code"}), code=code, company_id=current_user.company_id, created_by_id=current_user.id, updated_by_id=current_user.id)
     db.add(warehouse)
     await db.commit()
@@ -57,6 +68,7 @@ async def update_warehouse(warehouse_id: UUID, data: schemas.WarehouseUpdate, db
         changes["code"] = changes["code"].strip().upper()
     if changes.get("is_default"):
         await db.execute(update(Warehouse).where(Warehouse.branch_id == warehouse.branch_id, Warehouse.id != warehouse.id).values(is_default=False))
+        mark_stale(db, tenant_tag(current_user.company_id, WAREHOUSES))
     for field, value in changes.items():
         setattr(warehouse, field, value)
     warehouse.updated_by_id = current_user.id
@@ -0,0 +1,265 @@
+"""
+Two-tier cache for tenant reference data.
+
+Reads go to a bounded in-process LRU first and to Redis second; only a miss in
+both runs the loader (usually one Postgres query). Every entry carries tags
+such as ``company:<id>:brands`` or ``storefront:<id>:shipping``.
+
+Invalidating a tag bumps its version in Redis, so Redis entries stored under
+an older version are ignored, and appends the tag to an invalidation stream
+that every process reads (at most every ``CACHE_INVALIDATION_CHECK_SECONDS``)
+to drop its own LRU entries.
+
+Writers either call :func:`mark_stale` on their session, or register a model
+with :func:`register_cache_tags` so ORM inserts, updates and deletes are
+tagged automatically. Either way the invalidation is published from the
+session's ``after_commit`` hook, so a rolled back write never evicts anything.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import discard_on_rollback
+from app.core.lru import LRUCache
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "lumefy:cache"
+INVALIDATION_STREAM = f"{KEY_PREFIX}:invalidations"
+INVALIDATION_STREAM_MAXLEN = 10000
+_SESSION_TAGS = "cache_stale_tags"
+_MISSING = object()
+
+
+def tenant_tag(company_id: uuid.UUID | str, name: str) -> str:
+    return f"company:{company_id}:{name}"
+
+
+def storefront_tag(storefront_id: uuid.UUID | str, name: Optional[str] = None) -> str:
+    return f"storefront:{storefront_id}:{name}" if name else f"storefront:{storefront_id}"
+
+
+def _tag_key(tag: str) -> str:
+    return f"{KEY_PREFIX}:tag:{tag}"
+
+
+def _entry_key(key: str) -> str:
+    return f"{KEY_PREFIX}:entry:{key}"
+
+
+class TieredCache:
+    """Process LRU in front of Redis, with tag-versioned invalidation.
+
+    Values must be JSON serializable. Redis failures degrade to the loader, so
+    the cache never makes a request fail.
+    """
+
+    def __init__(
+        self,
+        *,
+        local_max_entries: int = 4096,
+        local_ttl_seconds: float = 60,
+        ttl_seconds: int = 600,
+        check_interval_seconds: float = 1,
+        enabled: bool = True,
+    ) -> None:
+        self._local: LRUCache[str, Any] = LRUCache(
+            local_max_entries, ttl_seconds=local_ttl_seconds, on_evict=lambda key, _value: self._forget(key)
+        )
+        # Both indexes only hold keys present in the LRU, so they are bounded with it.
+        self._keys_by_tag: dict[str, set[str]] = {}
+        self._tags_by_key: dict[str, tuple[str, ...]] = {}
+        self.ttl_seconds = ttl_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.enabled = enabled
+        self._stream_id: Optional[str] = None
+        self._checked_at = float("-inf")
+
+    async def get_or_load(
+        self,
+        key: str,
+        tags: Iterable[str],
+        loader: Callable[[], Awaitable[Any]],
+        *,
+        ttl_seconds: Optional[int] = None,
+    ) -> Any:
+        if not self.enabled:
+            return await loader()
+        tags = sorted(set(tags))
+        await self._sync_invalidations()
+        local = self._local.get(key, _MISSING)
+        if local is not _MISSING:
+            return local
+
+        versions: Optional[list[str]] = None
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.get(_entry_key(key))
+                pipe.mget([_tag_key(tag) for tag in tags])
+                raw, current = await pipe.execute()
+            versions = [version or "0" for version in current]
+            if raw:
+                stored = json.loads(raw)
+                if stored.get("tags") == dict(zip(tags, versions)):
+                    self._remember(key, tags, stored["value"], ttl_seconds)
+                    return stored["value"]
+        except Exception:  # noqa: BLE001 - fall through to the database
+            logger.debug("Cache read failed for %s", key, exc_info=True)
+
+        # Versions are read before loading: if a tag is invalidated while the
+        # loader runs, the stored entry is already outdated and never served.
+        value = await loader()
+        self._remember(key, tags, value, ttl_seconds)
+        if versions is not None:
+            entry = json.dumps({"tags": dict(zip(tags, versions)), "value": value}, default=str)
+            try:
+                await get_redis().set(_entry_key(key), entry, ex=ttl_seconds or self.ttl_seconds)
+            except Exception:  # noqa: BLE001
+                logger.debug("Cache write failed for %s", key, exc_info=True)
+        return value
+
+    async def tag_versions(self, tags: list[str]) -> list[str]:
+        """Current versions of ``tags`` ("0" if never invalidated). Raises if Redis is down."""
+        return [version or "0" for version in await get_redis().mget([_tag_key(tag) for tag in tags])]
+
+    def _remember(self, key: str, tags: list[str], value: Any, ttl_seconds: Optional[int] = None) -> None:
+        # An entry shorter-lived than the local TTL expires here no later than in Redis.
+        local_ttl = self._local.ttl_seconds
+        if ttl_seconds and (not local_ttl or ttl_seconds < local_ttl):
+            local_ttl = ttl_seconds
+        self._forget(key)
+        self._local.set(key, value, ttl_seconds=local_ttl)
+        self._tags_by_key[key] = tuple(tags)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+
+    def _forget(self, key: str) -> None:
+        for tag in self._tags_by_key.pop(key, ()):
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def evict_local(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._local.pop(key)
+                self._forget(key)
+
+    def clear_local(self) -> None:
+        self._local.clear()
+        self._keys_by_tag.clear()
+        self._tags_by_key.clear()
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        """Invalidate ``tags`` here and, through Redis, in every other process."""
+        tags = sorted(set(tags))
+        if not tags:
+            return
+        self.evict_local(tags)
+        if not self.enabled:
+            return
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(_tag_key(tag))
+                pipe.xadd(
+                    INVALIDATION_STREAM,
+                    {"tags": " ".join(tags)},
+                    maxlen=INVALIDATION_STREAM_MAXLEN,
+                    approximate=True,
+                )
+                await pipe.execute()
+        except Exception:  # noqa: BLE001 - other processes fall back to the local TTL
+            logger.warning("Could not publish cache invalidation for %s", tags, exc_info=True)
+
+    async def _sync_invalidations(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval_seconds:
+            return
+        self._checked_at = now
+        try:
+            client = get_redis()
+            if self._stream_id is None:
+                latest = await client.xrevrange(INVALIDATION_STREAM, count=1)
+                self._stream_id = latest[0][0] if latest else "0-0"
+                return
+            batch = 500
+            response = await client.xread({INVALIDATION_STREAM: self._stream_id}, count=batch)
+        except Exception:  # noqa: BLE001 - the local TTL still bounds staleness
+            logger.debug("Cache invalidation check failed", exc_info=True)
+            return
+        entries = [entry for _stream, stream_entries in response or [] for entry in stream_entries]
+        if not entries:
+            return
+        self._stream_id = entries[-1][0]
+        if len(entries) >= batch:
+            # Too far behind to replay tag by tag.
+            self.clear_local()
+            return
+        for _entry_id, fields in entries:
+            self.evict_local((fields.get("tags") or "").split())
+
+
+reference_cache = TieredCache(
+    local_max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    local_ttl_seconds=settings.CACHE_LOCAL_TTL_SECONDS,
+    ttl_seconds=settings.CACHE_TTL_SECONDS,
+    check_interval_seconds=settings.CACHE_INVALIDATION_CHECK_SECONDS,
+    enabled=settings.CACHE_ENABLED,
+)
+
+_tag_functions: dict[type, list[Callable[[Any], Iterable[str]]]] = {}
+_pending_tasks: set[asyncio.Task] = set()
+
+
+def register_cache_tags(model: type, tags: Callable[[Any], Iterable[str]]) -> None:
+    """Invalidate ``tags(instance)`` whenever a ``model`` row is committed.
+
+    A model may be registered several times; every function's tags are invalidated.
+    """
+    _tag_functions.setdefault(model, []).append(tags)
+
+
+def mark_stale(db: AsyncSession | Session, *tags: str) -> None:
+    """Invalidate ``tags`` once the session commits (e.g. after bulk statements)."""
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    session.info.setdefault(_SESSION_TAGS, set()).update(tag for tag in tags if tag)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_model_tags(session: Session, _flush_context) -> None:
+    if not _tag_functions:
+        return
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        for tags in _tag_functions.get(type(instance), ()):
+            mark_stale(session, *tags(instance))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_stale_tags(session: Session) -> None:
+    tags = session.info.pop(_SESSION_TAGS, None)
+    if not tags:
+        return
+    # Local entries go now, so this process reads its own writes immediately.
+    reference_cache.evict_local(tags)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(reference_cache.invalidate(tags))
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
+
+
+discard_on_rollback(_SESSION_TAGS)
@@ -47,6 +47,82 @@ class Settings(BaseSettings):
     INTEGRATION_RETRY_MAX_SECONDS: float = Field(default=8, ge=0, le=60)
     INTEGRATION_MAX_RESPONSE_BYTES: int = Field(default=20 * 1024 * 1024, ge=1024, le=100 * 1024 * 1024)
     
+    # Shared cache/counter store. Workers read the same variable directly.
+    REDIS_URL: str = "redis://redis:6379/0"
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = Field(default=0.5, gt=0, le=10)
+
+    # Reference-data cache: a per-process LRU in front of Redis. Local entries
+    # are dropped when another process publishes an invalidation, checked at
+    # most every CACHE_INVALIDATION_CHECK_SECONDS.
+    CACHE_ENABLED: bool = True
+    CACHE_TTL_SECONDS: int = Field(default=600, ge=1, le=86400)
+    CACHE_LOCAL_MAX_ENTRIES: int = Field(default=4096, ge=1)
+    CACHE_LOCAL_TTL_SECONDS: float = Field(default=60, gt=0)
+    CACHE_INVALIDATION_CHECK_SECONDS: float = Field(default=1, ge=0, le=60)
+    # Filtered catalog totals of the admin product list; product changes also
+    # invalidate them, the TTL only bounds what a missed invalidation costs.
+    PRODUCT_TOTALS_TTL_SECONDS: int = Field(default=30, ge=1, le=3600)
+
+    # Public storefront responses carry ETags derived from the storefront's
+    # content version. The shared cache also stores anonymous responses in
+    # Redis; leave it off when Caddy or a CDN already caches them.
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_SHARED_ENABLED: bool = False
+    HTTP_CACHE_SHARED_MAX_BYTES: int = Field(default=512 * 1024, ge=1024)
+
+    # Extra pooled connections one dashboard or report request may use to run
+    # its independent queries at the same time (the pool holds 5 plus overflow).
+    METRICS_QUERY_CONCURRENCY: int = Field(default=3, ge=1, le=10)
+
+    # Background exports are written outside /static, which Caddy serves
+    # publicly, and downloaded through the authenticated API. A finished file
+    # is reused by identical requests over unchanged data until it expires.
+    EXPORTS_DIR: Optional[str] = None
+    EXPORT_ARTIFACT_TTL_HOURS: int = Field(default=24, ge=1, le=24 * 30)
+
+    # Uploaded import files wait here, outside /static, until the import
+    # worker applies them; each is deleted when its job finishes. Large files
+    # arrive in pieces of at most IMPORT_UPLOAD_CHUNK_BYTES (below the proxy's
+    # body limit); an upload idle for IMPORT_UPLOAD_TTL_HOURS is discarded.
+    IMPORTS_DIR: Optional[str] = None
+    IMPORT_MAX_FILE_BYTES: int = Field(default=512 * 1024 * 1024, ge=1024 * 1024)
+    IMPORT_UPLOAD_CHUNK_BYTES: int = Field(default=8 * 1024 * 1024, ge=64 * 1024)
+    IMPORT_UPLOAD_TTL_HOURS: int = Field(default=24, ge=1, le=24 * 7)
+
+    # PDF documents render in a pool of PDF_RENDER_PROCESSES processes (0
+    # renders in a thread instead) so reportlab never blocks the event loop.
+    # Rendered files are cached by content in Redis; batches leave one process
+    # free for single downloads, so a pool needs at least 2.
+    PDF_RENDER_PROCESSES: int = Field(default=2, ge=0, le=16)
+    PDF_CACHE_TTL_SECONDS: int = Field(default=3600, ge=0, le=7 * 86400)
+    PDF_CACHE_MAX_BYTES: int = Field(default=2 * 1024 * 1024, ge=1024)
+
+    @field_validator("PDF_RENDER_PROCESSES")
+    @classmethod
+    def validate_pdf_render_processes(cls, v: int) -> int:
+        if v == 1:
+            raise ValueError("PDF_RENDER_PROCESSES must be 0 (render in a thread) or at least 2")
+        return v
+
+    # Thumbnails and WebP/AVIF copies of uploaded and synced images are
+    # encoded in a pool of IMAGE_PROCESSES processes (0 encodes in a thread).
+    IMAGE_PROCESSES: int = Field(default=1, ge=0, le=16)
+    # Stored product images no product, product image or collection has used
+    # for ASSET_GC_GRACE_HOURS are deleted by the product deletion worker.
+    ASSET_GC_GRACE_HOURS: int = Field(default=24, ge=1, le=24 * 30)
+
+    # Route-class budgets ("<requests>/<second|minute|hour|day>") enforced in
+    # Redis across all workers. Catalog and checkout are charged per client and
+    # per storefront, so shoppers sharing one IP do not starve each other.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CATALOG_PER_CLIENT: str = "300/minute"
+    RATE_LIMIT_CATALOG_PER_STOREFRONT: str = "6000/minute"
+    RATE_LIMIT_CHECKOUT_PER_CLIENT: str = "30/minute"
+    RATE_LIMIT_CHECKOUT_PER_STOREFRONT: str = "600/minute"
+    RATE_LIMIT_WEBHOOK_PER_ENDPOINT: str = "600/minute"
+    RATE_LIMIT_API_PER_USER: str = "1200/minute"
+    RATE_LIMIT_ANONYMOUS_PER_IP: str = "120/minute"
+
     FIRST_SUPERUSER: str
     FIRST_SUPERUSER_PASSWORD: str
 
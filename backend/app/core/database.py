@@ -1,7 +1,13 @@
+from sqlalchemy import Select, event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import Session, declarative_base
 from app.core.config import settings
 
+try:
+    from sqlalchemy.dialects.postgresql import distinct_on as _distinct_on
+except ImportError:  # SQLAlchemy < 2.1
+    _distinct_on = None
+
 # Create Async Engine
 engine = create_async_engine(settings.DATABASE_URL, echo=settings.SQL_ECHO)
 
@@ -14,3 +20,24 @@ Base = declarative_base()
 async def get_db():
     async with SessionLocal() as session:
         yield session
+
+
+def distinct_on(query: Select, *columns) -> Select:
+    """``SELECT DISTINCT ON (columns)``; ``distinct(*columns)`` is deprecated since SQLAlchemy 2.1."""
+    if _distinct_on is None:
+        return query.distinct(*columns)
+    return query.ext(_distinct_on(*columns))
+
+
+def discard_on_rollback(*keys: str) -> None:
+    """Drop the ``session.info`` entries ``keys`` when a session's transaction rolls back.
+
+    A rolled back SAVEPOINT keeps them: the outer transaction may still commit
+    what was flushed before it, and collecting a few extra targets is harmless.
+    """
+    @event.listens_for(Session, "after_soft_rollback")
+    def _discard(session: Session, previous_transaction) -> None:
+        if previous_transaction.nested:
+            return
+        for key in keys:
+            session.info.pop(key, None)
@@ -0,0 +1,220 @@
+"""
+HTTP caching for public storefront reads.
+
+Each cacheable route has a policy (``Cache-Control`` max-age and
+stale-while-revalidate). Its strong ETag is derived from the request URL and
+the storefront's content version, a counter bumped whenever anything the
+storefront publishes is committed (see ``app.services.reference_cache``).
+A matching ``If-None-Match`` is answered with 304 before the endpoint runs.
+
+Product data (prices, stock) is shared by every storefront of a company and
+changes through many write paths, so catalog routes also fold a short time
+window into their ETag; a product edit is visible within that window.
+
+With ``HTTP_CACHE_SHARED_ENABLED`` anonymous 200 responses are also stored in
+Redis under their ETag and served without touching the database.
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+from sqlalchemy import select
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+
+from app.core.cache import reference_cache, storefront_tag
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis_client import get_redis
+from app.models.storefront import Storefront, StorefrontDomain
+from app.services.reference_cache import CONTENT, STOREFRONT_HOSTS
+
+logger = logging.getLogger(__name__)
+
+SHARED_KEY_PREFIX = "lumefy:http"
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    max_age: int
+    stale_while_revalidate: int
+    version_window_seconds: int = 0
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}, stale-while-revalidate={self.stale_while_revalidate}"
+
+
+STOREFRONT_POLICY = CachePolicy(max_age=60, stale_while_revalidate=600)
+CATALOG_POLICY = CachePolicy(max_age=30, stale_while_revalidate=120, version_window_seconds=60)
+
+_PUBLIC = rf"^{re.escape(settings.API_V1_STR.rstrip('/'))}/storefront/public"
+_UUID = r"[0-9a-fA-F-]{36}"
+_ROUTES: tuple[tuple[re.Pattern, CachePolicy], ...] = (
+    (re.compile(rf"{_PUBLIC}/(?P<storefront>{_UUID})/?$"), STOREFRONT_POLICY),
+    (re.compile(rf"{_PUBLIC}/by-(?P<kind>subdomain|domain)/(?P<host>[^/]+)/?$"), STOREFRONT_POLICY),
+    (
+        re.compile(rf"{_PUBLIC}/(?P<storefront>{_UUID})/(?:navigation|payment-gateways|shipping/config|collections)/?$"),
+        STOREFRONT_POLICY,
+    ),
+    (re.compile(rf"{_PUBLIC}/(?P<storefront>{_UUID})/collections/[^/]+/?$"), CATALOG_POLICY),
+    (re.compile(rf"{_PUBLIC}/(?P<storefront>{_UUID})/products(?:/[^/]+)?/?$"), CATALOG_POLICY),
+)
+
+
+def match_route(path: str) -> Optional[tuple[re.Match, CachePolicy]]:
+    for pattern, policy in _ROUTES:
+        match = pattern.match(path)
+        if match:
+            return match, policy
+    return None
+
+
+async def resolve_storefront_host(kind: str, host: str) -> Optional[str]:
+    """Storefront id served at a subdomain or verified custom domain, if any."""
+    host = host.strip().lower()
+    if kind == "domain":
+        host = host.split(":", 1)[0]
+    if not host:
+        return None
+
+    async def load() -> Optional[str]:
+        if kind == "subdomain":
+            query = select(Storefront.id).where(Storefront.subdomain == host)
+        else:
+            query = (
+                select(Storefront.id)
+                .join(StorefrontDomain, StorefrontDomain.storefront_id == Storefront.id)
+                .where(
+                    StorefrontDomain.domain == host,
+                    StorefrontDomain.is_active == True,
+                    StorefrontDomain.is_verified == True,
+                )
+            )
+        async with SessionLocal() as db:
+            storefront_id = await db.scalar(
+                query.where(Storefront.is_active == True, Storefront.is_enabled == True).limit(1)
+            )
+        return str(storefront_id) if storefront_id else None
+
+    return await reference_cache.get_or_load(f"storefront-host:{kind}:{host}", [STOREFRONT_HOSTS], load)
+
+
+def compute_etag(path: str, query_string: str, version: str, policy: CachePolicy, now: Optional[float] = None) -> str:
+    query = urlencode(sorted(parse_qsl(query_string, keep_blank_values=True)))
+    window = 0
+    if policy.version_window_seconds:
+        window = int((time.time() if now is None else now) // policy.version_window_seconds)
+    digest = hashlib.sha256(f"{path}?{query}|{version}|{window}".encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _header(scope: dict, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class PublicCacheMiddleware:
+    """ETag, 304 and ``Cache-Control`` handling for public storefront GETs.
+
+    Fails open: if Redis is unavailable responses are served uncached.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "GET" or not settings.HTTP_CACHE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        matched = match_route(scope.get("path", ""))
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+        match, policy = matched
+
+        try:
+            storefront_id = match.groupdict().get("storefront")
+            if storefront_id is None:
+                storefront_id = await resolve_storefront_host(match["kind"], match["host"])
+            if storefront_id is None:
+                await self.app(scope, receive, send)
+                return
+            [version] = await reference_cache.tag_versions([storefront_tag(str(uuid.UUID(storefront_id)), CONTENT)])
+        except Exception:  # noqa: BLE001 - serve uncached rather than fail
+            logger.debug("HTTP cache unavailable for %s", scope.get("path"), exc_info=True)
+            await self.app(scope, receive, send)
+            return
+
+        etag = compute_etag(scope["path"], scope.get("query_string", b"").decode("latin-1"), version, policy)
+        cache_headers = {"ETag": etag, "Cache-Control": policy.cache_control}
+        if etag_matches(_header(scope, b"if-none-match"), etag):
+            await Response(status_code=304, headers=cache_headers)(scope, receive, send)
+            return
+
+        anonymous = _header(scope, b"authorization") is None and _header(scope, b"cookie") is None
+        shared = settings.HTTP_CACHE_SHARED_ENABLED and anonymous
+        shared_key = f"{SHARED_KEY_PREFIX}:{etag[1:-1]}"
+        if shared:
+            cached = await self._read_shared(shared_key)
+            if cached is not None:
+                body, media_type = cached
+                response = Response(body, media_type=media_type, headers={**cache_headers, "X-Cache": "HIT"})
+                await response(scope, receive, send)
+                return
+
+        state = {"status": None, "media_type": None, "body": bytearray(), "storable": shared}
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                if message["status"] == 200:
+                    headers = MutableHeaders(scope=message)
+                    headers["ETag"] = etag
+                    headers["Cache-Control"] = policy.cache_control
+                    state["media_type"] = headers.get("content-type")
+                else:
+                    state["storable"] = False
+            elif message["type"] == "http.response.body" and state["storable"]:
+                state["body"].extend(message.get("body", b""))
+                if len(state["body"]) > settings.HTTP_CACHE_SHARED_MAX_BYTES:
+                    state["storable"] = False
+                    state["body"] = bytearray()
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
+        if state["storable"] and state["status"] == 200:
+            await self._write_shared(shared_key, bytes(state["body"]), state["media_type"], policy)
+
+    async def _read_shared(self, key: str) -> Optional[tuple[bytes, Optional[str]]]:
+        try:
+            raw = await get_redis().get(key)
+        except Exception:  # noqa: BLE001
+            logger.debug("Shared HTTP cache read failed", exc_info=True)
+            return None
+        if not raw:
+            return None
+        entry = json.loads(raw)
+        return entry["body"].encode("utf-8"), entry.get("media_type")
+
+    async def _write_shared(self, key: str, body: bytes, media_type: Optional[str], policy: CachePolicy) -> None:
+        try:
+            entry = json.dumps({"body": body.decode("utf-8"), "media_type": media_type})
+            await get_redis().set(key, entry, ex=policy.max_age + policy.stale_while_revalidate)
+        except Exception:  # noqa: BLE001 - caching is best effort
+            logger.debug("Shared HTTP cache write failed", exc_info=True)
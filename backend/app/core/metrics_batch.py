@@ -0,0 +1,94 @@
+"""
+Batched reads for report and dashboard endpoints.
+
+``MetricsBatch`` compiles several single-row aggregates into one statement:
+each select becomes a CTE and the outer select reads the row of every CTE, so
+N aggregates cost one round trip instead of N.
+
+``run_concurrently`` runs independent queries that cannot share a statement
+(grouped series, ORM loads) at the same time, each on its own pooled session,
+so an endpoint waits for its slowest query rather than for their sum.
+"""
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Mapping, Optional, TypeVar
+
+from sqlalchemy import Select, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+T = TypeVar("T")
+_SEPARATOR = "__"
+
+
+class MetricsBatch:
+    """Single-row aggregate selects executed as one CTE-based statement.
+
+    Every select added must return exactly one row (aggregates without
+    ``GROUP BY``) and label its columns; a select returning no rows would
+    empty the whole batch.
+    """
+
+    def __init__(self) -> None:
+        self._queries: dict[str, Select] = {}
+
+    def add(self, name: str, query: Select) -> "MetricsBatch":
+        if name in self._queries or _SEPARATOR in name:
+            raise ValueError(f"Invalid or duplicated metric name: {name!r}")
+        self._queries[name] = query
+        return self
+
+    def statement(self) -> Select:
+        if not self._queries:
+            raise ValueError("MetricsBatch is empty")
+        ctes = [query.cte(f"metric_{name}") for name, query in self._queries.items()]
+        columns = [
+            column.label(f"{name}{_SEPARATOR}{column.key}")
+            for name, cte in zip(self._queries, ctes)
+            for column in cte.c
+        ]
+        # One row per CTE, joined on TRUE: an explicit one-row cross join.
+        source = ctes[0]
+        for cte in ctes[1:]:
+            source = source.join(cte, true())
+        return select(*columns).select_from(source)
+
+    async def execute(self, db: AsyncSession) -> dict[str, SimpleNamespace]:
+        """Run the batch and return each metric's row, by name."""
+        row = (await db.execute(self.statement())).mappings().first() or {}
+        results = {name: {} for name in self._queries}
+        for name, query in self._queries.items():
+            for key in query.selected_columns.keys():
+                results[name][key] = row.get(f"{name}{_SEPARATOR}{key}")
+        return {name: SimpleNamespace(**values) for name, values in results.items()}
+
+
+async def run_concurrently(
+    queries: Mapping[str, Callable[[AsyncSession], Awaitable[T]]],
+    *,
+    db: Optional[AsyncSession] = None,
+    session_factory: Callable[[], Any] = SessionLocal,
+    limit: Optional[int] = None,
+) -> dict[str, T]:
+    """Run independent read-only ``queries`` at once and return their results by name.
+
+    Each query gets its own session from ``session_factory``; with ``db`` the
+    first one reuses it, since the request already holds its connection. At
+    most ``limit`` extra sessions (``METRICS_QUERY_CONCURRENCY`` by default)
+    are open at a time, so one request cannot drain the pool.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit or settings.METRICS_QUERY_CONCURRENCY))
+
+    async def run_own(query: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        async with semaphore:
+            async with session_factory() as session:
+                return await query(session)
+
+    names = list(queries)
+    tasks = [
+        query(db) if db is not None and index == 0 else run_own(query)
+        for index, query in enumerate(queries.values())
+    ]
+    return dict(zip(names, await asyncio.gather(*tasks)))
@@ -1,9 +1,282 @@
 """
-Rate Limiting configuration via slowapi.
-Provides a pre-configured Limiter instance and key functions.
+Rate limiting.
+
+Two layers share the same Redis:
+
+* ``limiter`` (slowapi) keeps the strict per-IP limits declared with
+  ``@limiter.limit`` on login, registration and password endpoints. Its
+  counters live in Redis so every uvicorn worker enforces the same budget.
+* ``RateLimitMiddleware`` applies per-route-class token buckets. Each request
+  is classified (public catalog, checkout, inbound webhook, authenticated API)
+  and charged against every bucket of its class — e.g. one per client and one
+  per storefront — in a single atomic Lua call.
 """
+import hashlib
+import logging
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import jwt
+from jwt.exceptions import PyJWTError
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Per-IP limits for credential endpoints, stored in Redis and falling back to
+# process memory if Redis is unavailable.
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.REDIS_URL,
+    in_memory_fallback_enabled=True,
+    key_prefix="lumefy:slowapi",
+)
+
+# Token bucket over one or more keys. All buckets are refilled, then one token
+# is taken from each only if every bucket has one, so a rejected request never
+# consumes budget. Redis TIME keeps the clock consistent across processes.
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tokens = {}
+local retry_after = 0
+for i = 1, #KEYS do
+  local capacity = tonumber(ARGV[i * 2 - 1])
+  local rate = tonumber(ARGV[i * 2])
+  local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+  local available = tonumber(bucket[1]) or capacity
+  local updated = tonumber(bucket[2]) or now
+  available = math.min(capacity, available + math.max(0, now - updated) * rate)
+  tokens[i] = available
+  if available < 1 then
+    retry_after = math.max(retry_after, math.ceil((1 - available) / rate))
+  end
+end
+local allowed = 0
+if retry_after == 0 then allowed = 1 end
+local remaining = -1
+for i = 1, #KEYS do
+  local capacity = tonumber(ARGV[i * 2 - 1])
+  local rate = tonumber(ARGV[i * 2])
+  local available = tokens[i] - allowed
+  redis.call('HSET', KEYS[i], 'tokens', tostring(available), 'ts', tostring(now))
+  redis.call('PEXPIRE', KEYS[i], math.ceil(capacity / rate) + 1000)
+  if remaining < 0 or available < remaining then remaining = available end
+end
+return {allowed, math.floor(remaining), retry_after}
+"""
+
+_PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Budget:
+    """``capacity`` requests per ``period_seconds``, refilled continuously."""
+
+    capacity: int
+    period_seconds: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Budget":
+        amount, _, period = value.strip().partition("/")
+        period = period.strip().lower().rstrip("s")
+        if not amount.strip().isdigit() or period not in _PERIOD_SECONDS or int(amount) < 1:
+            raise ValueError(f"Invalid rate limit budget: {value!r}")
+        return cls(int(amount), _PERIOD_SECONDS[period])
+
+    @property
+    def tokens_per_ms(self) -> float:
+        return self.capacity / (self.period_seconds * 1000)
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    remaining: int
+    retry_after_seconds: int
+
+
+class RedisRateLimiter:
+    def __init__(self, prefix: str = "lumefy:rl") -> None:
+        self.prefix = prefix
+        self._script = None
+
+    async def hit(self, buckets: list[tuple[str, Budget]]) -> RateLimitDecision:
+        if self._script is None:
+            # register_script uses EVALSHA and reloads the script on NOSCRIPT.
+            self._script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+        keys = [f"{self.prefix}:{key}" for key, _ in buckets]
+        args: list[str] = []
+        for _, budget in buckets:
+            args.extend((str(budget.capacity), repr(budget.tokens_per_ms)))
+        allowed, remaining, retry_after_ms = await self._script(keys=keys, args=args)
+        retry_after = 0 if allowed else max(1, math.ceil(int(retry_after_ms) / 1000))
+        return RateLimitDecision(bool(allowed), max(0, int(remaining)), retry_after)
+
+
+_API_PREFIX = settings.API_V1_STR.rstrip("/")
+_STOREFRONT_PUBLIC = re.compile(rf"^{re.escape(_API_PREFIX)}/storefront/public/(?P<storefront>[0-9a-fA-F-]{{36}})(?P<rest>/.*)?$")
+_PAYMENT_WEBHOOK = re.compile(rf"^{re.escape(_API_PREFIX)}/storefront/public/payments/(?P<provider>[a-z]+)/webhook(?:/(?P<storefront>[0-9a-fA-F-]{{36}}))?/?$")
+_STOREFRONT_LOOKUP = re.compile(rf"^{re.escape(_API_PREFIX)}/storefront/public/by-(?:domain|subdomain)/(?P<host>[^/]+)/?$")
+_INTEGRATION_WEBHOOK = re.compile(rf"^{re.escape(_API_PREFIX)}/integrations/sources/(?P<source>[0-9a-fA-F-]{{36}})/webhook/?$")
+# Credential endpoints keep only their stricter slowapi limits; the TLS
+# on-demand check is called by Caddy, never by shoppers.
+_EXEMPT_PREFIXES = (
+    f"{_API_PREFIX}/login",
+    f"{_API_PREFIX}/password-recovery",
+    f"{_API_PREFIX}/reset-password",
+    f"{_API_PREFIX}/storefront/public/certificate-authorization",
+)
+
+
+def _header(scope: dict, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _client_ip(scope: dict) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _token_subject(scope: dict) -> Optional[str]:
+    """Hashed subject of a valid bearer token; forged tokens fall back to IP."""
+    authorization = _header(scope, b"authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except PyJWTError:
+        return None
+    subject = payload.get("sub")
+    if not subject:
+        return None
+    return hashlib.sha256(str(subject).encode("utf-8")).hexdigest()[:24]
+
+
+def _client_key(scope: dict) -> str:
+    subject = _token_subject(scope)
+    return f"sub:{subject}" if subject else f"ip:{_client_ip(scope)}"
+
+
+class RouteClassifier:
+    """Map a request to its route class and the buckets it is charged against."""
+
+    def __init__(self) -> None:
+        self.catalog_client = Budget.parse(settings.RATE_LIMIT_CATALOG_PER_CLIENT)
+        self.catalog_storefront = Budget.parse(settings.RATE_LIMIT_CATALOG_PER_STOREFRONT)
+        self.checkout_client = Budget.parse(settings.RATE_LIMIT_CHECKOUT_PER_CLIENT)
+        self.checkout_storefront = Budget.parse(settings.RATE_LIMIT_CHECKOUT_PER_STOREFRONT)
+        self.webhook = Budget.parse(settings.RATE_LIMIT_WEBHOOK_PER_ENDPOINT)
+        self.api_user = Budget.parse(settings.RATE_LIMIT_API_PER_USER)
+        self.anonymous = Budget.parse(settings.RATE_LIMIT_ANONYMOUS_PER_IP)
+
+    def classify(self, scope: dict) -> Optional[tuple[str, list[tuple[str, Budget]]]]:
+        path: str = scope.get("path", "")
+        method: str = scope.get("method", "GET")
+        if method == "OPTIONS" or not path.startswith(_API_PREFIX) or path.startswith(_EXEMPT_PREFIXES):
+            return None
+
+        match = _PAYMENT_WEBHOOK.match(path)
+        if match:
+            endpoint = f"{match['provider']}:{(match['storefront'] or 'global').lower()}"
+            return "webhook", [(f"webhook:{endpoint}", self.webhook)]
+        match = _INTEGRATION_WEBHOOK.match(path)
+        if match:
+            return "webhook", [(f"webhook:integration:{match['source'].lower()}", self.webhook)]
+
+        match = _STOREFRONT_LOOKUP.match(path)
+        if match:
+            host = match["host"].lower()
+            return "catalog", [
+                (f"catalog:client:{host}:{_client_key(scope)}", self.catalog_client),
+                (f"catalog:storefront:{host}", self.catalog_storefront),
+            ]
+
+        match = _STOREFRONT_PUBLIC.match(path)
+        if match:
+            storefront = match["storefront"].lower()
+            client = _client_key(scope)
+            if (match["rest"] or "").startswith("/checkout"):
+                return "checkout", [
+                    (f"checkout:client:{storefront}:{client}", self.checkout_client),
+                    (f"checkout:storefront:{storefront}", self.checkout_storefront),
+                ]
+            return "catalog", [
+                (f"catalog:client:{storefront}:{client}", self.catalog_client),
+                (f"catalog:storefront:{storefront}", self.catalog_storefront),
+            ]
+
+        subject = _token_subject(scope)
+        if subject:
+            return "api", [(f"api:sub:{subject}", self.api_user)]
+        return "anonymous", [(f"anonymous:ip:{_client_ip(scope)}", self.anonymous)]
+
+
+class RateLimitMiddleware:
+    """Enforce route-class budgets across processes; fails open if Redis is down."""
+
+    def __init__(
+        self,
+        app,
+        classifier: Optional[RouteClassifier] = None,
+        backend: Optional[RedisRateLimiter] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.app = app
+        self.classifier = classifier or RouteClassifier()
+        self.backend = backend or RedisRateLimiter()
+        self.clock = clock
+        self._warned_at = float("-inf")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        classified = self.classifier.classify(scope)
+        if classified is None:
+            await self.app(scope, receive, send)
+            return
+        route_class, buckets = classified
+        try:
+            decision = await self.backend.hit(buckets)
+        except Exception:  # noqa: BLE001 - availability wins over limiting
+            now = self.clock()
+            if now - self._warned_at > 60:
+                self._warned_at = now
+                logger.warning("Rate limiter unavailable; allowing requests", exc_info=True)
+            await self.app(scope, receive, send)
+            return
+
+        if not decision.allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Demasiadas solicitudes. Intenta de nuevo más tarde.", "code": "RATE_LIMITED"},
+                headers={
+                    "Retry-After": str(decision.retry_after_seconds),
+                    "X-RateLimit-Class": route_class,
+                    "X-RateLimit-Remaining": "0",
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-RateLimit-Class"] = route_class
+                headers["X-RateLimit-Remaining"] = str(decision.remaining)
+            await send(message)
 
-# Global limiter instance — keyed by client IP
-limiter = Limiter(key_func=get_remote_address, default_limits=["60/minute"])
+        await self.app(scope, receive, send_with_headers)
@@ -2,15 +2,22 @@ from fastapi import FastAPI, HTTPException
 from starlette.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
 import mimetypes
 from sqlalchemy import text
 
 from app.core.config import settings
 from app.core.database import SessionLocal
-from app.core.rate_limit import limiter
+from app.core.http_cache import PublicCacheMiddleware
+from app.core.pagination import PAGE_HEADERS
+from app.core.rate_limit import RateLimitMiddleware, limiter
 from app.core.middleware import MaintenanceMiddleware, RequestObservabilityMiddleware
 import app.models # Import all models to ensure they are registered with SQLAlchemy
+import app.services.sales_rollups  # noqa: F401 - registers the rollup outbox hooks
+import app.services.inventory_snapshots  # noqa: F401 - registers the snapshot outbox hooks
+import app.services.live_counters  # noqa: F401 - registers the dashboard counter outbox hooks
+import app.services.product_listing  # noqa: F401 - keeps Product.variant_count current
+import app.services.asset_store  # noqa: F401 - recounts stored image references
+import app.services.pricing  # noqa: F401 - recomputes effective prices
 from app.api.v1.api import api_router
 
 app = FastAPI(
@@ -34,10 +41,13 @@ async def readiness_probe():
         raise HTTPException(status_code=503, detail="Database is not ready") from exc
     return {"status": "ready"}
 
-# Rate Limiting
+# Rate Limiting: explicit @limiter.limit decorators guard credential routes;
+# the middleware applies the shared per-route-class budgets.
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
+# Inside the rate limiter, so revalidations (304) still count against budgets.
+app.add_middleware(PublicCacheMiddleware)
+app.add_middleware(RateLimitMiddleware)
 
 # Maintenance must be registered before CORS. FastAPI applies the most recently
 # added middleware first, leaving CORS as the outer layer for 503 responses.
@@ -52,6 +62,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=PAGE_HEADERS,
     )
 
 # Registered last so every application response carries the same correlation ID.
@@ -62,3 +62,11 @@ from .storefront_customer import StorefrontCustomerAccount
 from .storefront_newsletter import StorefrontNewsletterSubscription
 from .integration import IntegrationSource, IntegrationSyncRun, IntegrationRecordLink, IntegrationWebhookEvent
 
+from .sales_rollup import SalesDailyRollup, SalesProductDailyRollup, ReturnDailyRollup
+from .export_job import ExportJob
+from .inventory_snapshot import InventoryProductSnapshot, InventoryBranchSnapshot
+from .import_job import ImportJob
+from .product_deletion_job import ProductDeletionJob
+from .image_derivative import ImageDerivative
+from .stored_asset import StoredAsset, StoredAssetSource
+from .effective_price import EffectivePrice
@@ -25,4 +25,9 @@ class AppWebhookDelivery(Base):
     status_code: Mapped[int] = mapped_column(Integer, nullable=True)
     error_message: Mapped[str] = mapped_column(Text, nullable=True)
     attempt_number: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    # The outbox event that produced this attempt; a redelivered stream message
+    # must not record the same attempt twice.
+    outbox_event_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("outbox_events.id"), nullable=True, unique=True
+    )
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey, DateTime, func, JSON
+from sqlalchemy import String, ForeignKey, DateTime, Index, func, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import BaseModel
@@ -7,6 +7,10 @@ from datetime import datetime
 
 class AuditLog(BaseModel):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Keyset pagination of the audit log (app.core.pagination).
+        Index("ix_audit_logs_company_created_at_id", "company_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
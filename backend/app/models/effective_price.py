@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Float, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base
+
+
+class EffectivePrice(Base):
+    """Selling price of a product or variant in one channel, kept by app.services.pricing."""
+
+    __tablename__ = "effective_prices"
+    __table_args__ = (
+        # One price per product, variant and channel. The base channel (POS,
+        # sales) has neither a publication nor a price list.
+        Index(
+            "uq_effective_prices_channel",
+            "product_id",
+            "variant_id",
+            "published_product_id",
+            "pricelist_id",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+        # Catalog sorting and price filters read the lowest price per publication.
+        Index(
+            "ix_effective_prices_published_price",
+            "published_product_id",
+            "price",
+            postgresql_where=text("published_product_id IS NOT NULL"),
+        ),
+    )
+
+    # Rows are only written by INSERT ... SELECT, so the database generates ids.
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    # NULL for products without variants; products with variants only have variant rows.
+    variant_id = Column(UUID(as_uuid=True), ForeignKey("product_variants.id", ondelete="CASCADE"), nullable=True)
+    # Storefront channel: the publication whose price_override applies.
+    published_product_id = Column(
+        UUID(as_uuid=True), ForeignKey("published_products.id", ondelete="CASCADE"), nullable=True
+    )
+    # Active sale price list with a unit price for the product.
+    pricelist_id = Column(UUID(as_uuid=True), ForeignKey("price_lists.id", ondelete="CASCADE"), nullable=True)
+    price = Column(Float, nullable=False)
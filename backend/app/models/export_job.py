@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+
+class ExportJob(BaseModel):
+    """A requested data export, produced by the export worker into a downloadable file."""
+
+    __tablename__ = "export_jobs"
+    __table_args__ = (
+        Index("ix_export_jobs_company_fingerprint", "company_id", "fingerprint"),
+        Index("ix_export_jobs_status_queued", "status", "queued_at"),
+        # At most one queued or running job per identical export.
+        Index(
+            "uq_export_jobs_active_fingerprint",
+            "company_id",
+            "fingerprint",
+            unique=True,
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')"),
+        ),
+    )
+
+    requested_by_user_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True
+    )
+    resource: Mapped[str] = mapped_column(String(30), nullable=False)
+    format: Mapped[str] = mapped_column(String(10), nullable=False, default="excel")
+    filters: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    # sha256 of resource, format, filters and the data watermark when queued.
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    # QUEUED -> RUNNING -> COMPLETED | FAILED; COMPLETED -> EXPIRED once the file is purged.
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="QUEUED")
+    # Progress counts exported records (a product with variants is one record
+    # and several rows); rows_written is the number of rows in the file.
+    total_records: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    processed_records: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_written: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    queued_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    file_name: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Relative to EXPORTS_DIR.
+    file_path: Mapped[str | None] = mapped_column(String, nullable=True)
+    file_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    @property
+    def percent(self) -> int | None:
+        if self.status == "COMPLETED":
+            return 100
+        if not self.total_records:
+            return None
+        return min(99, int(self.processed_records * 100 / self.total_records))
@@ -0,0 +1,27 @@
+import uuid
+
+from sqlalchemy import JSON, Column, DateTime, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+
+class ImageDerivative(Base):
+    """Resized WebP/AVIF copies generated for one locally stored image."""
+
+    __tablename__ = "image_derivatives"
+    __table_args__ = (UniqueConstraint("source_url", name="uq_image_derivatives_source_url"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Root-relative URL of the original (``/static/...``), as stored in
+    # ``products.image_url`` and ``product_images.image_url``.
+    source_url = Column(String, nullable=False)
+    # SHA-256 of the original bytes; derivative files are named after it, so
+    # identical images share their files.
+    content_hash = Column(String(64), nullable=False, index=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    # [{"width", "height", "format", "url"}], smallest first.
+    renditions = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
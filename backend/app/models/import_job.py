@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, BigInteger, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+
+class ImportJob(BaseModel):
+    """A spreadsheet, uploaded whole or in pieces, applied in chunks by the import worker."""
+
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        Index("ix_import_jobs_status_queued", "status", "queued_at"),
+    )
+
+    requested_by_user_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True
+    )
+    resource: Mapped[str] = mapped_column(String(30), nullable=False)
+    # Resource-specific parameters, e.g. the storefront of shipping destinations.
+    options: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    # Name of the uploaded file, as shown to the user.
+    file_name: Mapped[str] = mapped_column(String, nullable=False)
+    # Relative to IMPORTS_DIR; cleared once the job finishes and the file is removed.
+    file_path: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Declared size of a chunked upload and the bytes stored so far; a client
+    # resumes an interrupted upload from received_bytes.
+    file_size: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    received_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    # UPLOADING -> QUEUED -> RUNNING -> COMPLETED | FAILED. A worker restart
+    # puts RUNNING jobs back in the queue; they resume after the last
+    # committed chunk.
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="QUEUED")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_rows: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    processed_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Counts per outcome ("count", "products_created", ...), "error_count" and
+    # the first row errors under "errors".
+    summary: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    queued_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    @property
+    def percent(self) -> int | None:
+        if self.status == "COMPLETED":
+            return 100
+        if not self.total_rows:
+            return None
+        return min(99, int(self.processed_rows * 100 / self.total_rows))
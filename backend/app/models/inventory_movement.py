@@ -1,4 +1,4 @@
-from sqlalchemy import String, Float, ForeignKey, Enum
+from sqlalchemy import String, Float, ForeignKey, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import BaseModel
@@ -18,6 +18,18 @@ class MovementType(str, enum.Enum):
 
 class InventoryMovement(BaseModel):
     __tablename__ = "inventory_movements"
+    __table_args__ = (
+        # Keyset pagination of the movement history (app.core.pagination).
+        Index("ix_inventory_movements_branch_created_at_id", "branch_id", "created_at", "id"),
+        Index("ix_inventory_movements_product_created_at_id", "product_id", "created_at", "id"),
+        # Point-in-time stock per ledger key (app.services.stock_ledger).
+        Index(
+            "ix_inventory_movements_ledger",
+            "company_id", "product_id", "variant_id", "branch_id", "warehouse_id", "created_at",
+        ),
+        # Period scans of the append-only table; rows arrive in created_at order.
+        Index("ix_inventory_movements_created_at_brin", "created_at", postgresql_using="brin"),
+    )
 
     product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("products.id"), index=True)
     variant_id: Mapped[uuid.UUID | None] = mapped_column(
@@ -0,0 +1,61 @@
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class InventoryProductSnapshot(Base):
+    """Stock and value of one product in one branch at the end of a day.
+
+    Rows are derived data kept by ``app.services.inventory_snapshots`` and are
+    sparse: a product gets a row only on days its stock changed. Its stock on
+    any other day is the latest earlier row.
+    """
+    __tablename__ = "inventory_product_snapshots"
+    __table_args__ = (
+        Index(
+            "uq_inventory_product_snapshots_key",
+            "company_id", "branch_id", "product_id", "day",
+            unique=True,
+        ),
+        Index("ix_inventory_product_snapshots_company_day", "company_id", "day"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
+    branch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("branches.id", ondelete="CASCADE"), nullable=False)
+    product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    quantity: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    reserved_quantity: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # Quantity times the weighted-average cost of each stock row.
+    value: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class InventoryBranchSnapshot(Base):
+    """Totals of one branch's inventory at the end of a day.
+
+    One row per branch and day: the daily close carries the previous row
+    forward and stock changes refresh the current day's row.
+    """
+    __tablename__ = "inventory_branch_snapshots"
+    __table_args__ = (
+        Index("uq_inventory_branch_snapshots_key", "company_id", "branch_id", "day", unique=True),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
+    branch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("branches.id", ondelete="CASCADE"), nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    quantity: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # At weighted-average cost, as the inventory valuation shows it.
+    value: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # At catalog cost (or price when there is no cost), as the reports show it.
+    catalog_value: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    low_stock_items: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -1,15 +1,29 @@
-from sqlalchemy import Column, String, Boolean, Text
+from datetime import datetime
+from sqlalchemy import Column, String, Boolean, Text, ForeignKey, DateTime, Index, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.core.database import Base
 
 class NotificationTemplate(Base):
     __tablename__ = "notification_templates"
+    __table_args__ = (
+        UniqueConstraint("company_id", "code", name="uq_notification_template_company_code"),
+        # Platform defaults (company_id NULL) are unique per code as well.
+        Index(
+            "uq_notification_template_platform_code",
+            "code",
+            unique=True,
+            postgresql_where=text("company_id IS NULL"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    code = Column(String, unique=True, index=True, nullable=False) # e.g. 'NEW_SALE', 'WELCOME'
+    # NULL for platform defaults; a company row overrides the default with the same code.
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=True, index=True)
+    code = Column(String, index=True, nullable=False) # e.g. 'NEW_SALE', 'WELCOME'
     name = Column(String, nullable=False)
     type = Column(String, default="info") # info, success, warning, danger
     title_template = Column(String, nullable=False)
     body_template = Column(Text, nullable=False)
     is_active = Column(Boolean, default=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Float, Boolean, ForeignKey, Enum, Text, JSON
+from sqlalchemy import String, Float, Boolean, ForeignKey, Enum, Text, JSON, Index, Integer, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import BaseModel
@@ -13,6 +13,26 @@ class ProductType(str, enum.Enum):
 
 class Product(BaseModel):
     __tablename__ = "products"
+    __table_args__ = (
+        # SKUs are unique per company among active products, ignoring case and
+        # surrounding spaces; see app.services.product_codes.
+        Index(
+            "uq_products_company_sku_active",
+            "company_id",
+            text("lower(trim(sku))"),
+            unique=True,
+            postgresql_where=text("is_active AND sku IS NOT NULL"),
+        ),
+        Index(
+            "ix_products_company_barcode",
+            "company_id",
+            text("trim(barcode)"),
+            postgresql_where=text("barcode IS NOT NULL"),
+        ),
+        # Stored assets recount their references by URL. Hash, not btree:
+        # provider URLs can exceed the btree row size.
+        Index("ix_products_image_url", "image_url", postgresql_using="hash"),
+    )
 
     # Basic Info
     name: Mapped[str] = mapped_column(String, index=True)
@@ -40,6 +60,9 @@ class Product(BaseModel):
     sale_ok: Mapped[bool] = mapped_column(Boolean, default=True)      # Can be sold
     purchase_ok: Mapped[bool] = mapped_column(Boolean, default=True)   # Can be purchased
 
+    # Number of variants, kept by app.services.product_listing for the catalog list.
+    variant_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
     # Foreign Keys
     category_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("categories.id"), nullable=True)
     brand_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("brands.id"), nullable=True)
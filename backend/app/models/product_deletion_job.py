@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+
+class ProductDeletionJob(BaseModel):
+    """A bulk product deletion, applied in short batches by the product deletion worker."""
+
+    __tablename__ = "product_deletion_jobs"
+    __table_args__ = (
+        Index("ix_product_deletion_jobs_status_queued", "status", "queued_at"),
+    )
+
+    requested_by_user_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True
+    )
+    # "selected" (product_ids), "catalog" (active products matching the
+    # filters) or "archived" (archived products, all or product_ids).
+    scope: Mapped[str] = mapped_column(String(20), nullable=False)
+    # product_ids, filters, force (archive blocked products) and purge_inventory.
+    params: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    # QUEUED -> RUNNING -> COMPLETED | FAILED. A worker restart puts RUNNING
+    # jobs back in the queue; they resume after cursor.
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="QUEUED")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_products: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    processed_products: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Last product id of the last committed batch; products are visited by id.
+    cursor: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    # "deleted", "archived", "blocked_count", the first blocked products under
+    # "blocked" and the requested ids that were not found under "not_found".
+    summary: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    queued_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    @property
+    def percent(self) -> int | None:
+        if self.status == "COMPLETED":
+            return 100
+        if not self.total_products:
+            return None
+        return min(99, int(self.processed_products * 100 / self.total_products))
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Float, Boolean, ForeignKey, JSON
+from sqlalchemy import String, Float, Boolean, ForeignKey, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import BaseModel
@@ -6,6 +6,20 @@ import uuid
 
 class ProductVariant(BaseModel):
     __tablename__ = "product_variants"
+    __table_args__ = (
+        Index(
+            "ix_product_variants_company_sku",
+            "company_id",
+            text("lower(trim(sku))"),
+            postgresql_where=text("sku IS NOT NULL"),
+        ),
+        Index(
+            "ix_product_variants_company_barcode",
+            "company_id",
+            text("trim(barcode)"),
+            postgresql_where=text("barcode IS NOT NULL"),
+        ),
+    )
 
     product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("products.id"), index=True)
     name: Mapped[str] = mapped_column(String, index=True)  # e.g. "Rojo / XL", "500ml"
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Float, ForeignKey, DateTime, Enum, Integer
+from sqlalchemy import String, Float, ForeignKey, DateTime, Enum, Index, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import BaseModel
@@ -23,6 +23,10 @@ class SaleStatus(str, enum.Enum):
 
 class Sale(BaseModel):
     __tablename__ = "sales"
+    __table_args__ = (
+        # Keyset pagination of the sales list (app.core.pagination).
+        Index("ix_sales_company_created_at_id", "company_id", "created_at", "id"),
+    )
 
     branch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("branches.id"), index=True)
     warehouse_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("warehouses.id"), nullable=True, index=True)
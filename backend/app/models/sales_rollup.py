@@ -0,0 +1,68 @@
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class SalesDailyRollup(Base):
+    """Sales, payments and item margins of one branch, day and sale status.
+
+    Rows are derived data: ``app.services.sales_rollups`` rebuilds a company's
+    day from ``sales``, ``sale_items`` and ``payments`` whenever one changes.
+    """
+    __tablename__ = "sales_daily_rollups"
+    __table_args__ = (Index("ix_sales_daily_rollups_company_day", "company_id", "day"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
+    branch_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("branches.id"), nullable=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    sales_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    gross_sales: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    payments_cash: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    payments_card: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    payments_credit: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    items_revenue: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    items_cost: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class SalesProductDailyRollup(Base):
+    """Units, revenue and cost sold per product, branch, day and sale status."""
+    __tablename__ = "sales_product_daily_rollups"
+    __table_args__ = (
+        Index("ix_sales_product_daily_rollups_company_day", "company_id", "day"),
+        Index("ix_sales_product_daily_rollups_company_product", "company_id", "product_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
+    branch_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("branches.id"), nullable=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    # Category at the time the day was rolled up.
+    category_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    quantity: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    revenue: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    cost: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class ReturnDailyRollup(Base):
+    """Approved returns per branch of the original sale and approval day."""
+    __tablename__ = "return_daily_rollups"
+    __table_args__ = (Index("ix_return_daily_rollups_company_day", "company_id", "day"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
+    branch_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("branches.id"), nullable=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    returns_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_refunds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, text
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+
+class StoredAsset(Base):
+    """One image file of the content-addressed store, with the rows pointing at it counted."""
+
+    __tablename__ = "stored_assets"
+    __table_args__ = (
+        # Garbage collection reads only the unreferenced assets.
+        Index("ix_stored_assets_unreferenced", "unreferenced_since", postgresql_where=text("ref_count = 0")),
+    )
+
+    # SHA-256 of the file's bytes; the file lives at url.
+    content_hash = Column(String(64), primary_key=True)
+    url = Column(String, nullable=False, unique=True)
+    content_type = Column(String(50), nullable=True)
+    size_bytes = Column(Integer, nullable=True)
+    # Products, product images and collections whose image_url is url,
+    # recounted whenever a transaction changes one of them.
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # When ref_count last dropped to 0 (or the file was stored); NULL while
+    # referenced.
+    unreferenced_since = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class StoredAssetSource(Base):
+    """The stored file an integration source's image URL was downloaded to."""
+
+    __tablename__ = "stored_asset_sources"
+
+    # SHA-256 of "<integration source id>:<provider image URL>".
+    source_key = Column(String(64), primary_key=True)
+    content_hash = Column(
+        String(64), ForeignKey("stored_assets.content_hash", ondelete="CASCADE"), nullable=False, index=True
+    )
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
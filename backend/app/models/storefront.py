@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, JSON, String, Text, UniqueConstraint
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, JSON, String, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -58,6 +58,7 @@ class StorefrontDomain(BaseModel):
 
 class StoreCollection(BaseModel):
     __tablename__ = "store_collections"
+    __table_args__ = (Index("ix_store_collections_image_url", "image_url", postgresql_using="hash"),)
 
     storefront_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("storefronts.id"), nullable=False, index=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
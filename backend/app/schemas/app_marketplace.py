@@ -179,6 +179,8 @@ class AppBillingSummary(BaseModel):
 
 class WebhookTestOut(BaseModel):
     delivered: bool
+    queued: bool = False
+    webhook_id: Optional[str] = None
     endpoint: Optional[str] = None
     status_code: Optional[int] = None
     signature: Optional[str] = None
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ExportJobCreate(BaseModel):
+    resource: str = Field(min_length=1, max_length=30)
+    format: Literal["excel", "csv"] = "excel"
+    filters: dict[str, Optional[str]] = Field(default_factory=dict)
+
+
+class ExportJobOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    resource: str
+    format: str
+    filters: dict[str, str] = Field(default_factory=dict)
+    status: str
+    total_records: int | None
+    processed_records: int
+    rows_written: int | None
+    percent: int | None
+    queued_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    expires_at: datetime | None
+    file_name: str | None
+    file_size: int | None
+    error_message: str | None
+    # True when an identical export over unchanged data was returned instead
+    # of queuing a new one.
+    reused: bool = False
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class ImageDerivative(BaseModel):
+    """A resized copy of a product image (``webp`` or ``avif``)."""
+
+    width: int
+    height: int
+    format: str
+    url: str
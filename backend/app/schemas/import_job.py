@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ImportJobOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    resource: str
+    file_name: str
+    file_size: int | None
+    received_bytes: int
+    status: str
+    total_rows: int | None
+    processed_rows: int
+    percent: int | None
+    summary: dict[str, Any] = Field(default_factory=dict)
+    queued_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    error_message: str | None
+
+
+class ImportUploadCreate(BaseModel):
+    resource: str
+    file_name: str = Field(min_length=1, max_length=255)
+    file_size: int = Field(gt=0)
+    options: dict[str, Any] = Field(default_factory=dict)
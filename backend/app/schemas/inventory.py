@@ -77,3 +77,27 @@ class Movement(MovementBase):
     
     class Config:
         from_attributes = True
+
+
+class MovementUser(BaseModel):
+    id: UUID
+    full_name: Optional[str] = None
+
+
+class MovementListItem(BaseModel):
+    """A history row: the movement's own columns plus who made it."""
+    id: UUID
+    product_id: UUID
+    variant_id: Optional[UUID] = None
+    branch_id: UUID
+    warehouse_id: Optional[UUID] = None
+    type: MovementType
+    quantity: float
+    previous_stock: float
+    new_stock: float
+    unit_cost: Optional[float] = None
+    reason: Optional[str] = None
+    reference_id: Optional[str] = None
+    user_id: Optional[UUID] = None
+    created_at: datetime
+    user: Optional[MovementUser] = None
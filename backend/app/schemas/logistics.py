@@ -1,7 +1,9 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
 from uuid import UUID
 
+from app.models.sale import SaleStatus
+
 # Package Type
 class PackageTypeBase(BaseModel):
     name: str
@@ -57,3 +59,17 @@ class SalePackage(SalePackageBase):
 class PickingUpdate(BaseModel):
     sale_item_id: UUID
     quantity_picked: float
+
+# Bulk documents for a picking wave
+class SaleDocumentBatch(BaseModel):
+    doc_type: Literal["invoice", "picking", "packing"] = "picking"
+    sale_ids: Optional[List[UUID]] = Field(default=None, min_length=1, max_length=200)
+    stage: Optional[SaleStatus] = None
+    warehouse_id: Optional[UUID] = None
+    format: Literal["pdf", "zip"] = "pdf"
+
+    @model_validator(mode="after")
+    def validate_selection(self) -> "SaleDocumentBatch":
+        if (self.sale_ids is None) == (self.stage is None):
+            raise ValueError("Indica las ventas o la etapa del tablero, no ambas.")
+        return self
@@ -11,7 +11,7 @@ class NotificationTemplateBase(BaseModel):
     is_active: bool = True
 
 class NotificationTemplateCreate(NotificationTemplateBase):
-    pass
+    company_id: Optional[UUID] = None  # None creates a platform default
 
 class NotificationTemplateUpdate(BaseModel):
     name: Optional[str] = None
@@ -22,6 +22,7 @@ class NotificationTemplateUpdate(BaseModel):
 
 class NotificationTemplate(NotificationTemplateBase):
     id: UUID
+    company_id: Optional[UUID] = None
 
     class Config:
         from_attributes = True
@@ -4,6 +4,8 @@ from uuid import UUID
 from datetime import datetime
 from enum import Enum
 
+from app.schemas.image import ImageDerivative
+
 class POSProductVariant(BaseModel):
     id: UUID
     name: str
@@ -23,8 +25,15 @@ class POSProduct(BaseModel):
     category_id: Optional[UUID] = None
     category_name: Optional[str] = None
     image_url: Optional[str] = None
+    # Resized WebP/AVIF copies of image_url, smallest first.
+    image_derivatives: List[ImageDerivative] = []
     variants: List[POSProductVariant] = []
 
+class POSProductLookup(BaseModel):
+    product: POSProduct
+    # Set when the code belongs to one of the product's variants.
+    variant_id: Optional[UUID] = None
+
 class POSCartItem(BaseModel):
     product_id: UUID
     variant_id: Optional[UUID] = None
@@ -1,5 +1,5 @@
-from typing import Any, Optional, List
-from pydantic import BaseModel, Field
+from typing import Any, Literal, Optional, List
+from pydantic import BaseModel, Field, model_validator
 from uuid import UUID
 from app.schemas.unit_of_measure import UnitOfMeasure as UnitOfMeasureSchema
 from app.schemas.brand import Brand as BrandSchema
@@ -131,22 +131,6 @@ class ProductBulkDeleteRequest(BaseModel):
     force: bool = False
 
 
-class ProductBulkDeleteBlocked(BaseModel):
-    id: UUID
-    name: str
-    reasons: List[str]
-
-
-class ProductBulkDeleteResponse(BaseModel):
-    requested: int
-    deleted: int
-    deleted_ids: List[UUID]
-    blocked: List[ProductBulkDeleteBlocked]
-    not_found: List[UUID]
-    archived: int = 0
-    archived_ids: List[UUID] = Field(default_factory=list)
-
-
 class ProductBulkRestoreArchivedRequest(BaseModel):
     """Restore selected archived products, or all archived products when empty."""
 
@@ -165,8 +149,6 @@ class ProductBulkDeleteArchivedRequest(BaseModel):
 
     product_ids: List[UUID] = Field(default_factory=list, max_length=5000)
     purge_inventory: bool = False
-    exclude_product_ids: List[UUID] = Field(default_factory=list, max_length=20000)
-    limit: int = Field(default=25, ge=1, le=100)
 
 
 class ProductPage(BaseModel):
@@ -221,3 +203,87 @@ class ProductBulkPublishResponse(BaseModel):
     reactivated: int
     already_published: int
     not_found: List[UUID]
+
+
+class PriceExpression(BaseModel):
+    """New value of a numeric field: fixed, a percentage or an amount over the current one.
+
+    ``round_to`` rounds the result to a multiple of that step (1, 0.01, 50,
+    100...) in the ``rounding`` direction.
+    """
+
+    mode: Literal["set", "percent", "delta"]
+    value: float
+    round_to: Optional[float] = Field(default=None, gt=0)
+    rounding: Literal["nearest", "up", "down"] = "nearest"
+
+
+class ProductBulkChanges(BaseModel):
+    """Fields to change in every matched product; omitted fields stay as they are.
+
+    ``variant_price`` applies to variants with their own price (set by
+    integrations); the others follow ``price`` plus their ``price_extra``.
+    """
+
+    price: Optional[PriceExpression] = None
+    cost: Optional[PriceExpression] = None
+    variant_price: Optional[PriceExpression] = None
+    price_extra: Optional[PriceExpression] = None
+    tax_rate: Optional[float] = Field(default=None, ge=0, le=100)
+    category_id: Optional[UUID] = None
+    brand_id: Optional[UUID] = None
+    sale_ok: Optional[bool] = None
+    purchase_ok: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def validate_fixed_prices(self) -> "ProductBulkChanges":
+        # A negative price_extra is a cheaper variant; other amounts are not negative.
+        for name in ("price", "cost", "variant_price"):
+            expression = getattr(self, name)
+            if expression is not None and expression.mode == "set" and expression.value < 0:
+                raise ValueError(f"{name} cannot be set to a negative value")
+        return self
+
+
+class ProductBulkFilters(BaseModel):
+    """Admin catalog filters selecting the active products to change.
+
+    At least one filter is required; ``all`` selects the whole active catalog.
+    """
+
+    search: Optional[str] = None
+    category_id: Optional[UUID] = None
+    brand_id: Optional[UUID] = None
+    product_type: Optional[str] = None
+    all: bool = False
+
+    @model_validator(mode="after")
+    def validate_scope(self) -> "ProductBulkFilters":
+        if not self.all and not (self.search and self.search.strip()) and not any(
+            (self.category_id, self.brand_id, self.product_type)
+        ):
+            raise ValueError("Provide at least one filter, or all=true to change the whole catalog")
+        return self
+
+
+class ProductBulkUpdateRequest(BaseModel):
+    """Products to change, by ID or by filters, and the changes to apply."""
+
+    product_ids: Optional[List[UUID]] = Field(default=None, min_length=1, max_length=10000)
+    filters: Optional[ProductBulkFilters] = None
+    changes: ProductBulkChanges
+
+    @model_validator(mode="after")
+    def validate_selection(self) -> "ProductBulkUpdateRequest":
+        if (self.product_ids is None) == (self.filters is None):
+            raise ValueError("Provide either product_ids or filters")
+        if not self.changes.model_dump(exclude_none=True):
+            raise ValueError("At least one change is required")
+        return self
+
+
+class ProductBulkUpdateResponse(BaseModel):
+    matched: int
+    products_updated: int
+    variants_updated: int
+    not_found: List[UUID]
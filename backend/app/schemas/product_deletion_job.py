@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ProductDeletionJobOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    scope: str
+    status: str
+    total_products: int | None
+    processed_products: int
+    percent: int | None
+    summary: dict[str, Any] = Field(default_factory=dict)
+    queued_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    error_message: str | None
@@ -4,6 +4,8 @@ from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field
 
+from app.schemas.image import ImageDerivative
+
 
 class Msg(BaseModel):
     msg: str
@@ -464,6 +466,8 @@ class PublicProduct(BaseModel):
     variants: list[PublicProductVariant] = Field(default_factory=list)
     image_url: Optional[str] = None
     gallery: list[str] = Field(default_factory=list)
+    # Resized WebP/AVIF copies of image_url and the gallery, by original URL.
+    image_derivatives: dict[str, list[ImageDerivative]] = Field(default_factory=dict)
     price: float
     base_price: float
     compare_at_price: Optional[float] = None
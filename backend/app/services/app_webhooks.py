@@ -0,0 +1,242 @@
+"""Queue and deliver signed webhooks to installed marketplace apps.
+
+API handlers only enqueue an ``app.webhook`` outbox event in their own
+transaction. ``app.workers.app_webhook_worker`` consumes those events, posts
+them through a pooled HTTP session off the event loop and schedules retries as
+delayed outbox events, so a slow partner endpoint never holds an API worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from urllib import parse as urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.app_security import sign_webhook_payload
+from app.models.app_definition import AppDefinition
+from app.models.company_app_install import CompanyAppInstall
+from app.services.outbox import enqueue_outbox_event
+
+WEBHOOK_EVENT_TYPE = "app.webhook"
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+
+
+def webhook_endpoint(install: CompanyAppInstall) -> str | None:
+    return install.webhook_url or (install.settings or {}).get("webhook_url")
+
+
+def encode_webhook_body(envelope: dict[str, Any]) -> bytes:
+    return json.dumps(envelope, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def enqueue_app_webhook(
+    db: AsyncSession,
+    install: CompanyAppInstall,
+    app: AppDefinition,
+    company_id: Any,
+    event_name: str,
+    payload: dict[str, Any],
+    *,
+    attempt_number: int = 1,
+    webhook_id: str | None = None,
+    envelope: dict[str, Any] | None = None,
+    available_at: datetime | None = None,
+    deferral: int = 0,
+) -> dict[str, Any]:
+    """Queue one signed webhook attempt; the caller commits it with its change.
+
+    ``webhook_id`` identifies the logical notification across retries and is
+    sent to the partner as ``X-Lumefy-Delivery`` so receivers can deduplicate.
+    ``deferral`` counts the times an attempt was postponed without being sent
+    (open circuit), so each postponement gets its own outbox event.
+    """
+    endpoint = webhook_endpoint(install)
+    if not endpoint:
+        return {"delivered": False, "queued": False, "reason": "webhook_url_missing"}
+    if not install.webhook_secret:
+        return {"delivered": False, "queued": False, "reason": "webhook_secret_missing", "endpoint": endpoint}
+
+    webhook_id = webhook_id or str(uuid.uuid4())
+    if envelope is None:
+        envelope = {
+            "id": webhook_id,
+            "event": event_name,
+            "app_slug": app.slug,
+            "company_id": str(company_id),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "payload": payload,
+        }
+    enqueue_outbox_event(
+        db,
+        event_type=WEBHOOK_EVENT_TYPE,
+        aggregate_type="company_app_install",
+        aggregate_id=install.id,
+        company_id=company_id,
+        payload={
+            "webhook_id": webhook_id,
+            "install_id": str(install.id),
+            "app_id": str(app.id),
+            "event_name": event_name,
+            "attempt_number": attempt_number,
+            "deferral": deferral,
+            "envelope": envelope,
+        },
+        idempotency_key=(
+            f"{WEBHOOK_EVENT_TYPE}:{webhook_id}:{attempt_number}"
+            + (f":deferred-{deferral}" if deferral else "")
+        ),
+        available_at=available_at,
+    )
+    return {
+        "delivered": False,
+        "queued": True,
+        "endpoint": endpoint,
+        "reason": "queued",
+        "webhook_id": webhook_id,
+    }
+
+
+def retry_delay_seconds(attempt_number: int, *, base_seconds: float, max_seconds: float) -> float:
+    """Exponential backoff, jittered across the upper half of each window."""
+    ceiling = min(max_seconds, base_seconds * (2 ** max(0, attempt_number - 1)))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def is_retryable(status_code: int | None) -> bool:
+    if status_code is None:
+        return True
+    return status_code in RETRYABLE_STATUS_CODES or 500 <= status_code <= 599
+
+
+def endpoint_key(endpoint: str) -> str:
+    """Group concurrency and circuit state by partner origin, not full URL."""
+    parts = urlparse.urlsplit(endpoint)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+@dataclass
+class WebhookResult:
+    delivered: bool
+    status_code: int | None = None
+    reason: str | None = None
+    circuit_open: bool = False
+
+
+class CircuitBreaker:
+    """Per-endpoint breaker: open after consecutive failures, probe after a cooldown."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures: dict[str, int] = {}
+        self._open_until: dict[str, float] = {}
+
+    def open_until(self, key: str) -> float | None:
+        until = self._open_until.get(key)
+        if until is None:
+            return None
+        if time.monotonic() >= until:
+            # Half-open: let the next request probe the endpoint.
+            self._open_until.pop(key, None)
+            return None
+        return until
+
+    def record_success(self, key: str) -> None:
+        self._failures.pop(key, None)
+        self._open_until.pop(key, None)
+
+    def record_failure(self, key: str) -> None:
+        failures = self._failures.get(key, 0) + 1
+        self._failures[key] = failures
+        if failures >= self.failure_threshold:
+            self._open_until[key] = time.monotonic() + self.reset_seconds
+
+
+class WebhookDispatcher:
+    """Pooled, bounded HTTP delivery for app webhooks.
+
+    ``requests`` keeps keep-alive connections per origin; the blocking calls run
+    on a dedicated thread pool so neither the loop nor the default executor is
+    starved by a slow partner.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = 16,
+        per_endpoint_concurrency: int = 4,
+        timeout_seconds: float = 8,
+        failure_threshold: int = 5,
+        circuit_reset_seconds: float = 60,
+    ) -> None:
+        self.per_endpoint_concurrency = per_endpoint_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.breaker = CircuitBreaker(failure_threshold, circuit_reset_seconds)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="app-webhook")
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def _post(self, endpoint: str, body: bytes, headers: dict[str, str]) -> WebhookResult:
+        try:
+            response = self._session.post(
+                endpoint,
+                data=body,
+                headers=headers,
+                timeout=self.timeout_seconds,
+                allow_redirects=False,
+            )
+            response.close()
+        except requests.RequestException as exc:
+            return WebhookResult(False, None, f"{type(exc).__name__}: {exc}"[:500])
+        if 200 <= response.status_code < 300:
+            return WebhookResult(True, response.status_code)
+        return WebhookResult(False, response.status_code, f"http_error:{response.status_code}")
+
+    async def deliver(self, endpoint: str, body: bytes, headers: dict[str, str]) -> WebhookResult:
+        key = endpoint_key(endpoint)
+        if self.breaker.open_until(key) is not None:
+            return WebhookResult(False, None, "circuit_open", circuit_open=True)
+        semaphore = self._semaphores.setdefault(key, asyncio.Semaphore(self.per_endpoint_concurrency))
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, self._post, endpoint, body, headers)
+        if result.delivered:
+            self.breaker.record_success(key)
+        elif is_retryable(result.status_code):
+            # Permanent 4xx answers prove the endpoint is alive; only transport
+            # errors and server-side failures count towards opening the circuit.
+            self.breaker.record_failure(key)
+        return result
+
+    def close(self) -> None:
+        self._session.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def signed_headers(secret: str, event_name: str, webhook_id: str, body: bytes) -> tuple[str, dict[str, str]]:
+    signature = sign_webhook_payload(secret, body)
+    return signature, {
+        "Content-Type": "application/json",
+        "X-Lumefy-Event": event_name,
+        "X-Lumefy-Delivery": webhook_id,
+        "X-Lumefy-Signature": signature,
+    }
+
+
+def next_attempt_at(attempt_number: int, *, base_seconds: float, max_seconds: float) -> datetime:
+    return datetime.utcnow() + timedelta(
+        seconds=retry_delay_seconds(attempt_number, base_seconds=base_seconds, max_seconds=max_seconds)
+    )
@@ -0,0 +1,216 @@
+"""
+Content-addressed store for product images.
+
+Catalog uploads and integration downloads are saved once per distinct
+content, at ``/static/assets/<ab>/<sha256><ext>``: the same image uploaded
+twice or synced from several sources is written once and shares one URL.
+Provider URLs map to their file through ``stored_asset_sources``, so a sync
+never downloads an image it already has.
+
+``stored_assets.ref_count`` counts the products, product images and
+collections using each file. The session collects the asset URLs a flush
+adds or removes and recounts them right before committing, in the same
+transaction; bulk statements call :func:`mark_asset_refs_stale`. Assets
+unreferenced for ``ASSET_GC_GRACE_HOURS`` (uploads are unreferenced until
+their product is saved) are deleted by :func:`collect_unreferenced_assets`,
+an indexed query instead of a walk of the directory; their files are removed
+before the deletion commits, so an upload of the same bytes waits for it.
+"""
+import asyncio
+import hashlib
+import logging
+import operator
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta, timezone
+from functools import reduce
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, case, delete, event, exists, func, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import discard_on_rollback
+from app.models.product import Product
+from app.models.product_image import ProductImage
+from app.models.storefront import StoreCollection
+from app.models.stored_asset import StoredAsset, StoredAssetSource
+from app.services.image_derivatives import STATIC_DIR, forget_derivatives
+
+logger = logging.getLogger(__name__)
+
+ASSET_DIR = STATIC_DIR / "assets"
+ASSET_PREFIX = "/static/assets"
+CONTENT_TYPES = {".jpg": "image/jpeg", ".png": "image/png", ".webp": "image/webp", ".gif": "image/gif"}
+# Assets deleted per collection run.
+GC_BATCH = 500
+
+_ASSET_URL = re.compile(r"^/static/assets/([0-9a-f]{2})/(\1[0-9a-f]{62})(\.(?:jpg|png|webp|gif))$")
+_SESSION_URLS = "stored_asset_urls"
+# Every column that can point at a stored asset.
+REFERENCES = (Product.image_url, ProductImage.image_url, StoreCollection.image_url)
+_REFERRERS = {column.class_: column.key for column in REFERENCES}
+
+
+def is_asset_url(value: Optional[str]) -> bool:
+    return bool(value and _ASSET_URL.fullmatch(value))
+
+
+def asset_path(url: Optional[str]) -> Optional[Path]:
+    match = _ASSET_URL.fullmatch(url or "")
+    return ASSET_DIR / match.group(1) / f"{match.group(2)}{match.group(3)}" if match else None
+
+
+def _write_once(path: Path, data: bytes) -> None:
+    if path.is_file() and path.stat().st_size == len(data):
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(prefix=".asset-", dir=path.parent)
+    try:
+        with os.fdopen(descriptor, "wb") as output:
+            output.write(data)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temporary_path, path)
+    except Exception:
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+        raise
+
+
+async def store_asset(db: AsyncSession, data: bytes, extension: str) -> str:
+    """URL of ``data`` in the store, writing the file only if no identical one exists.
+
+    The asset stays unreferenced (and collectable after the grace period)
+    until a product, product image or collection using the URL is committed.
+    """
+    content_hash = hashlib.sha256(data).hexdigest()
+    table = StoredAsset.__table__
+    # Identical bytes keep their first URL, whatever extension they arrive with.
+    url = (await db.execute(
+        insert(table)
+        .values(
+            content_hash=content_hash,
+            url=f"{ASSET_PREFIX}/{content_hash[:2]}/{content_hash}{extension}",
+            content_type=CONTENT_TYPES.get(extension),
+            size_bytes=len(data),
+            ref_count=0,
+            unreferenced_since=func.now(),
+        )
+        .on_conflict_do_update(
+            index_elements=[table.c.content_hash],
+            set_={"unreferenced_since": case((table.c.ref_count == 0, func.now()), else_=table.c.unreferenced_since)},
+        )
+        .returning(table.c.url)
+    )).scalar_one()
+    await asyncio.to_thread(_write_once, asset_path(url), data)
+    return url
+
+
+async def source_asset_url(db: AsyncSession, source_key: str) -> Optional[str]:
+    """The stored file an integration image was downloaded to, if it is still on disk."""
+    url = await db.scalar(
+        select(StoredAsset.url)
+        .join(StoredAssetSource, StoredAssetSource.content_hash == StoredAsset.content_hash)
+        .where(StoredAssetSource.source_key == source_key)
+    )
+    path = asset_path(url)
+    return url if path is not None and await asyncio.to_thread(path.is_file) else None
+
+
+async def remember_source(db: AsyncSession, source_key: str, url: str) -> None:
+    content_hash = _ASSET_URL.fullmatch(url).group(2)
+    await db.execute(
+        insert(StoredAssetSource)
+        .values(source_key=source_key, content_hash=content_hash)
+        .on_conflict_do_update(index_elements=[StoredAssetSource.source_key], set_={"content_hash": content_hash})
+    )
+
+
+def mark_asset_refs_stale(db: AsyncSession | Session, urls: Iterable[Optional[str]]) -> None:
+    """Recount the references of ``urls`` when ``db`` commits (after bulk statements)."""
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    stale = {url for url in urls if is_asset_url(url)}
+    if stale:
+        session.info.setdefault(_SESSION_URLS, set()).update(stale)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_asset_urls(session: Session, _flush_context) -> None:
+    urls = set()
+    for instance in (*session.new, *session.deleted):
+        key = _REFERRERS.get(type(instance))
+        if key:
+            urls.add(getattr(instance, key))
+    for instance in session.dirty:
+        key = _REFERRERS.get(type(instance))
+        if key:
+            history = inspect(instance).attrs[key].history
+            urls.update((*history.added, *history.deleted))
+    mark_asset_refs_stale(session, urls)
+
+
+@event.listens_for(Session, "before_commit")
+def _recount_asset_refs(session: Session) -> None:
+    session.flush()
+    urls = session.info.pop(_SESSION_URLS, None)
+    if not urls:
+        return
+    table = StoredAsset.__table__
+    refs = reduce(operator.add, [
+        select(func.count()).where(column == table.c.url).scalar_subquery()
+        for column in REFERENCES
+    ])
+    session.execute(
+        update(table)
+        .where(table.c.url.in_(urls))
+        .values(
+            ref_count=refs,
+            unreferenced_since=case((refs == 0, func.coalesce(table.c.unreferenced_since, func.now())), else_=None),
+        )
+    )
+
+
+discard_on_rollback(_SESSION_URLS)
+
+
+def _remove_files(urls: set[str]) -> None:
+    for url in urls:
+        try:
+            asset_path(url).unlink()
+        except FileNotFoundError:
+            continue
+        except OSError:
+            logger.warning("Could not remove stored asset %s", url)
+
+
+async def collect_unreferenced_assets(db: AsyncSession) -> int:
+    """Delete assets unreferenced for longer than the grace period, with their files and derivatives."""
+    table = StoredAsset.__table__
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.ASSET_GC_GRACE_HOURS)
+    candidates = (
+        select(table.c.content_hash)
+        .where(
+            table.c.ref_count == 0,
+            table.c.unreferenced_since < cutoff,
+            # Rows written by statements that skipped the recount still count.
+            and_(*(~exists().where(column == table.c.url) for column in REFERENCES)),
+        )
+        .limit(GC_BATCH)
+        .with_for_update(skip_locked=True)
+    )
+    deleted = set((await db.execute(
+        delete(table).where(table.c.content_hash.in_(candidates)).returning(table.c.url)
+    )).scalars().all())
+    if deleted:
+        # Files go before the commit: until then, storing the same bytes again
+        # waits on the deleted rows (store_asset's upsert) instead of keeping
+        # a file about to be removed.
+        await asyncio.to_thread(_remove_files, deleted)
+        await forget_derivatives(db, deleted, commit=False)
+    await db.commit()
+    return len(deleted)
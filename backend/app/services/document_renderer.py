@@ -0,0 +1,328 @@
+"""
+Off-loop, cached PDF rendering for sales and purchase documents.
+
+Endpoints turn the loaded ORM objects into plain snapshots (``sale_snapshot``,
+``purchase_snapshot``, ``company_snapshot``) and call ``render_pdf`` or
+``render_many``. Snapshots are rendered by ``pdf_service.render_document`` in a
+process pool, so reportlab neither blocks the event loop nor holds the GIL
+other requests need.
+
+Company logos are downloaded and re-encoded once, then kept per company for
+an hour. Rendered PDFs are cached in this process and in Redis under the
+document id and a digest of everything printed on it (snapshot, company,
+logo and print date), so any change to the document renders a new file.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import requests
+from PIL import Image as PILImage
+
+from app.core.config import settings
+from app.core.lru import LRUCache
+from app.core.redis_client import get_redis
+from app.services.pdf_service import DOCUMENT_GENERATORS, DocumentLogo, render_combined, render_document
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "lumefy:pdf"
+LOGO_BOX = (120, 50)
+# Logo pixels kept per point of the header box, enough for print quality.
+LOGO_PIXELS_PER_POINT = 4
+LOGO_MAX_BYTES = 2 * 1024 * 1024
+LOGO_TTL_SECONDS = 3600
+LOGO_MISS_TTL_SECONDS = 300
+STATIC_DIR = Path(__file__).resolve().parents[2] / "static"
+_MISSING = object()
+
+_logos: LRUCache[tuple[str, str], Optional[DocumentLogo]] = LRUCache(256)
+_logo_loads: dict[tuple[str, str], asyncio.Task] = {}
+_pdfs: LRUCache[str, bytes] = LRUCache(64, ttl_seconds=300)
+_pool: Optional[ProcessPoolExecutor] = None
+_batch_limit: Optional[tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+
+def company_snapshot(company: Any) -> Optional[dict]:
+    if not company:
+        return None
+    return {
+        "id": str(company.id),
+        "name": company.name,
+        "address": company.address,
+        "tax_id": company.tax_id,
+        "phone": company.phone,
+        "website": company.website,
+        "logo_url": company.logo_url,
+    }
+
+
+def _product_snapshot(product: Any) -> Optional[dict]:
+    return {"name": product.name, "sku": product.sku} if product else None
+
+
+def sale_snapshot(sale: Any) -> dict:
+    """The fields of ``sale`` printed on its invoice, picking and packing documents."""
+    client = sale.client
+    return {
+        "id": str(sale.id),
+        # Formatted as the documents print it.
+        "status": f"{sale.status}",
+        "payment_method": sale.payment_method,
+        "notes": sale.notes,
+        "subtotal": sale.subtotal,
+        "tax": sale.tax,
+        "total": sale.total,
+        "user": {"full_name": sale.user.full_name} if sale.user else None,
+        "client": {
+            "name": client.name,
+            "address": client.address,
+            "phone": client.phone,
+            "email": client.email,
+        } if client else None,
+        "items": [
+            {
+                "quantity": item.quantity,
+                "price": item.price,
+                "total": item.total,
+                "product": _product_snapshot(item.product),
+            }
+            for item in sale.items
+        ],
+    }
+
+
+def purchase_snapshot(purchase: Any) -> dict:
+    """The fields of ``purchase`` printed on its purchase order."""
+    supplier = purchase.supplier
+    return {
+        "id": str(purchase.id),
+        "status": f"{purchase.status}",
+        "expected_date": purchase.expected_date,
+        "total_amount": purchase.total_amount,
+        "supplier": {"name": supplier.name, "tax_id": supplier.tax_id} if supplier else None,
+        "items": [
+            {
+                "quantity": item.quantity,
+                "unit_cost": item.unit_cost,
+                "subtotal": item.subtotal,
+                "product": _product_snapshot(item.product),
+                "variant": {"name": item.variant.name, "sku": item.variant.sku} if item.variant else None,
+            }
+            for item in purchase.items
+        ],
+    }
+
+
+def _read_logo(url: str) -> Optional[bytes]:
+    if url.startswith(("http://", "https://")):
+        with requests.get(url, timeout=5, stream=True) as response:
+            if response.status_code != 200:
+                return None
+            data = response.raw.read(LOGO_MAX_BYTES + 1, decode_content=True)
+            return data if len(data) <= LOGO_MAX_BYTES else None
+    if url.startswith("/static/"):
+        path = (STATIC_DIR / url[len("/static/"):]).resolve()
+        if STATIC_DIR.resolve() in path.parents and path.is_file() and path.stat().st_size <= LOGO_MAX_BYTES:
+            return path.read_bytes()
+    return None
+
+
+def fit_logo(data: bytes, width: float = LOGO_BOX[0], height: float = LOGO_BOX[1]) -> DocumentLogo:
+    """Scale a logo into the header box and re-encode it as a small PNG."""
+    with PILImage.open(BytesIO(data)) as image:
+        image.load()
+        image_width, image_height = image.size
+        aspect = image_height / float(image_width)
+        draw_width, draw_height = float(image_width), float(image_height)
+        if image_width > width:
+            draw_width, draw_height = width, width * aspect
+        elif image_height > height:
+            draw_width, draw_height = height / aspect, height
+        image = image.convert("RGBA")
+        image.thumbnail((
+            max(1, int(draw_width * LOGO_PIXELS_PER_POINT)),
+            max(1, int(draw_height * LOGO_PIXELS_PER_POINT)),
+        ))
+        buffer = BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+    return DocumentLogo(buffer.getvalue(), draw_width, draw_height)
+
+
+def _load_logo(url: str) -> Optional[DocumentLogo]:
+    try:
+        data = _read_logo(url)
+        return fit_logo(data) if data else None
+    except Exception:  # noqa: BLE001 - documents fall back to the company name
+        logger.warning("Could not load company logo %s", url, exc_info=True)
+        return None
+
+
+async def company_logo(company: Optional[dict]) -> Optional[DocumentLogo]:
+    """The company's fitted logo, loaded at most once per hour and company."""
+    if not company or not company.get("logo_url"):
+        return None
+    key = (company["id"], company["logo_url"])
+    cached = _logos.get(key, _MISSING)
+    if cached is not _MISSING:
+        return cached
+    # Concurrent renders for one company (a batch) share a single download.
+    task = _logo_loads.get(key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(_load_logo, company["logo_url"]))
+        _logo_loads[key] = task
+        task.add_done_callback(lambda _task: _logo_loads.pop(key, None))
+    logo = await asyncio.shield(task)
+    _logos.set(key, logo, ttl_seconds=LOGO_TTL_SECONDS if logo else LOGO_MISS_TTL_SECONDS)
+    return logo
+
+
+def document_version(
+    kind: str,
+    document: dict,
+    company: Optional[dict],
+    logo: Optional[DocumentLogo],
+    printed_on: date,
+) -> str:
+    payload = json.dumps(
+        {
+            "kind": kind,
+            "document": document,
+            "company": company,
+            "logo": hashlib.sha256(logo.data).hexdigest() if logo else None,
+            "printed_on": printed_on.isoformat(),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def _cached_pdf(key: str) -> Optional[bytes]:
+    pdf = _pdfs.get(key)
+    if pdf is not None or not settings.PDF_CACHE_TTL_SECONDS:
+        return pdf
+    try:
+        raw = await get_redis().get(key)
+    except Exception:  # noqa: BLE001 - the cache never makes a download fail
+        logger.debug("PDF cache read failed", exc_info=True)
+        return None
+    if not raw:
+        return None
+    pdf = base64.b64decode(raw)
+    _pdfs.set(key, pdf)
+    return pdf
+
+
+async def _store_pdf(key: str, pdf: bytes) -> None:
+    if not settings.PDF_CACHE_TTL_SECONDS or len(pdf) > settings.PDF_CACHE_MAX_BYTES:
+        return
+    _pdfs.set(key, pdf)
+    try:
+        # The shared client decodes responses, so the file is stored as base64.
+        await get_redis().set(key, base64.b64encode(pdf).decode("ascii"), ex=settings.PDF_CACHE_TTL_SECONDS)
+    except Exception:  # noqa: BLE001
+        logger.debug("PDF cache write failed", exc_info=True)
+
+
+def _executor() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if not settings.PDF_RENDER_PROCESSES:
+        return None
+    if _pool is None:
+        # Spawned, not forked: the API process holds an event loop, sockets
+        # and connection pools that a forked child must not inherit.
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_RENDER_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def _run(function: Callable[..., bytes], *args: Any) -> bytes:
+    global _pool
+    executor = _executor()
+    if executor is None:
+        return await asyncio.to_thread(function, *args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+    except BrokenProcessPool:
+        # A crashed render process breaks the whole pool; start a fresh one
+        # for the next request.
+        if _pool is executor:
+            _pool = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+async def _render(*args: Any) -> bytes:
+    return await _run(render_document, *args)
+
+
+def _batch_semaphore() -> asyncio.Semaphore:
+    global _batch_limit
+    loop = asyncio.get_running_loop()
+    if _batch_limit is None or _batch_limit[0] is not loop:
+        _batch_limit = (loop, asyncio.Semaphore(max(1, settings.PDF_RENDER_PROCESSES - 1)))
+    return _batch_limit[1]
+
+
+async def render_pdf(kind: str, document: dict, company: Optional[dict] = None, *, batch: bool = False) -> bytes:
+    """Render ``document`` as a ``kind`` PDF, reusing the cached file when nothing printed on it changed."""
+    if kind not in DOCUMENT_GENERATORS:
+        raise ValueError(f"Unknown document kind: {kind}")
+    logo = await company_logo(company)
+    printed_on = date.today()
+    key = f"{KEY_PREFIX}:{kind}:{document['id']}:{document_version(kind, document, company, logo, printed_on)}"
+    pdf = await _cached_pdf(key)
+    if pdf is not None:
+        return pdf
+    if batch:
+        async with _batch_semaphore():
+            pdf = await _render(kind, document, company, logo, printed_on)
+    else:
+        pdf = await _render(kind, document, company, logo, printed_on)
+    await _store_pdf(key, pdf)
+    return pdf
+
+
+async def render_many(documents: list[tuple[str, dict]], company: Optional[dict] = None) -> list[bytes]:
+    """Render several ``(kind, snapshot)`` documents of one company, in order.
+
+    They render in parallel across the pool but hold at most all processes
+    but one, so single downloads still find a free process.
+    """
+    await company_logo(company)
+    return list(await asyncio.gather(
+        *(render_pdf(kind, document, company, batch=True) for kind, document in documents)
+    ))
+
+
+async def render_combined_pdf(kind: str, documents: list[dict], company: Optional[dict] = None) -> bytes:
+    """Render several snapshots of one kind into a single printable PDF.
+
+    The merged file renders in one pool process, counted against the batch
+    limit like ``render_many``.
+    """
+    if kind not in DOCUMENT_GENERATORS:
+        raise ValueError(f"Unknown document kind: {kind}")
+    logo = await company_logo(company)
+    printed_on = date.today()
+    version = document_version(kind, {"documents": documents}, company, logo, printed_on)
+    key = f"{KEY_PREFIX}:{kind}:combined:{version}"
+    pdf = await _cached_pdf(key)
+    if pdf is not None:
+        return pdf
+    async with _batch_semaphore():
+        pdf = await _run(render_combined, kind, documents, company, logo, printed_on)
+    await _store_pdf(key, pdf)
+    return pdf
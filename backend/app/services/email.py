@@ -6,6 +6,7 @@ import aiosmtplib
 from pydantic import EmailStr
 
 from app.core.config import settings
+from app.services.notification_templates import render_default
 
 logger = logging.getLogger(__name__)
 
@@ -44,32 +45,15 @@ class EmailService:
 
     @staticmethod
     async def send_reset_password_email(email_to: str, token: str):
-        project_name = settings.PROJECT_NAME
-        subject = f"{project_name} - Recuperación de Contraseña"
-        link = f"{settings.FRONTEND_URL}/reset-password?token={token}"
-        
-        html_content = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif;">
-                <div style="background-color: #f4f6f9; padding: 20px;">
-                    <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; padding: 30px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                        <h2 style="color: #1a237e; text-align: center;">{project_name}</h2>
-                        <h3 style="color: #333;">Recuperación de Contraseña</h3>
-                        <p style="color: #555;">Hola,</p>
-                        <p style="color: #555;">Recibimos una solicitud para restablecer tu contraseña. Si no fuiste tú, puedes ignorar este correo.</p>
-                        <p style="color: #555;">Para continuar, haz clic en el siguiente botón:</p>
-                        <div style="text-align: center; margin: 30px 0;">
-                            <a href="{link}" style="background-color: #1a237e; color: #ffffff; padding: 12px 24px; text-decoration: none; border-radius: 4px; font-weight: bold;">Restablecer Contraseña</a>
-                        </div>
-                        <p style="color: #999; font-size: 12px; text-align: center;">Este enlace expirará en 1 hora.</p>
-                        <hr style="border: 1px solid #eee; margin: 20px 0;">
-                        <p style="color: #999; font-size: 10px; text-align: center;">&copy; {project_name}. Todos los derechos reservados.</p>
-                    </div>
-                </div>
-            </body>
-        </html>
-        """
-        await EmailService.send_email(email_to, subject, html_content)
+        message = render_default(
+            "PASSWORD_RESET_EMAIL",
+            {
+                "project_name": settings.PROJECT_NAME,
+                "link": f"{settings.FRONTEND_URL}/reset-password?token={token}",
+            },
+            html_body=True,
+        )
+        await EmailService.send_email(email_to, message.title, message.body)
 
     @staticmethod
     async def send_storefront_reset_password_email(
@@ -78,23 +62,9 @@ class EmailService:
         storefront_name: str,
         reset_link: str,
     ):
-        subject = f"{storefront_name} - Password reset"
-        html_content = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif;">
-                <div style="background-color: #f4f6f9; padding: 20px;">
-                    <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; padding: 30px; border-radius: 8px;">
-                        <h2 style="color: #1a237e; text-align: center;">{storefront_name}</h2>
-                        <h3 style="color: #333;">Reset your password</h3>
-                        <p style="color: #555;">We received a request to reset your password.</p>
-                        <p style="color: #555;">If you did not request this change, you can ignore this email.</p>
-                        <div style="text-align: center; margin: 30px 0;">
-                            <a href="{reset_link}" style="background-color: #1a237e; color: #ffffff; padding: 12px 24px; text-decoration: none; border-radius: 4px; font-weight: bold;">Reset Password</a>
-                        </div>
-                        <p style="color: #999; font-size: 12px; text-align: center;">This link expires in 1 hour.</p>
-                    </div>
-                </div>
-            </body>
-        </html>
-        """
-        await EmailService.send_email(email_to, subject, html_content)
+        message = render_default(
+            "STOREFRONT_PASSWORD_RESET_EMAIL",
+            {"storefront_name": storefront_name, "reset_link": reset_link},
+            html_body=True,
+        )
+        await EmailService.send_email(email_to, message.title, message.body)
@@ -0,0 +1,391 @@
+"""
+Data exports offered by the API, one definition per resource.
+
+Each definition names the permission it requires, its columns, the filters it
+accepts and how to build its company-scoped query and turn each loaded object
+into rows. The synchronous ``/<resource>/export`` endpoints and the background
+export worker read the same definitions, so both produce identical files.
+"""
+import json
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.branch import Branch
+from app.models.client import Client
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.purchase import PurchaseOrder
+from app.models.sale import Sale
+from app.services.export_service import ExportService
+
+Filters = dict[str, Optional[str]]
+
+
+@dataclass(frozen=True)
+class ExportDefinition:
+    resource: str
+    filename: str
+    permission: str
+    columns: dict[str, str]
+    build_query: Callable[[uuid.UUID, Filters], Select]
+    to_rows: Callable[[Any], Iterable[dict]]
+    filters: tuple[str, ...] = ()
+    # Extra freshness markers for data the root rows do not timestamp, given
+    # the subquery of exported rows (see ``export_watermark``).
+    watermark: Callable[[Any], list] = field(default=lambda rows: [])
+
+
+PRODUCT_EXPORT_COLUMNS = {
+    "product_id": "product_id",
+    "variant_id": "variant_id",
+    "name": "name",
+    "sku": "sku",
+    "barcode": "barcode",
+    "variant_name": "variant_name",
+    "variant_sku": "variant_sku",
+    "variant_barcode": "variant_barcode",
+    "price": "price",
+    "cost": "cost",
+    "price_extra": "price_extra",
+    "cost_extra": "cost_extra",
+    "variant_price": "variant_price",
+    "variant_cost": "variant_cost",
+    "variant_attributes_json": "variant_attributes_json",
+    "variant_weight": "variant_weight",
+    "product_type": "product_type",
+    "category_name": "category_name",
+    "brand_name": "brand_name",
+    "image_url": "image_url",
+    "tax_rate": "tax_rate",
+    "min_stock": "min_stock",
+    "track_inventory": "track_inventory",
+    "sale_ok": "sale_ok",
+    "purchase_ok": "purchase_ok",
+    "is_active": "is_active",
+    "variant_is_active": "variant_is_active",
+}
+
+
+def product_export_row(product: Product, variant: ProductVariant | None = None) -> dict[str, Any]:
+    """Build one round-trip row for a product or one of its variants.
+
+    IDs are the only stable relation keys.  SKU values are deliberately kept as
+    editable business data and are never used to decide which record to update.
+    """
+    return {
+        "product_id": str(product.id),
+        "variant_id": str(variant.id) if variant else "",
+        "name": product.name or "",
+        "sku": product.sku or "",
+        "barcode": product.barcode or "",
+        "variant_name": variant.name if variant else "",
+        "variant_sku": variant.sku if variant else "",
+        "variant_barcode": variant.barcode if variant else "",
+        "price": float(product.price) if product.price is not None else 0,
+        "cost": float(product.cost) if product.cost is not None else 0,
+        "price_extra": float(variant.price_extra) if variant else 0,
+        "cost_extra": float(variant.cost_extra) if variant else 0,
+        "variant_price": float(variant.price) if variant and variant.price is not None else "",
+        "variant_cost": float(variant.cost) if variant and variant.cost is not None else "",
+        "variant_attributes_json": (
+            json.dumps(variant.attributes or {}, ensure_ascii=False, sort_keys=True)
+            if variant
+            else ""
+        ),
+        "variant_weight": float(variant.weight) if variant and variant.weight is not None else "",
+        "product_type": product.product_type or "",
+        "category_name": product.category.name if product.category else "",
+        "brand_name": product.brand.name if product.brand else "",
+        "image_url": product.image_url or "",
+        "tax_rate": float(product.tax_rate) if product.tax_rate is not None else 0,
+        "min_stock": float(product.min_stock) if product.min_stock is not None else 0,
+        "track_inventory": bool(product.track_inventory),
+        "sale_ok": bool(product.sale_ok),
+        "purchase_ok": bool(product.purchase_ok),
+        "is_active": bool(product.is_active),
+        "variant_is_active": bool(variant.is_active) if variant else "",
+    }
+
+
+def build_product_export_rows(products: Iterable[Product]) -> list[dict[str, Any]]:
+    """Return one row per variant, or one row for products without variants."""
+    rows: list[dict[str, Any]] = []
+    for product in products:
+        variants = list(product.variants or [])
+        if variants:
+            rows.extend(product_export_row(product, variant) for variant in variants)
+        else:
+            rows.append(product_export_row(product))
+    return rows
+
+
+def _products_query(company_id: uuid.UUID, filters: Filters) -> Select:
+    query = select(Product).options(
+        selectinload(Product.brand),
+        selectinload(Product.category),
+        selectinload(Product.unit_of_measure),
+        selectinload(Product.variants),
+    ).where(Product.company_id == company_id).order_by(Product.created_at.desc(), Product.id)
+    if filters.get("search"):
+        search_filter = f"%{filters['search']}%"
+        query = query.where(
+            or_(
+                Product.name.ilike(search_filter),
+                Product.sku.ilike(search_filter),
+                Product.variants.any(ProductVariant.name.ilike(search_filter)),
+                Product.variants.any(ProductVariant.sku.ilike(search_filter)),
+                Product.variants.any(ProductVariant.barcode.ilike(search_filter)),
+            )
+        )
+    if filters.get("category_id"):
+        query = query.where(Product.category_id == uuid.UUID(filters["category_id"]))
+    if filters.get("brand_id"):
+        query = query.where(Product.brand_id == uuid.UUID(filters["brand_id"]))
+    return query
+
+
+def _product_variants_watermark(rows) -> list:
+    # Variant edits do not touch their product's updated_at.
+    return [
+        select(func.max(ProductVariant.updated_at))
+        .where(ProductVariant.product_id.in_(select(rows.c.id)))
+        .scalar_subquery()
+    ]
+
+
+def _sales_query(company_id: uuid.UUID, filters: Filters) -> Select:
+    query = select(Sale).options(
+        selectinload(Sale.client),
+        selectinload(Sale.user),
+        selectinload(Sale.branch),
+        selectinload(Sale.storefront_order),
+    ).where(Sale.company_id == company_id).order_by(Sale.created_at.desc(), Sale.id)
+    if filters.get("status"):
+        query = query.where(Sale.status == filters["status"])
+    if filters.get("date_from"):
+        query = query.where(Sale.created_at >= datetime.fromisoformat(filters["date_from"]))
+    if filters.get("date_to"):
+        query = query.where(Sale.created_at <= datetime.fromisoformat(filters["date_to"]))
+    return query
+
+
+def _sale_rows(s: Sale) -> list[dict]:
+    return [{
+        "order_number": s.order_number or "",
+        "created_at": s.created_at.strftime("%Y-%m-%d %H:%M") if s.created_at else "",
+        "client_name": s.client.name if s.client else "Consumidor Final",
+        "branch_name": s.branch.name if s.branch else "",
+        "status": s.status or "",
+        "subtotal": float(s.subtotal) if s.subtotal else 0,
+        "tax_amount": float(s.tax_amount) if s.tax_amount else 0,
+        "total": float(s.total) if s.total else 0,
+        "user_name": s.user.full_name if s.user else "",
+    }]
+
+
+def _inventory_query(company_id: uuid.UUID, filters: Filters) -> Select:
+    query = select(Inventory).options(
+        selectinload(Inventory.product),
+        selectinload(Inventory.branch),
+    ).join(Branch, Inventory.branch_id == Branch.id).where(
+        Branch.company_id == company_id
+    ).order_by(Inventory.id)
+    if filters.get("branch_id"):
+        query = query.where(Inventory.branch_id == uuid.UUID(filters["branch_id"]))
+    return query
+
+
+def _inventory_rows(inv: Inventory) -> list[dict]:
+    return [{
+        "product_name": inv.product.name if inv.product else "",
+        "product_sku": inv.product.sku if inv.product else "",
+        "branch_name": inv.branch.name if inv.branch else "",
+        "quantity": float(inv.quantity) if inv.quantity else 0,
+        "min_quantity": float(inv.min_quantity) if getattr(inv, "min_quantity", None) else 0,
+        "max_quantity": float(inv.max_quantity) if getattr(inv, "max_quantity", None) else 0,
+    }]
+
+
+def _clients_query(company_id: uuid.UUID, filters: Filters) -> Select:
+    return select(Client).where(Client.company_id == company_id).order_by(Client.created_at, Client.id)
+
+
+def _client_rows(c: Client) -> list[dict]:
+    return [{
+        "name": c.name or "",
+        "tax_id": c.tax_id or "",
+        "email": c.email or "",
+        "phone": c.phone or "",
+        "address": c.address or "",
+        "city": getattr(c, "city", "") or "",
+        "created_at": c.created_at.strftime("%Y-%m-%d") if c.created_at else "",
+    }]
+
+
+def _purchases_query(company_id: uuid.UUID, filters: Filters) -> Select:
+    return select(PurchaseOrder).options(
+        selectinload(PurchaseOrder.supplier),
+        selectinload(PurchaseOrder.branch),
+    ).where(
+        PurchaseOrder.company_id == company_id
+    ).order_by(PurchaseOrder.created_at.desc(), PurchaseOrder.id)
+
+
+def _purchase_rows(p: PurchaseOrder) -> list[dict]:
+    return [{
+        "order_number": getattr(p, "order_number", "") or str(p.id)[:8],
+        "created_at": p.created_at.strftime("%Y-%m-%d %H:%M") if p.created_at else "",
+        "supplier_name": p.supplier.name if p.supplier else "",
+        "branch_name": p.branch.name if p.branch else "",
+        "status": p.status or "",
+        "total": float(p.total) if p.total else 0,
+    }]
+
+
+EXPORTS: dict[str, ExportDefinition] = {
+    definition.resource: definition
+    for definition in (
+        ExportDefinition(
+            resource="products",
+            filename="productos",
+            permission="view_products",
+            columns=PRODUCT_EXPORT_COLUMNS,
+            build_query=_products_query,
+            to_rows=lambda product: build_product_export_rows([product]),
+            filters=("search", "category_id", "brand_id"),
+            watermark=_product_variants_watermark,
+        ),
+        ExportDefinition(
+            resource="sales",
+            filename="ventas",
+            permission="view_sales",
+            columns={
+                "order_number": "# Orden",
+                "created_at": "Fecha",
+                "client_name": "Cliente",
+                "branch_name": "Sucursal",
+                "status": "Estado",
+                "subtotal": "Subtotal",
+                "tax_amount": "Impuesto",
+                "total": "Total",
+                "user_name": "Vendedor",
+            },
+            build_query=_sales_query,
+            to_rows=_sale_rows,
+            filters=("status", "date_from", "date_to"),
+        ),
+        ExportDefinition(
+            resource="inventory",
+            filename="inventario",
+            permission="view_inventory",
+            columns={
+                "product_name": "Producto",
+                "product_sku": "SKU",
+                "branch_name": "Sucursal",
+                "quantity": "Cantidad",
+                "min_quantity": "Stock Mínimo",
+                "max_quantity": "Stock Máximo",
+            },
+            build_query=_inventory_query,
+            to_rows=_inventory_rows,
+            filters=("branch_id",),
+        ),
+        ExportDefinition(
+            resource="clients",
+            filename="clientes",
+            permission="manage_clients",
+            columns={
+                "name": "Nombre",
+                "tax_id": "RUC/NIT",
+                "email": "Email",
+                "phone": "Teléfono",
+                "address": "Dirección",
+                "city": "Ciudad",
+                "created_at": "Fecha Registro",
+            },
+            build_query=_clients_query,
+            to_rows=_client_rows,
+        ),
+        ExportDefinition(
+            resource="purchases",
+            filename="compras",
+            permission="view_inventory",
+            columns={
+                "order_number": "# Orden",
+                "created_at": "Fecha",
+                "supplier_name": "Proveedor",
+                "branch_name": "Sucursal",
+                "status": "Estado",
+                "total": "Total",
+            },
+            build_query=_purchases_query,
+            to_rows=_purchase_rows,
+        ),
+    )
+}
+
+
+def normalize_filters(definition: ExportDefinition, filters: Filters) -> dict[str, str]:
+    """Keep the non-empty filters ``definition`` accepts, as stripped strings."""
+    normalized = {}
+    for name in definition.filters:
+        value = filters.get(name)
+        if value is not None and str(value).strip():
+            normalized[name] = str(value).strip()
+    return normalized
+
+
+async def export_rows(
+    db: AsyncSession,
+    definition: ExportDefinition,
+    query: Select,
+    on_record: Optional[Callable[[], Awaitable[None]]] = None,
+) -> AsyncIterator[dict]:
+    """Stream the rows of ``query`` as ``definition`` lays them out.
+
+    ``on_record`` is awaited once per loaded record, before its rows.
+    """
+    async for obj in ExportService.stream_scalars(db, query):
+        if on_record:
+            await on_record()
+        for row in definition.to_rows(obj):
+            yield row
+
+
+async def export_watermark(db: AsyncSession, definition: ExportDefinition, query: Select) -> list[Any]:
+    """Row count and latest change of the rows ``query`` would export.
+
+    A new or deleted row changes the count and an edited one its updated_at,
+    so two exports with equal filters and watermark hold the same data.
+    Renames of related records (a client's name on its sales) are not seen;
+    the artifact TTL bounds how long such a file is reused.
+    """
+    rows = query.order_by(None).subquery()
+    result = await db.execute(
+        select(func.count(), func.max(rows.c.updated_at), *definition.watermark(rows)).select_from(rows)
+    )
+    return list(result.one())
+
+
+async def export_response(
+    db: AsyncSession,
+    resource: str,
+    company_id: uuid.UUID,
+    format: str,
+    filters: Filters,
+):
+    """Build the export for ``resource`` inside the request, streaming it as it is produced."""
+    definition = EXPORTS[resource]
+    query = definition.build_query(company_id, normalize_filters(definition, filters))
+    rows = export_rows(db, definition, query)
+    if format == "csv":
+        return ExportService.to_csv_response(rows, definition.columns, filename=definition.filename)
+    return await ExportService.to_excel_response(rows, definition.columns, filename=definition.filename)
@@ -0,0 +1,223 @@
+"""
+Background data exports.
+
+``request_export`` records an ``ExportJob`` for the export worker, or returns
+an earlier job when an identical export over unchanged data is queued, running
+or still downloadable: jobs are keyed by a fingerprint of the resource, format,
+filters and the watermark of the rows they cover (see ``export_watermark``).
+``run_export_job`` streams the rows into a file under ``EXPORTS_DIR``,
+recording progress as it goes, and notifies the requester when it is ready.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import monotonic
+from typing import Any, Callable
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.export_job import ExportJob
+from app.models.notification import Notification
+from app.models.user import User
+from app.services.export_definitions import EXPORTS, export_rows, export_watermark, normalize_filters
+from app.services.export_service import ExportService
+
+LOGGER = logging.getLogger("lumefy.export_jobs")
+EXPORT_EXTENSIONS = {"excel": "xlsx", "csv": "csv"}
+ACTIVE_STATUSES = ("QUEUED", "RUNNING")
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+
+def exports_directory() -> Path:
+    if settings.EXPORTS_DIR:
+        return Path(settings.EXPORTS_DIR)
+    # This resolves to /app/exports in the backend and export worker
+    # containers, which share the backend_exports volume.
+    return Path(__file__).resolve().parents[2] / "exports"
+
+
+def artifact_path(job: ExportJob) -> Path:
+    return exports_directory() / job.file_path
+
+
+def export_fingerprint(resource: str, format: str, filters: dict[str, str], watermark: list[Any]) -> str:
+    payload = json.dumps(
+        {"resource": resource, "format": format, "filters": filters, "watermark": watermark},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def _reusable_job(db: AsyncSession, company_id: uuid.UUID, fingerprint: str) -> ExportJob | None:
+    job = (await db.execute(
+        select(ExportJob)
+        .where(
+            ExportJob.company_id == company_id,
+            ExportJob.fingerprint == fingerprint,
+            or_(
+                ExportJob.status.in_(ACTIVE_STATUSES),
+                and_(ExportJob.status == "COMPLETED", ExportJob.expires_at > datetime.utcnow()),
+            ),
+        )
+        .order_by(ExportJob.queued_at.desc())
+        .limit(1)
+    )).scalars().first()
+    if job and job.status == "COMPLETED" and not await asyncio.to_thread(artifact_path(job).is_file):
+        return None
+    return job
+
+
+async def request_export(
+    db: AsyncSession,
+    user: User,
+    resource: str,
+    format: str,
+    filters: dict[str, Any],
+) -> tuple[ExportJob, bool]:
+    """Queue an export of ``resource`` for ``user``'s company.
+
+    Returns the job and whether it was reused instead of created. Raises
+    ``ValueError`` for filters the resource's query cannot use.
+    """
+    definition = EXPORTS[resource]
+    normalized = normalize_filters(definition, filters)
+    query = definition.build_query(user.company_id, normalized)
+    watermark = await export_watermark(db, definition, query)
+    fingerprint = export_fingerprint(resource, format, normalized, watermark)
+
+    existing = await _reusable_job(db, user.company_id, fingerprint)
+    if existing:
+        return existing, True
+
+    job = ExportJob(
+        id=uuid.uuid4(),
+        company_id=user.company_id,
+        requested_by_user_id=user.id,
+        created_by_id=user.id,
+        resource=resource,
+        format=format,
+        filters=normalized,
+        fingerprint=fingerprint,
+        status="QUEUED",
+        total_records=watermark[0],
+        processed_records=0,
+        queued_at=datetime.utcnow(),
+    )
+    db.add(job)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # An identical request queued the same export first.
+        await db.rollback()
+        existing = await _reusable_job(db, user.company_id, fingerprint)
+        if existing:
+            return existing, True
+        raise
+    await db.refresh(job)
+    return job, False
+
+
+class _ProgressReporter:
+    """Counts processed records and stores the count every few seconds.
+
+    Updates go through their own short sessions: the export session keeps a
+    server-side cursor open, and committing it would close the cursor.
+    """
+
+    def __init__(self, job_id: uuid.UUID, session_factory: Callable[[], Any]) -> None:
+        self.job_id = job_id
+        self.session_factory = session_factory
+        self.count = 0
+        self._reported_at = monotonic()
+
+    async def advance(self) -> None:
+        self.count += 1
+        if monotonic() - self._reported_at < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._reported_at = monotonic()
+        async with self.session_factory() as db:
+            await db.execute(
+                update(ExportJob).where(ExportJob.id == self.job_id).values(processed_records=self.count)
+            )
+            await db.commit()
+
+
+async def run_export_job(job_id: uuid.UUID, *, session_factory: Callable[[], Any] = SessionLocal) -> None:
+    """Produce the file of a RUNNING job and mark it COMPLETED or FAILED."""
+    async with session_factory() as db:
+        job = await db.get(ExportJob, job_id)
+        if not job or job.status != "RUNNING":
+            return
+        definition = EXPORTS[job.resource]
+        extension = EXPORT_EXTENSIONS[job.format]
+        relative_path = f"{job.company_id}/{job.id}.{extension}"
+        target = exports_directory() / relative_path
+        partial = target.with_name(f"{target.name}.part")
+        progress = _ProgressReporter(job.id, session_factory)
+
+        try:
+            await asyncio.to_thread(target.parent.mkdir, parents=True, exist_ok=True)
+            query = definition.build_query(job.company_id, job.filters or {})
+            rows = export_rows(db, definition, query, on_record=progress.advance)
+            if job.format == "csv":
+                written = await ExportService.write_csv(rows, definition.columns, partial)
+            else:
+                written = await ExportService.write_excel(rows, definition.columns, partial)
+            await asyncio.to_thread(os.replace, partial, target)
+            file_size = (await asyncio.to_thread(target.stat)).st_size
+        except Exception:  # noqa: BLE001 - the failure is recorded on the job for the requester
+            LOGGER.exception("Export job %s failed", job_id)
+            await db.rollback()
+            await asyncio.to_thread(partial.unlink, missing_ok=True)
+            job = await db.get(ExportJob, job_id)
+            job.status = "FAILED"
+            job.finished_at = datetime.utcnow()
+            job.error_message = "No se pudo generar la exportación. Intenta de nuevo."
+            await db.commit()
+            return
+
+        now = datetime.utcnow()
+        job.status = "COMPLETED"
+        job.processed_records = progress.count
+        job.rows_written = written
+        job.file_path = relative_path
+        job.file_name = f"{definition.filename}_{now.strftime('%Y%m%d_%H%M')}.{extension}"
+        job.file_size = file_size
+        job.finished_at = now
+        job.expires_at = now + timedelta(hours=settings.EXPORT_ARTIFACT_TTL_HOURS)
+        if job.requested_by_user_id:
+            db.add(Notification(
+                user_id=job.requested_by_user_id,
+                type="success",
+                title="Exportación lista",
+                message=f"El archivo {job.file_name} ({written} filas) está listo para descargar.",
+            ))
+        await db.commit()
+
+
+async def purge_expired_exports(*, limit: int = 100) -> int:
+    """Delete the files of expired jobs and mark them EXPIRED."""
+    async with SessionLocal() as db:
+        jobs = list((await db.execute(
+            select(ExportJob)
+            .where(ExportJob.status == "COMPLETED", ExportJob.expires_at <= datetime.utcnow())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).scalars().all())
+        for job in jobs:
+            if job.file_path:
+                await asyncio.to_thread(artifact_path(job).unlink, missing_ok=True)
+            job.status = "EXPIRED"
+            job.file_path = None
+        await db.commit()
+        return len(jobs)
@@ -3,24 +3,204 @@ Reusable Excel/CSV export service.
 
 Usage:
     from app.services.export_service import ExportService
-    return ExportService.to_excel_response(rows, columns, filename="products")
+    rows = (to_row(obj) async for obj in ExportService.stream_scalars(db, query))
+    return await ExportService.to_excel_response(rows, columns, filename="products")
     return ExportService.to_csv_response(rows, columns, filename="products")
+
+Rows may be a list or an async iterator; ``stream_scalars`` reads a query through
+a server-side cursor so large exports never hold every row in memory. CSV is
+encoded batch by batch in a worker thread and sent as it is produced. Excel is
+written with openpyxl's write-only mode to a spooled temporary file, also from
+worker threads, and streamed once complete: an xlsx file is a zip archive and
+is not readable until its last entry is written. ``write_excel`` and
+``write_csv`` produce the same files on disk for background export jobs.
 """
-import io
+import asyncio
 import csv
+import io
+import os
+import tempfile
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
 from datetime import datetime
-from typing import Any
+from typing import Any, Optional, Union
 
 from fastapi.responses import StreamingResponse
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+Rows = Union[Iterable[dict], AsyncIterable[dict]]
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+BATCH_SIZE = 500
+# Column widths are estimated from the header and the first rows only.
+WIDTH_SAMPLE_ROWS = 200
+MAX_COLUMN_WIDTH = 50
+# Workbooks up to this size stay in memory; larger ones spill to disk.
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _cell_value(row_data: Any, key: str) -> Any:
+    value = row_data.get(key, "")
+    # Handle nested keys like "client.name"
+    if "." in key:
+        value = row_data
+        for part in key.split("."):
+            if isinstance(value, dict):
+                value = value.get(part, "")
+            else:
+                value = getattr(value, part, "")
+    # Format datetime objects
+    if isinstance(value, datetime):
+        value = value.strftime("%Y-%m-%d %H:%M")
+    return value
+
+
+async def _batches(rows: Rows, size: int) -> AsyncIterator[list[dict]]:
+    batch: list[dict] = []
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    else:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _attachment(filename: str, extension: str) -> dict[str, str]:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    return {"Content-Disposition": f'attachment; filename="{filename}_{timestamp}.{extension}"'}
+
+
+class _WorkbookWriter:
+    """Write-only workbook fed in batches. Not thread safe: one call at a time."""
+
+    def __init__(self, columns: dict[str, str], sheet_name: str) -> None:
+        self.keys = list(columns.keys())
+        self.headers = list(columns.values())
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(title=sheet_name)
+
+    def start(self, sample: list[dict]) -> None:
+        """Size the columns from ``sample`` and write the header and the sample rows."""
+        # Write-only sheets need their widths before the first row.
+        for col_idx, header in enumerate(self.headers, 1):
+            max_length = len(header)
+            for row_data in sample:
+                value = _cell_value(row_data, self.keys[col_idx - 1])
+                if value:
+                    max_length = max(max_length, len(str(value)))
+            self.sheet.column_dimensions[get_column_letter(col_idx)].width = min(max_length + 3, MAX_COLUMN_WIDTH)
+
+        header_font = Font(bold=True, color="FFFFFF", size=11)
+        header_fill = PatternFill(start_color="1A237E", end_color="1A237E", fill_type="solid")
+        header_alignment = Alignment(horizontal="center", vertical="center")
+        thin = Side(style="thin")
+        header_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        header_cells = []
+        for header in self.headers:
+            cell = WriteOnlyCell(self.sheet, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            cell.border = header_border
+            header_cells.append(cell)
+        self.sheet.append(header_cells)
+        self.append(sample)
+
+    def append(self, rows: list[dict]) -> None:
+        for row_data in rows:
+            self.sheet.append([_cell_value(row_data, key) for key in self.keys])
+
+    def save(self) -> tempfile.SpooledTemporaryFile:
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        self.workbook.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+    def save_to(self, path: Union[str, os.PathLike]) -> None:
+        self.workbook.save(path)
+
+
+async def _fill_workbook(
+    rows: Rows,
+    columns: dict[str, str],
+    sheet_name: str,
+    on_progress: Optional[ProgressCallback] = None,
+) -> tuple[_WorkbookWriter, int]:
+    """Write ``rows`` into a new workbook off the event loop; returns it and the row count."""
+    writer = _WorkbookWriter(columns, sheet_name)
+    started = False
+    sample: list[dict] = []
+    count = 0
+    async for batch in _batches(rows, BATCH_SIZE):
+        count += len(batch)
+        if started:
+            await asyncio.to_thread(writer.append, batch)
+        else:
+            sample.extend(batch)
+            if len(sample) >= WIDTH_SAMPLE_ROWS:
+                await asyncio.to_thread(writer.start, sample)
+                started, sample = True, []
+        if on_progress:
+            await on_progress(count)
+    if not started:
+        await asyncio.to_thread(writer.start, sample)
+    return writer, count
+
+
+def _encode_csv_header(headers: list[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(headers)
+    return buffer.getvalue()
+
+
+def _encode_csv(rows: list[dict], keys: list[str]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_cell_value(row_data, key) for key in keys] for row_data in rows)
+    return buffer.getvalue()
+
+
+def _append_csv(handle: io.TextIOBase, rows: list[dict], keys: list[str]) -> None:
+    handle.write(_encode_csv(rows, keys))
+
+
+async def _read_file(buffer: tempfile.SpooledTemporaryFile) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            chunk = await asyncio.to_thread(buffer.read, READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        buffer.close()
 
 
 class ExportService:
 
     @staticmethod
-    def to_excel_response(
-        rows: list[dict],
+    async def stream_scalars(db: AsyncSession, query: Select, batch_size: int = BATCH_SIZE) -> AsyncIterator[Any]:
+        """Yield the ORM results of ``query`` fetched ``batch_size`` at a time from a server-side cursor."""
+        result = await db.stream_scalars(query.execution_options(yield_per=batch_size))
+        async for obj in result:
+            yield obj
+
+    @staticmethod
+    async def to_excel_response(
+        rows: Rows,
         columns: dict[str, str],
         filename: str = "export",
         sheet_name: str = "Datos",
@@ -29,125 +209,79 @@ class ExportService:
         Generate a styled Excel file and return as StreamingResponse.
 
         Args:
-            rows: list of dicts with raw data
+            rows: dicts with raw data, as a list or an async iterator
             columns: ordered dict mapping field_key -> display_header
             filename: base name for the download file
             sheet_name: name of the Excel sheet
         """
-        wb = Workbook()
-        ws = wb.active
-        ws.title = sheet_name
+        writer, _count = await _fill_workbook(rows, columns, sheet_name)
+        buffer = await asyncio.to_thread(writer.save)
 
-        # --- Header style ---
-        header_font = Font(bold=True, color="FFFFFF", size=11)
-        header_fill = PatternFill(start_color="1A237E", end_color="1A237E", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        thin_border = Border(
-            left=Side(style="thin"),
-            right=Side(style="thin"),
-            top=Side(style="thin"),
-            bottom=Side(style="thin"),
-        )
-
-        headers = list(columns.values())
-        keys = list(columns.keys())
-
-        # Write headers
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_idx, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-            cell.border = thin_border
-
-        # Write rows
-        for row_idx, row_data in enumerate(rows, 2):
-            for col_idx, key in enumerate(keys, 1):
-                value = row_data.get(key, "")
-                # Handle nested keys like "client.name"
-                if "." in key:
-                    parts = key.split(".")
-                    value = row_data
-                    for part in parts:
-                        if isinstance(value, dict):
-                            value = value.get(part, "")
-                        else:
-                            value = getattr(value, part, "")
-                
-                # Format datetime objects
-                if isinstance(value, datetime):
-                    value = value.strftime("%Y-%m-%d %H:%M")
-                
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.border = thin_border
-
-        # Auto-width columns
-        for col_idx, key in enumerate(keys, 1):
-            max_length = len(headers[col_idx - 1])
-            for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=col_idx, max_col=col_idx):
-                for cell in row:
-                    try:
-                        if cell.value and len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-            ws.column_dimensions[ws.cell(row=1, column=col_idx).column_letter].width = min(max_length + 3, 50)
-
-        # Save to buffer
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
         return StreamingResponse(
-            buffer,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}_{timestamp}.xlsx"'
-            },
+            _read_file(buffer),
+            media_type=XLSX_MEDIA_TYPE,
+            headers=_attachment(filename, "xlsx"),
         )
 
     @staticmethod
     def to_csv_response(
-        rows: list[dict],
+        rows: Rows,
         columns: dict[str, str],
         filename: str = "export",
     ) -> StreamingResponse:
-        """Generate a CSV file and return as StreamingResponse."""
-        buffer = io.StringIO()
+        """Stream a CSV file, encoding each batch of rows in a worker thread."""
         keys = list(columns.keys())
         headers = list(columns.values())
 
-        writer = csv.writer(buffer)
-        writer.writerow(headers)
-
-        for row_data in rows:
-            row_values = []
-            for key in keys:
-                value = row_data.get(key, "")
-                if "." in key:
-                    parts = key.split(".")
-                    value = row_data
-                    for part in parts:
-                        if isinstance(value, dict):
-                            value = value.get(part, "")
-                        else:
-                            value = getattr(value, part, "")
-                if isinstance(value, datetime):
-                    value = value.strftime("%Y-%m-%d %H:%M")
-                row_values.append(value)
-            writer.writerow(row_values)
+        async def content() -> AsyncIterator[str]:
+            yield _encode_csv_header(headers)
+            async for batch in _batches(rows, BATCH_SIZE):
+                yield await asyncio.to_thread(_encode_csv, batch, keys)
 
-        buffer.seek(0)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
         return StreamingResponse(
-            iter([buffer.getvalue()]),
+            content(),
             media_type="text/csv",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}_{timestamp}.csv"'
-            },
+            headers=_attachment(filename, "csv"),
         )
 
+    @staticmethod
+    async def write_excel(
+        rows: Rows,
+        columns: dict[str, str],
+        path: Union[str, os.PathLike],
+        sheet_name: str = "Datos",
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> int:
+        """Write the Excel file of ``to_excel_response`` to ``path``; returns the number of rows.
+
+        ``on_progress`` is awaited after each batch with the rows written so far.
+        """
+        writer, count = await _fill_workbook(rows, columns, sheet_name, on_progress)
+        await asyncio.to_thread(writer.save_to, path)
+        return count
+
+    @staticmethod
+    async def write_csv(
+        rows: Rows,
+        columns: dict[str, str],
+        path: Union[str, os.PathLike],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> int:
+        """Write the CSV file of ``to_csv_response`` to ``path``; returns the number of rows."""
+        keys = list(columns.keys())
+        handle = await asyncio.to_thread(open, path, "w", encoding="utf-8", newline="")
+        count = 0
+        try:
+            await asyncio.to_thread(handle.write, _encode_csv_header(list(columns.values())))
+            async for batch in _batches(rows, BATCH_SIZE):
+                await asyncio.to_thread(_append_csv, handle, batch, keys)
+                count += len(batch)
+                if on_progress:
+                    await on_progress(count)
+        finally:
+            await asyncio.to_thread(handle.close)
+        return count
+
     @staticmethod
     def model_to_dict(obj: Any, keys: list[str]) -> dict:
         """Convert an SQLAlchemy model instance to a dict, supporting nested keys."""
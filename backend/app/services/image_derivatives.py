@@ -0,0 +1,236 @@
+"""
+Thumbnails and WebP/AVIF copies of locally stored product images.
+
+Uploads and synced provider images call :func:`ensure_derivatives` with the
+original bytes or file. Each original is encoded once, in a process pool, to
+fit every box in ``DERIVATIVE_WIDTHS`` (never upscaled) as WebP and, when
+Pillow was built with libavif, AVIF. Files are named after the SHA-256 of the
+original (``/static/derivatives/ab/<hash>-320.webp``): the same image uploaded
+twice or synced from two sources is encoded once, and a URL never changes
+content. ``image_derivatives`` maps each original URL to its renditions;
+:func:`derivatives_for` reads them for product payloads in one query.
+"""
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping, Optional, Union
+
+from PIL import Image, ImageOps, features
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.image_derivative import ImageDerivative
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).resolve().parents[2] / "static"
+DERIVATIVE_DIR = STATIC_DIR / "derivatives"
+DERIVATIVE_PREFIX = "/static/derivatives"
+# Longest side of each rendition: POS tiles and thumbnails, catalog cards and
+# the product detail.
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+# Same limit as uploads and provider assets.
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+ENCODERS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "avif": {"format": "AVIF", "quality": 60, "speed": 6},
+}
+
+Source = Union[bytes, Path, None]
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def available_formats() -> list[str]:
+    return [name for name in ENCODERS if features.check(name)]
+
+
+def static_path(url: Optional[str]) -> Optional[Path]:
+    """The file behind a root-relative ``/static/...`` URL, never outside the static directory."""
+    if not url or not url.startswith("/static/"):
+        return None
+    root = STATIC_DIR.resolve()
+    path = (root / url[len("/static/"):]).resolve()
+    return path if root in path.parents else None
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    descriptor, temporary_path = tempfile.mkstemp(prefix=".derivative-", dir=path.parent)
+    try:
+        with os.fdopen(descriptor, "wb") as output:
+            output.write(data)
+        os.replace(temporary_path, path)
+    except Exception:
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+        raise
+
+
+def render_derivatives(data: bytes, content_hash: str, directory: str) -> dict:
+    """Encode ``data`` for every box and format into ``directory``; runs in the pool.
+
+    Returns the original's size and the renditions, smallest first. Files that
+    already exist (same content hash) are not encoded again.
+    """
+    target = Path(directory) / content_hash[:2]
+    target.mkdir(parents=True, exist_ok=True)
+    with Image.open(BytesIO(data)) as source:
+        # Animated images keep their first frame; phone photos their rotation.
+        image = ImageOps.exif_transpose(source)
+    width, height = image.size
+    transparent = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if transparent else "RGB")
+
+    boxes = [box for box in DERIVATIVE_WIDTHS if box < max(width, height)] or [DERIVATIVE_WIDTHS[0]]
+    renditions = []
+    for box in boxes:
+        resized = image.copy()
+        resized.thumbnail((box, box), Image.Resampling.LANCZOS)
+        for name in available_formats():
+            path = target / f"{content_hash}-{box}.{name}"
+            if not path.is_file():
+                options = dict(ENCODERS[name])
+                buffer = BytesIO()
+                resized.save(buffer, format=options.pop("format"), **options)
+                _write_file(path, buffer.getvalue())
+            renditions.append({
+                "width": resized.width,
+                "height": resized.height,
+                "format": name,
+                "url": f"{DERIVATIVE_PREFIX}/{content_hash[:2]}/{path.name}",
+            })
+    return {"width": width, "height": height, "renditions": renditions}
+
+
+def _executor() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if not settings.IMAGE_PROCESSES:
+        return None
+    if _pool is None:
+        # Spawned, not forked, for the same reasons as the PDF pool.
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def _run(function: Callable[..., Any], *args: Any) -> Any:
+    global _pool
+    executor = _executor()
+    if executor is None:
+        return await asyncio.to_thread(function, *args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+    except BrokenProcessPool:
+        if _pool is executor:
+            _pool = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+def _read_file(path: Path) -> Optional[bytes]:
+    try:
+        if not path.is_file() or path.stat().st_size > MAX_SOURCE_BYTES:
+            return None
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+async def _read_source(source: Source) -> Optional[bytes]:
+    if isinstance(source, Path):
+        return await asyncio.to_thread(_read_file, source)
+    return source or None
+
+
+async def derivatives_for(db: AsyncSession, urls: Iterable[Optional[str]]) -> dict[str, list[dict]]:
+    """Renditions of each image in ``urls`` that has them; others are left out."""
+    wanted = {url for url in urls if url and url.startswith("/static/")}
+    if not wanted:
+        return {}
+    rows = await db.execute(
+        select(ImageDerivative.source_url, ImageDerivative.renditions).where(ImageDerivative.source_url.in_(wanted))
+    )
+    return {source_url: renditions or [] for source_url, renditions in rows.all()}
+
+
+async def ensure_derivatives(db: AsyncSession, sources: Mapping[str, Source]) -> dict[str, list[dict]]:
+    """Renditions of each original in ``sources`` (URL to bytes or file), encoding the missing ones.
+
+    Originals that cannot be read or decoded get none; callers keep serving
+    the original. New rows are added to ``db`` and saved with its commit.
+    """
+    derivatives = await derivatives_for(db, sources)
+    for url, source in sources.items():
+        if url in derivatives or not url or not url.startswith("/static/"):
+            continue
+        data = await _read_source(source)
+        if not data:
+            continue
+        content_hash = hashlib.sha256(data).hexdigest()
+        known = (await db.execute(
+            select(ImageDerivative).where(ImageDerivative.content_hash == content_hash).limit(1)
+        )).scalars().first()
+        if known is not None:
+            values = {"width": known.width, "height": known.height, "renditions": known.renditions}
+        else:
+            try:
+                values = await _run(render_derivatives, data, content_hash, str(DERIVATIVE_DIR))
+            except Exception:  # noqa: BLE001 - the original is still served
+                logger.warning("Could not generate image derivatives for %s", url, exc_info=True)
+                continue
+        await db.execute(
+            insert(ImageDerivative)
+            .values(id=uuid.uuid4(), source_url=url, content_hash=content_hash, **values)
+            .on_conflict_do_nothing(index_elements=[ImageDerivative.source_url])
+        )
+        derivatives[url] = values["renditions"]
+    return derivatives
+
+
+def _remove_renditions(content_hashes: set[str]) -> None:
+    for content_hash in content_hashes:
+        for path in (DERIVATIVE_DIR / content_hash[:2]).glob(f"{content_hash}-*"):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            except OSError:
+                logger.warning("Could not remove image derivative %s", path)
+
+
+async def forget_derivatives(db: AsyncSession, urls: Iterable[str], *, commit: bool = True) -> int:
+    """Drop the renditions of deleted originals; files no other original shares are removed.
+
+    By default the deletion is committed and the files removed afterwards:
+    call it after the deletion that orphaned ``urls`` is committed. With
+    ``commit=False`` the files go first and the caller commits, while its
+    transaction still holds the deleted originals.
+    """
+    urls = set(urls)
+    if not urls:
+        return 0
+    result = await db.execute(
+        delete(ImageDerivative).where(ImageDerivative.source_url.in_(urls)).returning(ImageDerivative.content_hash)
+    )
+    content_hashes = set(result.scalars().all())
+    if content_hashes:
+        shared = await db.execute(
+            select(ImageDerivative.content_hash).where(ImageDerivative.content_hash.in_(content_hashes))
+        )
+        content_hashes -= set(shared.scalars().all())
+    if commit:
+        await db.commit()
+    await asyncio.to_thread(_remove_renditions, content_hashes)
+    return len(content_hashes)
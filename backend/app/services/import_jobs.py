@@ -0,0 +1,423 @@
+"""
+Background spreadsheet imports.
+
+A file reaches ``IMPORTS_DIR`` in one of two ways:
+
+* ``request_import`` streams a multipart upload to disk and queues the job;
+* ``start_upload`` opens an ``UPLOADING`` job that receives the file in
+  pieces (``append_upload``), so a large or interrupted upload can resume from
+  ``received_bytes``; ``complete_upload`` queues it.
+
+``run_import_job`` streams the file ``CHUNK_ROWS`` rows at a time (CSV in
+chunks, xlsx through openpyxl's read-only mode) and hands each chunk to the
+resource's importer; memory stays bounded by the chunk size whatever the file
+size. Each chunk commits together with the job's progress and summary, so a
+job interrupted by a restart resumes after its last committed chunk. Row
+errors are collected in the summary; a chunk the database rejects is reported
+as a whole and skipped, and an importer raises ``ValueError`` for problems
+with the whole file.
+"""
+import asyncio
+import csv
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+import pandas as pd
+from fastapi import UploadFile
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.import_job import ImportJob
+from app.models.notification import Notification
+from app.models.storefront import Storefront
+from app.models.user import User
+from app.services.product_import import ProductImporter
+from app.services.shipping_destination_import import ShippingDestinationImporter
+
+LOGGER = logging.getLogger("lumefy.import_jobs")
+IMPORT_EXTENSIONS = (".csv", ".xls", ".xlsx")
+CHUNK_ROWS = 1000
+# Row errors kept in the summary; the rest are only counted.
+MAX_REPORTED_ERRORS = 500
+UPLOAD_READ_BYTES = 1024 * 1024
+
+
+class UploadOffsetError(ValueError):
+    """A piece of a chunked upload does not start where the stored bytes end."""
+
+    def __init__(self, received_bytes: int) -> None:
+        super().__init__(f"Upload continues at byte {received_bytes}")
+        self.received_bytes = received_bytes
+
+
+async def _storefront_options(db: AsyncSession, user: User, options: dict[str, Any]) -> dict[str, Any]:
+    try:
+        storefront_id = uuid.UUID(str(options.get("storefront_id")))
+    except ValueError as exc:
+        raise ValueError("storefront_id is required") from exc
+    found = await db.scalar(
+        select(Storefront.id).where(Storefront.id == storefront_id, Storefront.company_id == user.company_id)
+    )
+    if not found:
+        raise LookupError("storefront not found")
+    return {"storefront_id": str(storefront_id)}
+
+
+async def _no_options(db: AsyncSession, user: User, options: dict[str, Any]) -> dict[str, Any]:
+    return {}
+
+
+@dataclass(frozen=True)
+class ImportDefinition:
+    resource: str
+    permission: str
+    # job -> an importer with ``counters``, ``apply_chunk(db, chunk)`` and ``forget()``.
+    importer: Callable[[ImportJob], Any]
+    # Validates the request's options for the user's company; raises
+    # ValueError for bad options and LookupError for foreign references.
+    options: Callable[[AsyncSession, User, dict[str, Any]], Awaitable[dict[str, Any]]] = _no_options
+
+
+IMPORTS = {
+    "products": ImportDefinition(
+        "products",
+        "manage_inventory",
+        lambda job: ProductImporter(job.company_id, job.requested_by_user_id, job.id),
+    ),
+    "shipping_destinations": ImportDefinition(
+        "shipping_destinations",
+        "manage_company",
+        lambda job: ShippingDestinationImporter(
+            job.company_id, job.requested_by_user_id, uuid.UUID(job.options["storefront_id"])
+        ),
+        _storefront_options,
+    ),
+}
+
+
+def imports_directory() -> Path:
+    if settings.IMPORTS_DIR:
+        return Path(settings.IMPORTS_DIR)
+    # /app/imports in the backend and import worker containers, which share
+    # the backend_imports volume.
+    return Path(__file__).resolve().parents[2] / "imports"
+
+
+def upload_path(job: ImportJob) -> Path:
+    return imports_directory() / job.file_path
+
+
+def _new_job(user: User, resource: str, file_name: str, options: dict[str, Any], status: str) -> ImportJob:
+    extension = Path(file_name).suffix.lower()
+    if extension not in IMPORT_EXTENSIONS:
+        raise ValueError(f"Unsupported import file {file_name!r}")
+    job_id = uuid.uuid4()
+    return ImportJob(
+        id=job_id,
+        company_id=user.company_id,
+        requested_by_user_id=user.id,
+        created_by_id=user.id,
+        resource=resource,
+        options=options,
+        file_name=file_name,
+        file_path=f"{user.company_id}/{job_id}{extension}",
+        status=status,
+        attempts=0,
+        received_bytes=0,
+        processed_rows=0,
+        summary={},
+        queued_at=datetime.utcnow(),
+    )
+
+
+async def request_import(
+    db: AsyncSession,
+    user: User,
+    resource: str,
+    upload: UploadFile,
+    options: Optional[dict[str, Any]] = None,
+) -> ImportJob:
+    """Store a multipart ``upload`` and queue its import into ``user``'s company."""
+    job = _new_job(user, resource, upload.filename or "import", options or {}, "QUEUED")
+    target = upload_path(job)
+    await asyncio.to_thread(target.parent.mkdir, parents=True, exist_ok=True)
+    try:
+        with await asyncio.to_thread(open, target, "wb") as handle:
+            while chunk := await upload.read(UPLOAD_READ_BYTES):
+                await asyncio.to_thread(handle.write, chunk)
+                job.received_bytes += len(chunk)
+                if job.received_bytes > settings.IMPORT_MAX_FILE_BYTES:
+                    raise ValueError("Import file too large")
+    except BaseException:
+        await asyncio.to_thread(target.unlink, missing_ok=True)
+        raise
+    job.file_size = job.received_bytes
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def start_upload(
+    db: AsyncSession,
+    user: User,
+    resource: str,
+    file_name: str,
+    file_size: int,
+    options: dict[str, Any],
+) -> ImportJob:
+    """Open a chunked upload of ``file_size`` bytes."""
+    if file_size > settings.IMPORT_MAX_FILE_BYTES:
+        raise ValueError("Import file too large")
+    job = _new_job(user, resource, file_name, options, "UPLOADING")
+    job.file_size = file_size
+    target = upload_path(job)
+    await asyncio.to_thread(target.parent.mkdir, parents=True, exist_ok=True)
+    await asyncio.to_thread(target.touch)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+def _write_at(handle: Any, offset: int) -> None:
+    # Bytes past ``offset`` belong to a piece whose commit never happened.
+    handle.seek(offset)
+    handle.truncate()
+
+
+async def append_upload(db: AsyncSession, job: ImportJob, offset: int, body: AsyncIterator[bytes]) -> ImportJob:
+    """Store the piece of ``job``'s file that starts at ``offset``.
+
+    ``job`` must be locked (``SELECT ... FOR UPDATE``) so concurrent pieces
+    cannot interleave. Raises ``UploadOffsetError`` unless ``offset`` is
+    where the stored bytes end, and ``ValueError`` for a piece larger than
+    ``IMPORT_UPLOAD_CHUNK_BYTES`` or past the declared size.
+    """
+    if offset != job.received_bytes:
+        raise UploadOffsetError(job.received_bytes)
+    received = 0
+    with await asyncio.to_thread(open, upload_path(job), "r+b") as handle:
+        await asyncio.to_thread(_write_at, handle, offset)
+        async for data in body:
+            received += len(data)
+            if received > settings.IMPORT_UPLOAD_CHUNK_BYTES or offset + received > job.file_size:
+                raise ValueError("Upload piece too large")
+            await asyncio.to_thread(handle.write, data)
+    job.received_bytes = offset + received
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def complete_upload(db: AsyncSession, job: ImportJob) -> ImportJob:
+    """Queue an upload once every byte arrived; raises ``UploadOffsetError`` otherwise."""
+    if job.received_bytes != job.file_size:
+        raise UploadOffsetError(job.received_bytes)
+    job.status = "QUEUED"
+    job.queued_at = datetime.utcnow()
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def purge_abandoned_uploads(*, limit: int = 100) -> int:
+    """Fail uploads that received nothing for ``IMPORT_UPLOAD_TTL_HOURS`` and delete their files."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.IMPORT_UPLOAD_TTL_HOURS)
+    async with SessionLocal() as db:
+        jobs = list((await db.execute(
+            select(ImportJob)
+            .where(ImportJob.status == "UPLOADING", ImportJob.updated_at < cutoff)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).scalars().all())
+        for job in jobs:
+            if job.file_path:
+                await asyncio.to_thread(upload_path(job).unlink, missing_ok=True)
+            job.file_path = None
+            job.status = "FAILED"
+            job.finished_at = datetime.utcnow()
+            job.error_message = "La carga del archivo no se completó."
+        await db.commit()
+        return len(jobs)
+
+
+def _cell(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def count_import_rows(path: Path) -> Optional[int]:
+    """Data rows of the file (without the header), or ``None`` when unknown."""
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with open(path, newline="", encoding="utf-8-sig", errors="replace") as handle:
+            return max(0, sum(1 for _ in csv.reader(handle)) - 1)
+    if suffix == ".xlsx":
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = workbook.worksheets[0].max_row
+        finally:
+            workbook.close()
+        return max(0, rows - 1) if rows else None
+    return None
+
+
+def iter_import_chunks(path: Path, start: int = 0, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Chunks of the file's rows from row ``start``, every cell as text.
+
+    Text keeps barcodes and SKUs with their digits; typing is the importer's
+    job. Each chunk's index is the row's position in the file, header aside.
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        reader = pd.read_csv(
+            path,
+            dtype=str,
+            keep_default_na=False,
+            encoding="utf-8-sig",
+            skiprows=range(1, start + 1),
+            chunksize=chunk_rows,
+        )
+        with reader:
+            for chunk in reader:
+                chunk.index = pd.RangeIndex(start, start + len(chunk))
+                start += len(chunk)
+                yield chunk
+        return
+    if suffix == ".xls":
+        # Legacy binary workbooks cannot be streamed; they are small in practice.
+        frame = pd.read_excel(path, dtype=str)
+        for offset in range(start, len(frame), chunk_rows):
+            yield frame.iloc[offset:offset + chunk_rows]
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [_cell(value) or f"column_{position}" for position, value in enumerate(next(rows, ()))]
+        position, batch = 0, []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            if position >= start:
+                batch.append([_cell(value) for value in row[:len(header)]])
+                if len(batch) == chunk_rows:
+                    yield pd.DataFrame(batch, columns=header, index=range(position - len(batch) + 1, position + 1))
+                    batch = []
+            position += 1
+        if batch:
+            yield pd.DataFrame(batch, columns=header, index=range(position - len(batch), position))
+    finally:
+        workbook.close()
+
+
+class ImportSummary:
+    """Counts and row errors of a job, stored as ``ImportJob.summary``."""
+
+    def __init__(self, counters: tuple[str, ...], stored: dict[str, Any] | None = None) -> None:
+        stored = stored or {}
+        self.counts = {name: int(stored.get(name) or 0) for name in counters}
+        self.errors: list[str] = list(stored.get("errors") or [])
+        self.error_count = int(stored.get("error_count") or 0)
+
+    def add(self, counts: dict[str, int], errors: list[str]) -> None:
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+        self.error_count += len(errors)
+        self.errors.extend(errors[: max(0, MAX_REPORTED_ERRORS - len(self.errors))])
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**self.counts, "error_count": self.error_count, "errors": self.errors}
+
+
+def _chunk_failure(chunk: pd.DataFrame) -> str:
+    first, last = int(chunk.index[0]) + 2, int(chunk.index[-1]) + 2
+    return f"Filas {first}-{last}: no se pudieron guardar; revisa los datos e impórtalas de nuevo."
+
+
+async def _finish(db: AsyncSession, job: ImportJob, status: str, error_message: str | None = None) -> None:
+    job.status = status
+    job.finished_at = datetime.utcnow()
+    job.error_message = error_message
+    if job.file_path:
+        await asyncio.to_thread(upload_path(job).unlink, missing_ok=True)
+        job.file_path = None
+    if job.requested_by_user_id:
+        summary = job.summary or {}
+        if status == "COMPLETED":
+            notification = Notification(
+                user_id=job.requested_by_user_id,
+                type="warning" if summary.get("error_count") else "success",
+                title="Importación terminada",
+                message=(
+                    f"{job.file_name}: {summary.get('count', 0)} fila(s) importada(s), "
+                    f"{summary.get('error_count', 0)} con errores."
+                ),
+            )
+        else:
+            notification = Notification(
+                user_id=job.requested_by_user_id,
+                type="error",
+                title="Importación fallida",
+                message=f"{job.file_name}: {error_message}",
+            )
+        db.add(notification)
+    await db.commit()
+
+
+async def run_import_job(job_id: uuid.UUID, *, session_factory: Callable[[], Any] = SessionLocal) -> None:
+    """Apply the file of a RUNNING job from its last committed chunk and mark it COMPLETED or FAILED."""
+    async with session_factory() as db:
+        job = await db.get(ImportJob, job_id)
+        if not job or job.status != "RUNNING":
+            return
+        path = upload_path(job)
+        importer = IMPORTS[job.resource].importer(job)
+        summary = ImportSummary(importer.counters, job.summary)
+        chunks = iter_import_chunks(path, job.processed_rows, CHUNK_ROWS)
+        try:
+            if job.total_rows is None:
+                job.total_rows = await asyncio.to_thread(count_import_rows, path)
+                await db.commit()
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                try:
+                    counts, errors = await importer.apply_chunk(db, chunk)
+                except SQLAlchemyError:
+                    LOGGER.exception("Import job %s could not apply rows from %s", job_id, chunk.index[0])
+                    await db.rollback()
+                    importer.forget()
+                    counts, errors = {}, [_chunk_failure(chunk)]
+                summary.add(counts, errors)
+                job = await db.get(ImportJob, job_id)
+                job.processed_rows = int(chunk.index[-1]) + 1
+                job.summary = summary.as_dict()
+                await db.commit()
+        except ValueError as exc:
+            await db.rollback()
+            job = await db.get(ImportJob, job_id)
+            await _finish(db, job, "FAILED", str(exc))
+            return
+        except Exception:  # noqa: BLE001 - the failure is recorded on the job for the requester
+            LOGGER.exception("Import job %s could not read its file", job_id)
+            await db.rollback()
+            job = await db.get(ImportJob, job_id)
+            await _finish(db, job, "FAILED", "No se pudo leer el archivo. Usa el formato de la plantilla o de la exportación.")
+            return
+        finally:
+            chunks.close()
+        await _finish(db, job, "COMPLETED")
@@ -12,7 +12,6 @@ import os
 from pathlib import Path
 import re
 import socket
-import tempfile
 import time
 import uuid
 from datetime import datetime, timedelta, timezone
@@ -44,6 +43,9 @@ from app.models.product_variant import ProductVariant
 from app.models.warehouse import Warehouse
 from app.models.supplier import Supplier
 from app.models.unit_of_measure import UnitOfMeasure
+from app.services.asset_store import asset_path, is_asset_url, remember_source, source_asset_url, store_asset
+from app.services.image_derivatives import ensure_derivatives, forget_derivatives
+from app.services.product_codes import active_product_id_for_sku, product_for_sku, sku_key, variant_for_sku
 
 
 class IntegrationRequestError(Exception):
@@ -519,50 +521,46 @@ def _local_asset_file_candidates(source: IntegrationSource, provider_url: str) -
     ]
 
 
-async def _cache_provider_asset(source: IntegrationSource, provider_url: str) -> str | None:
-    """Download one provider image to the shared VPS volume.
+async def _cache_provider_asset(db: AsyncSession, source: IntegrationSource, provider_url: str) -> str | None:
+    """Store one provider image in the shared content-addressed asset store.
 
-    The URL hash makes downloads idempotent. Existing local files are served
-    without contacting the provider again. A failed refresh returns ``None``
-    so the caller can retain the previous local image instead of replacing it
-    with a broken URL.
+    Each source and provider URL is downloaded once; later runs reuse the
+    stored file, and identical images from any source share it. Files cached
+    per source by earlier versions are moved into the store without
+    contacting the provider. A failed refresh returns ``None`` so the caller
+    can retain the previous local image instead of replacing it with a
+    broken URL.
     """
 
     normalized_url = (provider_url or "").strip()
     if not normalized_url:
         return None
 
-    for local_url, target_path in _local_asset_file_candidates(source, normalized_url):
-        if target_path.is_file() and target_path.stat().st_size > 0:
-            return local_url
+    source_key = _local_asset_key(source, normalized_url)
+    stored_url = await source_asset_url(db, source_key)
+    if stored_url:
+        return stored_url
 
     try:
-        content_type, body = await request_asset(source, normalized_url)
-        extension = LOCAL_IMAGE_EXTENSIONS.get(content_type.lower())
-        if not extension:
-            raise IntegrationRequestError("Formato de imagen no permitido para almacenamiento local.", 415)
-        try:
-            with Image.open(BytesIO(body)) as image:
-                image.verify()
-        except (Image.DecompressionBombError, UnidentifiedImageError, OSError, SyntaxError, ValueError) as exc:
-            raise IntegrationRequestError("El proveedor devolvió una imagen corrupta.", 422) from exc
-
-        directory = _integration_asset_directory() / str(source.id)
-        directory.mkdir(parents=True, exist_ok=True)
-        target_path = directory / f"{_local_asset_key(source, normalized_url)}{extension}"
-        if not target_path.is_file() or target_path.stat().st_size == 0:
-            descriptor, temporary_path = tempfile.mkstemp(prefix=".asset-", dir=directory)
+        body = extension = None
+        for _local_url, legacy_path in _local_asset_file_candidates(source, normalized_url):
+            if legacy_path.is_file() and legacy_path.stat().st_size > 0:
+                body, extension = await asyncio.to_thread(legacy_path.read_bytes), legacy_path.suffix
+                break
+        if body is None:
+            content_type, body = await request_asset(source, normalized_url)
+            extension = LOCAL_IMAGE_EXTENSIONS.get(content_type.lower())
+            if not extension:
+                raise IntegrationRequestError("Formato de imagen no permitido para almacenamiento local.", 415)
             try:
-                with os.fdopen(descriptor, "wb") as output:
-                    output.write(body)
-                    output.flush()
-                    os.fsync(output.fileno())
-                os.replace(temporary_path, target_path)
-            except Exception:
-                if os.path.exists(temporary_path):
-                    os.unlink(temporary_path)
-                raise
-        return _local_asset_url(source, normalized_url, extension)
+                with Image.open(BytesIO(body)) as image:
+                    image.verify()
+            except (Image.DecompressionBombError, UnidentifiedImageError, OSError, SyntaxError, ValueError) as exc:
+                raise IntegrationRequestError("El proveedor devolvió una imagen corrupta.", 422) from exc
+
+        stored_url = await store_asset(db, body, extension)
+        await remember_source(db, source_key, stored_url)
+        return stored_url
     except (IntegrationRequestError, OSError) as exc:
         LOGGER.warning("No se pudo guardar la imagen externa %s: %s", normalized_url, exc)
         return None
@@ -641,6 +639,7 @@ async def remove_unreferenced_local_assets(
         return removed
 
     removed = await asyncio.to_thread(unlink_files)
+    await forget_derivatives(db, removable)
     for value in removable:
         path = _local_integration_asset_path(value)
         if path is None:
@@ -675,6 +674,7 @@ async def prune_orphaned_local_assets(db: AsyncSession) -> int:
     }
 
     orphaned = []
+    orphaned_urls: set[str] = set()
     for path in files:
         try:
             relative = path.relative_to(root)
@@ -685,6 +685,7 @@ async def prune_orphaned_local_assets(db: AsyncSession) -> int:
         value = f"{LOCAL_INTEGRATION_ASSET_PREFIX}/{relative.parts[0]}/{relative.parts[1]}"
         if _local_integration_asset_path(value) is not None and value not in referenced:
             orphaned.append(path)
+            orphaned_urls.add(value)
 
     def unlink_files() -> int:
         removed = 0
@@ -700,6 +701,7 @@ async def prune_orphaned_local_assets(db: AsyncSession) -> int:
         return removed
 
     removed = await asyncio.to_thread(unlink_files)
+    await forget_derivatives(db, orphaned_urls)
     for path in {item.parent for item in orphaned}:
         try:
             path.rmdir()
@@ -1562,7 +1564,7 @@ async def _sync_product_images(
     ).scalars().all()
     incoming: list[tuple[int, int, str]] = []
     for order, index, provider_url in provider_incoming:
-        local_url = await _cache_provider_asset(source, provider_url)
+        local_url = await _cache_provider_asset(db, source, provider_url)
         if not local_url:
             # Never replace a previously good local copy with a broken
             # provider URL. A later catalog run can retry the failed download.
@@ -1570,7 +1572,8 @@ async def _sync_product_images(
                 (
                     row
                     for row in existing_rows
-                    if (row.order or 0) == order and _is_local_integration_asset(row.image_url)
+                    if (row.order or 0) == order
+                    and (_is_local_integration_asset(row.image_url) or is_asset_url(row.image_url))
                 ),
                 None,
             )
@@ -1586,6 +1589,13 @@ async def _sync_product_images(
     }
     if not incoming:
         return
+    await ensure_derivatives(
+        db,
+        {
+            image_url: asset_path(image_url) or _local_integration_asset_path(image_url)
+            for _order, _index, image_url in incoming
+        },
+    )
 
     existing_by_url = {
         str(row.image_url).strip().casefold(): row
@@ -2488,9 +2498,7 @@ async def _linked_product(
     if product and product.company_id == source.company_id:
         return product
     if sku:
-        return (await db.execute(
-            select(Product).where(Product.company_id == source.company_id, Product.sku == sku).limit(1)
-        )).scalars().first()
+        return await product_for_sku(db, source.company_id, sku, include_archived=True)
     return None
 
 
@@ -2507,12 +2515,7 @@ async def _linked_variant(
     if variant and variant.company_id == source.company_id:
         return variant
     if sku:
-        return (await db.execute(
-            select(ProductVariant).where(
-                ProductVariant.company_id == source.company_id,
-                ProductVariant.sku == sku,
-            ).limit(1)
-        )).scalars().first()
+        return await variant_for_sku(db, source.company_id, sku)
     return None
 
 
@@ -2692,10 +2695,11 @@ async def _sync_products(
             product = None
 
         if not product and sku:
-            product_result = await db.execute(
-                select(Product).where(Product.company_id == source.company_id, Product.sku == sku).limit(1)
-            )
-            product = product_result.scalars().first()
+            product = await product_for_sku(db, source.company_id, sku, include_archived=True)
+        elif product and sku and not product.is_active:
+            # Restoring the linked product must not take a SKU another active
+            # product holds; that product is the one kept in sync instead.
+            product = await product_for_sku(db, source.company_id, sku) or product
 
         if product is None:
             product = Product(id=uuid.uuid4(), company_id=source.company_id, name=name, sku=sku)
@@ -2713,7 +2717,12 @@ async def _sync_products(
         # override these defaults.
         product.sale_ok = True
         product.purchase_ok = True
-        if sku is not None:
+        if sku is not None and sku_key(sku) != sku_key(product.sku):
+            if await active_product_id_for_sku(db, source.company_id, sku, exclude_product_id=product.id):
+                _record_sync_item_error(run, "catalog_duplicate_sku", external_id=external_id, name=name, sku=sku)
+            else:
+                product.sku = sku
+        elif sku is not None:
             product.sku = sku
         for field, key, *fallbacks in [
             ("description", "product.description", "description", "body_html"),
@@ -2928,13 +2937,7 @@ async def _sync_products(
             if variant and variant.product_id != product.id:
                 variant = None
             if not variant and variant_sku:
-                variant_result = await db.execute(
-                    select(ProductVariant).where(
-                        ProductVariant.product_id == product.id,
-                        ProductVariant.sku == variant_sku,
-                    ).limit(1)
-                )
-                variant = variant_result.scalars().first()
+                variant = await variant_for_sku(db, source.company_id, variant_sku, product_id=product.id)
             if not variant:
                 variant = ProductVariant(
                     id=uuid.uuid4(),
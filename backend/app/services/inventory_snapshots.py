@@ -0,0 +1,316 @@
+"""Daily inventory snapshots.
+
+Valuation, turnover and "stock as of a day" read per-day facts instead of
+scanning ``inventory`` on every request:
+
+* ``InventoryProductSnapshot``: stock, reserved stock and value per branch,
+  product and day. Sparse: a row is written only on days the stock changed,
+  and the latest row on or before a day is the stock of that day.
+* ``InventoryBranchSnapshot``: totals per branch and day (value at average
+  and at catalog cost, low-stock rows).
+
+Committing a change to an ``Inventory`` row, or to a product's cost, price or
+minimum stock, enqueues one ``inventory.snapshot`` outbox event per
+transaction. ``app.workers.inventory_snapshot_worker`` then recomputes the
+current day's rows for the affected stock and branches from the live tables,
+and carries every branch's totals forward when a new day starts. Days are UTC
+days, as in the sales rollups. Bulk ``update()``/``delete()`` statements bypass
+the hooks: code issuing them calls ``mark_branch_totals_stale``, and data fixes
+made that way need ``scripts/snapshot_inventory.py``.
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import Select, event, func, inspect, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import discard_on_rollback, distinct_on
+from app.models.branch import Branch
+from app.models.inventory import Inventory
+from app.models.inventory_snapshot import InventoryBranchSnapshot, InventoryProductSnapshot
+from app.models.product import Product
+from app.services.outbox import enqueue_outbox_event
+
+SNAPSHOT_EVENT_TYPE = "inventory.snapshot"
+# Product fields the branch totals depend on.
+VALUATION_FIELDS = ("cost", "price", "min_stock")
+_SESSION_TARGETS = "inventory_snapshot_targets"
+
+
+@dataclass
+class SnapshotTargets:
+    """Stock (branch, product) pairs and companies whose snapshots are stale."""
+
+    stock: set[tuple[uuid.UUID, uuid.UUID]] = field(default_factory=set)
+    # Companies whose branch totals changed without a stock change.
+    companies: set[uuid.UUID] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.stock or self.companies)
+
+    def merge(self, other: "SnapshotTargets") -> None:
+        self.stock |= other.stock
+        self.companies |= other.companies
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "stock": sorted([str(branch_id), str(product_id)] for branch_id, product_id in self.stock),
+            "companies": sorted(str(company_id) for company_id in self.companies),
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> "SnapshotTargets":
+        return cls(
+            stock={(uuid.UUID(branch_id), uuid.UUID(product_id)) for branch_id, product_id in payload.get("stock") or []},
+            companies={uuid.UUID(company_id) for company_id in payload.get("companies") or []},
+        )
+
+
+def utc_today() -> date:
+    return datetime.utcnow().date()
+
+
+def _valuation_changed(product: Product) -> bool:
+    state = inspect(product)
+    return state.deleted or any(state.attrs[name].history.has_changes() for name in VALUATION_FIELDS)
+
+
+def snapshot_targets(instances: Iterable[Any]) -> SnapshotTargets:
+    """Snapshots affected by changes to ``instances``."""
+    targets = SnapshotTargets()
+    for instance in instances:
+        if isinstance(instance, Inventory):
+            if instance.branch_id and instance.product_id:
+                targets.stock.add((instance.branch_id, instance.product_id))
+        elif isinstance(instance, Product):
+            if instance.company_id and instance.id and _valuation_changed(instance):
+                targets.companies.add(instance.company_id)
+    return targets
+
+
+def mark_branch_totals_stale(db: AsyncSession | Session, company_id: uuid.UUID) -> None:
+    """Refresh ``company_id``'s branch totals on commit, for bulk statements the hooks miss."""
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    session.info.setdefault(_SESSION_TARGETS, SnapshotTargets()).companies.add(company_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_snapshot_targets(session: Session, _flush_context) -> None:
+    dirty = (instance for instance in session.dirty if session.is_modified(instance, include_collections=False))
+    targets = snapshot_targets((*session.new, *session.deleted, *dirty))
+    if targets:
+        session.info.setdefault(_SESSION_TARGETS, SnapshotTargets()).merge(targets)
+
+
+@event.listens_for(Session, "before_commit")
+def _enqueue_snapshot_event(session: Session) -> None:
+    session.flush()
+    targets: Optional[SnapshotTargets] = session.info.pop(_SESSION_TARGETS, None)
+    if not targets:
+        return
+    enqueue_outbox_event(
+        session,
+        event_type=SNAPSHOT_EVENT_TYPE,
+        aggregate_type="inventory_snapshot",
+        aggregate_id=uuid.uuid4(),
+        company_id=next(iter(targets.companies)) if len(targets.companies) == 1 and not targets.stock else None,
+        payload=targets.to_payload(),
+    )
+
+
+discard_on_rollback(_SESSION_TARGETS)
+
+
+async def _lock_branches(db: AsyncSession, branch_ids: Iterable[uuid.UUID]) -> None:
+    # Serialize refreshes of a branch so an older read cannot overwrite a newer one.
+    for branch_id in sorted(set(branch_ids), key=str):
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"inventory-snapshot:{branch_id}"))))
+
+
+async def _upsert_product_rows(db: AsyncSession, rows: list[dict]) -> None:
+    if not rows:
+        return
+    statement = insert(InventoryProductSnapshot).values(rows)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=["company_id", "branch_id", "product_id", "day"],
+        set_={
+            "quantity": statement.excluded.quantity,
+            "reserved_quantity": statement.excluded.reserved_quantity,
+            "value": statement.excluded.value,
+            "refreshed_at": statement.excluded.refreshed_at,
+        },
+    ))
+
+
+async def refresh_branch_snapshots(db: AsyncSession, branch_ids: Iterable[uuid.UUID], day: date) -> None:
+    """Recompute the totals of ``branch_ids`` for ``day`` from live stock; the caller commits."""
+    branch_ids = set(branch_ids)
+    if not branch_ids:
+        return
+    result = await db.execute(
+        select(
+            Branch.id,
+            Branch.company_id,
+            func.coalesce(func.sum(Inventory.quantity), 0.0),
+            func.coalesce(func.sum(Inventory.quantity * Inventory.average_cost), 0.0),
+            func.coalesce(func.sum(Inventory.quantity * func.coalesce(Product.cost, Product.price, 0.0)), 0.0),
+            func.count(Inventory.id).filter(Inventory.quantity <= Product.min_stock),
+        )
+        .select_from(Branch)
+        .outerjoin(Inventory, Inventory.branch_id == Branch.id)
+        .outerjoin(Product, Product.id == Inventory.product_id)
+        .where(Branch.id.in_(branch_ids), Branch.company_id.is_not(None))
+        .group_by(Branch.id, Branch.company_id)
+    )
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(), "company_id": company_id, "branch_id": branch_id, "day": day,
+            "quantity": float(quantity), "value": float(value), "catalog_value": float(catalog_value),
+            "low_stock_items": int(low_stock), "refreshed_at": now,
+        }
+        for branch_id, company_id, quantity, value, catalog_value, low_stock in result.all()
+    ]
+    if not rows:
+        return
+    statement = insert(InventoryBranchSnapshot).values(rows)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=["company_id", "branch_id", "day"],
+        set_={
+            name: statement.excluded[name]
+            for name in ("quantity", "value", "catalog_value", "low_stock_items", "refreshed_at")
+        },
+    ))
+
+
+async def refresh_inventory_snapshots(db: AsyncSession, targets: SnapshotTargets, day: Optional[date] = None) -> None:
+    """Recompute the ``day`` (default: today) rows named by ``targets``; the caller commits."""
+    day = day or utc_today()
+    branches = dict((await db.execute(
+        select(Branch.id, Branch.company_id).where(
+            Branch.id.in_({branch_id for branch_id, _product_id in targets.stock})
+            | Branch.company_id.in_(targets.companies),
+            Branch.company_id.is_not(None),
+        )
+    )).all()) if targets else {}
+    if not branches:
+        return
+    await _lock_branches(db, branches)
+
+    stock = {key for key in targets.stock if key[0] in branches}
+    if stock:
+        result = await db.execute(
+            select(
+                Inventory.branch_id,
+                Inventory.product_id,
+                func.coalesce(func.sum(Inventory.quantity), 0.0),
+                func.coalesce(func.sum(Inventory.reserved_quantity), 0.0),
+                func.coalesce(func.sum(Inventory.quantity * Inventory.average_cost), 0.0),
+            )
+            .where(tuple_(Inventory.branch_id, Inventory.product_id).in_(sorted(stock, key=str)))
+            .group_by(Inventory.branch_id, Inventory.product_id)
+        )
+        totals = {(branch_id, product_id): values for branch_id, product_id, *values in result.all()}
+        now = datetime.utcnow()
+        rows = []
+        for branch_id, product_id in sorted(stock, key=str):
+            # Pairs without stock rows left (deleted) are recorded as empty.
+            quantity, reserved, value = totals.get((branch_id, product_id), (0.0, 0.0, 0.0))
+            rows.append({
+                "id": uuid.uuid4(), "company_id": branches[branch_id], "branch_id": branch_id,
+                "product_id": product_id, "day": day, "quantity": float(quantity),
+                "reserved_quantity": float(reserved), "value": float(value), "refreshed_at": now,
+            })
+        await _upsert_product_rows(db, rows)
+    await refresh_branch_snapshots(db, branches, day)
+
+
+async def close_inventory_day(db: AsyncSession, day: date) -> int:
+    """Carry each branch's latest totals forward to ``day`` unless it already has a row; the caller commits."""
+    columns = ("company_id", "branch_id", "quantity", "value", "catalog_value", "low_stock_items")
+    latest = distinct_on(
+        select(*(getattr(InventoryBranchSnapshot, name) for name in columns))
+        .where(InventoryBranchSnapshot.day < day),
+        InventoryBranchSnapshot.company_id,
+        InventoryBranchSnapshot.branch_id,
+    ).order_by(
+        InventoryBranchSnapshot.company_id,
+        InventoryBranchSnapshot.branch_id,
+        InventoryBranchSnapshot.day.desc(),
+    ).subquery()
+    statement = insert(InventoryBranchSnapshot).from_select(
+        ["id", "day", "refreshed_at", *columns],
+        select(func.gen_random_uuid(), literal(day), func.now(), *(latest.c[name] for name in columns)),
+    ).on_conflict_do_nothing(index_elements=["company_id", "branch_id", "day"])
+    result = await db.execute(statement)
+    return result.rowcount or 0
+
+
+async def snapshot_company(db: AsyncSession, company_id: uuid.UUID, day: Optional[date] = None) -> int:
+    """Record the current stock of every product in ``company_id`` for ``day``; the caller commits.
+
+    Seeds the snapshots of an existing company. Returns the product rows written.
+    """
+    day = day or utc_today()
+    branch_ids = (await db.execute(select(Branch.id).where(Branch.company_id == company_id))).scalars().all()
+    if not branch_ids:
+        return 0
+    await _lock_branches(db, branch_ids)
+    result = await db.execute(
+        select(
+            Inventory.branch_id,
+            Inventory.product_id,
+            func.coalesce(func.sum(Inventory.quantity), 0.0),
+            func.coalesce(func.sum(Inventory.reserved_quantity), 0.0),
+            func.coalesce(func.sum(Inventory.quantity * Inventory.average_cost), 0.0),
+        )
+        .where(Inventory.branch_id.in_(branch_ids))
+        .group_by(Inventory.branch_id, Inventory.product_id)
+    )
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(), "company_id": company_id, "branch_id": branch_id, "product_id": product_id,
+            "day": day, "quantity": float(quantity), "reserved_quantity": float(reserved),
+            "value": float(value), "refreshed_at": now,
+        }
+        for branch_id, product_id, quantity, reserved, value in result.all()
+    ]
+    # Keep each statement's parameter count well under the driver's limit.
+    for start in range(0, len(rows), 1000):
+        await _upsert_product_rows(db, rows[start:start + 1000])
+    await refresh_branch_snapshots(db, branch_ids, day)
+    return len(rows)
+
+
+def branch_totals_as_of(company_id: uuid.UUID, day: date, branch_id: Optional[uuid.UUID] = None) -> Select:
+    """Each branch's latest totals on or before ``day``."""
+    query = distinct_on(
+        select(InventoryBranchSnapshot)
+        .where(InventoryBranchSnapshot.company_id == company_id, InventoryBranchSnapshot.day <= day),
+        InventoryBranchSnapshot.branch_id,
+    ).order_by(InventoryBranchSnapshot.branch_id, InventoryBranchSnapshot.day.desc())
+    if branch_id:
+        query = query.where(InventoryBranchSnapshot.branch_id == branch_id)
+    return query
+
+
+def stock_as_of(company_id: uuid.UUID, day: date, branch_id: Optional[uuid.UUID] = None) -> Select:
+    """Each (branch, product) stock snapshot in effect at the end of ``day``."""
+    query = distinct_on(
+        select(InventoryProductSnapshot)
+        .where(InventoryProductSnapshot.company_id == company_id, InventoryProductSnapshot.day <= day),
+        InventoryProductSnapshot.branch_id,
+        InventoryProductSnapshot.product_id,
+    ).order_by(
+        InventoryProductSnapshot.branch_id,
+        InventoryProductSnapshot.product_id,
+        InventoryProductSnapshot.day.desc(),
+    )
+    if branch_id:
+        query = query.where(InventoryProductSnapshot.branch_id == branch_id)
+    return query
@@ -0,0 +1,268 @@
+"""Live dashboard counters in Redis.
+
+The dashboard cards and default charts read a few Redis hashes per company
+instead of aggregating tables on every load:
+
+* ``lumefy:counters:{company}``: ``users``, ``products``, ``orders``,
+  ``revenue``, ``returns`` and ``refunds``, plus when each part was refreshed.
+* ``lumefy:counters:{company}:revenue:day``: booked revenue per UTC day for the
+  last ``DAY_SERIES_DAYS`` days, keyed ``YYYY-MM-DD``.
+* ``lumefy:counters:{company}:revenue:month``: booked revenue per month of the
+  current and previous year, keyed ``YYYY-MM``.
+
+Counters are recomputed from SQL, never incremented, so redelivered events and
+concurrent refreshes cannot drift them. There are two parts, written by
+different consumers of the outbox stream:
+
+* the sales part (orders, revenue, returns, series) is refreshed from the daily
+  sales rollups by ``app.workers.sales_rollup_worker`` right after it rebuilds
+  them for a company;
+* the catalog part (users, products) is refreshed by
+  ``app.workers.dashboard_counter_worker`` from ``dashboard.counters`` events,
+  enqueued when a commit adds or removes products or company users.
+
+The counter worker also reconciles every company periodically. Each write is
+published on ``lumefy:counters:{company}`` for the dashboard's event stream.
+"""
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from sqlalchemy import event, func, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import discard_on_rollback
+from app.models.company import Company
+from app.models.product import Product
+from app.models.sales_rollup import ReturnDailyRollup, SalesDailyRollup
+from app.models.user import User
+from app.services.outbox import enqueue_outbox_event
+from app.services.sales_rollups import UNBOOKED_STATUSES
+
+COUNTERS_EVENT_TYPE = "dashboard.counters"
+KEY_PREFIX = "lumefy:counters"
+DAY_SERIES_DAYS = 35
+# User fields that decide whether a user is counted on the dashboard.
+USER_COUNT_FIELDS = ("company_id", "role_id", "is_superuser")
+_SESSION_TARGETS = "dashboard_counter_targets"
+_KEEPALIVE_SECONDS = 15
+
+
+def counters_key(company_id: uuid.UUID) -> str:
+    return f"{KEY_PREFIX}:{company_id}"
+
+
+def series_key(company_id: uuid.UUID, bucket: str) -> str:
+    return f"{KEY_PREFIX}:{company_id}:revenue:{bucket}"
+
+
+@dataclass
+class CounterTargets:
+    """Companies whose catalog counters are stale."""
+
+    companies: set[uuid.UUID] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.companies)
+
+    def merge(self, other: "CounterTargets") -> None:
+        self.companies |= other.companies
+
+    def to_payload(self) -> dict[str, Any]:
+        return {"companies": sorted(str(company_id) for company_id in self.companies)}
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> "CounterTargets":
+        return cls(companies={uuid.UUID(company_id) for company_id in payload.get("companies") or []})
+
+
+def counter_targets(new: Iterable[Any], deleted: Iterable[Any], dirty: Iterable[Any]) -> CounterTargets:
+    """Companies whose product or user counts change with this flush."""
+    targets = CounterTargets()
+    for instance in (*new, *deleted):
+        if isinstance(instance, (Product, User)) and instance.company_id:
+            targets.companies.add(instance.company_id)
+    for instance in dirty:
+        if not isinstance(instance, User):
+            continue
+        state = inspect(instance)
+        for name in USER_COUNT_FIELDS:
+            history = state.attrs[name].history
+            if history.has_changes():
+                if name == "company_id":
+                    targets.companies.update(company_id for company_id in history.deleted if company_id)
+                if instance.company_id:
+                    targets.companies.add(instance.company_id)
+    return targets
+
+
+def mark_counters_stale(db: AsyncSession | Session, company_id: uuid.UUID) -> None:
+    """Refresh ``company_id``'s catalog counters on commit, for bulk statements the hooks miss."""
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    session.info.setdefault(_SESSION_TARGETS, CounterTargets()).companies.add(company_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_counter_targets(session: Session, _flush_context) -> None:
+    targets = counter_targets(session.new, session.deleted, session.dirty)
+    if targets:
+        session.info.setdefault(_SESSION_TARGETS, CounterTargets()).merge(targets)
+
+
+@event.listens_for(Session, "before_commit")
+def _enqueue_counter_event(session: Session) -> None:
+    session.flush()
+    targets: Optional[CounterTargets] = session.info.pop(_SESSION_TARGETS, None)
+    if not targets:
+        return
+    enqueue_outbox_event(
+        session,
+        event_type=COUNTERS_EVENT_TYPE,
+        aggregate_type="dashboard_counters",
+        aggregate_id=uuid.uuid4(),
+        company_id=next(iter(targets.companies)) if len(targets.companies) == 1 else None,
+        payload=targets.to_payload(),
+    )
+
+
+discard_on_rollback(_SESSION_TARGETS)
+
+
+def utc_today() -> date:
+    return datetime.utcnow().date()
+
+
+async def _catalog_counts(db: AsyncSession, company_id: uuid.UUID) -> dict[str, Any]:
+    # Same definitions as the dashboard's SQL fallback.
+    users = await db.scalar(select(func.count(User.id)).where(
+        User.company_id == company_id,
+        or_(User.role_id.is_not(None), User.is_superuser.is_(True)),
+    ))
+    products = await db.scalar(select(func.count(Product.id)).where(Product.company_id == company_id))
+    return {"users": int(users or 0), "products": int(products or 0)}
+
+
+async def _sales_counts(db: AsyncSession, company_id: uuid.UUID) -> tuple[dict[str, Any], dict[str, float], dict[str, float]]:
+    booked = SalesDailyRollup.status.notin_(UNBOOKED_STATUSES)
+    totals = (await db.execute(select(
+        func.coalesce(func.sum(SalesDailyRollup.sales_count), 0),
+        func.coalesce(func.sum(SalesDailyRollup.gross_sales).filter(booked), 0.0),
+    ).where(SalesDailyRollup.company_id == company_id))).one()
+    returns = (await db.execute(select(
+        func.coalesce(func.sum(ReturnDailyRollup.returns_count), 0),
+        func.coalesce(func.sum(ReturnDailyRollup.total_refunds), 0.0),
+    ).where(ReturnDailyRollup.company_id == company_id))).one()
+
+    today = utc_today()
+    days = (await db.execute(
+        select(SalesDailyRollup.day, func.sum(SalesDailyRollup.gross_sales))
+        .where(
+            SalesDailyRollup.company_id == company_id,
+            SalesDailyRollup.day > today - timedelta(days=DAY_SERIES_DAYS),
+            booked,
+        )
+        .group_by(SalesDailyRollup.day)
+    )).all()
+    month = func.to_char(SalesDailyRollup.day, "YYYY-MM")
+    months = (await db.execute(
+        select(month, func.sum(SalesDailyRollup.gross_sales))
+        .where(
+            SalesDailyRollup.company_id == company_id,
+            SalesDailyRollup.day >= date(today.year - 1, 1, 1),
+            booked,
+        )
+        .group_by(month)
+    )).all()
+    counters = {
+        "orders": int(totals[0]),
+        "revenue": float(totals[1]),
+        "returns": int(returns[0]),
+        "refunds": float(returns[1]),
+    }
+    return counters, {day.isoformat(): float(total) for day, total in days}, {key: float(total) for key, total in months}
+
+
+async def _write(redis, company_id: uuid.UUID, part: str, counters: dict[str, Any], series=None) -> None:
+    refreshed = {**counters, f"{part}_refreshed_at": datetime.utcnow().isoformat()}
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(counters_key(company_id), mapping=refreshed)
+        if series is not None:
+            for bucket, values in series.items():
+                pipe.delete(series_key(company_id, bucket))
+                if values:
+                    pipe.hset(series_key(company_id, bucket), mapping=values)
+        pipe.publish(counters_key(company_id), json.dumps(counters))
+        await pipe.execute()
+
+
+async def refresh_sales_counters(db: AsyncSession, redis, company_id: uuid.UUID) -> None:
+    """Recompute the sales part of ``company_id``'s counters from the daily rollups."""
+    counters, days, months = await _sales_counts(db, company_id)
+    await _write(redis, company_id, "sales", counters, {"day": days, "month": months})
+
+
+async def refresh_catalog_counters(db: AsyncSession, redis, company_id: uuid.UUID) -> None:
+    """Recompute the user and product counts of ``company_id``."""
+    await _write(redis, company_id, "catalog", await _catalog_counts(db, company_id))
+
+
+async def reconcile_counters(db: AsyncSession, redis) -> int:
+    """Recompute every company's counters; returns the number of companies."""
+    company_ids = (await db.execute(select(Company.id))).scalars().all()
+    for company_id in company_ids:
+        await refresh_catalog_counters(db, redis, company_id)
+        await refresh_sales_counters(db, redis, company_id)
+    return len(company_ids)
+
+
+async def read_counters(redis, company_id: uuid.UUID, days: Iterable[date] = (), year: Optional[int] = None) -> Optional[dict[str, Any]]:
+    """Counters of ``company_id`` with its revenue for ``days`` and the months of ``year``.
+
+    ``None`` until both parts have been written once, so callers fall back
+    to SQL on a cold Redis.
+    """
+    days = list(days)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hgetall(counters_key(company_id))
+        pipe.hmget(series_key(company_id, "day"), [day.isoformat() for day in days] or ["-"])
+        pipe.hmget(series_key(company_id, "month"), [f"{year}-{month:02d}" for month in range(1, 13)] if year else ["-"])
+        values, day_values, month_values = await pipe.execute()
+    if not all(f"{part}_refreshed_at" in values for part in ("sales", "catalog")):
+        return None
+    counters: dict[str, Any] = {name: int(values.get(name) or 0) for name in ("users", "products", "orders", "returns")}
+    counters.update({name: float(values.get(name) or 0.0) for name in ("revenue", "refunds")})
+    counters["revenue_by_day"] = {day: float(value or 0.0) for day, value in zip(days, day_values)}
+    counters["revenue_by_month"] = (
+        {month: float(value or 0.0) for month, value in zip(range(1, 13), month_values)} if year else {}
+    )
+    return counters
+
+
+async def counter_events(redis, company_id: uuid.UUID, is_disconnected) -> AsyncIterator[str]:
+    """Server-sent events with ``company_id``'s counters.
+
+    A ``snapshot`` event with the current values, then a ``counters`` event
+    with the refreshed part on every change. ``is_disconnected`` is the
+    request's coroutine of the same name; a comment line every few seconds
+    keeps proxies from closing an idle stream.
+    """
+    pubsub = redis.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(counters_key(company_id))
+    try:
+        current = await read_counters(redis, company_id)
+        if current:
+            current.pop("revenue_by_day")
+            current.pop("revenue_by_month")
+            yield f"event: snapshot\ndata: {json.dumps(current)}\n\n"
+        while not await is_disconnected():
+            message = await pubsub.get_message(timeout=_KEEPALIVE_SECONDS)
+            if message and message.get("type") == "message":
+                yield f"event: counters\ndata: {message['data']}\n\n"
+            else:
+                yield ": keepalive\n\n"
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
@@ -0,0 +1,319 @@
+"""Compiled, per-company notification and email templates.
+
+Templates use ``str.format`` placeholders (``Hola {customer_name}``). Each one
+is parsed once into literal/field segments and kept in a bounded LRU per
+company, so rendering an email or an in-app notification neither queries the
+database nor reparses the template. Edits call :func:`invalidate_templates`,
+which clears the local entry and bumps a Redis generation that other
+processes check periodically.
+"""
+from __future__ import annotations
+
+import html
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from string import Formatter
+from typing import Any, Iterable, Mapping, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.lru import LRUCache
+from app.core.redis_client import get_redis
+from app.models.notification_template import NotificationTemplate
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "lumefy:notification-templates:generation"
+_formatter = Formatter()
+
+
+class TemplateSyntaxError(ValueError):
+    pass
+
+
+class CompiledTemplate:
+    """A ``str.format`` template parsed once into literal and field segments."""
+
+    __slots__ = ("source", "_segments")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        segments: list[tuple[str, Optional[str], str, Optional[str]]] = []
+        try:
+            for literal, field, spec, conversion in _formatter.parse(source):
+                if field is not None and not field.isidentifier():
+                    raise TemplateSyntaxError(f"Campo de plantilla no soportado: {{{field}}}")
+                segments.append((literal, field, spec or "", conversion))
+        except ValueError as exc:
+            if isinstance(exc, TemplateSyntaxError):
+                raise
+            raise TemplateSyntaxError(f"Plantilla inválida: {exc}") from exc
+        self._segments = tuple(segments)
+
+    @property
+    def fields(self) -> set[str]:
+        return {field for _, field, _, _ in self._segments if field}
+
+    def render(self, context: Mapping[str, Any], *, escape: bool = False) -> str:
+        parts: list[str] = []
+        for literal, field, spec, conversion in self._segments:
+            parts.append(literal)
+            if field is None:
+                continue
+            value = context.get(field, "")
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "s":
+                value = str(value)
+            try:
+                text = format(value, spec) if spec else str(value)
+            except (TypeError, ValueError):
+                text = str(value)
+            parts.append(html.escape(text) if escape else text)
+        return "".join(parts)
+
+
+@dataclass(frozen=True)
+class CompiledNotificationTemplate:
+    code: str
+    type: str
+    title: CompiledTemplate
+    body: CompiledTemplate
+
+
+@dataclass(frozen=True)
+class RenderedNotification:
+    code: str
+    type: str
+    title: str
+    body: str
+
+
+def compile_template(code: str, title: str, body: str, type_: str | None = "info") -> CompiledNotificationTemplate:
+    return CompiledNotificationTemplate(
+        code=code,
+        type=type_ or "info",
+        title=CompiledTemplate(title),
+        body=CompiledTemplate(body),
+    )
+
+
+_EMAIL_WRAPPER = (
+    '<html><body style="font-family: Arial, sans-serif;">'
+    '<div style="background-color: #f4f6f9; padding: 20px;">'
+    '<div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; padding: 30px; border-radius: 8px;">'
+    "{content}"
+    "</div></div></body></html>"
+)
+_EMAIL_BUTTON = (
+    '<div style="text-align: center; margin: 30px 0;">'
+    '<a href="{{{field}}}" style="background-color: #1a237e; color: #ffffff; padding: 12px 24px; '
+    'text-decoration: none; border-radius: 4px; font-weight: bold;">{label}</a></div>'
+)
+
+# Built-in transactional templates. A platform row (company_id NULL) or a
+# company row with the same code overrides them.
+DEFAULT_TEMPLATES: dict[str, CompiledNotificationTemplate] = {
+    template.code: template
+    for template in (
+        compile_template(
+            "ORDER_RECEIVED_EMAIL",
+            "Recibimos tu pedido #{order_code}",
+            "<p>Hola {customer_name},</p>"
+            "<p>Recibimos tu pedido <strong>#{order_code}</strong> por "
+            "<strong>{total:.2f} {currency}</strong>.</p>"
+            "<p>Te avisaremos cuando avance su preparación y despacho.</p>",
+        ),
+        compile_template(
+            "ORDER_DISPATCHED_EMAIL",
+            "Tu pedido #{order_code} fue enviado",
+            "<p>Hola {customer_name},</p><p>Tu pedido <strong>#{order_code}</strong> ya fue despachado. "
+            "Te avisaremos cuando sea entregado.</p>",
+        ),
+        compile_template(
+            "ORDER_DELIVERED_EMAIL",
+            "Tu pedido #{order_code} fue entregado",
+            "<p>Hola {customer_name},</p><p>Tu pedido <strong>#{order_code}</strong> fue entregado. "
+            "Gracias por comprar con nosotros.</p>",
+        ),
+        compile_template(
+            "PASSWORD_RESET_EMAIL",
+            "{project_name} - Recuperación de Contraseña",
+            _EMAIL_WRAPPER.format(content=(
+                '<h2 style="color: #1a237e; text-align: center;">{project_name}</h2>'
+                '<h3 style="color: #333;">Recuperación de Contraseña</h3>'
+                '<p style="color: #555;">Hola,</p>'
+                '<p style="color: #555;">Recibimos una solicitud para restablecer tu contraseña. '
+                "Si no fuiste tú, puedes ignorar este correo.</p>"
+                '<p style="color: #555;">Para continuar, haz clic en el siguiente botón:</p>'
+                + _EMAIL_BUTTON.format(field="link", label="Restablecer Contraseña")
+                + '<p style="color: #999; font-size: 12px; text-align: center;">Este enlace expirará en 1 hora.</p>'
+                '<hr style="border: 1px solid #eee; margin: 20px 0;">'
+                '<p style="color: #999; font-size: 10px; text-align: center;">'
+                "&copy; {project_name}. Todos los derechos reservados.</p>"
+            )),
+        ),
+        compile_template(
+            "STOREFRONT_PASSWORD_RESET_EMAIL",
+            "{storefront_name} - Password reset",
+            _EMAIL_WRAPPER.format(content=(
+                '<h2 style="color: #1a237e; text-align: center;">{storefront_name}</h2>'
+                '<h3 style="color: #333;">Reset your password</h3>'
+                '<p style="color: #555;">We received a request to reset your password.</p>'
+                '<p style="color: #555;">If you did not request this change, you can ignore this email.</p>'
+                + _EMAIL_BUTTON.format(field="reset_link", label="Reset Password")
+                + '<p style="color: #999; font-size: 12px; text-align: center;">This link expires in 1 hour.</p>'
+            )),
+        ),
+    )
+}
+
+
+class NotificationTemplateCache:
+    """Per-company compiled templates in a bounded LRU.
+
+    One query loads every template visible to a company (its own rows plus
+    platform defaults). An inactive row disables its code at its scope: a
+    company's inactive override turns the template off for that company
+    instead of falling back to the platform or built-in version. The Redis generation is checked at most every
+    ``check_interval_seconds``; the TTL bounds staleness if Redis is down.
+    """
+
+    def __init__(
+        self,
+        max_companies: int = 256,
+        ttl_seconds: float = 600,
+        check_interval_seconds: float = 5,
+    ) -> None:
+        self._companies: LRUCache[Optional[uuid.UUID], dict[str, Optional[CompiledNotificationTemplate]]] = LRUCache(
+            max_companies, ttl_seconds=ttl_seconds
+        )
+        self.check_interval_seconds = check_interval_seconds
+        self._generation: Optional[str] = None
+        self._checked_at = 0.0
+
+    async def _sync_generation(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval_seconds:
+            return
+        self._checked_at = now
+        try:
+            generation = await get_redis().get(GENERATION_KEY)
+        except Exception:  # noqa: BLE001 - the TTL still bounds staleness
+            logger.debug("Notification template generation check failed", exc_info=True)
+            return
+        if generation != self._generation:
+            if self._generation is not None:
+                self._companies.clear()
+            self._generation = generation
+
+    async def _load(
+        self, db: AsyncSession, company_id: Optional[uuid.UUID]
+    ) -> dict[str, Optional[CompiledNotificationTemplate]]:
+        visibility = NotificationTemplate.company_id.is_(None)
+        if company_id is not None:
+            visibility = or_(visibility, NotificationTemplate.company_id == company_id)
+        rows = (await db.execute(
+            select(NotificationTemplate)
+            .where(visibility)
+            # Platform rows first so company overrides replace them below.
+            .order_by(NotificationTemplate.company_id.is_not(None))
+        )).scalars().all()
+        # None marks a code disabled for the company.
+        templates: dict[str, Optional[CompiledNotificationTemplate]] = {}
+        for row in rows:
+            if not row.is_active:
+                templates[row.code] = None
+                continue
+            try:
+                templates[row.code] = compile_template(row.code, row.title_template, row.body_template, row.type)
+            except TemplateSyntaxError:
+                logger.warning("Skipping invalid notification template %s (%s)", row.code, row.id)
+        return templates
+
+    async def get(
+        self,
+        db: AsyncSession,
+        company_id: Optional[uuid.UUID],
+        code: str,
+    ) -> Optional[CompiledNotificationTemplate]:
+        await self._sync_generation()
+        templates = self._companies.get(company_id)
+        if templates is None:
+            templates = await self._load(db, company_id)
+            self._companies.set(company_id, templates)
+        if code in templates:
+            return templates[code]
+        return DEFAULT_TEMPLATES.get(code)
+
+    async def render(
+        self,
+        db: AsyncSession,
+        company_id: Optional[uuid.UUID],
+        code: str,
+        context: Mapping[str, Any],
+        *,
+        html_body: bool = False,
+    ) -> Optional[RenderedNotification]:
+        rendered = await self.render_many(db, company_id, code, [context], html_body=html_body)
+        return rendered[0] if rendered else None
+
+    async def render_many(
+        self,
+        db: AsyncSession,
+        company_id: Optional[uuid.UUID],
+        code: str,
+        contexts: Iterable[Mapping[str, Any]],
+        *,
+        html_body: bool = False,
+    ) -> list[RenderedNotification]:
+        """Render one template for many recipients with a single cache lookup.
+
+        Returns an empty list when the template does not exist or is inactive.
+        With ``html_body`` the body's values are HTML-escaped; titles are used
+        as subjects and plain text, so they never are.
+        """
+        template = await self.get(db, company_id, code)
+        if template is None:
+            return []
+        return [
+            RenderedNotification(
+                code=template.code,
+                type=template.type,
+                title=template.title.render(context),
+                body=template.body.render(context, escape=html_body),
+            )
+            for context in contexts
+        ]
+
+    def invalidate_local(self, company_id: Optional[uuid.UUID] = None, *, platform: bool = False) -> None:
+        if platform:
+            self._companies.clear()
+        else:
+            self._companies.pop(company_id)
+
+
+template_cache = NotificationTemplateCache()
+
+
+def render_default(code: str, context: Mapping[str, Any], *, html_body: bool = False) -> RenderedNotification:
+    """Render a built-in template without a database session."""
+    template = DEFAULT_TEMPLATES[code]
+    return RenderedNotification(
+        code=code,
+        type=template.type,
+        title=template.title.render(context),
+        body=template.body.render(context, escape=html_body),
+    )
+
+
+async def invalidate_templates(company_id: Optional[uuid.UUID]) -> None:
+    """Drop cached templates after an edit, here and in every other process."""
+    template_cache.invalidate_local(company_id, platform=company_id is None)
+    try:
+        await get_redis().incr(GENERATION_KEY)
+    except Exception:  # noqa: BLE001 - other processes fall back to the TTL
+        logger.warning("Could not publish notification template invalidation", exc_info=True)
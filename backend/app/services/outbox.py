@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime
 from typing import Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -14,15 +15,22 @@ def enqueue_outbox_event(
     aggregate_id: uuid.UUID,
     company_id: uuid.UUID,
     payload: dict[str, Any],
+    idempotency_key: str | None = None,
+    available_at: datetime | None = None,
 ) -> OutboxEvent:
-    """Add an idempotent event; caller commits it with its business transaction."""
+    """Add an idempotent event; caller commits it with its business transaction.
+
+    Events that may legitimately repeat for one aggregate (for example retries)
+    pass their own ``idempotency_key``; ``available_at`` delays publication.
+    """
     event = OutboxEvent(
         event_type=event_type,
         aggregate_type=aggregate_type,
         aggregate_id=aggregate_id,
-        idempotency_key=f"{event_type}:{aggregate_id}",
+        idempotency_key=idempotency_key or f"{event_type}:{aggregate_id}",
         payload=payload,
         company_id=company_id,
+        available_at=available_at or datetime.utcnow(),
     )
     db.add(event)
     return event
@@ -1,13 +1,21 @@
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
+from dataclasses import dataclass
 from io import BytesIO
 from datetime import datetime
-import os
-import requests
-from reportlab.lib.utils import ImageReader
+from types import SimpleNamespace
+
+
+@dataclass(frozen=True)
+class DocumentLogo:
+    """A company logo re-encoded as PNG, with its draw size in points."""
+    data: bytes
+    width: float
+    height: float
+
 
 class PDFService:
     def __init__(self):
@@ -17,9 +25,6 @@ class PDFService:
         self.secondary_color = colors.HexColor("#595959") # Dark Grey
         self.accent_color = colors.HexColor("#0D47A1")   # Deep Blue
         self.light_bg = colors.HexColor("#f5f5f5")       # Light Grey
-        
-        # Paths
-        self.base_assets_path = r"c:\Angular\lumefy\frontend_mantis\src"
 
         self.title_style = ParagraphStyle(
             'HeaderTitle',
@@ -62,73 +67,36 @@ class PDFService:
             alignment=TA_RIGHT
         )
 
-    def _get_logo_image(self, url, width=120, height=50):
-        """
-        Retrieves logo image from URL (http) or local path.
-        Returns an Image object or None.
-        """
-        try:
-            img_data = None
-            
-            # 1. Handle Remote URL
-            if url and (url.startswith("http://") or url.startswith("https://")):
-                try:
-                    response = requests.get(url, timeout=5)
-                    if response.status_code == 200:
-                        img_data = BytesIO(response.content)
-                except:
-                    pass # Fallback to None
-            
-            # 2. Handle Local Path (assets/...)
-            elif url and "assets/" in url:
-                # Remove leading slash or definition issues
-                clean_path = url.replace("/", "\\")
-                if clean_path.startswith("\\"): clean_path = clean_path[1:]
-                
-                # Construct absolute path: c:\Angular\...\src\assets\images...
-                full_path = os.path.join(self.base_assets_path, clean_path)
-                
-                if os.path.exists(full_path):
-                    img_data = full_path
-
-            if img_data:
-                img = Image(img_data)
-                
-                # Resize keeping aspect ratio
-                img_width = img.drawWidth
-                img_height = img.drawHeight
-                
-                aspect = img_height / float(img_width)
-                
-                # Fit to box
-                if img_width > width:
-                    img.drawWidth = width
-                    img.drawHeight = width * aspect
-                elif img_height > height:
-                    img.drawHeight = height
-                    img.drawWidth = height / aspect
-                    
-                return img
-
-        except Exception as e:
-            print(f"Error loading logo: {e}")
+        # Built once per service instance; documents reuse them for every row.
+        self.doc_type_style = ParagraphStyle('DT', parent=self.styles['Heading2'], alignment=TA_RIGHT, fontSize=16, textColor=self.primary_color)
+        self.date_style = ParagraphStyle('FD', parent=self.value_style, alignment=TA_RIGHT)
+        self.client_name_style = ParagraphStyle('CN', parent=self.value_style, fontSize=10, fontName='Helvetica-Bold')
+        self.th_style = ParagraphStyle('TH', fontSize=8, textColor=colors.white)
+        self.th_center_style = ParagraphStyle('TH_C', fontSize=8, textColor=colors.white, alignment=TA_CENTER)
+        self.th_right_style = ParagraphStyle('TH_R', fontSize=8, textColor=colors.white, alignment=TA_RIGHT)
+        self.cell_center_style = ParagraphStyle('TD_C', parent=self.value_style, alignment=TA_CENTER)
+        self.cell_right_style = ParagraphStyle('TD_R', parent=self.value_style, alignment=TA_RIGHT)
+        self.summary_value_style = ParagraphStyle('S_R', alignment=TA_RIGHT, fontSize=9)
+        self.total_label_style = ParagraphStyle('T_B', fontSize=10, fontName='Helvetica-Bold', textColor=self.primary_color)
+        self.total_value_style = ParagraphStyle('T_V', fontSize=10, fontName='Helvetica-Bold', alignment=TA_RIGHT, textColor=self.primary_color)
+        self.footer_style = ParagraphStyle('Footer', parent=self.value_style, alignment=TA_CENTER, textColor=colors.grey, fontSize=8)
+
+    def _logo_image(self, logo):
+        """Image flowable for a ``DocumentLogo`` already fitted to the header box."""
+        if not logo:
             return None
-        
-        return None
+        return Image(BytesIO(logo.data), width=logo.width, height=logo.height)
 
-    def _add_header(self, doc, elements, company=None, doc_type="DOCUMENTO", doc_id=""):
+    def _add_header(self, doc, elements, company=None, doc_type="DOCUMENTO", doc_id="", logo=None, printed_on=None):
         # 1. Prepare Data
         company_name = company.name if company else "Lumefy SaaS"
         address = company.address if company and company.address else "Calle 123 #45-67"
         tax_id = company.tax_id if company and company.tax_id else "NIT: 900.123.456-7"
         phone = company.phone if company and company.phone else "+57 300 123 4567"
         website = company.website if company and company.website else "www.lumefy.io"
-        logo_url = company.logo_url if company else "assets/images/logo-dark.svg" # Default fallback
-        # SVG fallback not supported by ReportLab efficiently without svglib, assume png/jpg or text
-        # If SVG, we might skip or try. For now, let's assume if it fails it fails gracefully.
 
-        # 2. Logo
-        logo_img = self._get_logo_image(logo_url)
+        # 2. Logo, loaded and fitted by the caller (see document_renderer)
+        logo_img = self._logo_image(logo)
         
         left_content = []
         if logo_img:
@@ -142,10 +110,10 @@ class PDFService:
         left_content.append(Paragraph(f"{phone} | {website}", self.subtitle_style))
 
         right_content = [
-            Paragraph(doc_type.upper(), ParagraphStyle('DT', parent=self.styles['Heading2'], alignment=TA_RIGHT, fontSize=16, textColor=self.primary_color)),
+            Paragraph(doc_type.upper(), self.doc_type_style),
             Paragraph(f"#{doc_id}", self.invoice_num_style),
             Spacer(1, 5),
-            Paragraph(f"<b>FECHA:</b> {datetime.now().strftime('%d/%m/%Y')}", ParagraphStyle('FD', parent=self.value_style, alignment=TA_RIGHT)),
+            Paragraph(f"<b>FECHA:</b> {(printed_on or datetime.now()).strftime('%d/%m/%Y')}", self.date_style),
         ]
 
         # 3. Create Table
@@ -166,13 +134,29 @@ class PDFService:
         ])))
         elements.append(Spacer(1, 15))
 
-    def generate_invoice(self, sale, company=None):
+    def _build(self, build_elements, documents, company, logo, printed_on):
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
         elements = []
+        for index, document in enumerate(documents):
+            if index:
+                elements.append(PageBreak())
+            build_elements(doc, elements, document, company, logo, printed_on)
+        doc.build(elements)
+        buffer.seek(0)
+        return buffer
+
+    def generate_batch(self, kind, documents, company=None, logo=None, printed_on=None):
+        """Render several documents of one kind into a single PDF, one per page break."""
+        build_elements = getattr(self, DOCUMENT_ELEMENTS[kind])
+        return self._build(build_elements, documents, company, logo, printed_on)
+
+    def generate_invoice(self, sale, company=None, logo=None, printed_on=None):
+        return self._build(self._invoice_elements, [sale], company, logo, printed_on)
 
+    def _invoice_elements(self, doc, elements, sale, company, logo, printed_on):
         # 1. Header
-        self._add_header(doc, elements, company, "FACTURA DE VENTA", str(sale.id).split('-')[0].upper())
+        self._add_header(doc, elements, company, "FACTURA DE VENTA", str(sale.id).split('-')[0].upper(), logo, printed_on)
 
         # 2. Client & Details Info (Side by Side)
         client_name = sale.client.name.upper() if sale.client else 'CONSUMIDOR FINAL'
@@ -185,7 +169,7 @@ class PDFService:
             [
                 [
                     Paragraph("FACTURAR A:", self.label_style),
-                    Paragraph(client_name, ParagraphStyle('CN', parent=self.value_style, fontSize=10, fontName='Helvetica-Bold')),
+                    Paragraph(client_name, self.client_name_style),
                     Paragraph(client_address, self.value_style),
                     Paragraph(f"Tel: {client_phone}", self.value_style),
                     Paragraph(f"Email: {client_email}", self.value_style),
@@ -208,10 +192,10 @@ class PDFService:
 
         # 3. Items Table
         headers = [
-            Paragraph('<b>ITEM / DESCRIPCIÓN</b>', ParagraphStyle('TH', fontSize=8, textColor=colors.white)), 
-            Paragraph('<b>CANT.</b>', ParagraphStyle('TH_C', fontSize=8, textColor=colors.white, alignment=TA_CENTER)), 
-            Paragraph('<b>PRECIO UNIT.</b>', ParagraphStyle('TH_R', fontSize=8, textColor=colors.white, alignment=TA_RIGHT)), 
-            Paragraph('<b>TOTAL</b>', ParagraphStyle('TH_R2', fontSize=8, textColor=colors.white, alignment=TA_RIGHT))
+            Paragraph('<b>ITEM / DESCRIPCIÓN</b>', self.th_style), 
+            Paragraph('<b>CANT.</b>', self.th_center_style), 
+            Paragraph('<b>PRECIO UNIT.</b>', self.th_right_style), 
+            Paragraph('<b>TOTAL</b>', self.th_right_style)
         ]
         
         data = [headers]
@@ -225,16 +209,16 @@ class PDFService:
             
             data.append([
                 Paragraph(desc, self.value_style),
-                Paragraph(str(item.quantity), ParagraphStyle('TD_C', parent=self.value_style, alignment=TA_CENTER)),
-                Paragraph(f"${item.price:,.2f}", ParagraphStyle('TD_R', parent=self.value_style, alignment=TA_RIGHT)),
-                Paragraph(f"${item.total:,.2f}", ParagraphStyle('TD_R', parent=self.value_style, alignment=TA_RIGHT))
+                Paragraph(str(item.quantity), self.cell_center_style),
+                Paragraph(f"${item.price:,.2f}", self.cell_right_style),
+                Paragraph(f"${item.total:,.2f}", self.cell_right_style)
             ])
         
         # Summary
-        data.append(['', '', Paragraph('<b>SUBTOTAL</b>', self.label_style), Paragraph(f"${sale.subtotal:,.2f}", ParagraphStyle('S_R', alignment=TA_RIGHT, fontSize=9))])
-        data.append(['', '', Paragraph('<b>IMPUESTOS</b>', self.label_style), Paragraph(f"${sale.tax:,.2f}", ParagraphStyle('S_R', alignment=TA_RIGHT, fontSize=9))])
-        data.append(['', '', Paragraph('<b>TOTAL</b>', ParagraphStyle('T_B', fontSize=10, fontName='Helvetica-Bold', textColor=self.primary_color)), 
-                     Paragraph(f"${sale.total:,.2f}", ParagraphStyle('T_V', fontSize=10, fontName='Helvetica-Bold', alignment=TA_RIGHT, textColor=self.primary_color))])
+        data.append(['', '', Paragraph('<b>SUBTOTAL</b>', self.label_style), Paragraph(f"${sale.subtotal:,.2f}", self.summary_value_style)])
+        data.append(['', '', Paragraph('<b>IMPUESTOS</b>', self.label_style), Paragraph(f"${sale.tax:,.2f}", self.summary_value_style)])
+        data.append(['', '', Paragraph('<b>TOTAL</b>', self.total_label_style), 
+                     Paragraph(f"${sale.total:,.2f}", self.total_value_style)])
 
         col_widths = [doc.width*0.5, doc.width*0.15, doc.width*0.15, doc.width*0.2]
         table = Table(data, colWidths=col_widths)
@@ -272,17 +256,13 @@ class PDFService:
 
         footer_text = "Gracias por su compra. Documento generado por Lumefy SaaS."
         elements.append(Spacer(1, 20))
-        elements.append(Paragraph(footer_text, ParagraphStyle('Footer', parent=self.value_style, alignment=TA_CENTER, textColor=colors.grey, fontSize=8)))
+        elements.append(Paragraph(footer_text, self.footer_style))
 
-        doc.build(elements)
-        buffer.seek(0)
-        return buffer
+    def generate_picking(self, sale, company=None, logo=None, printed_on=None):
+        return self._build(self._picking_elements, [sale], company, logo, printed_on)
 
-    def generate_picking(self, sale, company=None):
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
-        elements = []
-        self._add_header(doc, elements, company, "LISTA DE PICKING", str(sale.id).split('-')[0].upper())
+    def _picking_elements(self, doc, elements, sale, company, logo, printed_on):
+        self._add_header(doc, elements, company, "LISTA DE PICKING", str(sale.id).split('-')[0].upper(), logo, printed_on)
 
         headers = ['UBICACIÓN', 'SKU', 'PRODUCTO', 'REQ', 'CHECK']
         data = [headers]
@@ -308,18 +288,15 @@ class PDFService:
         
         t.setStyle(TableStyle(style))
         elements.append(t)
-        doc.build(elements)
-        buffer.seek(0)
-        return buffer
 
-    def generate_packing(self, sale, company=None):
-        return self.generate_picking(sale, company) # Re-use for now, upgrade later if needed
+    def generate_packing(self, sale, company=None, logo=None, printed_on=None):
+        return self.generate_picking(sale, company, logo, printed_on) # Re-use for now, upgrade later if needed
 
-    def generate_purchase_order(self, purchase, company=None):
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
-        elements = []
-        self._add_header(doc, elements, company, "ORDEN DE COMPRA", str(purchase.id).split('-')[0].upper())
+    def generate_purchase_order(self, purchase, company=None, logo=None, printed_on=None):
+        return self._build(self._purchase_order_elements, [purchase], company, logo, printed_on)
+
+    def _purchase_order_elements(self, doc, elements, purchase, company, logo, printed_on):
+        self._add_header(doc, elements, company, "ORDEN DE COMPRA", str(purchase.id).split('-')[0].upper(), logo, printed_on)
 
         # Supplier Info
         supp = purchase.supplier
@@ -375,7 +352,52 @@ class PDFService:
         
         t.setStyle(TableStyle(style))
         elements.append(t)
-        doc.build(elements)
-        buffer.seek(0)
-        return buffer
 
+
+DOCUMENT_GENERATORS = {
+    "invoice": "generate_invoice",
+    "picking": "generate_picking",
+    "packing": "generate_packing",
+    "purchase_order": "generate_purchase_order",
+}
+DOCUMENT_ELEMENTS = {
+    "invoice": "_invoice_elements",
+    "picking": "_picking_elements",
+    "packing": "_picking_elements",
+    "purchase_order": "_purchase_order_elements",
+}
+_service = None
+
+
+def _as_namespace(value):
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _as_namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_as_namespace(item) for item in value]
+    return value
+
+
+def _get_service():
+    global _service
+    if _service is None:
+        _service = PDFService()
+    return _service
+
+
+def render_document(kind, document, company=None, logo=None, printed_on=None):
+    """Render a document snapshot (plain dicts) to PDF bytes.
+
+    Entry point for the rendering processes: arguments are picklable and the
+    service, with its paragraph styles, is built once per process.
+    """
+    generate = getattr(_get_service(), DOCUMENT_GENERATORS[kind])
+    buffer = generate(_as_namespace(document), _as_namespace(company), logo, printed_on)
+    return buffer.getvalue()
+
+
+def render_combined(kind, documents, company=None, logo=None, printed_on=None):
+    """Render several snapshots of one kind as a single PDF, e.g. a picking wave."""
+    buffer = _get_service().generate_batch(
+        kind, [_as_namespace(document) for document in documents], _as_namespace(company), logo, printed_on
+    )
+    return buffer.getvalue()
@@ -0,0 +1,250 @@
+"""
+Effective selling prices, materialized in ``effective_prices``.
+
+A product without variants sells at ``Product.price``; a variant at its own
+``price`` (set by integrations) or at ``Product.price + price_extra``. A
+storefront's ``price_override`` or an active sale price list's unit price
+replaces the product price and keeps each variant's difference from it.
+:func:`list_price` and :func:`channel_price` define this for one row and
+:func:`refresh_prices_statements` for many, in SQL; the two must agree.
+
+One row is kept per product or variant and channel: the base channel (POS
+and sales), every publication of the product and every active sale price
+list with a unit price for it. The session collects the products whose
+prices, variants, publications or price list items a flush changes and
+recomputes their rows right before committing, in the same transaction;
+bulk statements call :func:`mark_prices_stale`. Deleted products, variants,
+publications and price lists take their rows with them (``ON DELETE
+CASCADE``).
+"""
+import uuid
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import case, delete, event, exists, func, inspect, null, or_, select, union_all
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import discard_on_rollback, distinct_on
+from app.models.effective_price import EffectivePrice
+from app.models.pricelist import PriceList, PriceListType
+from app.models.pricelist_item import PriceListItem
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.storefront import PublishedProduct
+
+_SESSION_PRODUCTS = "effective_price_products"
+_SESSION_PRICELISTS = "effective_price_pricelists"
+# Products recomputed per statement, well below the bind parameter limit.
+REFRESH_BATCH = 5000
+# Columns whose changes move a price, per model; the products are found
+# through ``product_id`` (``id`` for products).
+_PRICE_FIELDS = {
+    Product: ("price",),
+    ProductVariant: ("price", "price_extra", "product_id"),
+    PublishedProduct: ("price_override", "product_id"),
+    PriceListItem: ("price", "min_quantity", "product_id", "pricelist_id"),
+}
+_KEY = ("product_id", "variant_id", "published_product_id", "pricelist_id")
+
+
+def list_price(product: Any, variant: Any = None) -> float:
+    """Base price of ``variant``, or of ``product`` when it has no variant."""
+    base_price = float(product.price or 0)
+    if variant is None:
+        return base_price
+    if variant.price is not None:
+        return float(variant.price)
+    return base_price + float(variant.price_extra or 0)
+
+
+def channel_price(product: Any, variant: Any, fixed_price: Optional[float]) -> float:
+    """Price under a storefront override or price list price replacing ``product.price``."""
+    price = list_price(product, variant)
+    if fixed_price is None:
+        return price
+    base_price = float(product.price or 0)
+    return float(fixed_price) + (price - base_price) if base_price else float(fixed_price)
+
+
+def mark_prices_stale(db: AsyncSession | Session, product_ids: Iterable[uuid.UUID]) -> None:
+    """Recompute the effective prices of ``product_ids`` when ``db`` commits."""
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    session.info.setdefault(_SESSION_PRODUCTS, set()).update(
+        product_id for product_id in product_ids if product_id
+    )
+
+
+def refresh_prices_statements(product_ids: list[uuid.UUID]) -> tuple[Any, Any]:
+    """DELETE of the rows ``product_ids`` no longer have and upsert of their current ones."""
+    base = func.coalesce(Product.price, 0.0)
+    priced = (
+        select(
+            Product.id.label("product_id"),
+            ProductVariant.id.label("variant_id"),
+            base.label("base"),
+            case(
+                (ProductVariant.id.is_(None), base),
+                (ProductVariant.price.isnot(None), ProductVariant.price),
+                else_=base + func.coalesce(ProductVariant.price_extra, 0.0),
+            ).label("price"),
+        )
+        .outerjoin(ProductVariant, ProductVariant.product_id == Product.id)
+        .where(Product.id.in_(product_ids))
+        .cte("priced")
+    )
+
+    def fixed(price):
+        return case(
+            (price.is_(None), priced.c.price),
+            (priced.c.base != 0, price + priced.c.price - priced.c.base),
+            else_=price,
+        )
+
+    no_id = null().cast(UUID(as_uuid=True))
+    # The unit price of each active sale price list: its item with the
+    # largest minimum quantity up to one.
+    unit_items = distinct_on(
+        select(PriceListItem.pricelist_id, PriceListItem.product_id, PriceListItem.price)
+        .join(PriceList, PriceList.id == PriceListItem.pricelist_id)
+        .where(
+            PriceListItem.product_id.in_(product_ids),
+            PriceList.active.is_(True),
+            PriceList.type == PriceListType.SALE,
+            func.coalesce(PriceListItem.min_quantity, 0) <= 1,
+        ),
+        PriceListItem.pricelist_id,
+        PriceListItem.product_id,
+    ).order_by(
+        PriceListItem.pricelist_id,
+        PriceListItem.product_id,
+        func.coalesce(PriceListItem.min_quantity, 0).desc(),
+        PriceListItem.price.asc(),
+    ).subquery("unit_items")
+    current = union_all(
+        select(
+            priced.c.product_id,
+            priced.c.variant_id,
+            no_id.label("published_product_id"),
+            no_id.label("pricelist_id"),
+            priced.c.price,
+        ),
+        select(priced.c.product_id, priced.c.variant_id, PublishedProduct.id, no_id, fixed(PublishedProduct.price_override))
+        .join(PublishedProduct, PublishedProduct.product_id == priced.c.product_id),
+        select(priced.c.product_id, priced.c.variant_id, no_id, unit_items.c.pricelist_id, fixed(unit_items.c.price))
+        .join(unit_items, unit_items.c.product_id == priced.c.product_id),
+    ).subquery("current_prices")
+
+    table = EffectivePrice.__table__
+    obsolete = delete(table).where(
+        table.c.product_id.in_(product_ids),
+        ~exists().where(*(current.c[key].is_not_distinct_from(table.c[key]) for key in _KEY)),
+    )
+    statement = insert(table).from_select([*_KEY, "price"], select(current))
+    upsert = statement.on_conflict_do_update(
+        index_elements=list(_KEY),
+        set_={"price": statement.excluded.price},
+        where=table.c.price.is_distinct_from(statement.excluded.price),
+    )
+    return obsolete, upsert
+
+
+def _changed_products(instance: Any, fields: tuple[str, ...]) -> set:
+    state = inspect(instance)
+    if not any(state.attrs[field].history.has_changes() for field in fields):
+        return set()
+    if isinstance(instance, Product):
+        return {instance.id}
+    history = state.attrs.product_id.history
+    return {instance.product_id, *history.deleted} - {None}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_priced_products(session: Session, _flush_context) -> None:
+    product_ids = set()
+    for instance in (*session.new, *session.deleted):
+        if isinstance(instance, Product):
+            product_ids.add(instance.id)
+        elif type(instance) in _PRICE_FIELDS and instance.product_id:
+            product_ids.add(instance.product_id)
+    pricelist_ids = set()
+    for instance in session.dirty:
+        fields = _PRICE_FIELDS.get(type(instance))
+        if fields:
+            product_ids |= _changed_products(instance, fields)
+        elif isinstance(instance, PriceList) and any(
+            inspect(instance).attrs[field].history.has_changes() for field in ("active", "type")
+        ):
+            pricelist_ids.add(instance.id)
+    if product_ids:
+        mark_prices_stale(session, product_ids)
+    if pricelist_ids:
+        session.info.setdefault(_SESSION_PRICELISTS, set()).update(pricelist_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_effective_prices(session: Session) -> None:
+    session.flush()
+    product_ids = session.info.pop(_SESSION_PRODUCTS, set())
+    pricelist_ids = session.info.pop(_SESSION_PRICELISTS, None)
+    if pricelist_ids:
+        product_ids |= set(session.execute(
+            select(PriceListItem.product_id).where(PriceListItem.pricelist_id.in_(pricelist_ids))
+        ).scalars().all())
+    ordered = sorted(product_ids)
+    for start in range(0, len(ordered), REFRESH_BATCH):
+        for statement in refresh_prices_statements(ordered[start:start + REFRESH_BATCH]):
+            session.execute(statement)
+
+
+discard_on_rollback(_SESSION_PRODUCTS, _SESSION_PRICELISTS)
+
+
+async def product_prices(
+    db: AsyncSession,
+    product_ids: Iterable[uuid.UUID],
+    *,
+    pricelist_id: Optional[uuid.UUID] = None,
+) -> dict[tuple[uuid.UUID, Optional[uuid.UUID]], float]:
+    """Prices by ``(product_id, variant_id)``; those of ``pricelist_id`` win over the base ones."""
+    product_ids = list(set(product_ids))
+    if not product_ids:
+        return {}
+    channel = EffectivePrice.pricelist_id.is_(None)
+    if pricelist_id is not None:
+        channel = or_(channel, EffectivePrice.pricelist_id == pricelist_id)
+    rows = (await db.execute(
+        select(EffectivePrice.product_id, EffectivePrice.variant_id, EffectivePrice.price)
+        .where(
+            EffectivePrice.product_id.in_(product_ids),
+            EffectivePrice.published_product_id.is_(None),
+            channel,
+        )
+        .order_by(EffectivePrice.pricelist_id.nulls_first())
+    )).all()
+    return {(product_id, variant_id): price for product_id, variant_id, price in rows}
+
+
+async def published_prices(
+    db: AsyncSession,
+    published_ids: Iterable[uuid.UUID],
+) -> dict[tuple[uuid.UUID, Optional[uuid.UUID]], float]:
+    """Storefront prices by ``(published_product_id, variant_id)``."""
+    published_ids = list(set(published_ids))
+    if not published_ids:
+        return {}
+    rows = (await db.execute(
+        select(EffectivePrice.published_product_id, EffectivePrice.variant_id, EffectivePrice.price)
+        .where(EffectivePrice.published_product_id.in_(published_ids))
+    )).all()
+    return {(published_id, variant_id): price for published_id, variant_id, price in rows}
+
+
+def starting_price():
+    """Lowest storefront price of the correlated ``PublishedProduct``, for catalog queries."""
+    return (
+        select(func.min(EffectivePrice.price))
+        .where(EffectivePrice.published_product_id == PublishedProduct.id)
+        .correlate(PublishedProduct)
+        .scalar_subquery()
+    )
@@ -0,0 +1,186 @@
+"""Set-based changes to the prices and attributes of many products.
+
+``bulk_update_products`` selects the matching product ids once and changes
+them ``BULK_UPDATE_BATCH`` at a time with one ``UPDATE`` per table, computing
+percentages, deltas and rounding in SQL. The whole operation is one
+transaction with one audit entry and one ``products.bulk_updated`` outbox
+event; the caches and derived data the statements bypass (effective prices,
+list totals, inventory valuation, storefront catalogs) are marked once.
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+from sqlalchemy import Float, Numeric, case, cast, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.audit import log_activity
+from app.core.cache import mark_stale
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.storefront import PublishedProduct
+from app.schemas.product import PriceExpression, ProductBulkChanges
+from app.services.inventory_snapshots import VALUATION_FIELDS, mark_branch_totals_stale
+from app.services.outbox import enqueue_outbox_event
+from app.services.pricing import mark_prices_stale
+from app.services.product_listing import mark_totals_stale
+from app.services.reference_cache import CATALOG, storefront_content_tags
+
+# Products changed per statement.
+BULK_UPDATE_BATCH = 1000
+BULK_UPDATED_EVENT = "products.bulk_updated"
+_ROUNDING = {"nearest": func.round, "up": func.ceil, "down": func.floor}
+# Product fields the request sets to a plain value.
+_PRODUCT_VALUES = ("tax_rate", "category_id", "brand_id", "sale_ok", "purchase_ok")
+_PRICE_FIELDS = {"price", "variant_price", "price_extra"}
+
+
+@dataclass
+class BulkUpdateResult:
+    matched: int = 0
+    products_updated: int = 0
+    variants_updated: int = 0
+    not_found: list[uuid.UUID] = field(default_factory=list)
+
+
+def expression_value(column: Any, expression: PriceExpression, *, allow_negative: bool = False) -> Any:
+    """SQL for ``column``'s new value under ``expression``."""
+    current = func.coalesce(column, 0.0)
+    if expression.mode == "percent":
+        value = current * (1 + expression.value / 100)
+    elif expression.mode == "delta":
+        value = current + expression.value
+    else:
+        value = literal(expression.value, Float)
+    if expression.round_to:
+        # Numeric, so steps such as 0.01 do not leave binary fractions behind.
+        step = literal(Decimal(str(expression.round_to)), Numeric)
+        value = _ROUNDING[expression.rounding](cast(value, Numeric) / step) * step
+    if not allow_negative:
+        value = func.greatest(value, 0)
+    return cast(value, Float)
+
+
+def product_assignments(changes: ProductBulkChanges) -> dict[str, Any]:
+    assignments = {
+        name: getattr(changes, name)
+        for name in _PRODUCT_VALUES
+        if getattr(changes, name) is not None
+    }
+    for name in ("price", "cost"):
+        expression = getattr(changes, name)
+        if expression is not None:
+            assignments[name] = expression_value(getattr(Product, name), expression)
+    return assignments
+
+
+def variant_assignments(changes: ProductBulkChanges) -> dict[str, Any]:
+    assignments = {}
+    if changes.variant_price is not None:
+        # Variants without their own price keep following the product's.
+        assignments["price"] = case(
+            (ProductVariant.price.is_(None), None),
+            else_=expression_value(ProductVariant.price, changes.variant_price),
+        )
+    if changes.price_extra is not None:
+        # A negative extra is a cheaper variant.
+        assignments["price_extra"] = expression_value(
+            ProductVariant.price_extra, changes.price_extra, allow_negative=True
+        )
+    return assignments
+
+
+async def bulk_update_products(
+    db: AsyncSession,
+    *,
+    company_id: uuid.UUID,
+    user_id: Optional[uuid.UUID],
+    conditions: list[Any],
+    changes: ProductBulkChanges,
+    selection: dict[str, Any],
+    requested_ids: Optional[list[uuid.UUID]] = None,
+) -> BulkUpdateResult:
+    """Apply ``changes`` to the company's products matching ``conditions``, without committing.
+
+    ``selection`` (the requested ids or filters) is recorded in the audit
+    entry and the outbox event; ``requested_ids`` not matched are reported
+    in ``not_found``.
+    """
+    product_ids = (await db.execute(
+        select(Product.id).where(Product.company_id == company_id, *conditions).order_by(Product.id)
+    )).scalars().all()
+    matched = set(product_ids)
+    result = BulkUpdateResult(
+        matched=len(product_ids),
+        not_found=list(dict.fromkeys(pid for pid in requested_ids or [] if pid not in matched)),
+    )
+    if not product_ids:
+        return result
+
+    now = datetime.utcnow()
+    product_values = product_assignments(changes)
+    variant_values = variant_assignments(changes)
+    storefront_ids: set[uuid.UUID] = set()
+    for start in range(0, len(product_ids), BULK_UPDATE_BATCH):
+        batch = product_ids[start:start + BULK_UPDATE_BATCH]
+        if product_values:
+            updated = await db.execute(
+                update(Product)
+                .where(Product.id.in_(batch))
+                .values(**product_values, updated_at=now, updated_by_id=user_id)
+                .returning(Product.id)
+            )
+            result.products_updated += len(updated.all())
+        if variant_values:
+            updated = await db.execute(
+                update(ProductVariant)
+                .where(ProductVariant.product_id.in_(batch))
+                .values(**variant_values, updated_at=now, updated_by_id=user_id)
+                .returning(ProductVariant.id)
+            )
+            result.variants_updated += len(updated.all())
+        storefront_ids.update((await db.execute(
+            select(PublishedProduct.storefront_id)
+            .where(PublishedProduct.product_id.in_(batch))
+            .distinct()
+        )).scalars().all())
+
+    changed = set(changes.model_dump(exclude_none=True))
+    # Core statements bypass the session hooks.
+    if changed & _PRICE_FIELDS:
+        mark_prices_stale(db, product_ids)
+    if changed & set(VALUATION_FIELDS):
+        mark_branch_totals_stale(db, company_id)
+    if changed & {"category_id", "brand_id"}:
+        mark_totals_stale(db, company_id)
+    for storefront_id in storefront_ids:
+        mark_stale(db, *storefront_content_tags(storefront_id, CATALOG))
+
+    details = {
+        "bulk": True,
+        **selection,
+        "changes": changes.model_dump(mode="json", exclude_none=True),
+        "matched": result.matched,
+        "products_updated": result.products_updated,
+        "variants_updated": result.variants_updated,
+    }
+    await log_activity(
+        db,
+        action="BULK_UPDATE",
+        entity_type="Product",
+        entity_id=company_id,
+        user_id=user_id,
+        company_id=company_id,
+        details=details,
+    )
+    enqueue_outbox_event(
+        db,
+        event_type=BULK_UPDATED_EVENT,
+        aggregate_type="company",
+        aggregate_id=company_id,
+        company_id=company_id,
+        payload={**details, "company_id": str(company_id)},
+    )
+    return result
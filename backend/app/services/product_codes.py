@@ -0,0 +1,247 @@
+"""SKU and barcode resolution.
+
+Codes are compared the way the indexes store them: SKUs trimmed and without
+case (``lower(trim(sku))``), barcodes trimmed (``trim(barcode)``). Active
+products have a unique SKU per company (``uq_products_company_sku_active``),
+so a uniqueness check is one probe of that index. Variant SKUs and barcodes
+have plain expression indexes.
+
+Scans resolve against a per-company code table held in the reference cache:
+one dictionary from code to product and variant, loaded with two queries and
+invalidated (tag ``company:<id>:product-codes``) by committed changes to a
+product's or variant's codes or state. Companies with more codes than
+``CODE_TABLE_MAX_CODES`` skip the table and probe the indexes instead.
+"""
+import uuid
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import cast, func, literal_column, null, select, union_all
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import mark_stale, reference_cache, tenant_tag
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.services.reference_cache import PRODUCT_CODES
+
+# Above this many codes a company's table costs more to load and ship
+# through Redis than the index probes it saves.
+CODE_TABLE_MAX_CODES = 50000
+
+
+def sku_key(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+def barcode_key(value: Optional[str]) -> str:
+    return (value or "").strip()
+
+
+def sku_expression(column: Any) -> Any:
+    return func.lower(func.trim(column))
+
+
+def barcode_expression(column: Any) -> Any:
+    return func.trim(column)
+
+
+def mark_codes_stale(db: AsyncSession, company_id: Optional[uuid.UUID]) -> None:
+    """Drop the company's code table once ``db`` commits (after bulk statements)."""
+    if company_id:
+        mark_stale(db, tenant_tag(company_id, PRODUCT_CODES))
+
+
+@dataclass(frozen=True)
+class CodeMatch:
+    product_id: uuid.UUID
+    variant_id: Optional[uuid.UUID] = None
+
+
+async def active_sku_owners(
+    db: AsyncSession, company_id: uuid.UUID, skus: Iterable[str]
+) -> dict[str, uuid.UUID]:
+    """Active product holding each SKU (by ``sku_key``) of ``skus``; absent SKUs are left out."""
+    keys = {sku_key(sku) for sku in skus} - {""}
+    if not keys:
+        return {}
+    key = sku_expression(Product.sku)
+    rows = await db.execute(
+        select(key, Product.id).where(
+            Product.company_id == company_id,
+            Product.is_active == True,
+            Product.sku.is_not(None),
+            key.in_(keys),
+        )
+    )
+    return dict(rows.tuples().all())
+
+
+async def active_product_id_for_sku(
+    db: AsyncSession,
+    company_id: uuid.UUID,
+    sku: Optional[str],
+    *,
+    exclude_product_id: Any = None,
+) -> Optional[uuid.UUID]:
+    """The active product holding ``sku``, read from the unique index."""
+    key = sku_key(sku)
+    if not key:
+        return None
+    query = select(Product.id).where(
+        Product.company_id == company_id,
+        Product.is_active == True,
+        Product.sku.is_not(None),
+        sku_expression(Product.sku) == key,
+    )
+    if exclude_product_id:
+        query = query.where(Product.id != exclude_product_id)
+    return await db.scalar(query.limit(1))
+
+
+async def _load_code_table(db: AsyncSession, company_id: uuid.UUID) -> Optional[dict[str, dict[str, list]]]:
+    products = (await db.execute(
+        select(Product.id, Product.sku, Product.barcode)
+        .where(
+            Product.company_id == company_id,
+            Product.is_active == True,
+            (Product.sku.is_not(None)) | (Product.barcode.is_not(None)),
+        )
+        .order_by(Product.created_at.asc(), Product.id.asc())
+        .limit(CODE_TABLE_MAX_CODES + 1)
+    )).all()
+    variants = (await db.execute(
+        select(ProductVariant.id, ProductVariant.product_id, ProductVariant.sku, ProductVariant.barcode)
+        .join(Product, Product.id == ProductVariant.product_id)
+        .where(
+            ProductVariant.company_id == company_id,
+            ProductVariant.is_active == True,
+            Product.is_active == True,
+            (ProductVariant.sku.is_not(None)) | (ProductVariant.barcode.is_not(None)),
+        )
+        .order_by(ProductVariant.created_at.asc(), ProductVariant.id.asc())
+        .limit(CODE_TABLE_MAX_CODES + 1)
+    )).all()
+    if len(products) + len(variants) > CODE_TABLE_MAX_CODES:
+        return None
+
+    table: dict[str, dict[str, list]] = {"sku": {}, "barcode": {}}
+    # Products first, oldest first: setdefault keeps the first holder of a code.
+    entries = [(product_id, None, sku, barcode) for product_id, sku, barcode in products]
+    entries += [(product_id, variant_id, sku, barcode) for variant_id, product_id, sku, barcode in variants]
+    for product_id, variant_id, sku, barcode in entries:
+        target = [str(product_id), str(variant_id) if variant_id else None]
+        if sku_key(sku):
+            table["sku"].setdefault(sku_key(sku), target)
+        if barcode_key(barcode):
+            table["barcode"].setdefault(barcode_key(barcode), target)
+    return table
+
+
+async def code_table(db: AsyncSession, company_id: uuid.UUID) -> Optional[dict[str, dict[str, list]]]:
+    """The company's codes as ``{"sku": {...}, "barcode": {...}}``, or ``None`` above the size limit."""
+    return await reference_cache.get_or_load(
+        f"product-codes:{company_id}",
+        [tenant_tag(company_id, PRODUCT_CODES)],
+        lambda: _load_code_table(db, company_id),
+    )
+
+
+async def _probe_code(db: AsyncSession, company_id: uuid.UUID, code: str) -> Optional[CodeMatch]:
+    """The code table's lookup as one statement of four index probes, in ``resolve_code``'s order."""
+    def product_probe(condition: Any) -> Any:
+        return (
+            select(Product.id.label("product_id"), cast(null(), UUID(as_uuid=True)).label("variant_id"))
+            .where(Product.company_id == company_id, Product.is_active == True, condition)
+            .order_by(Product.created_at.asc(), Product.id.asc())
+        )
+
+    def variant_probe(condition: Any) -> Any:
+        return (
+            select(ProductVariant.product_id, ProductVariant.id.label("variant_id"))
+            .join(Product, Product.id == ProductVariant.product_id)
+            .where(
+                ProductVariant.company_id == company_id,
+                ProductVariant.is_active == True,
+                Product.is_active == True,
+                condition,
+            )
+            .order_by(ProductVariant.created_at.asc(), ProductVariant.id.asc())
+        )
+
+    probes = [
+        product_probe(barcode_expression(Product.barcode) == barcode_key(code)),
+        variant_probe(barcode_expression(ProductVariant.barcode) == barcode_key(code)),
+        product_probe(sku_expression(Product.sku) == sku_key(code)),
+        variant_probe(sku_expression(ProductVariant.sku) == sku_key(code)),
+    ]
+    combined = union_all(*(
+        probe.add_columns(literal_column(str(rank)).label("rank")).limit(1).subquery().select()
+        for rank, probe in enumerate(probes)
+    )).subquery()
+    row = (await db.execute(
+        select(combined.c.product_id, combined.c.variant_id).order_by(combined.c.rank).limit(1)
+    )).first()
+    return CodeMatch(row.product_id, row.variant_id) if row else None
+
+
+async def resolve_code(db: AsyncSession, company_id: uuid.UUID, code: Optional[str]) -> Optional[CodeMatch]:
+    """Product, and variant when the code is a variant's, scanned or typed as ``code``.
+
+    Barcodes win over SKUs; for the same kind of code, products win over
+    variants and older rows over newer ones.
+    """
+    if not barcode_key(code):
+        return None
+    table = await code_table(db, company_id)
+    if table is None:
+        return await _probe_code(db, company_id, code)
+    hit = table["barcode"].get(barcode_key(code)) or table["sku"].get(sku_key(code))
+    if not hit:
+        return None
+    product_id, variant_id = hit
+    return CodeMatch(uuid.UUID(product_id), uuid.UUID(variant_id) if variant_id else None)
+
+
+async def product_for_sku(
+    db: AsyncSession, company_id: uuid.UUID, sku: Optional[str], *, include_archived: bool = False
+) -> Optional[Product]:
+    """The active product holding ``sku``; with ``include_archived``, else an archived one with that exact SKU.
+
+    Reads the session (autoflush included), not the code table, so products
+    added earlier in the same transaction are found.
+    """
+    product_id = await active_product_id_for_sku(db, company_id, sku)
+    if product_id:
+        return await db.get(Product, product_id)
+    if not include_archived or not sku_key(sku):
+        return None
+    return (await db.execute(
+        select(Product)
+        .where(Product.company_id == company_id, Product.sku == sku.strip())
+        .order_by(Product.updated_at.desc())
+        .limit(1)
+    )).scalars().first()
+
+
+async def variant_for_sku(
+    db: AsyncSession,
+    company_id: uuid.UUID,
+    sku: Optional[str],
+    *,
+    product_id: Optional[uuid.UUID] = None,
+) -> Optional[ProductVariant]:
+    """A variant holding ``sku`` in the company, or in ``product_id`` when given."""
+    key = sku_key(sku)
+    if not key:
+        return None
+    query = select(ProductVariant).where(
+        ProductVariant.company_id == company_id,
+        ProductVariant.sku.is_not(None),
+        sku_expression(ProductVariant.sku) == key,
+    )
+    if product_id:
+        query = query.where(ProductVariant.product_id == product_id)
+    return (await db.execute(
+        query.order_by(ProductVariant.is_active.desc(), ProductVariant.created_at.asc()).limit(1)
+    )).scalars().first()
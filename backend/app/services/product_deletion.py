@@ -0,0 +1,435 @@
+"""
+Background bulk product deletion.
+
+``request_deletion`` queues a ``ProductDeletionJob``; the product deletion
+worker runs it with ``run_deletion_job``, visiting the job's products by id
+``BATCH_PRODUCTS`` at a time. Each batch runs in its own short transaction:
+
+* one query (``find_delete_blockers``) tells which products are referenced
+  by business history, with an ``EXISTS`` per relation instead of a
+  ``DISTINCT`` scan per relation;
+* products without blockers lose their images, variants and rows with one
+  ``DELETE`` per table; blocked products are archived with one ``UPDATE``
+  when the job is forced, and reported otherwise;
+* the batch commits together with the job's cursor and counts, so a job
+  interrupted by a restart resumes after its last committed batch.
+
+Provider image files left without references are removed after each
+batch commits, outside its transaction.
+"""
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import delete, exists, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.audit import log_activity
+from app.core.cache import mark_stale
+from app.core.database import SessionLocal
+from app.models.inventory import Inventory
+from app.models.inventory_lot import InventoryLot
+from app.models.inventory_movement import InventoryMovement
+from app.models.invoice import InvoiceItem
+from app.models.manufacturing import BillOfMaterials, BillOfMaterialsLine
+from app.models.notification import Notification
+from app.models.pricelist_item import PriceListItem
+from app.models.procurement import PurchaseRequestItem, SupplierQuoteItem
+from app.models.product import Product
+from app.models.product_deletion_job import ProductDeletionJob
+from app.models.product_image import ProductImage
+from app.models.product_variant import ProductVariant
+from app.models.purchase_item import PurchaseOrderItem
+from app.models.return_order import ReturnOrderItem
+from app.models.sale import SaleItem
+from app.models.stock_take import StockTakeItem
+from app.models.storefront import PublishedProduct, StoreCollectionProduct
+from app.models.user import User
+from app.services.integration_service import prune_orphaned_local_assets, remove_unreferenced_local_assets
+from app.services.asset_store import mark_asset_refs_stale
+from app.services.inventory_snapshots import mark_branch_totals_stale
+from app.services.live_counters import mark_counters_stale
+from app.services.product_codes import mark_codes_stale
+from app.services.product_listing import mark_totals_stale
+from app.services.reference_cache import CATALOG, storefront_content_tags
+
+LOGGER = logging.getLogger("lumefy.product_deletion")
+BATCH_PRODUCTS = 200
+# Blocked products kept in the summary; the rest are only counted.
+MAX_REPORTED_BLOCKED = 500
+
+PUBLISHED_REASON = "Está publicado en ecommerce"
+DATABASE_REASON = "Tiene una relación protegida por la base de datos"
+
+# A product is historical data once another business document points to it.  These
+# checks keep the bulk operation useful (safe products are still removed) while
+# protecting sales, inventory and accounting history from accidental deletion.
+PRODUCT_DELETE_RELATIONS = (
+    ("Tiene una orden o venta asociada", SaleItem.product_id),
+    ("Tiene una factura asociada", InvoiceItem.product_id),
+    ("Tiene existencias registradas", Inventory.product_id),
+    ("Tiene lotes de inventario registrados", InventoryLot.product_id),
+    ("Tiene movimientos de inventario registrados", InventoryMovement.product_id),
+    ("Tiene una orden de compra asociada", PurchaseOrderItem.product_id),
+    ("Tiene una solicitud de compra asociada", PurchaseRequestItem.product_id),
+    ("Tiene una cotización de proveedor asociada", SupplierQuoteItem.product_id),
+    ("Tiene una devolución asociada", ReturnOrderItem.product_id),
+    ("Tiene una lista de precios asociada", PriceListItem.product_id),
+    ("Tiene un conteo de inventario asociado", StockTakeItem.product_id),
+    (PUBLISHED_REASON, PublishedProduct.product_id),
+    ("Está usado como producto terminado en fabricación", BillOfMaterials.product_id),
+    ("Está usado como componente en fabricación", BillOfMaterialsLine.component_id),
+)
+
+
+async def find_delete_blockers(db: AsyncSession, product_ids: list[Any]) -> dict[Any, list[str]]:
+    """Return the historical relations that make each product undeletable.
+
+    One query answers every relation with an ``EXISTS`` probe per product,
+    which the foreign key indexes turn into index lookups.
+    """
+    blockers: dict[Any, list[str]] = {product_id: [] for product_id in product_ids}
+    if not product_ids:
+        return blockers
+    probes = [
+        exists().where(column == Product.id).label(f"r{position}")
+        for position, (_, column) in enumerate(PRODUCT_DELETE_RELATIONS)
+    ]
+    result = await db.execute(select(Product.id, *probes).where(Product.id.in_(product_ids)))
+    for row in result.all():
+        blockers[row[0]] = [
+            reason for (reason, _), blocked in zip(PRODUCT_DELETE_RELATIONS, row[1:]) if blocked
+        ]
+    return blockers
+
+
+def delete_blocker_detail(name: str, reasons: list[str]) -> str:
+    return (
+        f"No se puede eliminar '{name}' porque {', '.join(reasons).lower()}. "
+        "Primero elimina o desvincula esas relaciones."
+    )
+
+
+def _mark_storefronts_stale(db: AsyncSession, storefront_ids: Iterable[Any]) -> None:
+    for storefront_id in set(storefront_ids):
+        mark_stale(db, *storefront_content_tags(storefront_id, CATALOG))
+
+
+async def remove_ecommerce_publications(db: AsyncSession, *, company_id: Any, product_ids: list[Any]) -> None:
+    """Remove non-historical ecommerce rows before permanently deleting products."""
+    if not product_ids:
+        return
+    published = (await db.execute(
+        select(PublishedProduct.id, PublishedProduct.storefront_id).where(
+            PublishedProduct.company_id == company_id,
+            PublishedProduct.product_id.in_(product_ids),
+        )
+    )).all()
+    if not published:
+        return
+    published_ids = [published_id for published_id, _ in published]
+    # Collection rows point to the publication, not directly to the product.
+    # Delete them first because this relationship is not database-cascading in
+    # every deployed schema.
+    await db.execute(
+        delete(StoreCollectionProduct).where(StoreCollectionProduct.published_product_id.in_(published_ids))
+    )
+    await db.execute(delete(PublishedProduct).where(PublishedProduct.id.in_(published_ids)))
+    _mark_storefronts_stale(db, (storefront_id for _, storefront_id in published))
+
+
+async def purge_inventory_records(db: AsyncSession, *, company_id: Any, product_ids: list[Any]) -> None:
+    """Delete inventory state and inventory audit rows for archived products."""
+    if not product_ids:
+        return
+    # Stock-take lines, lots, movements and current balances all reference the
+    # product directly. They must be removed before deleting its variants and
+    # the product itself.
+    for model in (StockTakeItem, InventoryLot, InventoryMovement, Inventory):
+        await db.execute(delete(model).where(model.company_id == company_id, model.product_id.in_(product_ids)))
+    mark_branch_totals_stale(db, company_id)
+
+
+def candidate_conditions(job: ProductDeletionJob) -> list[Any]:
+    """Predicates selecting the products the job still has to visit."""
+    params = job.params or {}
+    conditions = [Product.company_id == job.company_id]
+    if job.scope == "catalog":
+        filters = params.get("filters") or {}
+        conditions.append(Product.is_active.is_(True))
+        if filters.get("search"):
+            search_filter = f"%{filters['search']}%"
+            conditions.append(or_(
+                Product.name.ilike(search_filter),
+                Product.sku.ilike(search_filter),
+                Product.barcode.ilike(search_filter),
+                Product.internal_reference.ilike(search_filter),
+            ))
+        for field in ("category_id", "brand_id", "product_type"):
+            if filters.get(field):
+                conditions.append(getattr(Product, field) == filters[field])
+    elif job.scope == "archived":
+        conditions.append(Product.is_active.is_(False))
+    if params.get("product_ids"):
+        conditions.append(Product.id.in_([uuid.UUID(str(value)) for value in params["product_ids"]]))
+    return conditions
+
+
+async def request_deletion(db: AsyncSession, user: User, scope: str, params: dict[str, Any]) -> ProductDeletionJob:
+    job = ProductDeletionJob(
+        company_id=user.company_id,
+        requested_by_user_id=user.id,
+        created_by_id=user.id,
+        scope=scope,
+        params=params,
+        status="QUEUED",
+        attempts=0,
+        processed_products=0,
+        summary={},
+        queued_at=datetime.utcnow(),
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+class DeletionSummary:
+    """Counts and blocked products of a job, stored as ``ProductDeletionJob.summary``."""
+
+    def __init__(self, stored: dict[str, Any] | None = None) -> None:
+        stored = stored or {}
+        self.requested = int(stored.get("requested") or 0)
+        self.deleted = int(stored.get("deleted") or 0)
+        self.archived = int(stored.get("archived") or 0)
+        self.blocked: list[dict[str, Any]] = list(stored.get("blocked") or [])
+        self.blocked_count = int(stored.get("blocked_count") or 0)
+        self.not_found: list[str] = list(stored.get("not_found") or [])
+
+    def block(self, product_id: Any, name: str, reasons: list[str]) -> None:
+        self.blocked_count += 1
+        if len(self.blocked) < MAX_REPORTED_BLOCKED:
+            self.blocked.append({"id": str(product_id), "name": name, "reasons": reasons})
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requested": self.requested,
+            "deleted": self.deleted,
+            "archived": self.archived,
+            "blocked_count": self.blocked_count,
+            "blocked": self.blocked,
+            "not_found": self.not_found,
+        }
+
+
+async def _delete_products(db: AsyncSession, product_ids: list[Any]) -> None:
+    await db.execute(delete(ProductImage).where(ProductImage.product_id.in_(product_ids)))
+    await db.execute(delete(ProductVariant).where(ProductVariant.product_id.in_(product_ids)))
+    await db.execute(delete(Product).where(Product.id.in_(product_ids)))
+
+
+async def _archive_products(db: AsyncSession, company_id: Any, product_ids: list[Any]) -> None:
+    # Historical rows keep their product reference, so sales, invoices and
+    # inventory remain auditable. The product is removed from the active
+    # catalog and every ecommerce channel and cannot be sold again.
+    await db.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids))
+        .values(is_active=False, sale_ok=False, purchase_ok=False)
+    )
+    await db.execute(
+        update(ProductVariant).where(ProductVariant.product_id.in_(product_ids)).values(is_active=False)
+    )
+    storefront_ids = (await db.execute(
+        update(PublishedProduct)
+        .where(PublishedProduct.company_id == company_id, PublishedProduct.product_id.in_(product_ids))
+        .values(is_active=False, is_published=False)
+        .returning(PublishedProduct.storefront_id)
+    )).scalars().all()
+    _mark_storefronts_stale(db, storefront_ids)
+
+
+async def apply_batch(
+    db: AsyncSession,
+    job: ProductDeletionJob,
+    products: list[Any],
+    summary: DeletionSummary,
+) -> set[str]:
+    """Delete or archive one batch of ``(id, name)`` rows without committing.
+
+    Returns the image URLs of the deleted products, for file cleanup once
+    the batch is committed.
+    """
+    params = job.params or {}
+    names = {product_id: name for product_id, name in products}
+    product_ids = list(names)
+    if params.get("purge_inventory"):
+        await purge_inventory_records(db, company_id=job.company_id, product_ids=product_ids)
+    blockers = await find_delete_blockers(db, product_ids)
+    if job.scope == "archived":
+        # An ecommerce publication is catalog metadata, not business history.
+        # It can be removed for products that have no other protected
+        # relation; products still blocked by history keep it.
+        publication_only = [product_id for product_id, reasons in blockers.items() if reasons == [PUBLISHED_REASON]]
+        await remove_ecommerce_publications(db, company_id=job.company_id, product_ids=publication_only)
+        for product_id in publication_only:
+            blockers[product_id] = []
+
+    deletable = [product_id for product_id in product_ids if not blockers.get(product_id)]
+    blocked = [product_id for product_id in product_ids if blockers.get(product_id)]
+    asset_urls: set[str] = set()
+    if deletable:
+        asset_urls = {
+            str(value).strip()
+            for value in [
+                *(await db.execute(select(Product.image_url).where(Product.id.in_(deletable)))).scalars().all(),
+                *(await db.execute(
+                    select(ProductImage.image_url).where(ProductImage.product_id.in_(deletable))
+                )).scalars().all(),
+            ]
+            if value
+        }
+        try:
+            async with db.begin_nested():
+                await _delete_products(db, deletable)
+        except IntegrityError:
+            # A relation the checks above do not know about: retry product by
+            # product so only the affected ones are reported.
+            remaining = []
+            for product_id in deletable:
+                try:
+                    async with db.begin_nested():
+                        await _delete_products(db, [product_id])
+                except IntegrityError:
+                    blockers[product_id] = [DATABASE_REASON]
+                    summary.block(product_id, names[product_id], [DATABASE_REASON])
+                    continue
+                remaining.append(product_id)
+            deletable = remaining
+        for product_id in deletable:
+            await log_activity(
+                db,
+                action="DELETE",
+                entity_type="Product",
+                entity_id=product_id,
+                user_id=job.requested_by_user_id,
+                company_id=job.company_id,
+                details={"bulk": True, "name": names[product_id], "job_id": str(job.id)},
+            )
+        summary.deleted += len(deletable)
+        mark_asset_refs_stale(db, asset_urls)
+
+    if blocked and params.get("force"):
+        await _archive_products(db, job.company_id, blocked)
+        for product_id in blocked:
+            await log_activity(
+                db,
+                action="ARCHIVE",
+                entity_type="Product",
+                entity_id=product_id,
+                user_id=job.requested_by_user_id,
+                company_id=job.company_id,
+                details={"bulk": True, "name": names[product_id], "reason": "force_delete", "job_id": str(job.id)},
+            )
+        summary.archived += len(blocked)
+    else:
+        for product_id in blocked:
+            summary.block(product_id, names[product_id], blockers[product_id])
+    mark_counters_stale(db, job.company_id)
+    mark_codes_stale(db, job.company_id)
+    mark_totals_stale(db, job.company_id)
+    return asset_urls
+
+
+async def _start(db: AsyncSession, job: ProductDeletionJob, summary: DeletionSummary) -> None:
+    conditions = candidate_conditions(job)
+    job.total_products = int(await db.scalar(select(func.count(Product.id)).where(*conditions)) or 0)
+    requested_ids = (job.params or {}).get("product_ids") or []
+    if requested_ids:
+        found = {
+            str(product_id)
+            for product_id in (await db.execute(select(Product.id).where(*conditions))).scalars().all()
+        }
+        summary.requested = len(requested_ids)
+        summary.not_found = [str(value) for value in requested_ids if str(value) not in found]
+    else:
+        summary.requested = job.total_products
+    job.summary = summary.as_dict()
+    await db.commit()
+
+
+async def _finish(db: AsyncSession, job: ProductDeletionJob, status: str, error_message: str | None = None) -> None:
+    job.status = status
+    job.finished_at = datetime.utcnow()
+    job.error_message = error_message
+    if job.requested_by_user_id:
+        summary = job.summary or {}
+        if status == "COMPLETED":
+            notification = Notification(
+                user_id=job.requested_by_user_id,
+                type="warning" if summary.get("blocked_count") else "success",
+                title="Eliminación de productos terminada",
+                message=(
+                    f"{summary.get('deleted', 0)} producto(s) eliminado(s), "
+                    f"{summary.get('archived', 0)} archivado(s) y "
+                    f"{summary.get('blocked_count', 0)} conservado(s)."
+                ),
+            )
+        else:
+            notification = Notification(
+                user_id=job.requested_by_user_id,
+                type="error",
+                title="Eliminación de productos fallida",
+                message=error_message or "La eliminación no pudo completarse.",
+            )
+        db.add(notification)
+    await db.commit()
+
+
+async def run_deletion_job(job_id: uuid.UUID, *, session_factory: Callable[[], Any] = SessionLocal) -> None:
+    """Process a RUNNING job from its cursor and mark it COMPLETED, or FAILED on an unexpected error."""
+    async with session_factory() as db:
+        job = await db.get(ProductDeletionJob, job_id)
+        if not job or job.status != "RUNNING":
+            return
+        try:
+            summary = DeletionSummary(job.summary)
+            if job.total_products is None:
+                await _start(db, job, summary)
+            while True:
+                query = select(Product.id, Product.name).where(*candidate_conditions(job))
+                if job.cursor:
+                    query = query.where(Product.id > job.cursor)
+                products = (await db.execute(query.order_by(Product.id.asc()).limit(BATCH_PRODUCTS))).all()
+                if not products:
+                    break
+                asset_urls = await apply_batch(db, job, products, summary)
+                job.cursor = products[-1][0]
+                job.processed_products += len(products)
+                job.summary = summary.as_dict()
+                await db.commit()
+                if asset_urls:
+                    try:
+                        await remove_unreferenced_local_assets(db, asset_urls)
+                    except Exception:  # noqa: BLE001 - leftover files are pruned when the job ends
+                        LOGGER.exception("Deletion job %s could not remove image files", job_id)
+        except Exception as exc:  # noqa: BLE001 - the failure is recorded on the job for the requester
+            LOGGER.exception("Deletion job %s failed", job_id)
+            await db.rollback()
+            job = await db.get(ProductDeletionJob, job_id)
+            # Committed batches stay applied; the summary reports them.
+            job.summary = {**(job.summary or {}), "error": f"{type(exc).__name__}: {exc}"[:500]}
+            await _finish(
+                db,
+                job,
+                "FAILED",
+                "La eliminación se detuvo por un error inesperado. Los lotes ya procesados se conservan.",
+            )
+            return
+        try:
+            await prune_orphaned_local_assets(db)
+        except Exception:  # noqa: BLE001 - the deletion itself is committed
+            LOGGER.exception("Deletion job %s could not prune orphaned image files", job_id)
+        await _finish(db, job, "COMPLETED")
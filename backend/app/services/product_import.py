@@ -0,0 +1,502 @@
+"""Set-based product import.
+
+A spreadsheet from the product export (or with the old Spanish headers) is
+applied in chunks of rows instead of row by row:
+
+* ``normalize_import_columns`` maps headers to the export's column names.
+* ``parse_product_rows`` types a chunk's columns with vectorized pandas
+  operations and records the first error of each row; invalid rows are
+  skipped, so no savepoint per row is needed.
+* ``ProductImporter.apply_chunk`` resolves the referenced product, variant and
+  category ids with one query each, then inserts new products and variants
+  with ``INSERT ... ON CONFLICT DO NOTHING`` and updates existing ones with one
+  executemany ``UPDATE`` per table.
+
+Rows without ``product_id`` create a product, and rows with a variant name but
+no ``variant_id`` create a variant, as in the original row-by-row import. New
+rows get ids derived from the job and the row number, so a chunk retried after
+a lost commit acknowledgment inserts nothing twice. Empty numeric and boolean
+cells keep the current value; empty text cells clear it.
+"""
+import json
+import re
+import unicodedata
+import uuid
+from datetime import datetime
+from typing import Any, Optional
+
+import pandas as pd
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.category import Category
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.services.asset_store import mark_asset_refs_stale
+from app.services.inventory_snapshots import VALUATION_FIELDS, mark_branch_totals_stale
+from app.services.live_counters import mark_counters_stale
+from app.services.pricing import mark_prices_stale
+from app.services.product_codes import active_sku_owners, mark_codes_stale, sku_key
+from app.services.product_listing import mark_totals_stale, mark_variant_counts_stale
+
+IMPORT_COLUMN_ALIASES = {
+    "id_producto": "product_id",
+    "producto_id": "product_id",
+    "product_id": "product_id",
+    "id_variante": "variant_id",
+    "variante_id": "variant_id",
+    "variant_id": "variant_id",
+    "nombre": "name",
+    "nombre_producto": "name",
+    "product_name": "name",
+    "name": "name",
+    "sku_producto": "sku",
+    "product_sku": "sku",
+    "sku": "sku",
+    "codigo_barras": "barcode",
+    "barcode": "barcode",
+    "nombre_variante": "variant_name",
+    "variant_name": "variant_name",
+    "sku_variante": "variant_sku",
+    "variant_sku": "variant_sku",
+    "codigo_barras_variante": "variant_barcode",
+    "variant_barcode": "variant_barcode",
+    "precio": "price",
+    "precio_venta": "price",
+    "sale_price": "price",
+    "price": "price",
+    "costo": "cost",
+    "precio_costo": "cost",
+    "cost_price": "cost",
+    "cost": "cost",
+    "precio_extra": "price_extra",
+    "price_extra": "price_extra",
+    "costo_extra": "cost_extra",
+    "cost_extra": "cost_extra",
+    "precio_variante": "variant_price",
+    "variant_price": "variant_price",
+    "costo_variante": "variant_cost",
+    "variant_cost": "variant_cost",
+    "atributos_variante_json": "variant_attributes_json",
+    "variant_attributes_json": "variant_attributes_json",
+    "peso_variante": "variant_weight",
+    "variant_weight": "variant_weight",
+    "tipo": "product_type",
+    "product_type": "product_type",
+    "categoria": "category_name",
+    "categoria_nombre": "category_name",
+    "category_name": "category_name",
+    "marca": "brand_name",
+    "marca_nombre": "brand_name",
+    "brand_name": "brand_name",
+    "imagen": "image_url",
+    "imagen_url": "image_url",
+    "image_url": "image_url",
+    "tasa_impuesto": "tax_rate",
+    "tax_rate": "tax_rate",
+    "stock_minimo": "min_stock",
+    "min_stock": "min_stock",
+    "control_inventario": "track_inventory",
+    "track_inventory": "track_inventory",
+    "venta": "sale_ok",
+    "sale_ok": "sale_ok",
+    "compra": "purchase_ok",
+    "purchase_ok": "purchase_ok",
+    "activo": "is_active",
+    "is_active": "is_active",
+    "variante_activa": "variant_is_active",
+    "variant_is_active": "variant_is_active",
+}
+
+# Import column -> model attribute, by type.
+PRODUCT_TEXT = {"name": "name", "sku": "sku", "barcode": "barcode", "product_type": "product_type", "image_url": "image_url"}
+PRODUCT_NUMERIC = {"price": "price", "cost": "cost", "tax_rate": "tax_rate", "min_stock": "min_stock"}
+PRODUCT_BOOLEAN = {"track_inventory": "track_inventory", "sale_ok": "sale_ok", "purchase_ok": "purchase_ok", "is_active": "is_active"}
+VARIANT_TEXT = {"variant_name": "name", "variant_sku": "sku", "variant_barcode": "barcode"}
+VARIANT_NUMERIC = {
+    "price_extra": "price_extra",
+    "cost_extra": "cost_extra",
+    "variant_price": "price",
+    "variant_cost": "cost",
+    "variant_weight": "weight",
+}
+VARIANT_BOOLEAN = {"variant_is_active": "is_active"}
+# Defaults of a new product's NOT NULL columns, as the original import set them.
+PRODUCT_DEFAULTS = {
+    "product_type": "STORABLE",
+    "price": 0.0,
+    "cost": 0.0,
+    "tax_rate": 0.0,
+    "min_stock": 0.0,
+    "track_inventory": True,
+    "sale_ok": True,
+    "purchase_ok": True,
+    "is_active": True,
+}
+VARIANT_DEFAULTS = {"price_extra": 0.0, "cost_extra": 0.0, "is_active": True}
+# Columns resolved by SKU/barcode scans; updating any of them drops the code table.
+CODE_COLUMNS = {"sku", "barcode", "is_active", "variant_sku", "variant_barcode", "variant_is_active"}
+# Columns the effective prices depend on.
+PRICE_COLUMNS = {"price", "price_extra", "variant_price"}
+
+TRUE_VALUES = {"1", "1.0", "true", "t", "yes", "si", "sí", "x"}
+FALSE_VALUES = {"0", "0.0", "false", "f", "no", "n"}
+_INVALID = object()
+
+
+def normalize_import_column(value: Any) -> str:
+    """Normalize old Spanish export headers and the new machine headers."""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def normalize_import_columns(df: pd.DataFrame) -> pd.DataFrame:
+    rename_map = {}
+    for column in df.columns:
+        normalized = normalize_import_column(column)
+        rename_map[column] = IMPORT_COLUMN_ALIASES.get(normalized, normalized)
+    return df.rename(columns=rename_map)
+
+
+def _objects(series: pd.Series) -> pd.Series:
+    """``series`` as Python objects with ``None`` for missing values."""
+    return series.astype(object).where(series.notna(), None)
+
+
+def _text(raw: pd.Series) -> pd.Series:
+    text = raw.astype("string").str.strip()
+    return text.mask((text == "").fillna(False))
+
+
+def _parse_uuid(value: str) -> Any:
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return _INVALID
+
+
+def _parse_attributes(value: str) -> Any:
+    try:
+        parsed = json.loads(value)
+    except json.JSONDecodeError:
+        return _INVALID
+    return parsed if isinstance(parsed, dict) else _INVALID
+
+
+class _RowErrors:
+    """First error message of each row of a chunk."""
+
+    def __init__(self, index: pd.Index) -> None:
+        self.messages = pd.Series(None, index=index, dtype=object)
+
+    def flag(self, mask: pd.Series, message: Any) -> None:
+        self.messages = self.messages.mask(mask & self.messages.isna(), message)
+
+
+def parse_product_rows(chunk: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+    """Typed values of a normalized chunk and the error of each row (``None`` when valid).
+
+    Only the chunk's known columns appear in the values, so callers can tell
+    a column left out of the file from an empty cell.
+    """
+    errors = _RowErrors(chunk.index)
+    values = pd.DataFrame(index=chunk.index)
+    text_columns = {*PRODUCT_TEXT, *VARIANT_TEXT, "category_name"}
+    numeric_columns = {*PRODUCT_NUMERIC, *VARIANT_NUMERIC}
+    boolean_columns = {*PRODUCT_BOOLEAN, *VARIANT_BOOLEAN}
+
+    for column in ("product_id", "variant_id"):
+        if column not in chunk:
+            values[column] = None
+            continue
+        text = _text(chunk[column])
+        parsed = text.dropna().map(_parse_uuid).reindex(chunk.index)
+        errors.flag(parsed.map(lambda value: value is _INVALID), f"{column} debe ser un UUID válido")
+        values[column] = _objects(parsed.where(parsed.map(lambda value: value is not _INVALID)))
+
+    for column in chunk.columns:
+        if column in text_columns:
+            values[column] = _objects(_text(chunk[column]))
+        elif column in numeric_columns:
+            text = _text(chunk[column])
+            parsed = pd.to_numeric(text.astype(object), errors="coerce")
+            errors.flag(text.notna() & parsed.isna(), "'" + text.astype(object).astype(str) + "' no es un número válido")
+            values[column] = _objects(parsed)
+        elif column in boolean_columns:
+            text = _text(chunk[column])
+            lowered = text.str.lower()
+            parsed = pd.Series(None, index=chunk.index, dtype=object)
+            parsed[lowered.isin(TRUE_VALUES).fillna(False).astype(bool)] = True
+            parsed[lowered.isin(FALSE_VALUES).fillna(False).astype(bool)] = False
+            errors.flag(text.notna() & parsed.isna(), "'" + text.astype(object).astype(str) + "' no es un booleano válido")
+            values[column] = _objects(parsed)
+        elif column == "variant_attributes_json":
+            text = _text(chunk[column])
+            parsed = text.dropna().map(_parse_attributes).reindex(chunk.index)
+            invalid = parsed.map(lambda value: value is _INVALID)
+            errors.flag(invalid, "variant_attributes_json debe ser un objeto JSON válido")
+            values[column] = _objects(parsed.where(~invalid))
+
+    has_product = values["product_id"].notna()
+    has_variant = values["variant_id"].notna()
+    errors.flag(has_variant & ~has_product, "variant_id requiere product_id")
+    name = values["name"] if "name" in values else pd.Series(None, index=chunk.index, dtype=object)
+    errors.flag(~has_product & name.isna(), "name es obligatorio para crear un producto")
+    for column in ("name", "product_type"):
+        if column in values:
+            errors.flag(has_product & values[column].isna(), f"{column} no puede quedar vacío")
+    variant_name = values.get("variant_name", pd.Series(None, index=chunk.index, dtype=object))
+    variant_sku = values.get("variant_sku", pd.Series(None, index=chunk.index, dtype=object))
+    if "variant_name" in values:
+        errors.flag(has_variant & variant_name.isna(), "variant_name no puede quedar vacío")
+    errors.flag(~has_variant & variant_sku.notna() & variant_name.isna(), "variant_name es obligatorio para crear una variante")
+    return values, _objects(errors.messages)
+
+
+def _row_number(index: Any) -> int:
+    # Header on the first line of the sheet, rows numbered from 0.
+    return int(index) + 2
+
+
+class ProductImporter:
+    """Applies chunks of a product import for one company."""
+
+    counters = ("count", "products_created", "products_updated", "variants_created", "variants_updated")
+
+    def __init__(self, company_id: uuid.UUID, user_id: Optional[uuid.UUID], namespace: uuid.UUID) -> None:
+        self.company_id = company_id
+        self.user_id = user_id
+        # Seeds the ids of created rows (the import job's id).
+        self.namespace = namespace
+        self._categories: Optional[dict[str, uuid.UUID]] = None
+        self._updated_products: set[uuid.UUID] = set()
+        self._updated_variants: set[uuid.UUID] = set()
+
+    def forget(self) -> None:
+        """Drop state a rolled-back chunk may have left behind."""
+        self._categories = None
+
+    def _row_id(self, kind: str, index: Any) -> uuid.UUID:
+        return uuid.uuid5(self.namespace, f"{kind}:{index}")
+
+    async def apply_chunk(self, db: AsyncSession, chunk: pd.DataFrame) -> tuple[dict[str, int], list[str]]:
+        """Apply ``chunk`` without committing; returns the counts and row errors."""
+        values, errors = parse_product_rows(normalize_import_columns(chunk))
+        await self._check_references(db, values, errors)
+        await self._check_skus(db, values, errors)
+        values = values[errors.isna()]
+        counts = dict.fromkeys(self.counters, 0)
+        counts["count"] = len(values)
+        row_errors = [f"Fila {_row_number(index)}: {message}" for index, message in errors.dropna().items()]
+        if values.empty:
+            return counts, row_errors
+
+        if "category_name" in values:
+            values["category_id"] = await self._category_ids(db, values["category_name"])
+        new_products = values["product_id"].isna()
+        product_ids = values["product_id"].where(
+            ~new_products, pd.Series([self._row_id("product", index) for index in values.index], index=values.index)
+        )
+
+        counts["products_created"] = await self._insert_products(db, values[new_products], product_ids)
+        counts["products_updated"] = await self._update_products(db, values[~new_products])
+        counts["variants_created"] = await self._insert_variants(db, values, product_ids)
+        counts["variants_updated"] = await self._update_variants(db, values[values["variant_id"].notna()])
+
+        valuation_columns = {column for column, attribute in PRODUCT_NUMERIC.items() if attribute in VALUATION_FIELDS}
+        if counts["products_created"]:
+            mark_counters_stale(db, self.company_id)
+        if counts["products_created"] or (counts["products_updated"] and valuation_columns & set(values.columns)):
+            mark_branch_totals_stale(db, self.company_id)
+        if counts["products_created"] or counts["variants_created"] or CODE_COLUMNS & set(values.columns):
+            mark_codes_stale(db, self.company_id)
+        mark_totals_stale(db, self.company_id)
+        if "image_url" in values:
+            mark_asset_refs_stale(db, values["image_url"].dropna())
+        if counts["products_created"] or counts["variants_created"] or PRICE_COLUMNS & set(values.columns):
+            mark_prices_stale(db, set(product_ids))
+        return counts, row_errors
+
+    async def _check_references(self, db: AsyncSession, values: pd.DataFrame, errors: pd.Series) -> None:
+        valid = errors.isna()
+        product_ids = set(values.loc[valid, "product_id"].dropna())
+        if product_ids:
+            found = set((await db.execute(
+                select(Product.id).where(Product.company_id == self.company_id, Product.id.in_(product_ids))
+            )).scalars().all())
+            missing = valid & values["product_id"].notna() & ~values["product_id"].isin(found)
+            errors.mask(missing, "product_id no pertenece a esta empresa o no existe", inplace=True)
+            valid = errors.isna()
+        variant_ids = set(values.loc[valid, "variant_id"].dropna())
+        if variant_ids:
+            pairs = set((await db.execute(
+                select(ProductVariant.id, ProductVariant.product_id).where(ProductVariant.id.in_(variant_ids))
+            )).tuples().all())
+            requested = pd.Series(list(zip(values["variant_id"], values["product_id"])), index=values.index)
+            missing = valid & values["variant_id"].notna() & ~requested.map(lambda pair: pair in pairs)
+            errors.mask(missing, "variant_id no pertenece al product_id indicado o no existe", inplace=True)
+
+    async def _check_skus(self, db: AsyncSession, values: pd.DataFrame, errors: pd.Series) -> None:
+        """Flag rows giving a product a SKU another active product holds, in the database or earlier in the chunk."""
+        if "sku" not in values:
+            return
+        keys = values["sku"].map(sku_key, na_action="ignore").where(errors.isna())
+        keys = keys[keys.notna() & (keys != "")]
+        if keys.empty:
+            return
+        owners = await active_sku_owners(db, self.company_id, set(keys))
+        for index, key in keys.items():
+            product_id = values.at[index, "product_id"]
+            if product_id is None or pd.isna(product_id):
+                product_id = self._row_id("product", index)
+            if owners.setdefault(key, product_id) != product_id:
+                errors.at[index] = f"el SKU '{values.at[index, 'sku']}' ya pertenece a otro producto activo"
+
+    async def _category_ids(self, db: AsyncSession, names: pd.Series) -> pd.Series:
+        if self._categories is None:
+            rows = (await db.execute(
+                select(Category.name, Category.id).where(Category.company_id == self.company_id)
+            )).all()
+            self._categories = {name.casefold(): category_id for name, category_id in rows}
+        keys = _objects(names).map(str.casefold, na_action="ignore")
+        created = {}
+        for key, name in zip(keys, names):
+            if isinstance(key, str) and key not in self._categories and key not in created:
+                created[key] = Category(name=name, company_id=self.company_id, created_by_id=self.user_id)
+        if created:
+            db.add_all(created.values())
+            await db.flush()
+            self._categories.update({key: category.id for key, category in created.items()})
+        return _objects(keys.map(self._categories.get, na_action="ignore"))
+
+    async def _insert_products(self, db: AsyncSession, rows: pd.DataFrame, product_ids: pd.Series) -> int:
+        if rows.empty:
+            return 0
+        now = datetime.utcnow()
+        records = []
+        for index, row in zip(rows.index, rows.to_dict("records")):
+            record = {
+                "id": product_ids[index],
+                "company_id": self.company_id,
+                "created_by_id": self.user_id,
+                "created_at": now,
+                "updated_at": now,
+                "category_id": row.get("category_id"),
+                "attributes": {},
+            }
+            for column, attribute in PRODUCT_TEXT.items():
+                record[attribute] = row.get(column)
+            for column, attribute in {**PRODUCT_NUMERIC, **PRODUCT_BOOLEAN}.items():
+                record[attribute] = row.get(column)
+            for attribute, default in PRODUCT_DEFAULTS.items():
+                if record[attribute] is None:
+                    record[attribute] = default
+            records.append(record)
+        table = Product.__table__
+        result = await db.execute(
+            insert(table).on_conflict_do_nothing(index_elements=[table.c.id]).returning(table.c.id), records
+        )
+        return len(result.all())
+
+    async def _update_products(self, db: AsyncSession, rows: pd.DataFrame) -> int:
+        if rows.empty:
+            return 0
+        # Several rows (one per variant) may carry the same product; the last one wins.
+        rows = rows.drop_duplicates(subset="product_id", keep="last")
+        table = Product.__table__
+        if "image_url" in rows:
+            # The images being replaced lose a reference.
+            mark_asset_refs_stale(db, (await db.execute(
+                select(table.c.image_url).where(table.c.id.in_(list(rows["product_id"])))
+            )).scalars().all())
+        assignments = {"updated_at": datetime.utcnow(), "updated_by_id": self.user_id}
+        columns = {}
+        for column, attribute in PRODUCT_TEXT.items():
+            if column in rows:
+                assignments[attribute] = bindparam(f"v_{attribute}")
+                columns[column] = attribute
+        kept = {**PRODUCT_NUMERIC, **PRODUCT_BOOLEAN}
+        if "category_id" in rows:
+            kept["category_id"] = "category_id"
+        for column, attribute in kept.items():
+            if column in rows:
+                assignments[attribute] = func.coalesce(bindparam(f"v_{attribute}", type_=table.c[attribute].type), table.c[attribute])
+                columns[column] = attribute
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.company_id == self.company_id)
+            .values(assignments)
+        )
+        await db.execute(statement, [
+            {"b_id": row["product_id"], **{f"v_{attribute}": row[column] for column, attribute in columns.items()}}
+            for row in rows.to_dict("records")
+        ])
+        updated = set(rows["product_id"]) - self._updated_products
+        self._updated_products |= updated
+        return len(updated)
+
+    async def _insert_variants(self, db: AsyncSession, values: pd.DataFrame, product_ids: pd.Series) -> int:
+        if "variant_name" not in values:
+            return 0
+        rows = values[values["variant_id"].isna() & values["variant_name"].notna()]
+        if rows.empty:
+            return 0
+        now = datetime.utcnow()
+        records = []
+        for index, row in zip(rows.index, rows.to_dict("records")):
+            record = {
+                "id": self._row_id("variant", index),
+                "product_id": product_ids[index],
+                "company_id": self.company_id,
+                "created_by_id": self.user_id,
+                "created_at": now,
+                "updated_at": now,
+                "attributes": row.get("variant_attributes_json") or {},
+            }
+            for column, attribute in {**VARIANT_TEXT, **VARIANT_NUMERIC, **VARIANT_BOOLEAN}.items():
+                record[attribute] = row.get(column)
+            for attribute, default in VARIANT_DEFAULTS.items():
+                if record[attribute] is None:
+                    record[attribute] = default
+            records.append(record)
+        table = ProductVariant.__table__
+        result = await db.execute(
+            insert(table).on_conflict_do_nothing(index_elements=[table.c.id]).returning(table.c.id), records
+        )
+        mark_variant_counts_stale(db, {record["product_id"] for record in records})
+        return len(result.all())
+
+    async def _update_variants(self, db: AsyncSession, rows: pd.DataFrame) -> int:
+        if rows.empty:
+            return 0
+        rows = rows.drop_duplicates(subset="variant_id", keep="last")
+        table = ProductVariant.__table__
+        assignments = {"updated_at": datetime.utcnow(), "updated_by_id": self.user_id}
+        columns = {}
+        for column, attribute in VARIANT_TEXT.items():
+            if column in rows:
+                assignments[attribute] = bindparam(f"v_{attribute}")
+                columns[column] = attribute
+        kept = {**VARIANT_NUMERIC, **VARIANT_BOOLEAN, "variant_attributes_json": "attributes"}
+        for column, attribute in kept.items():
+            if column in rows:
+                assignments[attribute] = func.coalesce(bindparam(f"v_{attribute}", type_=table.c[attribute].type), table.c[attribute])
+                columns[column] = attribute
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.product_id == bindparam("b_product_id"))
+            .values(assignments)
+        )
+        await db.execute(statement, [
+            {
+                "b_id": row["variant_id"],
+                "b_product_id": row["product_id"],
+                **{f"v_{attribute}": row[column] for column, attribute in columns.items()},
+            }
+            for row in rows.to_dict("records")
+        ])
+        updated = set(rows["variant_id"]) - self._updated_variants
+        self._updated_variants |= updated
+        return len(updated)
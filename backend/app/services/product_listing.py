@@ -0,0 +1,111 @@
+"""Paging support for the admin product list.
+
+* Filtered totals are cached per company and filter fingerprint in the
+  reference cache for ``PRODUCT_TOTALS_TTL_SECONDS``. Committed changes to the
+  fields the list filters on invalidate the company's totals (tag
+  ``company:<id>:product-totals``), so flipping pages costs no ``COUNT``.
+* ``Product.variant_count`` is kept current when variants are added, deleted
+  or moved: the session collects the affected products while flushing and
+  recounts their variants right before committing. Bulk statements call
+  :func:`mark_variant_counts_stale` themselves.
+"""
+import hashlib
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, attributes
+
+from app.core.cache import mark_stale, reference_cache, tenant_tag
+from app.core.config import settings
+from app.core.database import discard_on_rollback
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.services.reference_cache import PRODUCT_TOTALS
+
+_SESSION_PRODUCTS = "variant_count_products"
+
+
+def filter_fingerprint(filters: dict[str, Any]) -> str:
+    """Stable digest of the list filters; empty ones and search case do not matter."""
+    normalized = {name: value for name, value in filters.items() if value not in (None, "", False)}
+    if isinstance(normalized.get("search"), str):
+        normalized["search"] = normalized["search"].strip().lower()
+    encoded = json.dumps(normalized, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode()).hexdigest()
+
+
+async def cached_product_total(
+    company_id: uuid.UUID,
+    filters: dict[str, Any],
+    count: Callable[[], Awaitable[int]],
+) -> int:
+    """Total for ``filters`` from the cache, running ``count`` on a miss."""
+    return await reference_cache.get_or_load(
+        f"product-total:{company_id}:{filter_fingerprint(filters)}",
+        [tenant_tag(company_id, PRODUCT_TOTALS)],
+        count,
+        ttl_seconds=settings.PRODUCT_TOTALS_TTL_SECONDS,
+    )
+
+
+def mark_totals_stale(db: AsyncSession | Session, company_id: Optional[uuid.UUID]) -> None:
+    """Drop the company's cached totals once ``db`` commits (after bulk statements)."""
+    if company_id:
+        mark_stale(db, tenant_tag(company_id, PRODUCT_TOTALS))
+
+
+def mark_variant_counts_stale(db: AsyncSession | Session, product_ids: Iterable[uuid.UUID]) -> None:
+    """Recount the variants of ``product_ids`` when ``db`` commits."""
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    session.info.setdefault(_SESSION_PRODUCTS, set()).update(
+        product_id for product_id in product_ids if product_id
+    )
+
+
+def _moved_product_ids(variant: ProductVariant) -> set:
+    history = inspect(variant).attrs.product_id.history
+    return {product_id for product_id in (*history.added, *history.deleted) if product_id}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_variant_products(session: Session, _flush_context) -> None:
+    product_ids = set()
+    for instance in (*session.new, *session.deleted):
+        if isinstance(instance, ProductVariant) and instance.product_id:
+            product_ids.add(instance.product_id)
+    for instance in session.dirty:
+        if isinstance(instance, ProductVariant):
+            product_ids |= _moved_product_ids(instance)
+    if product_ids:
+        mark_variant_counts_stale(session, product_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_variant_counts(session: Session) -> None:
+    session.flush()
+    product_ids = session.info.pop(_SESSION_PRODUCTS, None)
+    if not product_ids:
+        return
+    table = Product.__table__
+    counts = (
+        select(func.count(ProductVariant.id))
+        .where(ProductVariant.product_id == table.c.id)
+        .scalar_subquery()
+    )
+    rows = session.execute(
+        update(table)
+        .where(table.c.id.in_(product_ids))
+        .values(variant_count=counts)
+        .returning(table.c.id, table.c.variant_count)
+    ).all()
+    # Products already in the session show the new count without a reload.
+    for product_id, variant_count in rows:
+        product = session.identity_map.get(session.identity_key(Product, product_id))
+        if product is not None:
+            attributes.set_committed_value(product, "variant_count", variant_count)
+
+
+discard_on_rollback(_SESSION_PRODUCTS)
@@ -0,0 +1,117 @@
+"""Cache tags for tenant reference data.
+
+Importing this module registers the models whose committed changes invalidate
+cached reads. Bulk ``update()``/``delete()`` statements, and models without a
+tenant or storefront column, bypass these hooks; endpoints that write them
+call :func:`app.core.cache.mark_stale` themselves.
+"""
+from typing import Any, Iterable
+
+from sqlalchemy import inspect
+
+from app.core.cache import register_cache_tags, storefront_tag, tenant_tag
+from app.models.branch import Branch
+from app.models.brand import Brand
+from app.models.category import Category
+from app.models.pricelist import PriceList
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.storefront import (
+    PublishedProduct,
+    StoreCollection,
+    StoreNavigationItem,
+    StorePaymentGateway,
+    Storefront,
+    StorefrontDomain,
+    StorefrontShippingDestination,
+    StorefrontShippingMethod,
+    StorefrontShippingRule,
+)
+from app.models.unit_of_measure import UnitOfMeasure
+from app.models.warehouse import Warehouse
+
+BRANCHES = "branches"
+BRANDS = "brands"
+CATEGORIES = "categories"
+PRICELISTS = "pricelists"
+# SKU/barcode table of app.services.product_codes.
+PRODUCT_CODES = "product-codes"
+# Filtered product counts of app.services.product_listing.
+PRODUCT_TOTALS = "product-totals"
+UNITS = "units"
+WAREHOUSES = "warehouses"
+
+CATALOG = "catalog"
+NAVIGATION = "navigation"
+PAYMENT_GATEWAYS = "payment-gateways"
+SHIPPING = "shipping"
+# Bumped by any change to what a storefront publishes; its version feeds the
+# public ETags (see app.core.http_cache).
+CONTENT = "content"
+# Global: host (subdomain or custom domain) to storefront resolution.
+STOREFRONT_HOSTS = "storefront-hosts"
+
+
+def storefront_content_tags(storefront_id: Any, name: str | None = None) -> list[str]:
+    tags = [storefront_tag(storefront_id, CONTENT)]
+    if name:
+        tags.append(storefront_tag(storefront_id, name))
+    return tags
+
+
+def _by_company(name: str):
+    def tags(instance: Any) -> Iterable[str]:
+        return [tenant_tag(instance.company_id, name)] if instance.company_id else []
+    return tags
+
+
+def _on_change(name: str, fields: tuple[str, ...]):
+    """Tag ``name`` for inserts, deletes and updates that touch ``fields`` only."""
+    def tags(instance: Any) -> Iterable[str]:
+        if not instance.company_id:
+            return []
+        state = inspect(instance)
+        session = state.session
+        touched = session is not None and (instance in session.new or instance in session.deleted)
+        if touched or any(state.attrs[field].history.has_changes() for field in fields):
+            return [tenant_tag(instance.company_id, name)]
+        return []
+    return tags
+
+
+def _by_storefront(name: str):
+    def tags(instance: Any) -> Iterable[str]:
+        return storefront_content_tags(instance.storefront_id, name) if instance.storefront_id else []
+    return tags
+
+
+register_cache_tags(Brand, _by_company(BRANDS))
+register_cache_tags(Category, _by_company(CATEGORIES))
+register_cache_tags(UnitOfMeasure, _by_company(UNITS))
+register_cache_tags(Branch, _by_company(BRANCHES))
+register_cache_tags(Warehouse, _by_company(WAREHOUSES))
+register_cache_tags(PriceList, _by_company(PRICELISTS))
+register_cache_tags(Product, _on_change(PRODUCT_CODES, ("sku", "barcode", "is_active")))
+register_cache_tags(ProductVariant, _on_change(PRODUCT_CODES, ("sku", "barcode", "is_active", "product_id")))
+# Fields the admin catalog filters on (see _product_filter_conditions).
+register_cache_tags(Product, _on_change(PRODUCT_TOTALS, (
+    "is_active", "name", "sku", "barcode", "internal_reference", "category_id", "brand_id", "product_type",
+)))
+register_cache_tags(ProductVariant, _on_change(PRODUCT_TOTALS, ("name", "sku", "barcode", "product_id")))
+# Public storefront entries also carry the bare storefront tag, so editing or
+# disabling the storefront itself drops all of them.
+register_cache_tags(
+    Storefront,
+    lambda storefront: [storefront_tag(storefront.id), *storefront_content_tags(storefront.id), STOREFRONT_HOSTS],
+)
+register_cache_tags(
+    StorefrontDomain,
+    lambda domain: [*storefront_content_tags(domain.storefront_id), STOREFRONT_HOSTS],
+)
+register_cache_tags(StoreCollection, _by_storefront(CATALOG))
+register_cache_tags(PublishedProduct, _by_storefront(CATALOG))
+register_cache_tags(StoreNavigationItem, _by_storefront(NAVIGATION))
+register_cache_tags(StorePaymentGateway, _by_storefront(PAYMENT_GATEWAYS))
+register_cache_tags(StorefrontShippingDestination, _by_storefront(SHIPPING))
+register_cache_tags(StorefrontShippingMethod, _by_storefront(SHIPPING))
+register_cache_tags(StorefrontShippingRule, _by_storefront(SHIPPING))
@@ -0,0 +1,296 @@
+"""Daily sales rollups.
+
+Reports and dashboard charts read per-day facts instead of scanning sales:
+
+* ``SalesDailyRollup``: sales, payments and item margins per company, branch,
+  day and sale status.
+* ``SalesProductDailyRollup``: the same grain split by product.
+* ``ReturnDailyRollup``: approved returns per branch and approval day.
+
+A sale belongs to the day it was created; its items and payments are counted
+on that day too, as the reports always did. Committing a change to a sale,
+sale item, payment or return enqueues one ``sales.rollup`` outbox event per
+transaction naming the affected days, and ``app.workers.sales_rollup_worker``
+rebuilds each (company, day) from the source rows. Rebuilding is idempotent,
+so redelivered or duplicated events are harmless. Bulk ``update()``/``delete()``
+statements bypass the hooks; run ``scripts/backfill_sales_rollups.py`` after
+data fixes made that way.
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import discard_on_rollback
+from app.models.product import Product
+from app.models.return_order import ReturnOrder, ReturnStatus
+from app.models.sale import Payment, Sale, SaleItem, SaleStatus
+from app.models.sales_rollup import ReturnDailyRollup, SalesDailyRollup, SalesProductDailyRollup
+from app.services.outbox import enqueue_outbox_event
+
+ROLLUP_EVENT_TYPE = "sales.rollup"
+# Statuses that are not (yet) revenue: the dashboard leaves them out.
+UNBOOKED_STATUSES = (SaleStatus.DRAFT.value, SaleStatus.QUOTE.value, SaleStatus.CANCELLED.value)
+_SESSION_TARGETS = "sales_rollup_targets"
+
+
+@dataclass
+class RollupTargets:
+    """Days to rebuild, known directly or through the sales they belong to."""
+
+    days: set[tuple[uuid.UUID, date]] = field(default_factory=set)
+    sale_ids: set[uuid.UUID] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.days or self.sale_ids)
+
+    def merge(self, other: "RollupTargets") -> None:
+        self.days |= other.days
+        self.sale_ids |= other.sale_ids
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "days": sorted([str(company_id), day.isoformat()] for company_id, day in self.days),
+            "sale_ids": sorted(str(sale_id) for sale_id in self.sale_ids),
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> "RollupTargets":
+        return cls(
+            days={(uuid.UUID(company_id), date.fromisoformat(day)) for company_id, day in payload.get("days") or []},
+            sale_ids={uuid.UUID(sale_id) for sale_id in payload.get("sale_ids") or []},
+        )
+
+
+def _utc_day(value: datetime) -> date:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def rollup_targets(instances: Iterable[Any]) -> RollupTargets:
+    """Rollup days affected by changes to ``instances``."""
+    targets = RollupTargets()
+    for instance in instances:
+        if isinstance(instance, Sale):
+            if instance.company_id and instance.created_at:
+                targets.days.add((instance.company_id, _utc_day(instance.created_at)))
+            elif instance.id:
+                targets.sale_ids.add(instance.id)
+        elif isinstance(instance, (SaleItem, Payment)):
+            if instance.sale_id:
+                targets.sale_ids.add(instance.sale_id)
+        elif isinstance(instance, ReturnOrder):
+            # Returns are counted on the day they were approved.
+            if instance.company_id and instance.approved_at:
+                targets.days.add((instance.company_id, _utc_day(instance.approved_at)))
+    return targets
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_rollup_targets(session: Session, _flush_context) -> None:
+    dirty = (instance for instance in session.dirty if session.is_modified(instance, include_collections=False))
+    targets = rollup_targets((*session.new, *session.deleted, *dirty))
+    if targets:
+        session.info.setdefault(_SESSION_TARGETS, RollupTargets()).merge(targets)
+
+
+@event.listens_for(Session, "before_commit")
+def _enqueue_rollup_event(session: Session) -> None:
+    # Flush first so changes still pending at commit time are collected too;
+    # the event added below is flushed by the commit itself.
+    session.flush()
+    targets: Optional[RollupTargets] = session.info.pop(_SESSION_TARGETS, None)
+    if not targets:
+        return
+    companies = {company_id for company_id, _day in targets.days}
+    event_id = uuid.uuid4()
+    enqueue_outbox_event(
+        session,
+        event_type=ROLLUP_EVENT_TYPE,
+        aggregate_type="sales_rollup",
+        aggregate_id=event_id,
+        company_id=companies.pop() if len(companies) == 1 else None,
+        payload=targets.to_payload(),
+    )
+
+
+discard_on_rollback(_SESSION_TARGETS)
+
+
+async def resolve_rollup_days(db: AsyncSession, targets: RollupTargets) -> dict[uuid.UUID, set[date]]:
+    """Group the days in ``targets`` by company, looking up the day of each sale."""
+    days: dict[uuid.UUID, set[date]] = {}
+    for company_id, day in targets.days:
+        days.setdefault(company_id, set()).add(day)
+    if targets.sale_ids:
+        rows = await db.execute(
+            select(Sale.company_id, func.date(Sale.created_at))
+            .where(Sale.id.in_(targets.sale_ids), Sale.company_id.is_not(None))
+            .distinct()
+        )
+        for company_id, day in rows.all():
+            days.setdefault(company_id, set()).add(day)
+    return days
+
+
+def build_rollup_rows(
+    company_id: uuid.UUID,
+    sales_rows: Iterable[Any],
+    payment_rows: Iterable[Any],
+    item_rows: Iterable[Any],
+    return_rows: Iterable[Any],
+    now: Optional[datetime] = None,
+) -> tuple[list[dict], list[dict], list[dict]]:
+    """Rollup rows for one company from the grouped source aggregates."""
+    now = now or datetime.utcnow()
+    daily: dict[tuple, dict] = {}
+
+    def bucket(day: date, branch_id: Optional[uuid.UUID], sale_status: Any) -> dict:
+        status_value = getattr(sale_status, "value", sale_status)
+        key = (day, branch_id, status_value)
+        if key not in daily:
+            daily[key] = {
+                "id": uuid.uuid4(), "company_id": company_id, "branch_id": branch_id, "day": day,
+                "status": status_value, "sales_count": 0, "gross_sales": 0.0, "payments_cash": 0.0,
+                "payments_card": 0.0, "payments_credit": 0.0, "items_revenue": 0.0, "items_cost": 0.0,
+                "refreshed_at": now,
+            }
+        return daily[key]
+
+    for row in sales_rows:
+        target = bucket(row.day, row.branch_id, row.status)
+        target["sales_count"] = int(row.sales_count or 0)
+        target["gross_sales"] = float(row.gross_sales or 0.0)
+    for row in payment_rows:
+        target = bucket(row.day, row.branch_id, row.status)
+        target["payments_cash"] = float(row.cash or 0.0)
+        target["payments_card"] = float(row.card or 0.0)
+        target["payments_credit"] = float(row.credit or 0.0)
+
+    product_rows = []
+    for row in item_rows:
+        revenue, cost = float(row.revenue or 0.0), float(row.cost or 0.0)
+        target = bucket(row.day, row.branch_id, row.status)
+        target["items_revenue"] += revenue
+        target["items_cost"] += cost
+        product_rows.append({
+            "id": uuid.uuid4(), "company_id": company_id, "branch_id": row.branch_id, "day": row.day,
+            "status": target["status"], "product_id": row.product_id, "category_id": row.category_id,
+            "quantity": float(row.quantity or 0.0), "revenue": revenue, "cost": cost, "refreshed_at": now,
+        })
+
+    returns = [
+        {
+            "id": uuid.uuid4(), "company_id": company_id, "branch_id": row.branch_id, "day": row.day,
+            "returns_count": int(row.returns_count or 0), "total_refunds": float(row.total_refunds or 0.0),
+            "refreshed_at": now,
+        }
+        for row in return_rows
+    ]
+    return list(daily.values()), product_rows, returns
+
+
+async def refresh_sales_rollups(db: AsyncSession, company_id: uuid.UUID, days: Iterable[date]) -> None:
+    """Rebuild the rollups of ``company_id`` for ``days`` from source rows; the caller commits."""
+    days = sorted(set(days))
+    if not days:
+        return
+    # Serialize rebuilds of the same day so concurrent workers cannot both
+    # insert after deleting.
+    for day in days:
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"sales-rollup:{company_id}:{day}"))))
+
+    start = datetime.combine(days[0], time.min)
+    end = datetime.combine(days[-1] + timedelta(days=1), time.min)
+    sale_day = func.date(Sale.created_at)
+    sale_conditions = [
+        Sale.company_id == company_id,
+        Sale.created_at >= start,
+        Sale.created_at < end,
+        sale_day.in_(days),
+    ]
+    sale_keys = (sale_day.label("day"), Sale.branch_id, Sale.status)
+
+    sales_rows = (await db.execute(
+        select(
+            *sale_keys,
+            func.count(Sale.id).label("sales_count"),
+            func.coalesce(func.sum(Sale.total), 0.0).label("gross_sales"),
+        ).where(*sale_conditions).group_by(*sale_keys)
+    )).all()
+    payment_rows = (await db.execute(
+        select(
+            *sale_keys,
+            func.coalesce(func.sum(Payment.amount).filter(Payment.method == "CASH"), 0.0).label("cash"),
+            func.coalesce(func.sum(Payment.amount).filter(Payment.method == "CARD"), 0.0).label("card"),
+            func.coalesce(func.sum(Payment.amount).filter(Payment.method == "CREDIT"), 0.0).label("credit"),
+        ).join(Sale, Payment.sale_id == Sale.id).where(*sale_conditions).group_by(*sale_keys)
+    )).all()
+    item_rows = (await db.execute(
+        select(
+            *sale_keys,
+            SaleItem.product_id,
+            Product.category_id,
+            func.coalesce(func.sum(SaleItem.quantity), 0.0).label("quantity"),
+            func.coalesce(func.sum(SaleItem.total), 0.0).label("revenue"),
+            func.coalesce(func.sum(SaleItem.quantity * func.coalesce(Product.cost, 0)), 0.0).label("cost"),
+        )
+        .join(Sale, SaleItem.sale_id == Sale.id)
+        .join(Product, SaleItem.product_id == Product.id)
+        .where(*sale_conditions)
+        .group_by(*sale_keys, SaleItem.product_id, Product.category_id)
+    )).all()
+    return_day = func.date(ReturnOrder.approved_at)
+    return_rows = (await db.execute(
+        select(
+            return_day.label("day"),
+            Sale.branch_id,
+            func.count(ReturnOrder.id).label("returns_count"),
+            func.coalesce(func.sum(ReturnOrder.total_refund), 0.0).label("total_refunds"),
+        )
+        .join(Sale, ReturnOrder.sale_id == Sale.id)
+        .where(
+            ReturnOrder.company_id == company_id,
+            ReturnOrder.status == ReturnStatus.APPROVED,
+            ReturnOrder.approved_at >= start,
+            ReturnOrder.approved_at < end,
+            return_day.in_(days),
+        )
+        .group_by(return_day, Sale.branch_id)
+    )).all()
+
+    daily, products, returns = build_rollup_rows(company_id, sales_rows, payment_rows, item_rows, return_rows)
+    for model, rows in (
+        (SalesDailyRollup, daily),
+        (SalesProductDailyRollup, products),
+        (ReturnDailyRollup, returns),
+    ):
+        await db.execute(delete(model).where(model.company_id == company_id, model.day.in_(days)))
+        if rows:
+            await db.execute(insert(model).values(rows))
+
+
+async def backfill_sales_rollups(
+    db: AsyncSession,
+    company_id: uuid.UUID,
+    start: date,
+    end: date,
+    *,
+    chunk_days: int = 31,
+) -> int:
+    """Rebuild ``start``..``end`` (inclusive) in chunks, committing each; returns the days rebuilt."""
+    rebuilt = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(end, chunk_start + timedelta(days=chunk_days - 1))
+        days = [chunk_start + timedelta(days=offset) for offset in range((chunk_end - chunk_start).days + 1)]
+        await refresh_sales_rollups(db, company_id, days)
+        await db.commit()
+        rebuilt += len(days)
+        chunk_start = chunk_end + timedelta(days=1)
+    return rebuilt
@@ -0,0 +1,201 @@
+"""Shipping destination import.
+
+Departments and cities of a storefront's shipping coverage, one row each.
+A row matching an existing destination by codes (country, department code,
+city code and type) or by names updates it; any other row creates one. The
+storefront's destinations are indexed once per job, so each chunk only adds
+and updates ORM rows and flushes them on commit.
+"""
+import re
+import unicodedata
+import uuid
+from typing import Any, Optional
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.storefront import StorefrontShippingDestination
+
+COLUMN_ALIASES = {
+    "country_code": {"country_code", "codigo_pais", "pais", "country"},
+    "state_code": {"state_code", "department_code", "departamento_codigo", "codigo_departamento", "depto_codigo", "codigo_depto"},
+    "state_name": {"state_name", "department", "departamento", "department_name", "nombre_departamento", "depto", "depto_nombre"},
+    "city_code": {"city_code", "municipality_code", "municipio_codigo", "codigo_municipio", "codigo_ciudad", "city_id"},
+    "city_name": {"city_name", "city", "municipality", "municipio", "ciudad", "nombre_ciudad", "nombre_municipio"},
+    "destination_type": {"destination_type", "tipo_destino", "tipo"},
+    "sort_order": {"sort_order", "orden", "prioridad"},
+}
+DEPARTMENT_TYPES = {"departamento", "department", "depto"}
+CITY_TYPES = {"ciudad", "city", "municipio", "municipality"}
+
+Identity = tuple[str, str, str, str]
+
+
+class MissingColumnError(ValueError):
+    """The file lacks a column every row needs."""
+
+
+def _normalize_column(value: Any) -> str:
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def _cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    try:
+        if pd.isna(value):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return str(value).strip()
+
+
+def _cell_code(value: Any) -> str:
+    text = _cell_text(value)
+    if text.endswith(".0") and text[:-2].isdigit():
+        text = text[:-2]
+    return text
+
+
+def destination_name_key(value: str | None) -> str:
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def select_columns(columns: Any) -> dict[str, Any]:
+    """File column of each destination field; raises ``MissingColumnError`` without a department column."""
+    normalized = {_normalize_column(column): column for column in columns}
+    selected = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        column = next((normalized[alias] for alias in aliases if alias in normalized), None)
+        if column is not None:
+            selected[field] = column
+    if "state_name" not in selected:
+        raise MissingColumnError("Falta una columna de departamento. Usa state_name o departamento.")
+    return selected
+
+
+class ShippingDestinationImporter:
+    """Applies chunks of a shipping destination import to one storefront."""
+
+    counters = ("count", "created", "updated", "skipped")
+
+    def __init__(self, company_id: uuid.UUID, user_id: Optional[uuid.UUID], storefront_id: uuid.UUID) -> None:
+        self.company_id = company_id
+        self.user_id = user_id
+        self.storefront_id = storefront_id
+        self._by_code: Optional[dict[Identity, StorefrontShippingDestination]] = None
+        self._by_name: dict[Identity, StorefrontShippingDestination] = {}
+
+    def forget(self) -> None:
+        """Drop state a rolled-back chunk may have left behind."""
+        self._by_code = None
+        self._by_name = {}
+
+    def _index(self, destination: StorefrontShippingDestination) -> None:
+        country = (destination.country_code or "CO").strip().upper()
+        state_code = (destination.state_code or "").strip().casefold()
+        city_code = (destination.city_code or "").strip().casefold()
+        if state_code or city_code:
+            self._by_code[(country, state_code, city_code, destination.destination_type)] = destination
+        self._by_name[(
+            country,
+            destination_name_key(destination.state_name),
+            destination_name_key(destination.city_name),
+            destination.destination_type,
+        )] = destination
+
+    async def _load(self, db: AsyncSession) -> None:
+        self._by_code, self._by_name = {}, {}
+        result = await db.execute(
+            select(StorefrontShippingDestination).where(
+                StorefrontShippingDestination.storefront_id == self.storefront_id,
+                StorefrontShippingDestination.company_id == self.company_id,
+            )
+        )
+        for destination in result.scalars().all():
+            self._index(destination)
+
+    async def apply_chunk(self, db: AsyncSession, chunk: pd.DataFrame) -> tuple[dict[str, int], list[str]]:
+        """Apply ``chunk`` without committing; returns the counts and row errors."""
+        columns = select_columns(chunk.columns)
+        if self._by_code is None:
+            await self._load(db)
+        counts = dict.fromkeys(self.counters, 0)
+        errors: list[str] = []
+        for index, row in zip(chunk.index, chunk.to_dict("records")):
+            try:
+                outcome = self._apply_row(db, {field: row.get(column) for field, column in columns.items()})
+            except (TypeError, ValueError, OverflowError) as exc:
+                errors.append(f"Fila {int(index) + 2}: {exc}")
+                continue
+            counts[outcome] += 1
+        counts["count"] = counts["created"] + counts["updated"]
+        return counts, errors
+
+    def _apply_row(self, db: AsyncSession, cells: dict[str, Any]) -> str:
+        def cell(field: str) -> str:
+            return _cell_text(cells.get(field))
+
+        state_name = cell("state_name")
+        if not state_name:
+            return "skipped"
+        country_code = (_cell_code(cell("country_code")) or "CO").upper()
+        state_code = _cell_code(cell("state_code"))
+        city_code = _cell_code(cell("city_code"))
+        city_name = cell("city_name")
+        destination_type = cell("destination_type").casefold()
+        if destination_type in DEPARTMENT_TYPES:
+            destination_type = "department"
+        elif destination_type in CITY_TYPES:
+            destination_type = "city"
+        else:
+            destination_type = "city" if city_name or city_code else "department"
+        if destination_type == "department":
+            city_code = ""
+            city_name = ""
+        elif not city_name and not city_code:
+            raise ValueError("una ciudad requiere city_name/ciudad o city_code/codigo_ciudad")
+
+        sort_order_text = cell("sort_order")
+        sort_order = int(float(sort_order_text)) if sort_order_text else 0
+        identity_code = (country_code, state_code.casefold(), city_code.casefold(), destination_type)
+        identity_name = (
+            country_code,
+            destination_name_key(state_name),
+            destination_name_key(city_name),
+            destination_type,
+        )
+        destination = self._by_code.get(identity_code) if (state_code or city_code) else None
+        destination = destination or self._by_name.get(identity_name)
+        values = {
+            "country_code": country_code,
+            "state_code": state_code or None,
+            "state_name": state_name,
+            "city_code": city_code or None,
+            "city_name": city_name or None,
+            "destination_type": destination_type,
+            "sort_order": sort_order,
+        }
+        if destination:
+            for field, value in values.items():
+                setattr(destination, field, value)
+            destination.is_active = True
+            destination.updated_by_id = self.user_id
+            outcome = "updated"
+        else:
+            destination = StorefrontShippingDestination(
+                **values,
+                storefront_id=self.storefront_id,
+                company_id=self.company_id,
+                created_by_id=self.user_id,
+                updated_by_id=self.user_id,
+            )
+            db.add(destination)
+            outcome = "created"
+        self._index(destination)
+        return outcome
@@ -0,0 +1,140 @@
+"""Stock ledger queries over ``inventory_movements``.
+
+Every movement records the stock of its inventory row before and after it
+(``previous_stock``/``new_stock``), so the movements of one ledger key
+(product, variant, branch, warehouse) form a running balance. These queries
+read that balance instead of re-adding quantities from the first movement:
+
+* ``stock_at``: each key's ``new_stock`` as of its latest movement up to a
+  timestamp, served by the ``ix_inventory_movements_ledger`` index.
+* ``period_balances``: opening and closing stock, inflow and outflow of each
+  key per day, week or month, computed with window functions over the
+  movements inside the range. A BRIN index on ``created_at`` keeps range scans
+  cheap on the append-only table.
+
+Timestamps are naive UTC, as ``created_at`` is stored. Unlike the daily
+snapshots (``app.services.inventory_snapshots``) the ledger needs no worker
+and covers any instant since the first movement, but only for stock that
+moved through movements.
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Select, case, func, literal_column, select
+
+from app.core.database import distinct_on
+from app.models.inventory_movement import InventoryMovement
+
+PERIODS = ("day", "week", "month")
+
+LEDGER_KEY = (
+    InventoryMovement.product_id,
+    InventoryMovement.variant_id,
+    InventoryMovement.branch_id,
+    InventoryMovement.warehouse_id,
+)
+
+
+def as_utc(moment: datetime) -> datetime:
+    """``moment`` as the naive UTC timestamp movements are stored with."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _movements(
+    company_id: uuid.UUID,
+    product_id: Optional[uuid.UUID] = None,
+    branch_id: Optional[uuid.UUID] = None,
+    warehouse_id: Optional[uuid.UUID] = None,
+) -> list:
+    conditions = [InventoryMovement.company_id == company_id]
+    if product_id:
+        conditions.append(InventoryMovement.product_id == product_id)
+    if branch_id:
+        conditions.append(InventoryMovement.branch_id == branch_id)
+    if warehouse_id:
+        conditions.append(InventoryMovement.warehouse_id == warehouse_id)
+    return conditions
+
+
+def stock_at(
+    company_id: uuid.UUID,
+    at: datetime,
+    *,
+    product_id: Optional[uuid.UUID] = None,
+    branch_id: Optional[uuid.UUID] = None,
+    warehouse_id: Optional[uuid.UUID] = None,
+) -> Select:
+    """Stock of each ledger key right after its last movement at or before ``at``.
+
+    Columns: the key, ``quantity`` and ``last_movement_at``.
+    """
+    return distinct_on(
+        select(
+            *LEDGER_KEY,
+            InventoryMovement.new_stock.label("quantity"),
+            InventoryMovement.created_at.label("last_movement_at"),
+        )
+        .where(*_movements(company_id, product_id, branch_id, warehouse_id), InventoryMovement.created_at <= as_utc(at)),
+        *LEDGER_KEY,
+    ).order_by(*LEDGER_KEY, InventoryMovement.created_at.desc(), InventoryMovement.id.desc())
+
+
+def period_balances(
+    company_id: uuid.UUID,
+    start: datetime,
+    end: datetime,
+    period: str = "month",
+    *,
+    product_id: Optional[uuid.UUID] = None,
+    branch_id: Optional[uuid.UUID] = None,
+    warehouse_id: Optional[uuid.UUID] = None,
+) -> Select:
+    """Opening/closing stock and flows of each ledger key per period in ``[start, end)``.
+
+    Only periods in which a key moved get a row; in any other period its
+    stock is the closing stock of its previous row. Columns: the key,
+    ``period_start``, ``opening``, ``closing``, ``inflow``, ``outflow`` and
+    ``movements``.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}")
+    bucket = func.date_trunc(literal_column(f"'{period}'"), InventoryMovement.created_at)
+    partition = (*LEDGER_KEY, bucket)
+    chronological = (InventoryMovement.created_at, InventoryMovement.id)
+    ranked = (
+        select(
+            *LEDGER_KEY,
+            bucket.label("period_start"),
+            InventoryMovement.previous_stock,
+            InventoryMovement.new_stock,
+            InventoryMovement.quantity,
+            func.row_number().over(partition_by=partition, order_by=chronological).label("first_rank"),
+            func.row_number().over(
+                partition_by=partition, order_by=tuple(column.desc() for column in chronological)
+            ).label("last_rank"),
+        )
+        .where(
+            *_movements(company_id, product_id, branch_id, warehouse_id),
+            InventoryMovement.created_at >= as_utc(start),
+            InventoryMovement.created_at < as_utc(end),
+        )
+        .subquery()
+    )
+    key = (ranked.c.product_id, ranked.c.variant_id, ranked.c.branch_id, ranked.c.warehouse_id)
+    return (
+        select(
+            *key,
+            ranked.c.period_start,
+            func.max(case((ranked.c.first_rank == 1, ranked.c.previous_stock))).label("opening"),
+            func.max(case((ranked.c.last_rank == 1, ranked.c.new_stock))).label("closing"),
+            func.coalesce(func.sum(case((ranked.c.quantity > 0, ranked.c.quantity))), 0.0).label("inflow"),
+            func.coalesce(func.sum(case((ranked.c.quantity < 0, -ranked.c.quantity))), 0.0).label("outflow"),
+            func.count().label("movements"),
+        )
+        .group_by(*key, ranked.c.period_start)
+        .order_by(*key, ranked.c.period_start)
+    )
+
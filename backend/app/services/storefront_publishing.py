@@ -0,0 +1,164 @@
+"""Set-based product publication in a storefront.
+
+``publish_products`` reads the candidate products and the storefront's
+publications as plain rows, allocates the new slugs in one pass against the
+storefront's slugs loaded once, and writes every new or reactivated
+publication with batched ``INSERT ... ON CONFLICT (storefront_id,
+product_id) DO UPDATE``. Publications already live are not written at all,
+and the storefront's catalog cache is invalidated once per call instead of
+once per row.
+"""
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import mark_stale
+from app.models.product import Product
+from app.models.storefront import PublishedProduct
+from app.services.pricing import mark_prices_stale
+from app.services.reference_cache import CATALOG, storefront_content_tags
+
+# Rows per executemany; SQLAlchemy sends each batch as multi-row INSERTs.
+PUBLISH_BATCH_ROWS = 2000
+
+
+def product_slug(value: str) -> str:
+    value = (value or "").strip().lower()
+    value = re.sub(r"[^a-z0-9]+", "-", value)
+    return value.strip("-") or "product"
+
+
+class SlugAllocator:
+    """Unique slugs against a preloaded set, without a query per candidate.
+
+    The next free suffix of each base is remembered, so many products with
+    the same name cost one probe each instead of one per earlier duplicate.
+    """
+
+    def __init__(self, taken: Iterable[str]) -> None:
+        self.taken = set(taken)
+        self._next_suffix: dict[str, int] = {}
+
+    def allocate(self, name: str) -> str:
+        base = product_slug(name)
+        slug = base
+        if slug in self.taken:
+            suffix = self._next_suffix.get(base, 2)
+            while f"{base}-{suffix}" in self.taken:
+                suffix += 1
+            slug = f"{base}-{suffix}"
+            self._next_suffix[base] = suffix + 1
+        self.taken.add(slug)
+        return slug
+
+
+async def taken_slugs(db: AsyncSession, storefront_id: uuid.UUID, base: Optional[str] = None) -> set[str]:
+    """Slugs used in the storefront, active or not; with ``base``, only that slug and its ``-N`` variants."""
+    query = select(PublishedProduct.slug).where(PublishedProduct.storefront_id == storefront_id)
+    if base:
+        query = query.where(or_(
+            PublishedProduct.slug == base,
+            PublishedProduct.slug.startswith(f"{base}-", autoescape=True),
+        ))
+    return set((await db.execute(query)).scalars().all())
+
+
+@dataclass
+class PublishResult:
+    requested: int
+    published: int = 0
+    reactivated: int = 0
+    already_published: int = 0
+    not_found: list[uuid.UUID] = field(default_factory=list)
+
+
+async def publish_products(
+    db: AsyncSession,
+    *,
+    company_id: uuid.UUID,
+    storefront_id: uuid.UUID,
+    user_id: Optional[uuid.UUID],
+    product_ids: Optional[list[uuid.UUID]] = None,
+) -> PublishResult:
+    """Publish ``product_ids`` (or every active product) in the storefront, without committing.
+
+    A concurrent publication taking one of the allocated slugs makes the
+    insert fail with ``IntegrityError``; retrying allocates around it.
+    """
+    requested_ids = list(dict.fromkeys(product_ids or []))
+    query = select(Product.id, Product.name).where(
+        Product.company_id == company_id,
+        Product.is_active == True,
+    )
+    if requested_ids:
+        query = query.where(Product.id.in_(requested_ids))
+    products = (await db.execute(query.order_by(Product.created_at.asc(), Product.id.asc()))).all()
+    result = PublishResult(requested=len(requested_ids) if requested_ids else len(products))
+    found_ids = {product_id for product_id, _ in products}
+    result.not_found = [product_id for product_id in requested_ids if product_id not in found_ids]
+
+    existing = {
+        row.product_id: row
+        for row in (await db.execute(
+            select(
+                PublishedProduct.product_id,
+                PublishedProduct.slug,
+                PublishedProduct.is_active,
+                PublishedProduct.is_published,
+            ).where(PublishedProduct.storefront_id == storefront_id)
+        )).all()
+    }
+    slugs = SlugAllocator(row.slug for row in existing.values())
+    now = datetime.utcnow()
+    records = []
+    for product_id, name in products:
+        current = existing.get(product_id)
+        result.published += 1
+        if current and current.is_active and current.is_published:
+            result.already_published += 1
+            continue
+        if current:
+            result.reactivated += 1
+        records.append({
+            "id": uuid.uuid4(),
+            "storefront_id": storefront_id,
+            "product_id": product_id,
+            # A reactivated publication keeps its slug; the conflict update leaves it alone.
+            "slug": current.slug if current else slugs.allocate(name),
+            "is_published": True,
+            "is_active": True,
+            "is_featured": False,
+            "show_stock": True,
+            "sort_order": 0,
+            "company_id": company_id,
+            "created_by_id": user_id,
+            "updated_by_id": user_id,
+            "created_at": now,
+            "updated_at": now,
+        })
+    if not records:
+        return result
+
+    table = PublishedProduct.__table__
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        constraint="uq_published_product_storefront_product",
+        set_={
+            "is_active": True,
+            "is_published": True,
+            "updated_by_id": statement.excluded.updated_by_id,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+    for start in range(0, len(records), PUBLISH_BATCH_ROWS):
+        await db.execute(statement, records[start:start + PUBLISH_BATCH_ROWS])
+    # Core statements bypass the session hooks that tag PublishedProduct changes.
+    mark_stale(db, *storefront_content_tags(storefront_id, CATALOG))
+    mark_prices_stale(db, (record["product_id"] for record in records))
+    return result
@@ -1,6 +1,6 @@
 """Tenant-scoped shipping configuration and server-side rate calculation."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import unicodedata
 from typing import Any
 import uuid
@@ -9,12 +9,14 @@ from fastapi import HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import reference_cache, storefront_tag
 from app.models.product import Product
 from app.models.storefront import (
     Storefront,
     StorefrontShippingMethod,
     StorefrontShippingRule,
 )
+from app.services.reference_cache import SHIPPING
 
 
 CHARGE_TYPES = {"free", "flat", "weight", "percentage", "quote"}
@@ -39,12 +41,45 @@ def _text(value: Any) -> str | None:
     return result or None
 
 
+@dataclass(frozen=True)
+class ShippingRuleRate:
+    id: uuid.UUID
+    name: str
+    destination_type: str | None
+    country_code: str | None
+    state_code: str | None
+    state_name: str | None
+    city_code: str | None
+    city_name: str | None
+    payment_provider: str | None
+    min_subtotal: float | None
+    max_subtotal: float | None
+    min_weight: float | None
+    max_weight: float | None
+    charge_type: str | None
+    amount: float | None
+    rate_per_kg: float | None
+
+
+@dataclass(frozen=True)
+class ShippingMethodRate:
+    """Cached, detached copy of an enabled method and its enabled rules."""
+
+    id: uuid.UUID
+    name: str
+    method_type: str | None
+    rules: tuple[ShippingRuleRate, ...] = field(default_factory=tuple)
+
+
+_RULE_FIELDS = tuple(name for name in ShippingRuleRate.__dataclass_fields__)
+
+
 @dataclass
 class ShippingCalculation:
     shipping: float
     total_weight: float
-    method: StorefrontShippingMethod | None = None
-    rule: StorefrontShippingRule | None = None
+    method: ShippingMethodRate | None = None
+    rule: ShippingRuleRate | None = None
     quote_required: bool = False
     requires_destination: bool = False
 
@@ -143,6 +178,57 @@ async def ensure_default_shipping_configuration(
     return True
 
 
+async def load_shipping_rates(db: AsyncSession, storefront_id: uuid.UUID) -> list[ShippingMethodRate]:
+    """Enabled methods with their enabled rules, in evaluation order.
+
+    Checkout previews call this on every cart change, so the rate table is
+    served from the reference cache and reloaded only after a shipping edit.
+    """
+
+    async def load() -> list[dict]:
+        methods = (await db.execute(
+            select(StorefrontShippingMethod).where(
+                StorefrontShippingMethod.storefront_id == storefront_id,
+                StorefrontShippingMethod.is_active == True,
+                StorefrontShippingMethod.is_enabled == True,
+            ).order_by(StorefrontShippingMethod.sort_order.asc(), StorefrontShippingMethod.created_at.asc())
+        )).scalars().all()
+        rules_by_method: dict[uuid.UUID, list[dict]] = {method.id: [] for method in methods}
+        if methods:
+            rules = (await db.execute(
+                select(StorefrontShippingRule).where(
+                    StorefrontShippingRule.storefront_id == storefront_id,
+                    StorefrontShippingRule.method_id.in_(rules_by_method),
+                    StorefrontShippingRule.is_active == True,
+                    StorefrontShippingRule.is_enabled == True,
+                ).order_by(StorefrontShippingRule.priority.asc(), StorefrontShippingRule.created_at.asc())
+            )).scalars().all()
+            for rule in rules:
+                rules_by_method[rule.method_id].append({name: getattr(rule, name) for name in _RULE_FIELDS})
+        return [
+            {"id": method.id, "name": method.name, "method_type": method.method_type, "rules": rules_by_method[method.id]}
+            for method in methods
+        ]
+
+    cached = await reference_cache.get_or_load(
+        f"storefront:{storefront_id}:shipping-rates",
+        [storefront_tag(storefront_id, SHIPPING)],
+        load,
+    )
+    return [
+        ShippingMethodRate(
+            id=uuid.UUID(str(method["id"])),
+            name=method["name"],
+            method_type=method["method_type"],
+            rules=tuple(
+                ShippingRuleRate(**{**rule, "id": uuid.UUID(str(rule["id"]))})
+                for rule in method["rules"]
+            ),
+        )
+        for method in cached
+    ]
+
+
 async def calculate_shipping(
     db: AsyncSession,
     storefront: Storefront,
@@ -154,14 +240,7 @@ async def calculate_shipping(
     allow_missing_destination: bool = True,
 ) -> ShippingCalculation:
     """Resolve the first matching rule. Client-provided amounts are never used."""
-    methods_result = await db.execute(
-        select(StorefrontShippingMethod).where(
-            StorefrontShippingMethod.storefront_id == storefront.id,
-            StorefrontShippingMethod.is_active == True,
-            StorefrontShippingMethod.is_enabled == True,
-        ).order_by(StorefrontShippingMethod.sort_order.asc(), StorefrontShippingMethod.created_at.asc())
-    )
-    methods = methods_result.scalars().all()
+    methods = await load_shipping_rates(db, storefront.id)
     total_weight = 0.0
     product_ids = [row.product_id for row in rows]
     if product_ids:
@@ -188,15 +267,7 @@ async def calculate_shipping(
     address_city = _key(getattr(address, "city", None))
     address_city_code = _key(getattr(address, "city_code", None))
     provider = _key(payment_provider)
-    rules_result = await db.execute(
-        select(StorefrontShippingRule).where(
-            StorefrontShippingRule.storefront_id == storefront.id,
-            StorefrontShippingRule.method_id == method.id,
-            StorefrontShippingRule.is_active == True,
-            StorefrontShippingRule.is_enabled == True,
-        ).order_by(StorefrontShippingRule.priority.asc(), StorefrontShippingRule.created_at.asc())
-    )
-    rules = rules_result.scalars().all()
+    rules = method.rules
     destination_missing = not (address_state or address_state_code or address_city or address_city_code)
 
     for rule in rules:
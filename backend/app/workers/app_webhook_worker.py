@@ -0,0 +1,263 @@
+"""Deliver queued marketplace app webhooks from Redis Streams.
+
+Each stream message is one delivery attempt. Attempts in a batch are posted
+concurrently (bounded per partner origin), their ``AppWebhookDelivery`` rows
+and receipts are written in one transaction, and failed attempts are retried
+through a delayed outbox event so retries survive restarts. Attempts skipped
+by an open circuit are postponed without counting as attempts.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from redis import asyncio as redis
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import SessionLocal
+from app.models.app_definition import AppDefinition
+from app.models.app_webhook_delivery import AppWebhookDelivery
+from app.models.company_app_install import CompanyAppInstall
+from app.models.outbox_consumption import OutboxConsumption
+from app.services.app_webhooks import (
+    WEBHOOK_EVENT_TYPE,
+    WebhookDispatcher,
+    WebhookResult,
+    encode_webhook_body,
+    enqueue_app_webhook,
+    is_retryable,
+    next_attempt_at,
+    signed_headers,
+    webhook_endpoint,
+)
+
+LOGGER = logging.getLogger("lumefy.app_webhook_worker")
+STREAM = os.getenv("REDIS_OUTBOX_STREAM", "lumefy:events")
+GROUP = "app-webhooks"
+CONSUMER = os.getenv("OUTBOX_CONSUMER_NAME", socket.gethostname())
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+BATCH_SIZE = max(1, int(os.getenv("APP_WEBHOOK_BATCH_SIZE", "50")))
+MAX_ATTEMPTS = max(1, int(os.getenv("APP_WEBHOOK_MAX_ATTEMPTS", "6")))
+RETRY_BASE_SECONDS = float(os.getenv("APP_WEBHOOK_RETRY_BASE_SECONDS", "30"))
+RETRY_MAX_SECONDS = float(os.getenv("APP_WEBHOOK_RETRY_MAX_SECONDS", "3600"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("APP_WEBHOOK_CIRCUIT_RESET_SECONDS", "60"))
+
+
+def build_dispatcher() -> WebhookDispatcher:
+    return WebhookDispatcher(
+        max_workers=int(os.getenv("APP_WEBHOOK_HTTP_WORKERS", "16")),
+        per_endpoint_concurrency=int(os.getenv("APP_WEBHOOK_PER_ENDPOINT_CONCURRENCY", "4")),
+        timeout_seconds=float(os.getenv("APP_WEBHOOK_TIMEOUT_SECONDS", "8")),
+        failure_threshold=int(os.getenv("APP_WEBHOOK_CIRCUIT_FAILURES", "5")),
+        circuit_reset_seconds=CIRCUIT_RESET_SECONDS,
+    )
+
+
+async def _attempt(
+    dispatcher: WebhookDispatcher,
+    install: CompanyAppInstall,
+    payload: dict,
+) -> tuple[str | None, str | None, WebhookResult]:
+    endpoint = webhook_endpoint(install)
+    if not endpoint:
+        return None, None, WebhookResult(False, None, "webhook_url_missing")
+    if not install.webhook_secret:
+        return endpoint, None, WebhookResult(False, None, "webhook_secret_missing")
+    body = encode_webhook_body(payload["envelope"])
+    # Sign at send time so a rotated secret applies to queued retries as well.
+    signature, headers = signed_headers(install.webhook_secret, payload["event_name"], payload["webhook_id"], body)
+    return endpoint, signature, await dispatcher.deliver(endpoint, body, headers)
+
+
+def _stage(db: AsyncSession, staged: list[tuple], now: datetime) -> list[dict]:
+    """Delivery rows of ``staged`` attempts; queues their retries and receipts in ``db``."""
+    delivery_rows = []
+    for (_, event_id, _, payload), install, app, outcome in staged:
+        db.add(OutboxConsumption(event_id=event_id, consumer=GROUP))
+        if outcome is None:
+            continue
+        endpoint, signature, result = outcome
+        attempt_number = int(payload.get("attempt_number") or 1)
+        delivery_rows.append({
+            "id": uuid.uuid4(),
+            "company_id": install.company_id,
+            "app_id": app.id,
+            "install_id": install.id,
+            "event_name": payload["event_name"],
+            "endpoint": endpoint,
+            "request_payload": payload["envelope"],
+            "signature": signature,
+            "success": result.delivered,
+            "status_code": result.status_code,
+            "error_message": result.reason,
+            "attempt_number": attempt_number,
+            "outbox_event_id": event_id,
+            "created_at": now,
+        })
+        if result.delivered or not endpoint or not signature:
+            continue
+        retry = {}
+        if result.circuit_open:
+            # Nothing was sent: repeat the same attempt once the circuit may
+            # have closed, without spending one of the attempts.
+            retry = {
+                "attempt_number": attempt_number,
+                "deferral": int(payload.get("deferral") or 0) + 1,
+                "available_at": now + timedelta(seconds=CIRCUIT_RESET_SECONDS * random.uniform(1, 1.5)),
+            }
+        elif is_retryable(result.status_code) and attempt_number < MAX_ATTEMPTS:
+            retry = {
+                "attempt_number": attempt_number + 1,
+                "available_at": next_attempt_at(
+                    attempt_number, base_seconds=RETRY_BASE_SECONDS, max_seconds=RETRY_MAX_SECONDS
+                ),
+            }
+        if retry:
+            enqueue_app_webhook(
+                db,
+                install,
+                app,
+                install.company_id,
+                payload["event_name"],
+                payload["envelope"].get("payload") or {},
+                webhook_id=payload["webhook_id"],
+                envelope=payload["envelope"],
+                **retry,
+            )
+    return delivery_rows
+
+
+async def _record(db: AsyncSession, staged: list[tuple], now: datetime) -> None:
+    delivery_rows = _stage(db, staged, now)
+    if delivery_rows:
+        await db.execute(
+            insert(AppWebhookDelivery)
+            .values(delivery_rows)
+            .on_conflict_do_nothing(index_elements=["outbox_event_id"])
+        )
+    await db.commit()
+
+
+async def _record_separately(db: AsyncSession, staged: list[tuple], now: datetime) -> None:
+    """Record each attempt in its own transaction, skipping those another consumer recorded."""
+    for entry in staged:
+        (_, event_id, _, _), install, app, _outcome = entry
+        recorded = await db.scalar(
+            select(OutboxConsumption.event_id).where(
+                OutboxConsumption.event_id == event_id,
+                OutboxConsumption.consumer == GROUP,
+            )
+        )
+        if recorded:
+            continue
+        if install is not None:
+            # The rollback expired them.
+            await db.refresh(install)
+            await db.refresh(app)
+        try:
+            await _record(db, [entry], now)
+        except IntegrityError:
+            # Recorded by another consumer meanwhile; its receipt wins.
+            await db.rollback()
+
+
+async def process_batch(dispatcher: WebhookDispatcher, entries: list[tuple[str, dict]]) -> list[str]:
+    """Deliver webhook attempts in ``entries`` and return the message ids to acknowledge."""
+    ack_ids: list[str] = []
+    jobs: list[tuple[str, uuid.UUID, uuid.UUID, dict]] = []
+    for message_id, values in entries:
+        if values.get("event_type") != WEBHOOK_EVENT_TYPE:
+            ack_ids.append(message_id)
+            continue
+        try:
+            payload = json.loads(values.get("payload") or "{}")
+            jobs.append((message_id, uuid.UUID(values["event_id"]), uuid.UUID(payload["install_id"]), payload))
+        except (KeyError, TypeError, ValueError):
+            LOGGER.warning("Discarding malformed webhook event %s", message_id)
+            ack_ids.append(message_id)
+    if not jobs:
+        return ack_ids
+
+    async with SessionLocal() as db:
+        processed = set((await db.execute(
+            select(OutboxConsumption.event_id).where(
+                OutboxConsumption.event_id.in_([event_id for _, event_id, _, _ in jobs]),
+                OutboxConsumption.consumer == GROUP,
+            )
+        )).scalars().all())
+        pending = [job for job in jobs if job[1] not in processed]
+        if pending:
+            rows = await db.execute(
+                select(CompanyAppInstall, AppDefinition)
+                .join(AppDefinition, AppDefinition.id == CompanyAppInstall.app_id)
+                .where(CompanyAppInstall.id.in_({install_id for _, _, install_id, _ in pending}))
+            )
+            installs = {install.id: (install, app) for install, app in rows.all()}
+            deliverable = [job for job in pending if job[2] in installs]
+            outcomes = dict(zip(
+                (job[1] for job in deliverable),
+                await asyncio.gather(*(
+                    _attempt(dispatcher, installs[install_id][0], payload)
+                    for _, _, install_id, payload in deliverable
+                )),
+            ))
+            # Jobs of uninstalled apps only get their receipt.
+            staged = [(job, *installs.get(job[2], (None, None)), outcomes.get(job[1])) for job in pending]
+            now = datetime.utcnow()
+            try:
+                await _record(db, staged, now)
+            except IntegrityError:
+                # Another consumer recorded part of this batch after our
+                # receipt check. Its receipts win (redelivering those would
+                # double-send); the rest of the batch must not be lost with it.
+                await db.rollback()
+                await _record_separately(db, staged, now)
+    ack_ids.extend(message_id for message_id, _, _, _ in jobs)
+    return ack_ids
+
+
+async def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    client = redis.from_url(REDIS_URL, decode_responses=True, socket_timeout=10)
+    dispatcher = build_dispatcher()
+    try:
+        try:
+            await client.xgroup_create(STREAM, GROUP, id="0-0", mkstream=True)
+        except Exception as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+        while True:
+            _next_id, claimed, _deleted = await client.xautoclaim(
+                STREAM, GROUP, CONSUMER, min_idle_time=60000, start_id="0-0", count=BATCH_SIZE
+            )
+            entries = list(claimed)
+            if not entries:
+                try:
+                    messages = await client.xreadgroup(GROUP, CONSUMER, {STREAM: ">"}, count=BATCH_SIZE, block=1000)
+                except redis.TimeoutError:
+                    continue
+                entries = [entry for _stream, stream_entries in messages for entry in stream_entries]
+            if not entries:
+                continue
+            try:
+                ack_ids = await process_batch(dispatcher, entries)
+            except Exception:  # noqa: BLE001 - leave unacknowledged so Redis redelivers the batch
+                LOGGER.exception("App webhook batch failed")
+                await asyncio.sleep(1)
+                continue
+            if ack_ids:
+                await client.xack(STREAM, GROUP, *ack_ids)
+    finally:
+        dispatcher.close()
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
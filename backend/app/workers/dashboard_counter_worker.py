@@ -0,0 +1,108 @@
+"""Keep the live dashboard counters current from ``dashboard.counters`` outbox events.
+
+Events in a batch are merged so each company's user and product counts are
+recomputed once per batch. Every ``DASHBOARD_COUNTERS_RECONCILE_SECONDS`` (and
+at start-up, which also fills a cold Redis) the worker recomputes all counters
+of every company from SQL, repairing anything a missed refresh left behind.
+The sales part is refreshed by the sales rollup worker.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from typing import Optional
+
+from redis import asyncio as redis
+
+from app.core.database import SessionLocal
+from app.services.live_counters import (
+    COUNTERS_EVENT_TYPE,
+    CounterTargets,
+    reconcile_counters,
+    refresh_catalog_counters,
+)
+
+LOGGER = logging.getLogger("lumefy.dashboard_counter_worker")
+STREAM = os.getenv("REDIS_OUTBOX_STREAM", "lumefy:events")
+GROUP = "dashboard-counters"
+CONSUMER = os.getenv("OUTBOX_CONSUMER_NAME", socket.gethostname())
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+BATCH_SIZE = max(1, int(os.getenv("DASHBOARD_COUNTERS_BATCH_SIZE", "200")))
+RECONCILE_SECONDS = max(60, int(os.getenv("DASHBOARD_COUNTERS_RECONCILE_SECONDS", "900")))
+
+
+async def process_batch(client, entries: list[tuple[str, dict]]) -> list[str]:
+    """Refresh the companies named by counter events in ``entries``; returns the message ids to acknowledge."""
+    ack_ids: list[str] = []
+    targets = CounterTargets()
+    for message_id, values in entries:
+        ack_ids.append(message_id)
+        if values.get("event_type") != COUNTERS_EVENT_TYPE:
+            continue
+        try:
+            targets.merge(CounterTargets.from_payload(json.loads(values.get("payload") or "{}")))
+        except (TypeError, ValueError):
+            LOGGER.warning("Discarding malformed counter event %s", message_id)
+    if not targets:
+        return ack_ids
+
+    async with SessionLocal() as db:
+        for company_id in sorted(targets.companies, key=str):
+            await refresh_catalog_counters(db, client, company_id)
+    return ack_ids
+
+
+async def reconcile(client, last_run: Optional[float]) -> float:
+    """Recompute every company's counters when the interval has passed; returns the last run time."""
+    now = time.monotonic()
+    if last_run is not None and now - last_run < RECONCILE_SECONDS:
+        return last_run
+    async with SessionLocal() as db:
+        companies = await reconcile_counters(db, client)
+    LOGGER.info("Reconciled live counters of %s companies", companies)
+    return now
+
+
+async def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    client = redis.from_url(REDIS_URL, decode_responses=True, socket_timeout=10)
+    last_reconcile: Optional[float] = None
+    try:
+        try:
+            await client.xgroup_create(STREAM, GROUP, id="0-0", mkstream=True)
+        except Exception as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+        while True:
+            try:
+                last_reconcile = await reconcile(client, last_reconcile)
+            except Exception:  # noqa: BLE001 - retried on the next loop
+                LOGGER.exception("Live counter reconcile failed")
+            _next_id, claimed, _deleted = await client.xautoclaim(
+                STREAM, GROUP, CONSUMER, min_idle_time=60000, start_id="0-0", count=BATCH_SIZE
+            )
+            entries = list(claimed)
+            if not entries:
+                try:
+                    messages = await client.xreadgroup(GROUP, CONSUMER, {STREAM: ">"}, count=BATCH_SIZE, block=1000)
+                except redis.TimeoutError:
+                    continue
+                entries = [entry for _stream, stream_entries in messages for entry in stream_entries]
+            if not entries:
+                continue
+            try:
+                ack_ids = await process_batch(client, entries)
+            except Exception:  # noqa: BLE001 - leave unacknowledged so Redis redelivers the batch
+                LOGGER.exception("Live counter batch failed")
+                await asyncio.sleep(1)
+                continue
+            if ack_ids:
+                await client.xack(STREAM, GROUP, *ack_ids)
+    finally:
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
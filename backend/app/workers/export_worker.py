@@ -0,0 +1,81 @@
+"""Produce queued background exports and purge expired export files."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.export_job import ExportJob
+from app.services.export_jobs import purge_expired_exports, run_export_job
+
+
+LOGGER = logging.getLogger("lumefy.export_worker")
+POLL_SECONDS = max(1.0, float(os.getenv("EXPORT_POLL_SECONDS", "2")))
+STALE_MINUTES = max(10, int(os.getenv("EXPORT_STALE_MINUTES", "60")))
+
+
+async def recover_stale_jobs(*, recover_all: bool = False) -> int:
+    conditions = [ExportJob.status == "RUNNING"]
+    if not recover_all:
+        conditions.append(ExportJob.started_at < datetime.utcnow() - timedelta(minutes=STALE_MINUTES))
+    async with SessionLocal() as db:
+        jobs = list((await db.execute(
+            select(ExportJob).where(*conditions).with_for_update(skip_locked=True)
+        )).scalars().all())
+        for job in jobs:
+            job.status = "FAILED"
+            job.finished_at = datetime.utcnow()
+            job.error_message = "La exportación fue interrumpida. Solicítala de nuevo."
+        await db.commit()
+        return len(jobs)
+
+
+async def claim_next_job() -> UUID | None:
+    async with SessionLocal() as db:
+        job = (await db.execute(
+            select(ExportJob)
+            .where(ExportJob.status == "QUEUED")
+            .order_by(ExportJob.queued_at.asc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )).scalars().first()
+        if not job:
+            return None
+        job.status = "RUNNING"
+        job.started_at = datetime.utcnow()
+        await db.commit()
+        return job.id
+
+
+async def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    # A restart interrupts running exports without updating their rows; fail
+    # them now so requesters can ask again instead of waiting for the timeout.
+    # Run a single replica: a second one would fail the first one's jobs here.
+    try:
+        recovered = await recover_stale_jobs(recover_all=True)
+        if recovered:
+            LOGGER.warning("Recovered %s interrupted export job(s) at startup", recovered)
+    except Exception:  # noqa: BLE001 - retry through the normal polling loop
+        LOGGER.exception("Initial export job recovery failed")
+    while True:
+        try:
+            await recover_stale_jobs()
+            await purge_expired_exports()
+            job_id = await claim_next_job()
+            if job_id:
+                await run_export_job(job_id)
+                continue
+        except Exception:  # noqa: BLE001 - keep the durable worker alive and observable
+            LOGGER.exception("Export worker iteration failed")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
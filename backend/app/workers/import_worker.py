@@ -0,0 +1,87 @@
+"""Apply queued spreadsheet imports, resuming the ones a restart interrupted,
+and discard chunked uploads the client abandoned."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.import_job import ImportJob
+from app.services.import_jobs import purge_abandoned_uploads, run_import_job
+
+
+LOGGER = logging.getLogger("lumefy.import_worker")
+POLL_SECONDS = max(1.0, float(os.getenv("IMPORT_POLL_SECONDS", "2")))
+STALE_MINUTES = max(10, int(os.getenv("IMPORT_STALE_MINUTES", "60")))
+# A job that keeps killing the worker (e.g. out of memory) stops being retried.
+MAX_ATTEMPTS = 3
+
+
+async def recover_stale_jobs(*, recover_all: bool = False) -> int:
+    """Queue interrupted jobs again; they resume after their last committed chunk."""
+    conditions = [ImportJob.status == "RUNNING"]
+    if not recover_all:
+        conditions.append(ImportJob.started_at < datetime.utcnow() - timedelta(minutes=STALE_MINUTES))
+    async with SessionLocal() as db:
+        jobs = list((await db.execute(
+            select(ImportJob).where(*conditions).with_for_update(skip_locked=True)
+        )).scalars().all())
+        for job in jobs:
+            if job.attempts >= MAX_ATTEMPTS:
+                job.status = "FAILED"
+                job.finished_at = datetime.utcnow()
+                job.error_message = "La importación fue interrumpida varias veces. Divide el archivo e inténtalo de nuevo."
+            else:
+                job.status = "QUEUED"
+        await db.commit()
+        return len(jobs)
+
+
+async def claim_next_job() -> UUID | None:
+    async with SessionLocal() as db:
+        job = (await db.execute(
+            select(ImportJob)
+            .where(ImportJob.status == "QUEUED")
+            .order_by(ImportJob.queued_at.asc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )).scalars().first()
+        if not job:
+            return None
+        job.status = "RUNNING"
+        job.attempts += 1
+        job.started_at = datetime.utcnow()
+        await db.commit()
+        return job.id
+
+
+async def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    # Run a single replica: a second one would requeue the first one's jobs here.
+    try:
+        recovered = await recover_stale_jobs(recover_all=True)
+        if recovered:
+            LOGGER.warning("Recovered %s interrupted import job(s) at startup", recovered)
+    except Exception:  # noqa: BLE001 - retry through the normal polling loop
+        LOGGER.exception("Initial import job recovery failed")
+    while True:
+        try:
+            await recover_stale_jobs()
+            await purge_abandoned_uploads()
+            job_id = await claim_next_job()
+            if job_id:
+                await run_import_job(job_id)
+                continue
+        except Exception:  # noqa: BLE001 - keep the durable worker alive and observable
+            LOGGER.exception("Import worker iteration failed")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -15,6 +15,10 @@ from sqlalchemy.orm import aliased
 from app.core.database import SessionLocal
 from app.models.integration import IntegrationSource, IntegrationSyncRun
 from app.services.integration_service import IntegrationSyncConflict, enqueue_sync, execute_sync_run
+import app.services.inventory_snapshots  # noqa: F401 - synced stock refreshes the snapshots
+import app.services.live_counters  # noqa: F401 - synced products refresh the dashboard counters
+import app.services.product_listing  # noqa: F401 - synced variants update Product.variant_count
+import app.services.pricing  # noqa: F401 - synced prices and variants refresh the effective prices
 
 
 LOGGER = logging.getLogger("lumefy.integration_sync_worker")
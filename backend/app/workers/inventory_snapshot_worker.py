@@ -0,0 +1,108 @@
+"""Keep the daily inventory snapshots current from ``inventory.snapshot`` outbox events.
+
+Events in a batch are merged so each stock pair and branch is recomputed once
+per batch from the live tables; a redelivered event just recomputes them
+again. When a new UTC day starts the worker also carries every branch's
+totals forward, so each branch has one row per day even without movements.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+from datetime import date
+from typing import Optional
+
+from redis import asyncio as redis
+
+from app.core.database import SessionLocal
+from app.services.inventory_snapshots import (
+    SNAPSHOT_EVENT_TYPE,
+    SnapshotTargets,
+    close_inventory_day,
+    refresh_inventory_snapshots,
+    utc_today,
+)
+
+LOGGER = logging.getLogger("lumefy.inventory_snapshot_worker")
+STREAM = os.getenv("REDIS_OUTBOX_STREAM", "lumefy:events")
+GROUP = "inventory-snapshots"
+CONSUMER = os.getenv("OUTBOX_CONSUMER_NAME", socket.gethostname())
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+BATCH_SIZE = max(1, int(os.getenv("INVENTORY_SNAPSHOT_BATCH_SIZE", "200")))
+
+
+async def process_batch(entries: list[tuple[str, dict]]) -> list[str]:
+    """Recompute the snapshots named by events in ``entries``; returns the message ids to acknowledge."""
+    ack_ids: list[str] = []
+    targets = SnapshotTargets()
+    for message_id, values in entries:
+        ack_ids.append(message_id)
+        if values.get("event_type") != SNAPSHOT_EVENT_TYPE:
+            continue
+        try:
+            targets.merge(SnapshotTargets.from_payload(json.loads(values.get("payload") or "{}")))
+        except (TypeError, ValueError):
+            LOGGER.warning("Discarding malformed snapshot event %s", message_id)
+    if not targets:
+        return ack_ids
+
+    async with SessionLocal() as db:
+        await refresh_inventory_snapshots(db, targets)
+        await db.commit()
+    return ack_ids
+
+
+async def close_day(closed: Optional[date]) -> date:
+    """Carry the branch totals forward once per UTC day; returns the day closed."""
+    today = utc_today()
+    if closed == today:
+        return closed
+    async with SessionLocal() as db:
+        carried = await close_inventory_day(db, today)
+        await db.commit()
+    LOGGER.info("Carried %s branch inventory totals forward to %s", carried, today)
+    return today
+
+
+async def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    client = redis.from_url(REDIS_URL, decode_responses=True, socket_timeout=10)
+    closed: Optional[date] = None
+    try:
+        try:
+            await client.xgroup_create(STREAM, GROUP, id="0-0", mkstream=True)
+        except Exception as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+        while True:
+            try:
+                closed = await close_day(closed)
+            except Exception:  # noqa: BLE001 - retried on the next loop
+                LOGGER.exception("Inventory day close failed")
+            _next_id, claimed, _deleted = await client.xautoclaim(
+                STREAM, GROUP, CONSUMER, min_idle_time=60000, start_id="0-0", count=BATCH_SIZE
+            )
+            entries = list(claimed)
+            if not entries:
+                try:
+                    messages = await client.xreadgroup(GROUP, CONSUMER, {STREAM: ">"}, count=BATCH_SIZE, block=1000)
+                except redis.TimeoutError:
+                    continue
+                entries = [entry for _stream, stream_entries in messages for entry in stream_entries]
+            if not entries:
+                continue
+            try:
+                ack_ids = await process_batch(entries)
+            except Exception:  # noqa: BLE001 - leave unacknowledged so Redis redelivers the batch
+                LOGGER.exception("Inventory snapshot batch failed")
+                await asyncio.sleep(1)
+                continue
+            if ack_ids:
+                await client.xack(STREAM, GROUP, *ack_ids)
+    finally:
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,5 @@
 """Idempotent consumer for operational inventory events from Redis Streams."""
 import asyncio
-import html
 import json
 import os
 import socket
@@ -17,21 +16,24 @@ from app.models.outbox_consumption import OutboxConsumption
 from app.models.sale import Sale
 from app.models.storefront import StorefrontOrder
 from app.models.email_delivery import EmailDelivery
+from app.services.notification_templates import template_cache
 
 STREAM = os.getenv("REDIS_OUTBOX_STREAM", "lumefy:events")
 GROUP = "operations"
 CONSUMER = os.getenv("OUTBOX_CONSUMER_NAME", socket.gethostname())
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+HANDLED_EVENTS = {"inventory.reserved", "inventory.released", "inventory.dispatched", "order.delivered"}
 
 
 async def process_event(event_id: str, event_type: str, payload: dict) -> bool:
     """Apply operational effects and persist the receipt in one transaction."""
+    if event_type not in HANDLED_EVENTS:
+        # The stream is shared with other consumer groups (e.g. app webhooks);
+        # their events are acknowledged here without a receipt.
+        return True
     parsed_event_id = uuid.UUID(event_id)
     customer_email = None
-    customer_name = None
-    order_code = None
-    customer_subject = None
-    customer_body = None
+    email_code = None
     async with SessionLocal() as db:
         exists = await db.scalar(select(OutboxConsumption.id).where(
             OutboxConsumption.event_id == parsed_event_id,
@@ -73,16 +75,7 @@ async def process_event(event_id: str, event_type: str, payload: dict) -> bool:
                 select(StorefrontOrder).where(StorefrontOrder.sale_id == sale.id)
             )
             if storefront_order and storefront_order.customer_email:
-                customer_email = storefront_order.customer_email
-                customer_name = html.escape(storefront_order.customer_name or "cliente")
-                order_code = str(sale.id)[:8].upper()
-                customer_subject = f"Recibimos tu pedido #{order_code}"
-                customer_body = (
-                    f"<p>Hola {customer_name},</p>"
-                    f"<p>Recibimos tu pedido <strong>#{order_code}</strong> por "
-                    f"<strong>{sale.total:.2f} {storefront_order.currency}</strong>.</p>"
-                    "<p>Te avisaremos cuando avance su preparación y despacho.</p>"
-                )
+                customer_email, email_code = storefront_order.customer_email, "ORDER_RECEIVED_EMAIL"
         elif event_type == "inventory.released" and sale:
             task = await db.scalar(select(FulfillmentTask).where(
                 FulfillmentTask.sale_id == sale.id,
@@ -115,11 +108,7 @@ async def process_event(event_id: str, event_type: str, payload: dict) -> bool:
                 ))
             storefront_order = await db.scalar(select(StorefrontOrder).where(StorefrontOrder.sale_id == sale.id))
             if storefront_order and storefront_order.customer_email:
-                customer_email = storefront_order.customer_email
-                customer_name = storefront_order.customer_name
-                order_code = str(sale.id)[:8].upper()
-                customer_subject = f"Tu pedido #{order_code} fue enviado"
-                customer_body = f"<p>Hola {customer_name},</p><p>Tu pedido <strong>#{order_code}</strong> ya fue despachado. Te avisaremos cuando sea entregado.</p>"
+                customer_email, email_code = storefront_order.customer_email, "ORDER_DISPATCHED_EMAIL"
         elif event_type == "order.delivered" and sale:
             if sale.user_id:
                 db.add(Notification(
@@ -131,19 +120,28 @@ async def process_event(event_id: str, event_type: str, payload: dict) -> bool:
                 ))
             storefront_order = await db.scalar(select(StorefrontOrder).where(StorefrontOrder.sale_id == sale.id))
             if storefront_order and storefront_order.customer_email:
-                customer_email = storefront_order.customer_email
-                customer_name = storefront_order.customer_name
-                order_code = str(sale.id)[:8].upper()
-                customer_subject = f"Tu pedido #{order_code} fue entregado"
-                customer_body = f"<p>Hola {customer_name},</p><p>Tu pedido <strong>#{order_code}</strong> fue entregado. Gracias por comprar con nosotros.</p>"
-        elif event_type not in {"inventory.reserved", "inventory.released", "inventory.dispatched", "order.delivered"}:
-            return False
+                customer_email, email_code = storefront_order.customer_email, "ORDER_DELIVERED_EMAIL"
 
         # The receipt and effects commit together. A crash or failed commit leaves
         # the stream message pending; a redelivery then safely retries everything.
         db.add(OutboxConsumption(event_id=parsed_event_id, consumer=GROUP))
         if customer_email:
-            db.add(EmailDelivery(event_id=parsed_event_id, recipient=customer_email, subject=customer_subject, html_content=customer_body, company_id=sale.company_id))
+            # Compiled per company and cached; values are HTML-escaped.
+            message = await template_cache.render(
+                db,
+                sale.company_id,
+                email_code,
+                {
+                    "customer_name": storefront_order.customer_name or "cliente",
+                    "order_code": str(sale.id)[:8].upper(),
+                    "total": float(sale.total or 0),
+                    "currency": storefront_order.currency,
+                },
+                html_body=True,
+            )
+            # None when the company disabled the email.
+            if message is not None:
+                db.add(EmailDelivery(event_id=parsed_event_id, recipient=customer_email, subject=message.title, html_content=message.body, company_id=sale.company_id))
         try:
             await db.commit()
         except IntegrityError:
@@ -0,0 +1,100 @@
+"""Apply queued bulk product deletions, resuming the ones a restart interrupted."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.product_deletion_job import ProductDeletionJob
+from app.services.asset_store import collect_unreferenced_assets
+from app.services.product_deletion import run_deletion_job
+
+
+LOGGER = logging.getLogger("lumefy.product_deletion_worker")
+POLL_SECONDS = max(1.0, float(os.getenv("PRODUCT_DELETION_POLL_SECONDS", "2")))
+STALE_MINUTES = max(10, int(os.getenv("PRODUCT_DELETION_STALE_MINUTES", "60")))
+# A job that keeps killing the worker stops being retried.
+MAX_ATTEMPTS = 3
+ASSET_GC_SECONDS = max(60, int(os.getenv("ASSET_GC_SECONDS", "600")))
+
+
+async def recover_stale_jobs(*, recover_all: bool = False) -> int:
+    """Queue interrupted jobs again; they resume after their last committed batch."""
+    conditions = [ProductDeletionJob.status == "RUNNING"]
+    if not recover_all:
+        conditions.append(ProductDeletionJob.started_at < datetime.utcnow() - timedelta(minutes=STALE_MINUTES))
+    async with SessionLocal() as db:
+        jobs = list((await db.execute(
+            select(ProductDeletionJob).where(*conditions).with_for_update(skip_locked=True)
+        )).scalars().all())
+        for job in jobs:
+            if job.attempts >= MAX_ATTEMPTS:
+                job.status = "FAILED"
+                job.finished_at = datetime.utcnow()
+                job.error_message = "La eliminación fue interrumpida varias veces. Inténtalo de nuevo."
+            else:
+                job.status = "QUEUED"
+        await db.commit()
+        return len(jobs)
+
+
+async def claim_next_job() -> UUID | None:
+    async with SessionLocal() as db:
+        job = (await db.execute(
+            select(ProductDeletionJob)
+            .where(ProductDeletionJob.status == "QUEUED")
+            .order_by(ProductDeletionJob.queued_at.asc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )).scalars().first()
+        if not job:
+            return None
+        job.status = "RUNNING"
+        job.attempts += 1
+        job.started_at = datetime.utcnow()
+        await db.commit()
+        return job.id
+
+
+async def collect_assets() -> None:
+    """Delete stored images that nothing has referenced for the grace period."""
+    async with SessionLocal() as db:
+        removed = await collect_unreferenced_assets(db)
+    if removed:
+        LOGGER.info("Removed %s unreferenced stored image(s)", removed)
+
+
+async def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    # Run a single replica: a second one would requeue the first one's jobs here.
+    try:
+        recovered = await recover_stale_jobs(recover_all=True)
+        if recovered:
+            LOGGER.warning("Recovered %s interrupted product deletion job(s) at startup", recovered)
+    except Exception:  # noqa: BLE001 - retry through the normal polling loop
+        LOGGER.exception("Initial product deletion job recovery failed")
+    next_collection = 0.0
+    while True:
+        try:
+            await recover_stale_jobs()
+            if time.monotonic() >= next_collection:
+                next_collection = time.monotonic() + ASSET_GC_SECONDS
+                await collect_assets()
+            job_id = await claim_next_job()
+            if job_id:
+                await run_deletion_job(job_id)
+                continue
+        except Exception:  # noqa: BLE001 - keep the durable worker alive and observable
+            LOGGER.exception("Product deletion worker iteration failed")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""Keep the daily sales rollups current from ``sales.rollup`` outbox events.
+
+Events in a batch are merged so each (company, day) is rebuilt once per batch.
+A rebuild recomputes the day from source rows, so no receipts are needed: a
+redelivered event just rebuilds the same day again. After a company's days are
+rebuilt, the sales part of its live dashboard counters is refreshed from them.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+
+from redis import asyncio as redis
+
+from app.core.database import SessionLocal
+from app.core.redis_client import get_redis
+from app.services.live_counters import refresh_sales_counters
+from app.services.sales_rollups import (
+    ROLLUP_EVENT_TYPE,
+    RollupTargets,
+    refresh_sales_rollups,
+    resolve_rollup_days,
+)
+
+LOGGER = logging.getLogger("lumefy.sales_rollup_worker")
+STREAM = os.getenv("REDIS_OUTBOX_STREAM", "lumefy:events")
+GROUP = "sales-rollups"
+CONSUMER = os.getenv("OUTBOX_CONSUMER_NAME", socket.gethostname())
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+BATCH_SIZE = max(1, int(os.getenv("SALES_ROLLUP_BATCH_SIZE", "200")))
+
+
+async def process_batch(entries: list[tuple[str, dict]]) -> list[str]:
+    """Rebuild the days named by rollup events in ``entries``; returns the message ids to acknowledge."""
+    ack_ids: list[str] = []
+    targets = RollupTargets()
+    for message_id, values in entries:
+        ack_ids.append(message_id)
+        if values.get("event_type") != ROLLUP_EVENT_TYPE:
+            continue
+        try:
+            targets.merge(RollupTargets.from_payload(json.loads(values.get("payload") or "{}")))
+        except (TypeError, ValueError):
+            LOGGER.warning("Discarding malformed rollup event %s", message_id)
+    if not targets:
+        return ack_ids
+
+    async with SessionLocal() as db:
+        days_by_company = await resolve_rollup_days(db, targets)
+        for company_id, days in sorted(days_by_company.items(), key=lambda item: str(item[0])):
+            await refresh_sales_rollups(db, company_id, days)
+            # One transaction per company keeps advisory locks short.
+            await db.commit()
+            try:
+                await refresh_sales_counters(db, get_redis(), company_id)
+            except Exception:  # noqa: BLE001 - the counter worker's reconcile repairs them
+                LOGGER.warning("Could not refresh live counters of company %s", company_id, exc_info=True)
+    return ack_ids
+
+
+async def main() -> None:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    client = redis.from_url(REDIS_URL, decode_responses=True, socket_timeout=10)
+    try:
+        try:
+            await client.xgroup_create(STREAM, GROUP, id="0-0", mkstream=True)
+        except Exception as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+        while True:
+            _next_id, claimed, _deleted = await client.xautoclaim(
+                STREAM, GROUP, CONSUMER, min_idle_time=60000, start_id="0-0", count=BATCH_SIZE
+            )
+            entries = list(claimed)
+            if not entries:
+                try:
+                    messages = await client.xreadgroup(GROUP, CONSUMER, {STREAM: ">"}, count=BATCH_SIZE, block=1000)
+                except redis.TimeoutError:
+                    continue
+                entries = [entry for _stream, stream_entries in messages for entry in stream_entries]
+            if not entries:
+                continue
+            try:
+                ack_ids = await process_batch(entries)
+            except Exception:  # noqa: BLE001 - leave unacknowledged so Redis redelivers the batch
+                LOGGER.exception("Sales rollup batch failed")
+                await asyncio.sleep(1)
+                continue
+            if ack_ids:
+                await client.xack(STREAM, GROUP, *ack_ids)
+    finally:
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
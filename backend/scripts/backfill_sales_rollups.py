@@ -0,0 +1,47 @@
+import argparse
+import asyncio
+import uuid
+from datetime import date
+
+from sqlalchemy import func, select
+
+from app.core.database import SessionLocal
+from app.models.sale import Sale
+from app.services.sales_rollups import backfill_sales_rollups
+
+
+async def backfill(company_id: uuid.UUID | None, start: date | None, end: date | None, chunk_days: int) -> None:
+    async with SessionLocal() as db:
+        query = select(Sale.company_id, func.min(func.date(Sale.created_at))).where(Sale.company_id.is_not(None)).group_by(Sale.company_id)
+        if company_id:
+            query = query.where(Sale.company_id == company_id)
+        ranges = (await db.execute(query)).all()
+
+        if not ranges:
+            print("No hay ventas para consolidar.")
+            return
+        for current_company, first_day in ranges:
+            first = start or first_day
+            # Up to today: returns may be approved after the last sale.
+            last = end or date.today()
+            days = await backfill_sales_rollups(db, current_company, first, last, chunk_days=chunk_days)
+            print(f"Empresa {current_company}: {days} dias consolidados ({first} a {last}).")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reconstruye los consolidados diarios de ventas, pagos y devoluciones.")
+    parser.add_argument("--company-id", type=uuid.UUID, help="Solo esta empresa. Por defecto, todas las que tienen ventas.")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="Primer dia (AAAA-MM-DD).")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="Ultimo dia (AAAA-MM-DD), inclusive.")
+    parser.add_argument(
+        "--chunk-days",
+        type=int,
+        default=31,
+        help="Dias reconstruidos por transaccion.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    asyncio.run(backfill(arguments.company_id, arguments.start, arguments.end, max(1, arguments.chunk_days)))
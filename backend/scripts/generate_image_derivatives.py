@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+
+from sqlalchemy import select, union
+
+from app.core.database import SessionLocal
+from app.models.image_derivative import ImageDerivative
+from app.models.product import Product
+from app.models.product_image import ProductImage
+from app.services.image_derivatives import ensure_derivatives, static_path
+
+
+async def generate(batch_size: int) -> None:
+    async with SessionLocal() as db:
+        images = union(
+            select(Product.image_url.label("url")).where(Product.image_url.like("/static/%")),
+            select(ProductImage.image_url.label("url")).where(ProductImage.image_url.like("/static/%")),
+        ).subquery()
+        pending = (await db.execute(
+            select(images.c.url)
+            .outerjoin(ImageDerivative, ImageDerivative.source_url == images.c.url)
+            .where(ImageDerivative.id.is_(None))
+            .order_by(images.c.url)
+        )).scalars().all()
+
+        if not pending:
+            print("Todas las imagenes tienen sus versiones reducidas.")
+            return
+        generated = 0
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            derivatives = await ensure_derivatives(db, {url: static_path(url) for url in batch})
+            await db.commit()
+            generated += len(derivatives)
+            print(f"{start + len(batch)}/{len(pending)} imagenes revisadas, {generated} con versiones reducidas.")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Genera miniaturas y copias WebP/AVIF de las imagenes locales de productos.")
+    parser.add_argument("--batch-size", type=int, default=50, help="Imagenes guardadas por transaccion.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    asyncio.run(generate(max(1, arguments.batch_size)))
@@ -0,0 +1,38 @@
+import argparse
+import asyncio
+import uuid
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.company import Company
+from app.services.inventory_snapshots import snapshot_company, utc_today
+
+
+async def snapshot(company_id: uuid.UUID | None) -> None:
+    day = utc_today()
+    async with SessionLocal() as db:
+        query = select(Company.id)
+        if company_id:
+            query = query.where(Company.id == company_id)
+        companies = (await db.execute(query)).scalars().all()
+
+        if not companies:
+            print("No hay empresas para registrar.")
+            return
+        for current_company in companies:
+            products = await snapshot_company(db, current_company, day)
+            # One transaction per company keeps the branch locks short.
+            await db.commit()
+            print(f"Empresa {current_company}: {products} existencias registradas al {day}.")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Registra el inventario actual en las fotos diarias de inventario.")
+    parser.add_argument("--company-id", type=uuid.UUID, help="Solo esta empresa. Por defecto, todas.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    asyncio.run(snapshot(arguments.company_id))
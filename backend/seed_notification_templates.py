@@ -33,7 +33,10 @@ async def seed_templates():
         ]
 
         for t in templates:
-            result = await db.execute(select(NotificationTemplate).where(NotificationTemplate.code == t["code"]))
+            result = await db.execute(select(NotificationTemplate).where(
+                NotificationTemplate.code == t["code"],
+                NotificationTemplate.company_id.is_(None),
+            ))
             existing = result.scalars().first()
             
             if not existing:
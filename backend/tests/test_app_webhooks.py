@@ -0,0 +1,198 @@
+import json
+import unittest
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+from sqlalchemy.exc import IntegrityError
+
+from app.models.outbox_consumption import OutboxConsumption
+from app.models.outbox_event import OutboxEvent
+from app.services.app_webhooks import (
+    CircuitBreaker,
+    WebhookDispatcher,
+    WebhookResult,
+    enqueue_app_webhook,
+    endpoint_key,
+    is_retryable,
+    retry_delay_seconds,
+)
+from app.workers import app_webhook_worker
+
+
+class EnqueueAppWebhookTests(unittest.TestCase):
+    def _install(self, **overrides):
+        values = {
+            "id": uuid.uuid4(),
+            "webhook_url": "https://partner.example/hooks",
+            "webhook_secret": "secret",
+            "settings": {},
+        }
+        values.update(overrides)
+        return SimpleNamespace(**values)
+
+    def test_queues_an_outbox_event_instead_of_posting(self):
+        db = Mock()
+        install = self._install()
+        app = SimpleNamespace(id=uuid.uuid4(), slug="erp-sync")
+        company_id = uuid.uuid4()
+
+        result = enqueue_app_webhook(db, install, app, company_id, "app.installed", {"version": "1.0.0"})
+
+        event = db.add.call_args.args[0]
+        self.assertIsInstance(event, OutboxEvent)
+        self.assertEqual(event.event_type, "app.webhook")
+        self.assertEqual(event.aggregate_id, install.id)
+        self.assertEqual(event.idempotency_key, f"app.webhook:{result['webhook_id']}:1")
+        self.assertEqual(event.payload["envelope"]["id"], result["webhook_id"])
+        self.assertEqual(event.payload["envelope"]["payload"], {"version": "1.0.0"})
+        self.assertTrue(result["queued"])
+        self.assertFalse(result["delivered"])
+
+    def test_retries_keep_the_logical_id_and_envelope(self):
+        db = Mock()
+        install = self._install()
+        app = SimpleNamespace(id=uuid.uuid4(), slug="erp-sync")
+        envelope = {"id": "hook-1", "event": "app.installed", "payload": {}}
+
+        enqueue_app_webhook(
+            db, install, app, uuid.uuid4(), "app.installed", {},
+            attempt_number=3, webhook_id="hook-1", envelope=envelope,
+        )
+
+        event = db.add.call_args.args[0]
+        self.assertEqual(event.idempotency_key, "app.webhook:hook-1:3")
+        self.assertIs(event.payload["envelope"], envelope)
+
+    def test_missing_endpoint_is_reported_without_queueing(self):
+        db = Mock()
+        result = enqueue_app_webhook(
+            db, self._install(webhook_url=None), SimpleNamespace(id=uuid.uuid4(), slug="x"),
+            uuid.uuid4(), "app.installed", {},
+        )
+
+        db.add.assert_not_called()
+        self.assertEqual(result["reason"], "webhook_url_missing")
+
+
+class WebhookRetryPolicyTests(unittest.TestCase):
+    def test_backoff_grows_and_is_capped(self):
+        for attempt, ceiling in ((1, 30), (2, 60), (3, 120), (10, 600)):
+            delay = retry_delay_seconds(attempt, base_seconds=30, max_seconds=600)
+            self.assertGreaterEqual(delay, ceiling / 2)
+            self.assertLessEqual(delay, ceiling)
+
+    def test_only_transient_failures_are_retried(self):
+        self.assertTrue(is_retryable(None))
+        self.assertTrue(is_retryable(429))
+        self.assertTrue(is_retryable(503))
+        self.assertFalse(is_retryable(400))
+        self.assertFalse(is_retryable(410))
+
+    def test_endpoints_are_grouped_by_origin(self):
+        self.assertEqual(
+            endpoint_key("https://Partner.example:8443/hooks/a?x=1"),
+            "https://partner.example:8443",
+        )
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    @patch("app.services.app_webhooks.time.monotonic")
+    def test_opens_after_threshold_and_half_opens_after_cooldown(self, monotonic):
+        monotonic.return_value = 100.0
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+
+        breaker.record_failure("https://a")
+        self.assertIsNone(breaker.open_until("https://a"))
+        breaker.record_failure("https://a")
+        self.assertEqual(breaker.open_until("https://a"), 130.0)
+
+        monotonic.return_value = 131.0
+        self.assertIsNone(breaker.open_until("https://a"))
+
+
+class WebhookDispatcherTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dispatcher = WebhookDispatcher(max_workers=2, failure_threshold=1, circuit_reset_seconds=60)
+
+    async def asyncTearDown(self):
+        self.dispatcher.close()
+
+    async def test_open_circuit_skips_the_request(self):
+        with patch.object(self.dispatcher, "_post", return_value=WebhookResult(False, 503, "http_error:503")) as post:
+            first = await self.dispatcher.deliver("https://partner.example/a", b"{}", {})
+            second = await self.dispatcher.deliver("https://partner.example/b", b"{}", {})
+
+        self.assertEqual(first.status_code, 503)
+        self.assertTrue(second.circuit_open)
+        post.assert_called_once()
+
+    async def test_client_errors_do_not_open_the_circuit(self):
+        with patch.object(self.dispatcher, "_post", return_value=WebhookResult(False, 400, "http_error:400")) as post:
+            await self.dispatcher.deliver("https://partner.example/a", b"{}", {})
+            await self.dispatcher.deliver("https://partner.example/a", b"{}", {})
+
+        self.assertEqual(post.call_count, 2)
+
+
+class WebhookWorkerTests(unittest.IsolatedAsyncioTestCase):
+    def _job(self, attempt_number=1, deferral=0):
+        install = SimpleNamespace(
+            id=uuid.uuid4(), company_id=uuid.uuid4(), webhook_url="https://partner.example/hooks",
+            webhook_secret="secret", settings={},
+        )
+        app = SimpleNamespace(id=uuid.uuid4(), slug="partner")
+        payload = {
+            "webhook_id": "hook-1", "event_name": "sale.created", "attempt_number": attempt_number,
+            "deferral": deferral, "envelope": {"payload": {}},
+        }
+        return ("1-0", uuid.uuid4(), install.id, payload), install, app
+
+    def test_open_circuit_postpones_the_same_attempt(self):
+        db = Mock()
+        job, install, app = self._job(attempt_number=3, deferral=1)
+        outcome = ("https://partner.example/hooks", "sig", WebhookResult(False, None, "circuit_open", circuit_open=True))
+
+        rows = app_webhook_worker._stage(db, [(job, install, app, outcome)], datetime.utcnow())
+
+        event = next(call.args[0] for call in db.add.call_args_list if isinstance(call.args[0], OutboxEvent))
+        self.assertEqual((rows[0]["attempt_number"], event.payload["attempt_number"]), (3, 3))
+        self.assertEqual(event.idempotency_key, "app.webhook:hook-1:3:deferred-2")
+
+    async def test_a_conflicting_batch_is_recorded_job_by_job(self):
+        (first, install, app), (second, _, _) = self._job(), self._job()
+        second = ("2-0", second[1], install.id, second[3])
+        rows = MagicMock()
+        rows.scalars.return_value.all.return_value = []
+        rows.all.return_value = [(install, app)]
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=rows)
+        # The batch commit conflicts; then the first job turns out to be
+        # recorded by another consumer and the second is written alone.
+        db.commit = AsyncMock(side_effect=[IntegrityError("insert", {}, Exception()), None])
+        db.rollback = AsyncMock()
+        db.refresh = AsyncMock()
+        db.scalar = AsyncMock(side_effect=[first[1], None])
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=db)
+        session.__aexit__ = AsyncMock(return_value=False)
+        dispatcher = Mock()
+        dispatcher.deliver = AsyncMock(return_value=WebhookResult(True, 200))
+
+        with patch.object(app_webhook_worker, "SessionLocal", return_value=session):
+            ack_ids = await app_webhook_worker.process_batch(dispatcher, [
+                (message_id, {"event_type": "app.webhook", "event_id": str(event_id), "payload": json.dumps({
+                    **payload, "install_id": str(install_id),
+                })})
+                for message_id, event_id, install_id, payload in (first, second)
+            ])
+
+        self.assertEqual(ack_ids, ["1-0", "2-0"])
+        self.assertEqual(db.commit.await_count, 2)
+        receipts = [call.args[0] for call in db.add.call_args_list if isinstance(call.args[0], OutboxConsumption)]
+        self.assertEqual([receipt.event_id for receipt in receipts], [first[1], second[1], second[1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
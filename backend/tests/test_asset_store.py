@@ -0,0 +1,114 @@
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.product_image import ProductImage
+from app.models.storefront import StoreCollection
+from app.services import asset_store
+
+
+def _url(data: bytes, extension: str = ".png") -> str:
+    content_hash = hashlib.sha256(data).hexdigest()
+    return f"/static/assets/{content_hash[:2]}/{content_hash}{extension}"
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class StoreTests(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_bytes_are_written_once_under_the_first_url(self):
+        data = b"\x89PNG same bytes"
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock(scalar_one=MagicMock(return_value=_url(data))))
+
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(asset_store, "ASSET_DIR", Path(directory)):
+            first = await asset_store.store_asset(db, data, ".png")
+            path = asset_store.asset_path(first)
+            written_at = path.stat().st_mtime_ns
+            second = await asset_store.store_asset(db, data, ".jpg")
+            self.assertEqual(path.read_bytes(), data)
+            self.assertEqual(path.stat().st_mtime_ns, written_at)
+
+        self.assertEqual((first, second), (_url(data), _url(data)))
+        sql = _sql(db.execute.await_args_list[0].args[0])
+        self.assertIn("ON CONFLICT (content_hash) DO UPDATE", sql)
+        self.assertIn("RETURNING stored_assets.url", sql)
+
+    def test_only_store_urls_are_managed(self):
+        url = _url(b"x", ".webp")
+        self.assertTrue(asset_store.is_asset_url(url))
+        self.assertEqual(asset_store.asset_path(url).parent.name, url.split("/")[3])
+        self.assertFalse(asset_store.is_asset_url("/static/uploads/logo.png"))
+        self.assertFalse(asset_store.is_asset_url("/static/assets/00/" + "ab" * 32 + ".png"))
+        self.assertIsNone(asset_store.asset_path("/static/assets/../../etc/passwd"))
+
+
+class ReferenceCountTests(unittest.TestCase):
+    def test_flushed_image_changes_collect_their_asset_urls(self):
+        added, removed, replaced, kept = (_url(bytes([value])) for value in range(4))
+        product = Product(name="Café", image_url=replaced)
+        product.image_url = kept
+        session = SimpleNamespace(
+            new=[ProductImage(image_url=added), StoreCollection(image_url="/static/uploads/legacy.png")],
+            deleted=[Product(name="Té", image_url=removed)],
+            dirty=[product],
+            info={},
+        )
+
+        asset_store._collect_asset_urls(session, None)
+
+        self.assertEqual(session.info[asset_store._SESSION_URLS], {added, removed, kept})
+
+    def test_commit_recounts_the_collected_urls_in_one_statement(self):
+        url = _url(b"logo")
+        session = Session()
+        asset_store.mark_asset_refs_stale(session, [url, None, "https://cdn.example.com/a.png"])
+
+        with patch.object(session, "execute") as execute:
+            asset_store._recount_asset_refs(session)
+
+        execute.assert_called_once()
+        sql = _sql(execute.call_args.args[0])
+        for table in ("products", "product_images", "store_collections"):
+            self.assertIn(f"FROM {table} \nWHERE {table}.image_url = stored_assets.url", sql)
+        self.assertIn("CASE WHEN", sql)
+        self.assertEqual(execute.call_args.args[0].compile().params["url_1"], [url])
+        self.assertNotIn(asset_store._SESSION_URLS, session.info)
+
+
+class CollectionTests(unittest.IsolatedAsyncioTestCase):
+    async def test_unreferenced_assets_lose_their_files_before_the_delete_commits(self):
+        gone = _url(b"gone")
+        db = MagicMock()
+        events = []
+        db.commit = AsyncMock(side_effect=lambda: events.append("commit"))
+        db.execute = AsyncMock(return_value=MagicMock(
+            scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=[gone])))
+        ))
+
+        with patch.object(asset_store, "_remove_files", side_effect=lambda urls: events.append("files")) as remove, \
+                patch.object(asset_store, "forget_derivatives", AsyncMock()) as forget:
+            collected = await asset_store.collect_unreferenced_assets(db)
+
+        self.assertEqual(collected, 1)
+        remove.assert_called_once_with({gone})
+        forget.assert_awaited_once_with(db, {gone}, commit=False)
+        self.assertEqual(events, ["files", "commit"])
+        sql = _sql(db.execute.await_args_list[0].args[0])
+        self.assertIn("stored_assets.ref_count = ", sql)
+        self.assertIn("NOT (EXISTS (SELECT * \nFROM products", sql)
+        self.assertIn("FOR UPDATE SKIP LOCKED", sql)
+        db.commit.assert_awaited_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import asyncio
+import uuid
+from datetime import date, datetime
+from io import BytesIO
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from PIL import Image
+
+from app.services import document_renderer
+from app.services.document_renderer import (
+    document_version,
+    fit_logo,
+    purchase_snapshot,
+    render_many,
+    render_pdf,
+    sale_snapshot,
+)
+from app.services.pdf_service import render_document
+
+
+def _sale():
+    product = SimpleNamespace(name="Café", sku="CAF-1")
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        status="CONFIRMED",
+        payment_method="CASH",
+        notes="Entregar en portería",
+        subtotal=100.0,
+        tax=19.0,
+        total=119.0,
+        user=SimpleNamespace(full_name="Ana Pérez"),
+        client=SimpleNamespace(name="Cliente", address="Calle 1", phone="123", email="c@example.com"),
+        items=[SimpleNamespace(quantity=2, price=50.0, total=100.0, product=product)],
+    )
+
+
+def _png(width, height):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class SnapshotTests(unittest.TestCase):
+    def test_snapshots_render_every_document_kind(self):
+        sale = sale_snapshot(_sale())
+        purchase = purchase_snapshot(SimpleNamespace(
+            id=uuid.uuid4(),
+            status="SENT",
+            expected_date=datetime(2026, 5, 1),
+            total_amount=30.0,
+            supplier=SimpleNamespace(name="Proveedor", tax_id="900"),
+            items=[SimpleNamespace(
+                quantity=3, unit_cost=10.0, subtotal=30.0,
+                product=SimpleNamespace(name="Azúcar", sku="AZ-1"), variant=None,
+            )],
+        ))
+        company = {"id": "c1", "name": "Lumefy", "address": None, "tax_id": "1", "phone": None, "website": None, "logo_url": None}
+
+        for kind, document in [("invoice", sale), ("picking", sale), ("packing", sale), ("purchase_order", purchase)]:
+            with self.subTest(kind=kind):
+                self.assertTrue(render_document(kind, document, company, printed_on=date(2026, 5, 1)).startswith(b"%PDF"))
+
+    def test_version_changes_with_anything_printed(self):
+        sale = sale_snapshot(_sale())
+        printed_on = date(2026, 5, 1)
+        base = document_version("invoice", sale, None, None, printed_on)
+
+        self.assertEqual(base, document_version("invoice", sale_snapshot(SimpleNamespace(**{**vars(_sale()), "id": sale["id"]})), None, None, printed_on))
+        self.assertNotEqual(base, document_version("invoice", {**sale, "total": 120.0}, None, None, printed_on))
+        self.assertNotEqual(base, document_version("picking", sale, None, None, printed_on))
+        self.assertNotEqual(base, document_version("invoice", sale, None, None, date(2026, 5, 2)))
+
+
+class FitLogoTests(unittest.TestCase):
+    def test_wide_logos_fit_the_header_width(self):
+        logo = fit_logo(_png(1200, 300))
+
+        self.assertEqual((logo.width, logo.height), (120, 30))
+        with Image.open(BytesIO(logo.data)) as image:
+            self.assertEqual(image.size, (480, 120))
+
+    def test_tall_logos_fit_the_header_height(self):
+        logo = fit_logo(_png(100, 200))
+
+        self.assertEqual((logo.width, logo.height), (25, 50))
+
+    def test_small_logos_keep_their_size(self):
+        logo = fit_logo(_png(40, 20))
+
+        self.assertEqual((logo.width, logo.height), (40, 20))
+
+
+class RenderPdfTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        document_renderer._pdfs.clear()
+        document_renderer._logos.clear()
+        self.redis = AsyncMock()
+        self.redis.get.return_value = None
+        for target, value in [
+            ("get_redis", lambda: self.redis),
+            ("_render", AsyncMock(side_effect=lambda kind, document, *args: f"%PDF {kind} {document['id']}".encode())),
+        ]:
+            patcher = patch.object(document_renderer, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_unchanged_documents_are_served_from_the_cache(self):
+        sale = sale_snapshot(_sale())
+
+        first = await render_pdf("invoice", sale)
+        second = await render_pdf("invoice", sale)
+
+        self.assertEqual(first, second)
+        document_renderer._render.assert_awaited_once()
+        self.redis.set.assert_awaited_once()
+
+    async def test_renders_cached_by_another_process_are_reused(self):
+        sale = sale_snapshot(_sale())
+        await render_pdf("invoice", sale)
+        stored = self.redis.set.await_args.args[1]
+        document_renderer._pdfs.clear()
+        self.redis.get.return_value = stored
+
+        pdf = await render_pdf("invoice", sale)
+
+        self.assertTrue(pdf.startswith(b"%PDF invoice"))
+        document_renderer._render.assert_awaited_once()
+
+    async def test_unknown_kinds_are_rejected(self):
+        with self.assertRaises(ValueError):
+            await render_pdf("receipt", sale_snapshot(_sale()))
+
+    async def test_batches_keep_order_and_load_the_logo_once(self):
+        company = {"id": "c1", "logo_url": "https://example.com/logo.png"}
+        sales = [sale_snapshot(_sale()) for _ in range(4)]
+
+        with patch.object(document_renderer, "_load_logo", return_value=None) as load_logo:
+            pdfs = await render_many([("picking", sale) for sale in sales], company)
+
+        self.assertEqual(pdfs, [f"%PDF picking {sale['id']}".encode() for sale in sales])
+        load_logo.assert_called_once_with("https://example.com/logo.png")
+
+    async def test_batches_leave_a_render_process_free(self):
+        running = 0
+        peak = 0
+
+        async def render(kind, document, *args):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return b"%PDF"
+
+        with patch.object(document_renderer, "_render", render), \
+                patch.object(document_renderer.settings, "PDF_RENDER_PROCESSES", 3):
+            await render_many([("invoice", sale_snapshot(_sale())) for _ in range(6)])
+
+        self.assertEqual(peak, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import csv
+import tempfile
+import unittest
+import uuid
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from openpyxl import load_workbook
+
+from app.models.export_job import ExportJob
+from app.models.notification import Notification
+from app.services import export_jobs
+from app.services.export_definitions import EXPORTS, normalize_filters
+from app.services.export_jobs import export_fingerprint, request_export, run_export_job
+
+
+class FingerprintTests(unittest.TestCase):
+    def test_changes_with_filters_format_and_watermark(self):
+        watermark = [10, datetime(2026, 3, 4, 10, 0)]
+        base = export_fingerprint("sales", "excel", {"status": "COMPLETED"}, watermark)
+
+        self.assertEqual(base, export_fingerprint("sales", "excel", {"status": "COMPLETED"}, list(watermark)))
+        self.assertNotEqual(base, export_fingerprint("sales", "csv", {"status": "COMPLETED"}, watermark))
+        self.assertNotEqual(base, export_fingerprint("sales", "excel", {}, watermark))
+        self.assertNotEqual(base, export_fingerprint("sales", "excel", {"status": "COMPLETED"}, [11, watermark[1]]))
+
+    def test_only_accepted_non_empty_filters_are_kept(self):
+        filters = normalize_filters(EXPORTS["sales"], {"status": " COMPLETED ", "date_to": "", "branch_id": "x"})
+
+        self.assertEqual(filters, {"status": "COMPLETED"})
+
+    def test_percent_follows_processed_records(self):
+        job = ExportJob(status="RUNNING", total_records=200, processed_records=50)
+
+        self.assertEqual(job.percent, 25)
+        job.status = "COMPLETED"
+        self.assertEqual(job.percent, 100)
+
+
+class RequestExportTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.user = SimpleNamespace(id=uuid.uuid4(), company_id=uuid.uuid4())
+        self.db = MagicMock()
+        self.db.commit = AsyncMock()
+        self.db.refresh = AsyncMock()
+
+    @patch("app.services.export_jobs._reusable_job", new_callable=AsyncMock)
+    @patch("app.services.export_jobs.export_watermark", new_callable=AsyncMock)
+    async def test_identical_export_over_unchanged_data_reuses_the_job(self, watermark, reusable):
+        watermark.return_value = [3, datetime(2026, 3, 4)]
+        previous = ExportJob(id=uuid.uuid4(), status="COMPLETED")
+        reusable.return_value = previous
+
+        job, reused = await request_export(self.db, self.user, "clients", "excel", {})
+
+        self.assertIs(job, previous)
+        self.assertTrue(reused)
+        self.db.add.assert_not_called()
+
+    @patch("app.services.export_jobs._reusable_job", new_callable=AsyncMock, return_value=None)
+    @patch("app.services.export_jobs.export_watermark", new_callable=AsyncMock)
+    async def test_queues_a_new_job_with_the_matching_record_count(self, watermark, _reusable):
+        watermark.return_value = [42, None]
+
+        job, reused = await request_export(self.db, self.user, "inventory", "csv", {"branch_id": None})
+
+        self.assertFalse(reused)
+        self.assertEqual((job.status, job.format, job.total_records), ("QUEUED", "csv", 42))
+        self.assertEqual(job.company_id, self.user.company_id)
+        self.assertEqual(job.fingerprint, export_fingerprint("inventory", "csv", {}, [42, None]))
+        self.db.commit.assert_awaited_once()
+
+    async def test_invalid_filters_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            await request_export(self.db, self.user, "products", "excel", {"category_id": "not-an-id"})
+
+
+class RunExportJobTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings_patch = patch.object(export_jobs.settings, "EXPORTS_DIR", self.directory.name)
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+
+        self.job = ExportJob(
+            id=uuid.uuid4(),
+            company_id=uuid.uuid4(),
+            requested_by_user_id=uuid.uuid4(),
+            resource="clients",
+            format="csv",
+            filters={},
+            status="RUNNING",
+            processed_records=0,
+        )
+        self.db = MagicMock()
+        self.db.get = AsyncMock(return_value=self.job)
+        self.db.commit = AsyncMock()
+        self.db.rollback = AsyncMock()
+        session = MagicMock()
+        session.return_value.__aenter__ = AsyncMock(return_value=self.db)
+        session.return_value.__aexit__ = AsyncMock(return_value=False)
+        self.session_factory = session
+
+    def _rows(self, count):
+        async def rows(db, definition, query, on_record=None):
+            for index in range(count):
+                await on_record()
+                yield {"name": f"Cliente {index}", "tax_id": str(index)}
+        return rows
+
+    async def test_writes_the_file_and_notifies_the_requester(self):
+        with patch("app.services.export_jobs.export_rows", self._rows(3)):
+            await run_export_job(self.job.id, session_factory=self.session_factory)
+
+        self.assertEqual(self.job.status, "COMPLETED")
+        self.assertEqual((self.job.processed_records, self.job.rows_written), (3, 3))
+        self.assertTrue(self.job.file_name.startswith("clientes_"))
+        path = Path(self.directory.name) / self.job.file_path
+        with open(path, newline="", encoding="utf-8") as handle:
+            lines = list(csv.reader(handle))
+        self.assertEqual(lines[0][:2], ["Nombre", "RUC/NIT"])
+        self.assertEqual(lines[-1][:2], ["Cliente 2", "2"])
+        self.assertEqual(self.job.file_size, path.stat().st_size)
+        self.assertGreater(self.job.expires_at, self.job.finished_at)
+        [notification] = [call.args[0] for call in self.db.add.call_args_list]
+        self.assertIsInstance(notification, Notification)
+        self.assertEqual(notification.user_id, self.job.requested_by_user_id)
+
+    async def test_excel_jobs_write_a_workbook(self):
+        self.job.format = "excel"
+
+        with patch("app.services.export_jobs.export_rows", self._rows(2)):
+            await run_export_job(self.job.id, session_factory=self.session_factory)
+
+        sheet = load_workbook(Path(self.directory.name) / self.job.file_path).active
+        self.assertEqual(sheet.max_row, 3)
+        self.assertTrue(self.job.file_path.endswith(".xlsx"))
+
+    async def test_failures_mark_the_job_and_leave_no_partial_file(self):
+        async def broken(db, definition, query, on_record=None):
+            yield {"name": "Cliente"}
+            raise RuntimeError("connection lost")
+
+        with patch("app.services.export_jobs.export_rows", broken), self.assertLogs("lumefy.export_jobs", "ERROR"):
+            await run_export_job(self.job.id, session_factory=self.session_factory)
+
+        self.assertEqual(self.job.status, "FAILED")
+        self.assertIsNone(self.job.file_path)
+        self.assertEqual(list(Path(self.directory.name).rglob("*")), [Path(self.directory.name) / str(self.job.company_id)])
+        self.db.rollback.assert_awaited_once()
+
+    async def test_jobs_no_longer_running_are_skipped(self):
+        self.job.status = "FAILED"
+
+        await run_export_job(self.job.id, session_factory=self.session_factory)
+
+        self.db.commit.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
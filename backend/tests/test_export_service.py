@@ -0,0 +1,80 @@
+import io
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from openpyxl import load_workbook
+
+from app.services import export_service
+from app.services.export_service import ExportService
+
+COLUMNS = {"name": "Nombre", "client.name": "Cliente", "created_at": "Fecha"}
+
+
+def _rows(count):
+    return [
+        {"name": f"Venta {index}", "client": {"name": "Ana"}, "created_at": datetime(2026, 3, 4, 10, 30)}
+        for index in range(count)
+    ]
+
+
+async def _aiter(rows):
+    for row in rows:
+        yield row
+
+
+async def _body(response) -> bytes:
+    chunks = []
+    async for chunk in response.body_iterator:
+        chunks.append(chunk.encode() if isinstance(chunk, str) else chunk)
+    return b"".join(chunks)
+
+
+class ExcelExportTests(unittest.IsolatedAsyncioTestCase):
+    async def test_streams_every_row_from_an_async_source(self):
+        with patch.object(export_service, "BATCH_SIZE", 7), patch.object(export_service, "WIDTH_SAMPLE_ROWS", 10):
+            response = await ExportService.to_excel_response(_aiter(_rows(25)), COLUMNS, filename="ventas")
+
+        sheet = load_workbook(io.BytesIO(await _body(response))).active
+        values = list(sheet.values)
+        self.assertEqual(values[0], ("Nombre", "Cliente", "Fecha"))
+        self.assertEqual(len(values), 26)
+        self.assertEqual(values[-1], ("Venta 24", "Ana", "2026-03-04 10:30"))
+        self.assertTrue(sheet["A1"].font.bold)
+        self.assertIn('filename="ventas_', response.headers["content-disposition"])
+
+    async def test_widths_come_from_the_sampled_rows(self):
+        rows = _rows(3) + [{"name": "x" * 80, "client": {}, "created_at": None}]
+
+        response = await ExportService.to_excel_response(rows, COLUMNS)
+
+        sheet = load_workbook(io.BytesIO(await _body(response))).active
+        self.assertEqual(sheet.column_dimensions["A"].width, export_service.MAX_COLUMN_WIDTH)
+        self.assertEqual(sheet.column_dimensions["C"].width, len("2026-03-04 10:30") + 3)
+
+    async def test_empty_exports_keep_the_header(self):
+        response = await ExportService.to_excel_response([], COLUMNS)
+
+        sheet = load_workbook(io.BytesIO(await _body(response))).active
+        self.assertEqual(list(sheet.values), [("Nombre", "Cliente", "Fecha")])
+
+
+class CsvExportTests(unittest.IsolatedAsyncioTestCase):
+    async def test_sends_the_header_and_then_one_chunk_per_batch(self):
+        with patch.object(export_service, "BATCH_SIZE", 2):
+            response = ExportService.to_csv_response(_aiter(_rows(5)), COLUMNS, filename="ventas")
+            chunks = [chunk async for chunk in response.body_iterator]
+
+        self.assertEqual(chunks[0], "Nombre,Cliente,Fecha\r\n")
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[1].splitlines()[0], "Venta 0,Ana,2026-03-04 10:30")
+        self.assertEqual(response.media_type, "text/csv")
+
+    async def test_accepts_plain_lists(self):
+        response = ExportService.to_csv_response(_rows(2), {"name": "Nombre"})
+
+        self.assertEqual((await _body(response)).decode().splitlines(), ["Nombre", "Venta 0", "Venta 1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
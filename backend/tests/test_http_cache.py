@@ -0,0 +1,141 @@
+import json
+import unittest
+import uuid
+from unittest.mock import AsyncMock, patch
+
+from app.core.http_cache import (
+    CATALOG_POLICY,
+    STOREFRONT_POLICY,
+    PublicCacheMiddleware,
+    compute_etag,
+    etag_matches,
+    match_route,
+)
+
+STOREFRONT_ID = str(uuid.uuid4())
+
+
+class RecordingApp:
+    def __init__(self, body=b'{"name": "Tienda"}', status=200):
+        self.body = body
+        self.status = status
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await send({
+            "type": "http.response.start",
+            "status": self.status,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({"type": "http.response.body", "body": self.body})
+
+
+def get_scope(path, headers=None, query=b""):
+    return {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": headers or []}
+
+
+class EtagTests(unittest.TestCase):
+    def test_etag_depends_on_version_and_normalized_query(self):
+        path = f"/api/v1/storefront/public/{STOREFRONT_ID}/products"
+        first = compute_etag(path, "page=2&sort=price", "4", STOREFRONT_POLICY)
+
+        self.assertEqual(first, compute_etag(path, "sort=price&page=2", "4", STOREFRONT_POLICY))
+        self.assertNotEqual(first, compute_etag(path, "sort=price&page=2", "5", STOREFRONT_POLICY))
+        self.assertTrue(first.startswith('"') and first.endswith('"'))
+
+    def test_catalog_etags_roll_over_with_the_time_window(self):
+        path = f"/api/v1/storefront/public/{STOREFRONT_ID}/products"
+
+        self.assertEqual(
+            compute_etag(path, "", "1", CATALOG_POLICY, now=120),
+            compute_etag(path, "", "1", CATALOG_POLICY, now=179),
+        )
+        self.assertNotEqual(
+            compute_etag(path, "", "1", CATALOG_POLICY, now=179),
+            compute_etag(path, "", "1", CATALOG_POLICY, now=180),
+        )
+
+    def test_if_none_match_accepts_lists_weak_tags_and_wildcard(self):
+        self.assertTrue(etag_matches('"a", W/"b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+        self.assertFalse(etag_matches(None, '"b"'))
+
+    def test_only_public_reads_are_cacheable(self):
+        self.assertIs(match_route(f"/api/v1/storefront/public/{STOREFRONT_ID}")[1], STOREFRONT_POLICY)
+        self.assertIs(match_route(f"/api/v1/storefront/public/{STOREFRONT_ID}/products/remera")[1], CATALOG_POLICY)
+        self.assertEqual(match_route("/api/v1/storefront/public/by-domain/shop.example")[0]["host"], "shop.example")
+        self.assertIsNone(match_route(f"/api/v1/storefront/public/{STOREFRONT_ID}/account/orders"))
+        self.assertIsNone(match_route(f"/api/v1/storefront/public/{STOREFRONT_ID}/checkout/payment-status"))
+
+
+class PublicCacheMiddlewareTests(unittest.IsolatedAsyncioTestCase):
+    path = f"/api/v1/storefront/public/{STOREFRONT_ID}/navigation"
+
+    def setUp(self):
+        patcher = patch("app.core.http_cache.reference_cache.tag_versions", AsyncMock(return_value=["3"]))
+        self.tag_versions = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def invoke(self, app, scope):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        await PublicCacheMiddleware(app)(scope, receive, send)
+        return messages[0]["status"], dict(messages[0]["headers"]), b"".join(m.get("body", b"") for m in messages[1:])
+
+    async def test_adds_validators_and_answers_revalidation_with_304(self):
+        app = RecordingApp()
+        status, headers, _ = await self.invoke(app, get_scope(self.path))
+        etag = headers[b"etag"]
+
+        revalidated, again, body = await self.invoke(app, get_scope(self.path, [(b"if-none-match", etag)]))
+
+        self.assertEqual(status, 200)
+        self.assertIn(b"stale-while-revalidate=600", headers[b"cache-control"])
+        self.assertEqual(revalidated, 304)
+        self.assertEqual(again[b"etag"], etag)
+        self.assertEqual(body, b"")
+        self.assertEqual(app.calls, 1)
+
+    async def test_errors_are_not_given_validators(self):
+        _, headers, _ = await self.invoke(RecordingApp(status=404), get_scope(self.path))
+
+        self.assertNotIn(b"etag", headers)
+
+    async def test_redis_failure_serves_uncached(self):
+        self.tag_versions.side_effect = ConnectionError("down")
+        app = RecordingApp()
+
+        status, headers, _ = await self.invoke(app, get_scope(self.path))
+
+        self.assertEqual(status, 200)
+        self.assertNotIn(b"etag", headers)
+        self.assertEqual(app.calls, 1)
+
+    @patch("app.core.http_cache.settings.HTTP_CACHE_SHARED_ENABLED", True)
+    @patch("app.core.http_cache.get_redis")
+    async def test_shared_cache_serves_anonymous_hits_without_the_endpoint(self, get_redis):
+        store = {}
+        get_redis.return_value.get = AsyncMock(side_effect=lambda key: store.get(key))
+        get_redis.return_value.set = AsyncMock(side_effect=lambda key, value, ex=None: store.update({key: value}))
+        app = RecordingApp()
+
+        await self.invoke(app, get_scope(self.path))
+        status, headers, body = await self.invoke(app, get_scope(self.path))
+        await self.invoke(app, get_scope(self.path, [(b"authorization", b"Bearer x")]))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"x-cache"], b"HIT")
+        self.assertEqual(json.loads(body), {"name": "Tienda"})
+        self.assertEqual(app.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
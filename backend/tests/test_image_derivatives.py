@@ -0,0 +1,82 @@
+import tempfile
+import unittest
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from PIL import Image
+
+from app.services import image_derivatives
+
+
+def _png(width: int, height: int, mode: str = "RGB") -> bytes:
+    buffer = BytesIO()
+    Image.new(mode, (width, height), "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _result(value=None, rows=()):
+    result = MagicMock()
+    result.all.return_value = list(rows)
+    result.scalars.return_value.first.return_value = value
+    return result
+
+
+class RenderTests(unittest.TestCase):
+    def test_every_box_smaller_than_the_original_is_encoded_once_per_format(self):
+        formats = image_derivatives.available_formats()
+        original = _png(2000, 1000)
+        with tempfile.TemporaryDirectory() as directory:
+            first = image_derivatives.render_derivatives(original, "ab" * 32, directory)
+            files = sorted(path.name for path in Path(directory, "ab").iterdir())
+            with patch.object(Image.Image, "save") as save:
+                second = image_derivatives.render_derivatives(original, "ab" * 32, directory)
+
+        self.assertEqual((first["width"], first["height"]), (2000, 1000))
+        self.assertEqual(
+            [(item["width"], item["height"], item["format"]) for item in first["renditions"]],
+            [(box, box // 2, name) for box in (320, 640, 1280) for name in formats],
+        )
+        self.assertEqual(first["renditions"][0]["url"], f"/static/derivatives/ab/{'ab' * 32}-320.{formats[0]}")
+        self.assertEqual(len(files), 3 * len(formats))
+        self.assertEqual(second, first)
+        save.assert_not_called()
+
+    def test_small_images_are_converted_without_upscaling(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result = image_derivatives.render_derivatives(_png(100, 50, "RGBA"), "cd" * 32, directory)
+
+        self.assertEqual({(item["width"], item["height"]) for item in result["renditions"]}, {(100, 50)})
+
+
+class EnsureTests(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_bytes_reuse_the_renditions_of_another_url(self):
+        known = MagicMock(width=10, height=10, renditions=[{"url": "/static/derivatives/x.webp"}])
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[_result(), _result(known), _result()])
+
+        with patch.object(image_derivatives, "_run", AsyncMock()) as run:
+            derivatives = await image_derivatives.ensure_derivatives(db, {"/static/uploads/b.png": _png(10, 10)})
+
+        run.assert_not_awaited()
+        self.assertEqual(derivatives, {"/static/uploads/b.png": known.renditions})
+
+    async def test_unreadable_originals_are_skipped(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=_result())
+
+        derivatives = await image_derivatives.ensure_derivatives(db, {
+            "/static/uploads/missing.png": Path("/nonexistent/missing.png"),
+            "https://cdn.example.com/a.png": b"...",
+        })
+
+        self.assertEqual(derivatives, {})
+        db.execute.assert_awaited_once()
+
+    def test_static_paths_stay_inside_the_static_directory(self):
+        self.assertEqual(
+            image_derivatives.static_path("/static/uploads/a.png"),
+            image_derivatives.STATIC_DIR.resolve() / "uploads" / "a.png",
+        )
+        self.assertIsNone(image_derivatives.static_path("/static/../app/main.py"))
+        self.assertIsNone(image_derivatives.static_path("https://cdn.example.com/a.png"))
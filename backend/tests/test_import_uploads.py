@@ -0,0 +1,134 @@
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pandas as pd
+from openpyxl import Workbook
+
+from app.models.storefront import StorefrontShippingDestination
+from app.services import import_jobs
+from app.services.shipping_destination_import import MissingColumnError, ShippingDestinationImporter
+
+
+async def _pieces(*parts):
+    for part in parts:
+        yield part
+
+
+class StreamingReaderTests(unittest.TestCase):
+    def test_csv_chunks_keep_file_positions_and_text_cells(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "rows.csv")
+            path.write_text("sku,price\n007,10\n008,\n009,12\n")
+
+            chunks = list(import_jobs.iter_import_chunks(path, start=1, chunk_rows=1))
+            total = import_jobs.count_import_rows(path)
+
+        self.assertEqual(total, 3)
+        self.assertEqual([chunk.index.tolist() for chunk in chunks], [[1], [2]])
+        self.assertEqual(chunks[0].loc[1, "sku"], "008")
+        self.assertEqual(chunks[0].loc[1, "price"], "")
+
+    def test_xlsx_is_read_row_by_row_skipping_blank_rows(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        for row in (("sku", "price"), ("A", 10), (None, None), ("B", 12.5), ("C", None)):
+            sheet.append(row)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "rows.xlsx")
+            workbook.save(path)
+
+            chunks = list(import_jobs.iter_import_chunks(path, start=1, chunk_rows=1))
+
+        frame = pd.concat(chunks)
+        self.assertEqual(frame.index.tolist(), [1, 2])
+        self.assertEqual(frame["sku"].tolist(), ["B", "C"])
+        self.assertEqual(frame.loc[1, "price"], "12.5")
+        self.assertIsNone(frame.loc[2, "price"])
+
+
+class ChunkedUploadTests(unittest.IsolatedAsyncioTestCase):
+    def _job(self, directory, received, size):
+        Path(directory, "upload.csv").write_bytes(b"x" * (received + 3))
+        return SimpleNamespace(file_path="upload.csv", file_size=size, received_bytes=received)
+
+    async def test_piece_overwrites_bytes_past_the_committed_offset(self):
+        db = MagicMock(commit=AsyncMock(), refresh=AsyncMock())
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(import_jobs.settings, "IMPORTS_DIR", directory):
+            # Three bytes of a piece whose commit was lost follow the offset.
+            job = self._job(directory, 4, 10)
+
+            await import_jobs.append_upload(db, job, 4, _pieces(b"ab", b"cd"))
+
+            content = Path(directory, "upload.csv").read_bytes()
+        self.assertEqual(content, b"xxxxabcd")
+        self.assertEqual(job.received_bytes, 8)
+
+    async def test_piece_at_another_offset_is_rejected_with_the_stored_size(self):
+        db = MagicMock(commit=AsyncMock())
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(import_jobs.settings, "IMPORTS_DIR", directory):
+            job = self._job(directory, 4, 10)
+
+            with self.assertRaises(import_jobs.UploadOffsetError) as raised:
+                await import_jobs.append_upload(db, job, 0, _pieces(b"ab"))
+
+        self.assertEqual(raised.exception.received_bytes, 4)
+        db.commit.assert_not_awaited()
+
+    async def test_piece_past_the_declared_size_is_rejected(self):
+        db = MagicMock(commit=AsyncMock())
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(import_jobs.settings, "IMPORTS_DIR", directory):
+            job = self._job(directory, 4, 5)
+
+            with self.assertRaises(ValueError):
+                await import_jobs.append_upload(db, job, 4, _pieces(b"ab"))
+
+        self.assertEqual(job.received_bytes, 4)
+
+    async def test_incomplete_upload_is_not_queued(self):
+        job = SimpleNamespace(file_size=10, received_bytes=8, status="UPLOADING")
+
+        with self.assertRaises(import_jobs.UploadOffsetError):
+            await import_jobs.complete_upload(MagicMock(), job)
+
+        self.assertEqual(job.status, "UPLOADING")
+
+
+class ShippingDestinationImporterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_rows_update_matching_destinations_and_create_the_rest(self):
+        company_id, storefront_id = uuid.uuid4(), uuid.uuid4()
+        existing = StorefrontShippingDestination(
+            country_code="CO", state_code="05", state_name="Antioquia", destination_type="department",
+        )
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = [existing]
+        db = MagicMock(execute=AsyncMock(return_value=result))
+        chunk = pd.DataFrame({
+            "Departamento": ["ANTIOQUIA", "Antioquia", "", "Antioquia"],
+            "Ciudad": ["", "Medellín", "", ""],
+            "Tipo": ["", "", "", "ciudad"],
+        }, index=[0, 1, 2, 3])
+
+        counts, errors = await ShippingDestinationImporter(company_id, None, storefront_id).apply_chunk(db, chunk)
+
+        self.assertEqual(counts, {"count": 2, "created": 1, "updated": 1, "skipped": 1})
+        self.assertEqual(errors, ["Fila 5: una ciudad requiere city_name/ciudad o city_code/codigo_ciudad"])
+        self.assertEqual(existing.state_name, "ANTIOQUIA")
+        [created] = [call.args[0] for call in db.add.call_args_list]
+        self.assertEqual((created.city_name, created.storefront_id), ("Medellín", storefront_id))
+
+    async def test_file_without_a_department_column_fails(self):
+        importer = ShippingDestinationImporter(uuid.uuid4(), None, uuid.uuid4())
+
+        with self.assertRaises(MissingColumnError):
+            await importer.apply_chunk(MagicMock(), pd.DataFrame({"ciudad": ["Cali"]}))
+
+
+if __name__ == "__main__":
+    unittest.main()
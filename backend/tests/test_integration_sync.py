@@ -6,7 +6,6 @@ import tempfile
 import uuid
 from io import BytesIO
 from datetime import datetime
-from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import AsyncMock, Mock, patch
 from urllib.parse import parse_qs, urlsplit
@@ -18,6 +17,7 @@ from app.schemas.integration import IntegrationInventoryScheduleUpdate, Integrat
 from app.services.integration_service import (
     _asset_url,
     _cache_provider_asset,
+    _local_asset_file_candidates,
     _fetch_entity,
     _fetch_inventory,
     _incremental_request_url,
@@ -157,25 +157,60 @@ class IntegrationProviderShapeTests(unittest.TestCase):
 
 
 class IntegrationImageSyncTests(unittest.IsolatedAsyncioTestCase):
-    async def test_provider_image_is_cached_on_vps_and_reused(self):
+    async def test_provider_image_is_downloaded_once_into_the_asset_store(self):
         source = SimpleNamespace(id=uuid.uuid4())
         image_buffer = BytesIO()
         Image.new("RGBA", (1, 1), (255, 255, 255, 255)).save(image_buffer, format="PNG")
         image_body = image_buffer.getvalue()
+        stored_url = f"/static/assets/ab/ab{'0' * 62}.png"
         with tempfile.TemporaryDirectory() as directory, patch.dict(
             os.environ, {"INTEGRATION_ASSET_DIR": directory}
         ), patch(
             "app.services.integration_service.request_asset",
             new=AsyncMock(return_value=("image/png", image_body)),
-        ) as request_asset_mock:
-            first_url = await _cache_provider_asset(source, "https://provider.example/products/1/a.png")
-            second_url = await _cache_provider_asset(source, "https://provider.example/products/1/a.png")
+        ) as request_asset_mock, patch(
+            "app.services.integration_service.source_asset_url",
+            new=AsyncMock(side_effect=[None, stored_url]),
+        ), patch(
+            "app.services.integration_service.store_asset", new=AsyncMock(return_value=stored_url)
+        ) as store_asset_mock, patch(
+            "app.services.integration_service.remember_source", new=AsyncMock()
+        ) as remember_source_mock:
+            db = Mock()
+            first_url = await _cache_provider_asset(db, source, "https://provider.example/products/1/a.png")
+            second_url = await _cache_provider_asset(db, source, "https://provider.example/products/1/a.png")
+
+        self.assertEqual((first_url, second_url), (stored_url, stored_url))
+        request_asset_mock.assert_awaited_once()
+        store_asset_mock.assert_awaited_once_with(db, image_body, ".png")
+        source_key = remember_source_mock.await_args.args[1]
+        remember_source_mock.assert_awaited_once_with(db, source_key, stored_url)
+
+    async def test_files_cached_per_source_move_into_the_store_without_downloading(self):
+        source = SimpleNamespace(id=uuid.uuid4())
+        provider_url = "https://provider.example/products/1/a.jpg"
+        stored_url = f"/static/assets/cd/cd{'0' * 62}.jpg"
+        with tempfile.TemporaryDirectory() as directory, patch.dict(
+            os.environ, {"INTEGRATION_ASSET_DIR": directory}
+        ), patch(
+            "app.services.integration_service.request_asset", new=AsyncMock()
+        ) as request_asset_mock, patch(
+            "app.services.integration_service.source_asset_url", new=AsyncMock(return_value=None)
+        ), patch(
+            "app.services.integration_service.store_asset", new=AsyncMock(return_value=stored_url)
+        ) as store_asset_mock, patch(
+            "app.services.integration_service.remember_source", new=AsyncMock()
+        ):
+            legacy_path = next(
+                path for _url, path in _local_asset_file_candidates(source, provider_url) if path.suffix == ".jpg"
+            )
+            legacy_path.parent.mkdir(parents=True)
+            legacy_path.write_bytes(b"jpeg")
+            url = await _cache_provider_asset(Mock(), source, provider_url)
 
-            self.assertEqual(first_url, second_url)
-            self.assertTrue(first_url.startswith("/static/uploads/integrations/"))
-            request_asset_mock.assert_awaited_once()
-            cached_files = list((Path(directory) / str(source.id)).glob("*.png"))
-            self.assertEqual(len(cached_files), 1)
+        self.assertEqual(url, stored_url)
+        request_asset_mock.assert_not_awaited()
+        self.assertEqual(store_asset_mock.await_args.args[1:], (b"jpeg", ".jpg"))
 
     async def test_catalog_images_reconcile_duplicates_and_stale_rows(self):
         product_id = uuid.uuid4()
@@ -192,7 +227,7 @@ class IntegrationImageSyncTests(unittest.IsolatedAsyncioTestCase):
 
         with patch(
             "app.services.integration_service._cache_provider_asset",
-            new=AsyncMock(side_effect=lambda _source, url: url),
+            new=AsyncMock(side_effect=lambda _db, _source, url: url),
         ):
             await _sync_product_images(
                 db,
@@ -0,0 +1,188 @@
+import json
+import unittest
+import uuid
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.api.v1.endpoints.inventory import get_inventory_valuation_history
+from app.models.inventory import Inventory
+from app.models.outbox_event import OutboxEvent
+from app.models.product import Product
+from app.services import inventory_snapshots
+from app.services.inventory_snapshots import (
+    SNAPSHOT_EVENT_TYPE,
+    SnapshotTargets,
+    _enqueue_snapshot_event,
+    close_inventory_day,
+    refresh_inventory_snapshots,
+    snapshot_targets,
+)
+from app.workers import inventory_snapshot_worker
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _stored_product(**values):
+    product = Product(id=uuid.uuid4(), company_id=uuid.uuid4())
+    for name in ("name", "cost", "price", "min_stock"):
+        set_committed_value(product, name, values.get(name, 1.0))
+    return product
+
+
+class SnapshotTargetTests(unittest.TestCase):
+    def test_stock_rows_map_to_their_branch_and_product(self):
+        branch_id, product_id = uuid.uuid4(), uuid.uuid4()
+
+        targets = snapshot_targets([Inventory(branch_id=branch_id, product_id=product_id), Inventory()])
+
+        self.assertEqual(targets.stock, {(branch_id, product_id)})
+        self.assertEqual(targets.companies, set())
+
+    def test_only_valuation_fields_of_a_product_refresh_its_company(self):
+        renamed = _stored_product(name="Café")
+        renamed.name = "Café molido"
+        repriced = _stored_product()
+        repriced.cost = 2.5
+
+        targets = snapshot_targets([renamed, repriced])
+
+        self.assertEqual(targets.companies, {repriced.company_id})
+
+    def test_payload_round_trip(self):
+        targets = SnapshotTargets(stock={(uuid.uuid4(), uuid.uuid4())}, companies={uuid.uuid4()})
+
+        self.assertEqual(SnapshotTargets.from_payload(json.loads(json.dumps(targets.to_payload()))), targets)
+
+    def test_one_event_per_commit_with_collected_targets(self):
+        branch_id, product_id = uuid.uuid4(), uuid.uuid4()
+        session = MagicMock()
+        session.info = {"inventory_snapshot_targets": SnapshotTargets(stock={(branch_id, product_id)})}
+
+        _enqueue_snapshot_event(session)
+
+        [event] = [call.args[0] for call in session.add.call_args_list]
+        self.assertIsInstance(event, OutboxEvent)
+        self.assertEqual(event.event_type, SNAPSHOT_EVENT_TYPE)
+        self.assertEqual(event.payload["stock"], [[str(branch_id), str(product_id)]])
+        self.assertEqual(session.info, {})
+
+
+class RefreshSnapshotTests(unittest.IsolatedAsyncioTestCase):
+    async def test_pairs_without_stock_rows_are_recorded_as_empty(self):
+        company_id, branch_id = uuid.uuid4(), uuid.uuid4()
+        kept, removed = uuid.uuid4(), uuid.uuid4()
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            MagicMock(all=MagicMock(return_value=[(branch_id, company_id)])),
+            MagicMock(),  # branch lock
+            MagicMock(all=MagicMock(return_value=[(branch_id, kept, 4.0, 1.0, 40.0)])),
+            MagicMock(),  # product upsert
+        ])
+
+        with patch.object(inventory_snapshots, "refresh_branch_snapshots", new_callable=AsyncMock) as branches:
+            await refresh_inventory_snapshots(
+                db, SnapshotTargets(stock={(branch_id, kept), (branch_id, removed)}), date(2026, 5, 1)
+            )
+
+        upsert = db.execute.await_args_list[3].args[0]
+        self.assertIn("ON CONFLICT (company_id, branch_id, product_id, day) DO UPDATE", _sql(upsert))
+        params = upsert.compile(dialect=postgresql.dialect()).params
+        quantities = sorted(value for name, value in params.items() if name.startswith("quantity"))
+        self.assertEqual(quantities, [0.0, 4.0])
+        branches.assert_awaited_once_with(db, {branch_id: company_id}, date(2026, 5, 1))
+
+    async def test_unknown_branches_skip_the_refresh(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[])))
+
+        await refresh_inventory_snapshots(db, SnapshotTargets(stock={(uuid.uuid4(), uuid.uuid4())}))
+
+        db.execute.assert_awaited_once()
+
+    async def test_closing_a_day_carries_the_latest_totals_forward_once(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock(rowcount=3))
+
+        carried = await close_inventory_day(db, date(2026, 5, 2))
+
+        sql = _sql(db.execute.await_args.args[0])
+        self.assertEqual(carried, 3)
+        self.assertIn("DISTINCT ON (inventory_branch_snapshots.company_id, inventory_branch_snapshots.branch_id)", sql)
+        self.assertIn("ON CONFLICT (company_id, branch_id, day) DO NOTHING", sql)
+
+
+class ValuationHistoryTests(unittest.IsolatedAsyncioTestCase):
+    async def test_days_without_rows_carry_the_previous_totals(self):
+        first, second = uuid.uuid4(), uuid.uuid4()
+
+        def snapshot(branch_id, day, quantity, value):
+            return SimpleNamespace(branch_id=branch_id, day=day, quantity=quantity, value=value)
+
+        opening = [snapshot(first, date(2026, 4, 20), 10, 100.0)]
+        in_range = [snapshot(second, date(2026, 5, 2), 5, 50.0), snapshot(first, date(2026, 5, 3), 8, 80.0)]
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            MagicMock(scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=rows))))
+            for rows in (opening, in_range)
+        ])
+        user = SimpleNamespace(company_id=uuid.uuid4())
+
+        history = await get_inventory_valuation_history(
+            db=db, start_date=date(2026, 5, 1), end_date=date(2026, 5, 3), branch_id=None, current_user=user
+        )
+
+        self.assertEqual(
+            [(day["day"], day["stock_quantity"], day["inventory_value"]) for day in history],
+            [("2026-05-01", 10, 100.0), ("2026-05-02", 15, 150.0), ("2026-05-03", 13, 130.0)],
+        )
+
+
+class InventorySnapshotWorkerTests(unittest.IsolatedAsyncioTestCase):
+    @patch("app.workers.inventory_snapshot_worker.refresh_inventory_snapshots", new_callable=AsyncMock)
+    @patch("app.workers.inventory_snapshot_worker.SessionLocal")
+    async def test_merges_events_into_one_refresh(self, session_local, refresh):
+        db = MagicMock()
+        db.commit = AsyncMock()
+        session_local.return_value.__aenter__ = AsyncMock(return_value=db)
+        session_local.return_value.__aexit__ = AsyncMock(return_value=False)
+        pairs = [(uuid.uuid4(), uuid.uuid4()) for _ in range(2)]
+
+        def snapshot_event(pair):
+            return {"event_type": SNAPSHOT_EVENT_TYPE, "payload": json.dumps(SnapshotTargets(stock={pair}).to_payload())}
+
+        ack_ids = await inventory_snapshot_worker.process_batch([
+            ("1-0", snapshot_event(pairs[0])),
+            ("2-0", {"event_type": "sales.rollup", "payload": "{}"}),
+            ("3-0", snapshot_event(pairs[1])),
+        ])
+
+        self.assertEqual(ack_ids, ["1-0", "2-0", "3-0"])
+        [targets] = refresh.await_args.args[1:]
+        self.assertEqual(targets.stock, set(pairs))
+        db.commit.assert_awaited_once()
+
+    @patch("app.workers.inventory_snapshot_worker.close_inventory_day", new_callable=AsyncMock)
+    @patch("app.workers.inventory_snapshot_worker.SessionLocal")
+    async def test_each_day_is_closed_once(self, session_local, close):
+        db = MagicMock()
+        db.commit = AsyncMock()
+        session_local.return_value.__aenter__ = AsyncMock(return_value=db)
+        session_local.return_value.__aexit__ = AsyncMock(return_value=False)
+        close.return_value = 2
+
+        with patch("app.workers.inventory_snapshot_worker.utc_today", return_value=date(2026, 5, 2)):
+            closed = await inventory_snapshot_worker.close_day(None)
+            closed = await inventory_snapshot_worker.close_day(closed)
+
+        self.assertEqual(closed, date(2026, 5, 2))
+        close.assert_awaited_once_with(db, date(2026, 5, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import unittest
+import uuid
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.product import Product
+from app.models.user import User
+from app.services import live_counters
+from app.services.live_counters import CounterTargets, counter_events, counter_targets, read_counters
+from app.workers import dashboard_counter_worker
+
+
+def _redis(*results):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=list(results))
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=pipe)
+    context.__aexit__ = AsyncMock(return_value=False)
+    redis = MagicMock()
+    redis.pipeline = MagicMock(return_value=context)
+    return redis
+
+
+class CounterTargetTests(unittest.TestCase):
+    def test_new_and_deleted_products_and_users_mark_their_company(self):
+        product_company, user_company = uuid.uuid4(), uuid.uuid4()
+        targets = counter_targets(
+            [Product(name="Café", company_id=product_company), SimpleNamespace(company_id=uuid.uuid4())],
+            [User(email="ana@example.com", company_id=user_company)],
+            [],
+        )
+
+        self.assertEqual(targets.companies, {product_company, user_company})
+
+    def test_payload_round_trip(self):
+        targets = CounterTargets(companies={uuid.uuid4(), uuid.uuid4()})
+
+        self.assertEqual(CounterTargets.from_payload(json.loads(json.dumps(targets.to_payload()))), targets)
+
+
+class ReadCountersTests(unittest.IsolatedAsyncioTestCase):
+    async def test_cold_counters_fall_back_to_sql(self):
+        redis = _redis({"users": "3", "catalog_refreshed_at": "2026-05-01T00:00:00"}, [None], [None])
+
+        self.assertIsNone(await read_counters(redis, uuid.uuid4()))
+
+    async def test_counters_and_series_are_parsed(self):
+        values = {
+            "users": "3", "products": "40", "orders": "12", "returns": "1",
+            "revenue": "1500.5", "refunds": "20", "sales_refreshed_at": "x", "catalog_refreshed_at": "x",
+        }
+        months = [None] * 12
+        months[4] = "900.25"
+        redis = _redis(values, ["100", None], months)
+
+        counters = await read_counters(redis, uuid.uuid4(), [date(2026, 5, 1), date(2026, 5, 2)], 2026)
+
+        self.assertEqual((counters["users"], counters["orders"], counters["revenue"]), (3, 12, 1500.5))
+        self.assertEqual(counters["revenue_by_day"], {date(2026, 5, 1): 100.0, date(2026, 5, 2): 0.0})
+        self.assertEqual((counters["revenue_by_month"][5], counters["revenue_by_month"][1]), (900.25, 0.0))
+
+    async def test_event_stream_sends_a_snapshot_then_changes(self):
+        pubsub = MagicMock()
+        pubsub.subscribe = pubsub.unsubscribe = pubsub.aclose = AsyncMock()
+        pubsub.get_message = AsyncMock(return_value={"type": "message", "data": '{"products": 41}'})
+        redis = MagicMock(pubsub=MagicMock(return_value=pubsub))
+        snapshot = {"products": 40, "revenue_by_day": {}, "revenue_by_month": {}}
+
+        with patch.object(live_counters, "read_counters", AsyncMock(return_value=snapshot)):
+            events = counter_events(redis, uuid.uuid4(), AsyncMock(side_effect=[False, True]))
+            received = [event async for event in events]
+
+        self.assertEqual(received, [
+            'event: snapshot\ndata: {"products": 40}\n\n',
+            'event: counters\ndata: {"products": 41}\n\n',
+        ])
+        pubsub.aclose.assert_awaited()
+
+
+class CounterWorkerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_batch_refreshes_each_company_once(self):
+        first, second = uuid.uuid4(), uuid.uuid4()
+        entries = [
+            ("1-0", {"event_type": "dashboard.counters", "payload": json.dumps({"companies": [str(first)]})}),
+            ("2-0", {"event_type": "dashboard.counters", "payload": json.dumps({"companies": [str(first), str(second)]})}),
+            ("3-0", {"event_type": "sale.updated", "payload": "{}"}),
+        ]
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        refresh = AsyncMock()
+
+        with patch.object(dashboard_counter_worker, "SessionLocal", MagicMock(return_value=session)), \
+                patch.object(dashboard_counter_worker, "refresh_catalog_counters", refresh):
+            ack_ids = await dashboard_counter_worker.process_batch(MagicMock(), entries)
+
+        self.assertEqual(ack_ids, ["1-0", "2-0", "3-0"])
+        self.assertEqual({call.args[2] for call in refresh.await_args_list}, {first, second})
+        self.assertEqual(refresh.await_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
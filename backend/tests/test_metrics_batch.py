@@ -0,0 +1,109 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+
+from app.core.metrics_batch import MetricsBatch, run_concurrently
+from app.models.pos_session import POSSession
+from app.models.sale import Sale
+
+
+def _batch() -> MetricsBatch:
+    return (
+        MetricsBatch()
+        .add("sales", select(func.count(Sale.id).label("count"), func.sum(Sale.total).label("total")))
+        .add("sessions", select(func.count(POSSession.id).label("count")))
+    )
+
+
+class MetricsBatchTests(unittest.IsolatedAsyncioTestCase):
+    def test_compiles_every_aggregate_into_one_statement(self):
+        sql = str(_batch().statement().compile(dialect=postgresql.dialect()))
+
+        self.assertTrue(sql.startswith("WITH metric_sales AS"))
+        self.assertIn("metric_sessions AS", sql)
+        self.assertIn("JOIN metric_sessions ON true", sql)
+        self.assertIn("metric_sales.total AS sales__total", sql)
+
+    def test_rejects_duplicated_names(self):
+        batch = MetricsBatch().add("sales", select(func.count(Sale.id).label("count")))
+
+        with self.assertRaises(ValueError):
+            batch.add("sales", select(func.count(Sale.id).label("count")))
+
+    async def test_splits_the_row_back_by_metric(self):
+        result = MagicMock()
+        result.mappings.return_value.first.return_value = {
+            "sales__count": 3, "sales__total": 120.0, "sessions__count": 1,
+        }
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=result)
+
+        metrics = await _batch().execute(db)
+
+        db.execute.assert_awaited_once()
+        self.assertEqual((metrics["sales"].count, metrics["sales"].total), (3, 120.0))
+        self.assertEqual(metrics["sessions"].count, 1)
+
+
+class RunConcurrentlyTests(unittest.IsolatedAsyncioTestCase):
+    async def test_runs_queries_at_the_same_time_reusing_the_request_session_first(self):
+        request_db = object()
+        opened = []
+        both_started = asyncio.Event()
+        running = 0
+
+        class FakeSession:
+            async def __aenter__(self):
+                session = object()
+                opened.append(session)
+                return session
+
+            async def __aexit__(self, *exc):
+                return False
+
+        async def query(session):
+            nonlocal running
+            running += 1
+            if running == 2:
+                both_started.set()
+            # Deadlocks unless the other query is already running.
+            await asyncio.wait_for(both_started.wait(), timeout=1)
+            return session
+
+        results = await run_concurrently({"a": query, "b": query}, db=request_db, session_factory=FakeSession)
+
+        self.assertIs(results["a"], request_db)
+        self.assertIs(results["b"], opened[0])
+        self.assertEqual(len(opened), 1)
+
+    async def test_limits_extra_sessions(self):
+        active = peak = 0
+
+        class FakeSession:
+            async def __aenter__(self):
+                return object()
+
+            async def __aexit__(self, *exc):
+                return False
+
+        async def query(_session):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return True
+
+        results = await run_concurrently(
+            {str(index): query for index in range(5)}, session_factory=FakeSession, limit=2
+        )
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(peak, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
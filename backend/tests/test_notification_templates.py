@@ -0,0 +1,135 @@
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.core.lru import LRUCache
+from app.services.notification_templates import (
+    CompiledTemplate,
+    NotificationTemplateCache,
+    TemplateSyntaxError,
+    render_default,
+)
+
+
+class CompiledTemplateTests(unittest.TestCase):
+    def test_renders_fields_and_format_specs(self):
+        template = CompiledTemplate("Venta #{order_id} por ${amount:,.2f}")
+
+        self.assertEqual(template.render({"order_id": "AB12", "amount": 1234.5}), "Venta #AB12 por $1,234.50")
+        self.assertEqual(template.fields, {"order_id", "amount"})
+
+    def test_escapes_values_but_not_markup_for_html(self):
+        template = CompiledTemplate("<p>Hola {name}</p>")
+
+        self.assertEqual(template.render({"name": "<b>Ana</b>"}, escape=True), "<p>Hola &lt;b&gt;Ana&lt;/b&gt;</p>")
+
+    def test_missing_values_render_empty(self):
+        self.assertEqual(CompiledTemplate("Hola {name}!").render({}), "Hola !")
+
+    def test_rejects_invalid_templates(self):
+        with self.assertRaises(TemplateSyntaxError):
+            CompiledTemplate("Hola {name")
+        with self.assertRaises(TemplateSyntaxError):
+            CompiledTemplate("Hola {user.name}")
+
+    def test_builtin_order_email_escapes_customer_name(self):
+        message = render_default(
+            "ORDER_RECEIVED_EMAIL",
+            {"customer_name": "<script>", "order_code": "AB12", "total": 10, "currency": "COP"},
+            html_body=True,
+        )
+
+        self.assertEqual(message.title, "Recibimos tu pedido #AB12")
+        self.assertIn("&lt;script&gt;", message.body)
+        self.assertIn("10.00 COP", message.body)
+
+
+class LRUCacheTests(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    @patch("app.core.lru.time.monotonic")
+    def test_entries_expire(self, monotonic):
+        monotonic.return_value = 10.0
+        cache = LRUCache(maxsize=2, ttl_seconds=5)
+        cache.set("a", 1)
+
+        monotonic.return_value = 16.0
+        self.assertIsNone(cache.get("a"))
+
+
+class NotificationTemplateCacheTests(unittest.IsolatedAsyncioTestCase):
+    def _db(self, rows):
+        result = Mock()
+        result.scalars.return_value.all.return_value = rows
+        db = Mock()
+        db.execute = AsyncMock(return_value=result)
+        return db
+
+    def _row(self, code, title, body, company_id=None, is_active=True):
+        return SimpleNamespace(
+            id=uuid.uuid4(), code=code, title_template=title, body_template=body,
+            type="success", company_id=company_id, is_active=is_active,
+        )
+
+    @patch("app.services.notification_templates.get_redis")
+    async def test_loads_a_company_once_and_company_rows_override_platform(self, get_redis):
+        get_redis.return_value.get = AsyncMock(return_value="1")
+        company_id = uuid.uuid4()
+        db = self._db([
+            self._row("NEW_SALE", "Venta", "Plataforma {order_id}"),
+            self._row("NEW_SALE", "Venta", "Empresa {order_id}", company_id),
+        ])
+        cache = NotificationTemplateCache()
+
+        rendered = await cache.render_many(db, company_id, "NEW_SALE", [{"order_id": "A"}, {"order_id": "B"}])
+        again = await cache.render(db, company_id, "NEW_SALE", {"order_id": "C"})
+
+        self.assertEqual([item.body for item in rendered], ["Empresa A", "Empresa B"])
+        self.assertEqual(again.body, "Empresa C")
+        db.execute.assert_awaited_once()
+
+    @patch("app.services.notification_templates.get_redis")
+    async def test_generation_change_drops_cached_companies(self, get_redis):
+        get_redis.return_value.get = AsyncMock(side_effect=["1", "2"])
+        db = self._db([self._row("WELCOME", "Hola", "Hola {user_name}")])
+        cache = NotificationTemplateCache(check_interval_seconds=0)
+
+        await cache.get(db, None, "WELCOME")
+        await cache.get(db, None, "WELCOME")
+
+        self.assertEqual(db.execute.await_count, 2)
+
+    @patch("app.services.notification_templates.get_redis")
+    async def test_inactive_company_override_disables_the_template(self, get_redis):
+        get_redis.return_value.get = AsyncMock(return_value="1")
+        company_id = uuid.uuid4()
+        db = self._db([
+            self._row("NEW_SALE", "Venta", "Plataforma {order_id}"),
+            self._row("ORDER_RECEIVED_EMAIL", "Pedido", "Empresa", company_id, is_active=False),
+            self._row("NEW_SALE", "Venta", "Empresa {order_id}", company_id, is_active=False),
+        ])
+        cache = NotificationTemplateCache()
+
+        self.assertIsNone(await cache.render(db, company_id, "NEW_SALE", {"order_id": "A"}))
+        self.assertIsNone(await cache.get(db, company_id, "ORDER_RECEIVED_EMAIL"))
+
+    @patch("app.services.notification_templates.get_redis")
+    async def test_unknown_code_without_default_is_not_rendered(self, get_redis):
+        get_redis.return_value.get = AsyncMock(return_value=None)
+        cache = NotificationTemplateCache()
+
+        self.assertIsNone(await cache.render(self._db([]), uuid.uuid4(), "NEW_SALE", {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
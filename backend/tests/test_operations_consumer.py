@@ -0,0 +1,45 @@
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.email_delivery import EmailDelivery
+from app.models.outbox_consumption import OutboxConsumption
+from app.services.notification_templates import RenderedNotification
+from app.workers import operations_consumer
+
+
+class DeliveredEmailTests(unittest.IsolatedAsyncioTestCase):
+    async def _process(self, message):
+        sale = SimpleNamespace(id=uuid.uuid4(), company_id=uuid.uuid4(), user_id=None, total=100)
+        order = SimpleNamespace(customer_email="ana@example.com", customer_name="Ana", currency="COP")
+        db = MagicMock(commit=AsyncMock(), get=AsyncMock(return_value=sale))
+        db.scalar = AsyncMock(side_effect=[None, order])  # receipt, storefront order
+        session = MagicMock(__aenter__=AsyncMock(return_value=db), __aexit__=AsyncMock(return_value=False))
+
+        with patch.object(operations_consumer, "SessionLocal", return_value=session), \
+                patch.object(operations_consumer.template_cache, "render", AsyncMock(return_value=message)):
+            handled = await operations_consumer.process_event(
+                str(uuid.uuid4()), "order.delivered", {"sale_id": str(sale.id)}
+            )
+
+        self.assertTrue(handled)
+        db.commit.assert_awaited_once()
+        return [call.args[0] for call in db.add.call_args_list]
+
+    async def test_customer_email_is_queued_with_the_receipt(self):
+        message = RenderedNotification(code="ORDER_DELIVERED_EMAIL", type="info", title="Entregado", body="<p>Hola</p>")
+
+        added = await self._process(message)
+
+        self.assertEqual([type(row) for row in added], [OutboxConsumption, EmailDelivery])
+        self.assertEqual(added[1].subject, "Entregado")
+
+    async def test_disabled_template_skips_the_email_but_keeps_the_receipt(self):
+        added = await self._process(None)
+
+        self.assertEqual([type(row) for row in added], [OutboxConsumption])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import json
+import unittest
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints.inventory import read_movements
+from app.core import pagination
+from app.models.audit import AuditLog
+from app.schemas.audit import AuditLog as AuditLogSchema
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class CursorTests(unittest.TestCase):
+    def test_round_trip(self):
+        key = (datetime(2026, 5, 1, 12, 30, 15, 123456), uuid.uuid4())
+
+        self.assertEqual(pagination.decode_cursor(pagination.encode_cursor(*key)), key)
+
+    def test_tampered_cursors_are_a_bad_request(self):
+        for cursor in ("not-base64!", pagination.encode_cursor(datetime(2026, 5, 1), uuid.uuid4())[:-4]):
+            with self.assertRaises(HTTPException) as raised:
+                pagination.decode_cursor(cursor)
+            self.assertEqual(raised.exception.status_code, 400)
+
+    def test_projection_keeps_only_mapped_columns(self):
+        columns = pagination.projection(AuditLog, AuditLogSchema)
+
+        self.assertEqual(
+            [column.key for column in columns],
+            ["action", "entity_type", "entity_id", "details", "id", "user_id", "company_id", "created_at"],
+        )
+
+
+class KeysetTests(unittest.TestCase):
+    def test_cursor_pages_start_after_the_last_key_without_offset(self):
+        cursor = pagination.encode_cursor(datetime(2026, 5, 1), uuid.uuid4())
+
+        sql = _sql(pagination.keyset(select(AuditLog.id), AuditLog.created_at, AuditLog.id, cursor, 50, skip=100))
+
+        self.assertIn("(audit_logs.created_at, audit_logs.id) < (", sql)
+        self.assertIn("ORDER BY audit_logs.created_at DESC, audit_logs.id DESC", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def test_one_extra_row_tells_whether_another_page_follows(self):
+        rows = [SimpleNamespace(created_at=datetime(2026, 5, 1, hour), id=uuid.uuid4()) for hour in (3, 2, 1)]
+
+        first, next_cursor = pagination.page(rows, 2)
+        last, no_cursor = pagination.page(rows[2:], 2)
+
+        self.assertEqual(first, rows[:2])
+        self.assertEqual(pagination.decode_cursor(next_cursor), (rows[1].created_at, rows[1].id))
+        self.assertEqual((last, no_cursor), (rows[2:], None))
+
+
+class EstimateCountTests(unittest.IsolatedAsyncioTestCase):
+    def _db(self, plan_rows):
+        connection = MagicMock()
+        connection.dialect = postgresql.dialect()
+        plan = json.dumps([{"Plan": {"Plan Rows": plan_rows}}])
+        connection.exec_driver_sql = AsyncMock(return_value=MagicMock(scalar=MagicMock(return_value=plan)))
+        db = MagicMock()
+        db.connection = AsyncMock(return_value=connection)
+        db.scalar = AsyncMock(return_value=7)
+        return db, connection
+
+    async def test_large_results_use_the_planner_estimate(self):
+        db, connection = self._db(250000)
+        query = select(AuditLog.id).where(AuditLog.action == "LOGIN").limit(51)
+
+        total = await pagination.estimate_count(db, query)
+
+        sql = connection.exec_driver_sql.await_args.args[0]
+        self.assertEqual(total, 250000)
+        self.assertTrue(sql.startswith("EXPLAIN (FORMAT JSON) SELECT"))
+        self.assertIn("'LOGIN'", sql)
+        self.assertNotIn("LIMIT", sql)
+        db.scalar.assert_not_awaited()
+
+    async def test_small_results_are_counted_exactly(self):
+        db, _ = self._db(12)
+
+        total = await pagination.estimate_count(db, select(AuditLog.id))
+
+        self.assertEqual(total, 7)
+        self.assertIn("count(*)", _sql(db.scalar.await_args.args[0]))
+
+
+class MovementListTests(unittest.IsolatedAsyncioTestCase):
+    async def test_movements_are_projected_rows_with_the_next_cursor_header(self):
+        user_id = uuid.uuid4()
+        rows = [
+            MagicMock(
+                _mapping={"id": uuid.uuid4(), "created_at": datetime(2026, 5, 1, hour), "user_id": user_id},
+                id=uuid.uuid4(),
+                created_at=datetime(2026, 5, 1, hour),
+                user_id=user_id if hour else None,
+                user_full_name="Ana Pérez",
+            )
+            for hour in (2, 1, 0)
+        ]
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=rows)))
+        response = Response()
+
+        movements = await read_movements(
+            response=response,
+            db=db,
+            product_id=uuid.uuid4(),
+            branch_id=None,
+            cursor=None,
+            limit=2,
+            estimate_total=False,
+            current_user=SimpleNamespace(company_id=uuid.uuid4()),
+        )
+
+        sql = _sql(db.execute.await_args.args[0])
+        self.assertNotIn("product_images", sql)
+        self.assertIn("users.full_name AS user_full_name", sql)
+        self.assertEqual(len(movements), 2)
+        self.assertEqual(movements[0]["user"], {"id": user_id, "full_name": "Ana Pérez"})
+        self.assertIn(pagination.NEXT_CURSOR_HEADER, response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.api.v1.endpoints.storefront import _serialize_public_product
+from app.models.pricelist import PriceList
+from app.models.pricelist_item import PriceListItem
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.storefront import PublishedProduct
+from app.services import pricing
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class PriceRuleTests(unittest.TestCase):
+    def test_variants_keep_their_difference_from_the_replaced_product_price(self):
+        product = SimpleNamespace(price=100.0)
+        extra = SimpleNamespace(price=None, price_extra=20.0)
+        absolute = SimpleNamespace(price=90.0, price_extra=0.0)
+
+        self.assertEqual(pricing.list_price(product), 100.0)
+        self.assertEqual(pricing.list_price(product, extra), 120.0)
+        self.assertEqual(pricing.list_price(product, absolute), 90.0)
+        self.assertEqual(pricing.channel_price(product, extra, None), 120.0)
+        self.assertEqual(pricing.channel_price(product, extra, 80.0), 100.0)
+        self.assertEqual(pricing.channel_price(product, absolute, 80.0), 70.0)
+        self.assertEqual(pricing.channel_price(SimpleNamespace(price=0), extra, 50.0), 50.0)
+
+    def test_storefront_payload_reads_the_precomputed_prices(self):
+        variant = SimpleNamespace(id=uuid.uuid4(), name="Rojo", sku=None, attributes={}, price=None, price_extra=5.0)
+        product = SimpleNamespace(
+            id=uuid.uuid4(), name="Camisa", description=None, price=100.0, product_type="STORABLE",
+            image_url=None, images=[], variants=[variant], track_inventory=False, category=None, brand=None,
+        )
+        published = SimpleNamespace(
+            id=uuid.uuid4(), product=product, custom_title=None, custom_description=None, price_override=None,
+            compare_at_price=None, slug="camisa", is_featured=False, show_stock=True,
+        )
+
+        serialized = _serialize_public_product(published, product, prices={(published.id, variant.id): 42.0})
+        computed = _serialize_public_product(published, product)
+
+        self.assertEqual((serialized.price, serialized.variants[0].price), (42.0, 42.0))
+        self.assertEqual(computed.price, 105.0)
+
+
+class RefreshTests(unittest.TestCase):
+    def test_flushed_price_changes_collect_their_products(self):
+        product, variant_product, published_product, item_product = (uuid.uuid4() for _ in range(4))
+        pricelist = PriceList(id=uuid.uuid4(), active=False)
+        session = SimpleNamespace(
+            new=[ProductVariant(product_id=variant_product, name="Rojo")],
+            deleted=[PriceListItem(product_id=item_product, price=10.0)],
+            dirty=[
+                Product(id=product, name="Camisa", price=120.0),
+                PublishedProduct(product_id=published_product, price_override=99.0),
+                pricelist,
+            ],
+            info={},
+        )
+
+        pricing._collect_priced_products(session, None)
+
+        self.assertEqual(
+            session.info[pricing._SESSION_PRODUCTS],
+            {product, variant_product, published_product, item_product},
+        )
+        self.assertEqual(session.info[pricing._SESSION_PRICELISTS], {pricelist.id})
+
+    def test_commit_recomputes_the_collected_products_in_batches(self):
+        session = Session()
+        pricelist_product = uuid.uuid4()
+        pricing.mark_prices_stale(session, [uuid.uuid4(), None])
+        session.info[pricing._SESSION_PRICELISTS] = {uuid.uuid4()}
+        lookup = MagicMock()
+        lookup.scalars.return_value.all.return_value = [pricelist_product]
+
+        with patch.object(pricing, "REFRESH_BATCH", 1), \
+                patch.object(session, "execute", side_effect=[lookup, None, None, None, None]) as execute:
+            pricing._refresh_effective_prices(session)
+
+        self.assertEqual(execute.call_count, 5)
+        obsolete, upsert = (_sql(call.args[0]) for call in execute.call_args_list[1:3])
+        self.assertIn("DELETE FROM effective_prices", obsolete)
+        self.assertIn("IS NOT DISTINCT FROM effective_prices.variant_id", obsolete)
+        self.assertIn("DISTINCT ON (pricelist_items.pricelist_id, pricelist_items.product_id)", upsert)
+        self.assertIn(
+            "ON CONFLICT (product_id, variant_id, published_product_id, pricelist_id) DO UPDATE SET price = excluded.price "
+            "WHERE effective_prices.price IS DISTINCT FROM excluded.price",
+            upsert,
+        )
+        self.assertNotIn(pricing._SESSION_PRODUCTS, session.info)
+        self.assertNotIn(pricing._SESSION_PRICELISTS, session.info)
+
+    def test_nothing_runs_without_price_changes(self):
+        session = Session()
+
+        with patch.object(session, "execute") as execute:
+            pricing._refresh_effective_prices(session)
+
+        execute.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints import products as products_endpoint
+from app.models.product import Product
+from app.schemas.product import PriceExpression, ProductBulkChanges, ProductBulkUpdateRequest
+from app.services import product_bulk_update
+from app.services.product_bulk_update import bulk_update_products, expression_value
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def _result(rows):
+    result = MagicMock()
+    result.all.return_value = list(rows)
+    result.scalars.return_value.all.return_value = list(rows)
+    return result
+
+
+class ExpressionTests(unittest.TestCase):
+    def test_percent_rounds_up_to_the_step_and_never_goes_negative(self):
+        expression = PriceExpression(mode="percent", value=10, round_to=0.01, rounding="up")
+
+        sql = _sql(expression_value(Product.price, expression))
+
+        self.assertIn("coalesce(products.price, 0.0) * 1.1", sql)
+        self.assertIn("ceil(CAST(", sql)
+        self.assertIn("/ CAST(0.01 AS NUMERIC)) * 0.01", sql)
+        self.assertTrue(sql.startswith("CAST(greatest("))
+
+    def test_negative_results_are_kept_when_allowed(self):
+        expression = PriceExpression(mode="delta", value=-500)
+
+        sql = _sql(expression_value(Product.price, expression, allow_negative=True))
+
+        self.assertEqual(sql, "CAST(coalesce(products.price, 0.0) + -500.0 AS FLOAT)")
+
+    def test_request_needs_one_selection_and_one_change(self):
+        changes = {"price": {"mode": "set", "value": 10}}
+        with self.assertRaises(ValidationError):
+            ProductBulkUpdateRequest(product_ids=[uuid.uuid4()], filters={"all": True}, changes=changes)
+        with self.assertRaises(ValidationError):
+            ProductBulkUpdateRequest(filters={"all": True}, changes={})
+
+    def test_whole_catalog_changes_must_be_explicit(self):
+        changes = {"price": {"mode": "percent", "value": 10}}
+        with self.assertRaises(ValidationError):
+            ProductBulkUpdateRequest(filters={}, changes=changes)
+        with self.assertRaises(ValidationError):
+            ProductBulkUpdateRequest(filters={"search": "  "}, changes=changes)
+
+        self.assertTrue(ProductBulkUpdateRequest(filters={"all": True}, changes=changes).filters.all)
+        self.assertIsNotNone(ProductBulkUpdateRequest(filters={"product_type": "STORABLE"}, changes=changes))
+
+    def test_fixed_prices_cannot_be_negative_except_variant_extras(self):
+        with self.assertRaises(ValidationError):
+            ProductBulkChanges(price={"mode": "set", "value": -1})
+        with self.assertRaises(ValidationError):
+            ProductBulkChanges(cost={"mode": "set", "value": -1})
+
+        self.assertEqual(ProductBulkChanges(price_extra={"mode": "set", "value": -5}).price_extra.value, -5)
+        self.assertEqual(ProductBulkChanges(price={"mode": "delta", "value": -5}).price.value, -5)
+
+
+class BulkUpdateTests(unittest.IsolatedAsyncioTestCase):
+    async def test_batches_are_updated_set_based_with_one_audit_and_one_event(self):
+        company_id, storefront_id, missing = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        product_ids = sorted(uuid.uuid4() for _ in range(3))
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            _result(product_ids),
+            _result(product_ids[:2]), _result([uuid.uuid4()]), _result([storefront_id]),
+            _result(product_ids[2:]), _result([]), _result([storefront_id]),
+        ])
+        changes = ProductBulkChanges(
+            price=PriceExpression(mode="percent", value=-15, round_to=100),
+            price_extra=PriceExpression(mode="set", value=0),
+            sale_ok=True,
+        )
+
+        with patch.object(product_bulk_update, "BULK_UPDATE_BATCH", 2), \
+                patch.object(product_bulk_update, "mark_prices_stale") as mark_prices_stale, \
+                patch.object(product_bulk_update, "mark_branch_totals_stale") as mark_branch_totals_stale, \
+                patch.object(product_bulk_update, "mark_totals_stale") as mark_totals_stale, \
+                patch.object(product_bulk_update, "mark_stale") as mark_stale, \
+                patch.object(product_bulk_update, "log_activity", new=AsyncMock()) as log_activity, \
+                patch.object(product_bulk_update, "enqueue_outbox_event") as enqueue_outbox_event:
+            outcome = await bulk_update_products(
+                db, company_id=company_id, user_id=None, conditions=[], changes=changes,
+                selection={"product_ids": []}, requested_ids=[*product_ids, missing],
+            )
+
+        self.assertEqual(
+            (outcome.matched, outcome.products_updated, outcome.variants_updated, outcome.not_found),
+            (3, 3, 1, [missing]),
+        )
+        self.assertEqual(db.execute.await_count, 7)
+        product_update, variant_update = (_sql(call.args[0]) for call in db.execute.await_args_list[1:3])
+        self.assertIn("UPDATE products SET", product_update)
+        self.assertIn("round(CAST(", product_update)
+        self.assertIn("UPDATE product_variants SET", variant_update)
+        mark_prices_stale.assert_called_once_with(db, product_ids)
+        mark_branch_totals_stale.assert_called_once_with(db, company_id)
+        mark_totals_stale.assert_not_called()
+        mark_stale.assert_called_once()
+        log_activity.assert_awaited_once()
+        enqueue_outbox_event.assert_called_once()
+        self.assertEqual(enqueue_outbox_event.call_args.kwargs["payload"]["products_updated"], 3)
+        self.assertEqual(enqueue_outbox_event.call_args.kwargs["aggregate_id"], company_id)
+
+    async def test_nothing_is_written_without_matches(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=_result([]))
+
+        with patch.object(product_bulk_update, "enqueue_outbox_event") as enqueue_outbox_event:
+            outcome = await bulk_update_products(
+                db, company_id=uuid.uuid4(), user_id=None, conditions=[],
+                changes=ProductBulkChanges(sale_ok=False), selection={"filters": {}},
+            )
+
+        self.assertEqual(outcome.matched, 0)
+        self.assertEqual(db.execute.await_count, 1)
+        enqueue_outbox_event.assert_not_called()
+
+
+class BulkUpdateEndpointTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.user = SimpleNamespace(id=uuid.uuid4(), company_id=uuid.uuid4())
+        self.db = MagicMock(commit=AsyncMock(), scalar=AsyncMock(return_value=None))
+        patcher = patch.object(products_endpoint, "bulk_update_products", new=AsyncMock(
+            return_value=product_bulk_update.BulkUpdateResult(matched=1, products_updated=1)
+        ))
+        self.service = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _update(self, **request):
+        return await products_endpoint.bulk_update_products_endpoint(
+            update_in=ProductBulkUpdateRequest(**request), db=self.db, current_user=self.user
+        )
+
+    async def test_categories_of_other_companies_are_not_found(self):
+        with self.assertRaises(HTTPException) as raised:
+            await self._update(product_ids=[uuid.uuid4()], changes={"category_id": str(uuid.uuid4())})
+
+        self.assertEqual(raised.exception.status_code, 404)
+        lookup = _sql(self.db.scalar.await_args.args[0])
+        self.assertIn(f"categories.company_id = '{self.user.company_id}'", lookup)
+        self.service.assert_not_awaited()
+        self.db.commit.assert_not_awaited()
+
+    async def test_selected_ids_are_updated_and_committed(self):
+        product_ids = [uuid.uuid4(), uuid.uuid4()]
+
+        response = await self._update(product_ids=product_ids, changes={"sale_ok": False})
+
+        kwargs = self.service.await_args.kwargs
+        self.assertEqual(kwargs["company_id"], self.user.company_id)
+        self.assertEqual(kwargs["requested_ids"], product_ids)
+        self.assertEqual(kwargs["selection"], {"product_ids": [str(product_id) for product_id in product_ids]})
+        self.assertIn("products.id IN", _sql(kwargs["conditions"][0]))
+        self.assertEqual(response.products_updated, 1)
+        self.db.commit.assert_awaited_once()
+
+    async def test_filters_select_within_the_company(self):
+        await self._update(filters={"all": True, "product_type": "STORABLE"}, changes={"sale_ok": True})
+
+        kwargs = self.service.await_args.kwargs
+        conditions = " AND ".join(_sql(condition) for condition in kwargs["conditions"])
+        self.assertIn(f"products.company_id = '{self.user.company_id}'", conditions)
+        self.assertIn("products.product_type = 'STORABLE'", conditions)
+        self.assertEqual(kwargs["selection"], {"filters": {"all": True, "product_type": "STORABLE"}})
+        self.assertIsNone(kwargs["requested_ids"])
+        self.db.commit.assert_awaited_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pandas as pd
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.models.product import Product
+from app.services import product_codes
+from app.services.product_import import ProductImporter, parse_product_rows
+from app.services.reference_cache import PRODUCT_CODES, _on_change
+
+
+def _result(rows=()):
+    result = MagicMock()
+    result.all.return_value = list(rows)
+    result.tuples.return_value.all.return_value = list(rows)
+    return result
+
+
+class CodeIndexTests(unittest.TestCase):
+    def test_uniqueness_query_matches_the_unique_index_expression(self):
+        [index] = [index for index in Product.__table__.indexes if index.name == "uq_products_company_sku_active"]
+        index_sql = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+        self.assertIn("lower(trim(sku))", index_sql)
+        self.assertIn("WHERE is_active AND sku IS NOT NULL", index_sql)
+
+        key_sql = str(product_codes.sku_expression(Product.sku).compile(dialect=postgresql.dialect()))
+        self.assertEqual(key_sql, "lower(trim(products.sku))")
+
+
+class CodeTableTests(unittest.IsolatedAsyncioTestCase):
+    async def test_barcodes_and_case_insensitive_skus_resolve_products_before_variants(self):
+        company_id, product_id, other_id, variant_id = (uuid.uuid4() for _ in range(4))
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            _result([(product_id, " Caf-01 ", "7701234"), (other_id, None, "7705555")]),
+            _result([(variant_id, other_id, "caf-01", "7709999")]),
+        ])
+        table = await product_codes._load_code_table(db, company_id)
+
+        with patch.object(product_codes, "code_table", AsyncMock(return_value=table)):
+            by_sku = await product_codes.resolve_code(db, company_id, "CAF-01")
+            by_barcode = await product_codes.resolve_code(db, company_id, " 7709999")
+            missing = await product_codes.resolve_code(db, company_id, "000")
+
+        self.assertEqual(by_sku, product_codes.CodeMatch(product_id, None))
+        self.assertEqual(by_barcode, product_codes.CodeMatch(other_id, variant_id))
+        self.assertIsNone(missing)
+
+    async def test_cached_and_probed_lookups_rank_codes_alike(self):
+        # "X1" is one product's SKU and another product's variant barcode.
+        company_id, sku_owner, other_id, variant_id = (uuid.uuid4() for _ in range(4))
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            _result([(sku_owner, "X1", None)]),
+            _result([(variant_id, other_id, None, "X1")]),
+        ])
+        table = await product_codes._load_code_table(db, company_id)
+        with patch.object(product_codes, "code_table", AsyncMock(return_value=table)):
+            cached = await product_codes.resolve_code(db, company_id, "X1")
+
+        probe = MagicMock()
+        probe.first.return_value = None
+        db.execute = AsyncMock(return_value=probe)
+        await product_codes._probe_code(db, company_id, "X1")
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        ranked = sql.split("UNION ALL")
+
+        self.assertEqual(cached, product_codes.CodeMatch(other_id, variant_id))
+        self.assertEqual(len(ranked), 4)
+        for rank, condition in enumerate((
+            "trim(products.barcode)", "trim(product_variants.barcode)",
+            "lower(trim(products.sku))", "lower(trim(product_variants.sku))",
+        )):
+            self.assertIn(f"{rank} AS rank", ranked[rank])
+            self.assertIn(condition, ranked[rank])
+
+    async def test_large_catalogs_probe_the_indexes_instead(self):
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[_result([(uuid.uuid4(), "A", None)] * 3), _result([])])
+
+        with patch.object(product_codes, "CODE_TABLE_MAX_CODES", 2):
+            self.assertIsNone(await product_codes._load_code_table(db, uuid.uuid4()))
+
+
+class CodeInvalidationTests(unittest.TestCase):
+    def test_only_code_changes_tag_the_company_table(self):
+        company_id = uuid.uuid4()
+        tags = _on_change(PRODUCT_CODES, ("sku", "barcode", "is_active"))
+
+        self.assertEqual(list(tags(Product(company_id=company_id, sku="A-1"))), [f"company:{company_id}:{PRODUCT_CODES}"])
+        self.assertEqual(list(tags(Product(company_id=company_id, name="Sin código"))), [])
+
+
+class ImportSkuTests(unittest.IsolatedAsyncioTestCase):
+    async def test_rows_taking_another_active_products_sku_are_rejected(self):
+        company_id, owner, job_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        values, errors = parse_product_rows(pd.DataFrame({
+            "product_id": ["", str(owner), "", ""],
+            "name": ["Café", "Café", "Té", "Té verde"],
+            "sku": ["caf-01", "CAF-01", "TE-01", "te-01 "],
+        }, dtype=object))
+        importer = ProductImporter(company_id, None, job_id)
+
+        with patch("app.services.product_import.active_sku_owners", AsyncMock(return_value={"caf-01": owner})):
+            await importer._check_skus(MagicMock(), values, errors)
+
+        self.assertEqual(errors.tolist(), [
+            "el SKU 'caf-01' ya pertenece a otro producto activo",
+            None,
+            None,
+            "el SKU 'te-01' ya pertenece a otro producto activo",
+        ])
@@ -4,10 +4,17 @@ import tempfile
 import uuid
 from pathlib import Path
 from types import SimpleNamespace
-from unittest.mock import AsyncMock, Mock
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
-from app.api.v1.endpoints.products import _PRODUCT_DELETE_RELATIONS, _find_product_delete_blockers
 from app.schemas.product import ProductBulkDeleteRequest
+from app.services import product_deletion
+from app.services.product_deletion import (
+    PRODUCT_DELETE_RELATIONS,
+    PUBLISHED_REASON,
+    DeletionSummary,
+    apply_batch,
+    find_delete_blockers,
+)
 from app.services.integration_service import (
     prune_orphaned_local_assets,
     remove_unreferenced_local_assets,
@@ -29,21 +36,129 @@ class _ScalarResult:
         return self._Scalars(self._values)
 
 
+def _blocker_row(product_id, *reasons):
+    return (product_id, *(reason in reasons for reason, _ in PRODUCT_DELETE_RELATIONS))
+
+
+def _rows(rows):
+    result = Mock()
+    result.all.return_value = list(rows)
+    result.scalars.return_value.all.return_value = list(rows)
+    return result
+
+
 class ProductDeleteGuardTests(unittest.IsolatedAsyncioTestCase):
-    async def test_sale_relation_is_reported_as_a_blocker(self):
-        product_id = uuid.uuid4()
-        query_results = []
-        for index, _ in enumerate(_PRODUCT_DELETE_RELATIONS):
-            result = Mock()
-            result.scalars.return_value.all.return_value = [product_id] if index == 0 else []
-            query_results.append(result)
+    async def test_blockers_of_every_relation_come_from_one_query(self):
+        blocked, free = uuid.uuid4(), uuid.uuid4()
+        db = SimpleNamespace(execute=AsyncMock(return_value=_rows([
+            _blocker_row(blocked, "Tiene una orden o venta asociada", PUBLISHED_REASON),
+            _blocker_row(free),
+        ])))
+
+        blockers = await find_delete_blockers(db, [blocked, free])
+
+        self.assertEqual(blockers[blocked], ["Tiene una orden o venta asociada", PUBLISHED_REASON])
+        self.assertEqual(blockers[free], [])
+        self.assertEqual(db.execute.await_count, 1)
+
+
+class _Savepoint:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class DeletionBatchTests(unittest.IsolatedAsyncioTestCase):
+    def _db(self, *results):
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=list(results))
+        db.begin_nested = Mock(return_value=_Savepoint())
+        return db
 
-        db = SimpleNamespace(execute=AsyncMock(side_effect=query_results))
+    async def test_free_products_are_deleted_and_blocked_ones_reported(self):
+        free, blocked = uuid.uuid4(), uuid.uuid4()
+        job = SimpleNamespace(id=uuid.uuid4(), company_id=uuid.uuid4(), requested_by_user_id=None, scope="selected", params={})
+        db = self._db(
+            _rows([_blocker_row(free), _blocker_row(blocked, "Tiene una factura asociada")]),
+            _rows(["/static/uploads/integrations/x/a.jpg"]),  # product image urls
+            _rows([]),  # gallery image urls
+            _rows([]), _rows([]), _rows([]),  # images, variants, products
+        )
+        summary = DeletionSummary()
 
-        blockers = await _find_product_delete_blockers(db, [product_id])
+        with patch.object(product_deletion, "log_activity", AsyncMock()), \
+                patch.object(product_deletion, "mark_counters_stale") as counters:
+            urls = await apply_batch(db, job, [(free, "Libre"), (blocked, "Facturado")], summary)
 
-        self.assertEqual(blockers[product_id], ["Tiene una orden o venta asociada"])
-        self.assertEqual(db.execute.await_count, len(_PRODUCT_DELETE_RELATIONS))
+        self.assertEqual(urls, {"/static/uploads/integrations/x/a.jpg"})
+        self.assertEqual((summary.deleted, summary.archived, summary.blocked_count), (1, 0, 1))
+        self.assertEqual(summary.blocked[0]["reasons"], ["Tiene una factura asociada"])
+        delete_sql = str(db.execute.await_args_list[5].args[0])
+        self.assertIn("DELETE FROM products", delete_sql)
+        counters.assert_called_once_with(db, job.company_id)
+
+    async def test_forced_jobs_archive_blocked_products_in_bulk(self):
+        blocked = [uuid.uuid4(), uuid.uuid4()]
+        job = SimpleNamespace(
+            id=uuid.uuid4(), company_id=uuid.uuid4(), requested_by_user_id=None, scope="catalog", params={"force": True},
+        )
+        db = self._db(
+            _rows([_blocker_row(product_id, "Tiene existencias registradas") for product_id in blocked]),
+            _rows([]), _rows([]), _rows([uuid.uuid4()]),  # products, variants, publications
+        )
+        summary = DeletionSummary()
+
+        with patch.object(product_deletion, "log_activity", AsyncMock()), \
+                patch.object(product_deletion, "mark_counters_stale"), \
+                patch.object(product_deletion, "mark_stale") as mark_stale:
+            await apply_batch(db, job, [(product_id, "x") for product_id in blocked], summary)
+
+        self.assertEqual((summary.deleted, summary.archived, summary.blocked_count), (0, 2, 0))
+        self.assertEqual(db.execute.await_count, 4)
+        mark_stale.assert_called_once()
+
+    async def test_job_resumes_after_its_cursor(self):
+        cursor, next_product = uuid.uuid4(), uuid.uuid4()
+        job = SimpleNamespace(
+            id=uuid.uuid4(), company_id=uuid.uuid4(), requested_by_user_id=None, scope="catalog", params={},
+            status="RUNNING", total_products=3, processed_products=2, cursor=cursor, summary={"deleted": 2},
+        )
+        db = MagicMock(get=AsyncMock(return_value=job), commit=AsyncMock())
+        db.execute = AsyncMock(side_effect=[_rows([(next_product, "c")]), _rows([])])
+        session = MagicMock(__aenter__=AsyncMock(return_value=db), __aexit__=AsyncMock(return_value=False))
+
+        async def apply(db, job, products, summary):
+            summary.deleted += len(products)
+            return set()
+
+        with patch.object(product_deletion, "apply_batch", side_effect=apply), \
+                patch.object(product_deletion, "prune_orphaned_local_assets", AsyncMock()), \
+                patch.object(product_deletion, "_finish", AsyncMock()) as finish:
+            await product_deletion.run_deletion_job(job.id, session_factory=lambda: session)
+
+        first_query = db.execute.await_args_list[0].args[0]
+        self.assertIn("products.id > ", str(first_query))
+        self.assertEqual((job.cursor, job.processed_products, job.summary["deleted"]), (next_product, 3, 3))
+        finish.assert_awaited_once_with(db, job, "COMPLETED")
+
+    async def test_unexpected_errors_fail_the_job(self):
+        job = SimpleNamespace(
+            id=uuid.uuid4(), company_id=uuid.uuid4(), requested_by_user_id=None, scope="catalog", params={},
+            status="RUNNING", total_products=3, processed_products=0, cursor=None, summary={"deleted": 0},
+        )
+        db = MagicMock(get=AsyncMock(return_value=job), commit=AsyncMock(), rollback=AsyncMock())
+        db.execute = AsyncMock(side_effect=[_rows([(uuid.uuid4(), "a")])])
+        session = MagicMock(__aenter__=AsyncMock(return_value=db), __aexit__=AsyncMock(return_value=False))
+
+        with patch.object(product_deletion, "apply_batch", AsyncMock(side_effect=RuntimeError("boom"))), \
+                patch.object(product_deletion, "_finish", AsyncMock()) as finish:
+            await product_deletion.run_deletion_job(job.id, session_factory=lambda: session)
+
+        db.rollback.assert_awaited_once()
+        self.assertEqual(job.summary["error"], "RuntimeError: boom")
+        self.assertEqual(finish.await_args.args[:3], (db, job, "FAILED"))
 
 
 class ProductBulkDeleteSchemaTests(unittest.TestCase):
@@ -82,7 +197,8 @@ class LocalIntegrationAssetCleanupTests(unittest.IsolatedAsyncioTestCase):
                         side_effect=[_ScalarResult([]), _ScalarResult([])]
                     )
                 )
-                removed = await remove_unreferenced_local_assets(db, {asset_url})
+                with patch("app.services.integration_service.forget_derivatives", AsyncMock()) as forget:
+                    removed = await remove_unreferenced_local_assets(db, {asset_url})
                 exists_after_cleanup = asset_path.exists()
             finally:
                 if previous_directory is None:
@@ -92,6 +208,7 @@ class LocalIntegrationAssetCleanupTests(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(removed, 1)
         self.assertFalse(exists_after_cleanup)
+        forget.assert_awaited_once_with(db, {asset_url})
 
     async def test_shared_provider_asset_is_kept_when_still_referenced(self):
         source_id = uuid.uuid4()
@@ -135,7 +252,8 @@ class LocalIntegrationAssetCleanupTests(unittest.IsolatedAsyncioTestCase):
                         side_effect=[_ScalarResult([]), _ScalarResult([])]
                     )
                 )
-                removed = await prune_orphaned_local_assets(db)
+                with patch("app.services.integration_service.forget_derivatives", AsyncMock()) as forget:
+                    removed = await prune_orphaned_local_assets(db)
                 exists_after_cleanup = asset_path.exists()
             finally:
                 if previous_directory is None:
@@ -145,6 +263,7 @@ class LocalIntegrationAssetCleanupTests(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(removed, 1)
         self.assertFalse(exists_after_cleanup)
+        forget.assert_awaited_once_with(db, {f"/static/uploads/integrations/{source_id}/{filename}"})
 
 
 if __name__ == "__main__":
@@ -2,12 +2,9 @@ from types import SimpleNamespace
 from unittest import TestCase
 from uuid import uuid4
 
-from app.api.v1.endpoints.products import (
-    _PRODUCT_EXPORT_COLUMNS,
-    _build_product_export_rows,
-    _complete_relative_image_url,
-    _normalize_import_dataframe,
-)
+from app.api.v1.endpoints.products import _complete_relative_image_url
+from app.services.export_definitions import PRODUCT_EXPORT_COLUMNS, build_product_export_rows
+from app.services.product_import import normalize_import_columns
 
 
 class ProductExportTests(TestCase):
@@ -51,19 +48,19 @@ class ProductExportTests(TestCase):
             ]
         )
 
-        rows = _build_product_export_rows([product])
+        rows = build_product_export_rows([product])
 
         self.assertEqual(len(rows), 1)
         self.assertEqual(rows[0]["product_id"], str(product.id))
         self.assertEqual(rows[0]["variant_id"], str(product.variants[0].id))
         self.assertEqual(rows[0]["sku"], "")
         self.assertEqual(rows[0]["variant_sku"], "THO12306")
-        self.assertEqual(set(_PRODUCT_EXPORT_COLUMNS), set(rows[0]))
+        self.assertEqual(set(PRODUCT_EXPORT_COLUMNS), set(rows[0]))
 
     def test_products_without_variants_keep_a_single_product_row(self):
         product = self._product()
 
-        rows = _build_product_export_rows([product])
+        rows = build_product_export_rows([product])
 
         self.assertEqual(len(rows), 1)
         self.assertEqual(rows[0]["product_id"], str(product.id))
@@ -72,7 +69,7 @@ class ProductExportTests(TestCase):
     def test_old_spanish_headers_are_accepted_by_import_normalizer(self):
         import pandas as pd
 
-        dataframe = _normalize_import_dataframe(
+        dataframe = normalize_import_columns(
             pd.DataFrame(columns=["ID producto", "ID variante", "Nombre", "SKU variante"])
         )
 
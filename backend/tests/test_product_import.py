@@ -0,0 +1,167 @@
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pandas as pd
+from sqlalchemy.dialects import postgresql
+
+from app.services import import_jobs
+from app.services.import_jobs import ImportSummary
+from app.services.product_import import ProductImporter, normalize_import_columns, parse_product_rows
+
+
+def _frame(rows):
+    return normalize_import_columns(pd.DataFrame(rows, dtype=str))
+
+
+def _result(scalars=(), tuples=(), rows=()):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = list(scalars)
+    result.tuples.return_value.all.return_value = list(tuples)
+    result.all.return_value = list(rows)
+    return result
+
+
+class ParseProductRowsTests(unittest.TestCase):
+    def test_values_are_typed_and_each_row_keeps_its_first_error(self):
+        product_id = str(uuid.uuid4())
+        chunk = _frame({
+            "ID producto": [product_id, "", "no-es-uuid", ""],
+            "Nombre": ["Café", "Té", "", ""],
+            "Precio": ["1200.5", "caro", "", ""],
+            "Activo": ["sí", "", "no", ""],
+            "SKU variante": ["", "", "", "SKU-1"],
+        })
+
+        values, errors = parse_product_rows(chunk)
+
+        self.assertEqual(values.loc[0, "product_id"], uuid.UUID(product_id))
+        self.assertEqual((values.loc[0, "price"], values.loc[0, "is_active"]), (1200.5, True))
+        self.assertIsNone(values.loc[1, "is_active"])
+        self.assertEqual(errors.tolist(), [
+            None,
+            "'caro' no es un número válido",
+            "product_id debe ser un UUID válido",
+            "name es obligatorio para crear un producto",
+        ])
+
+    def test_columns_left_out_of_the_file_are_not_in_the_values(self):
+        values, _ = parse_product_rows(_frame({"product_id": [str(uuid.uuid4())], "price": ["10"]}))
+
+        self.assertNotIn("name", values)
+        self.assertNotIn("cost", values)
+
+    def test_required_text_cannot_be_cleared_on_update(self):
+        _, errors = parse_product_rows(_frame({"product_id": [str(uuid.uuid4())], "name": [""]}))
+
+        self.assertEqual(errors.tolist(), ["name no puede quedar vacío"])
+
+
+class ProductImporterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_chunk_is_applied_with_one_statement_per_kind(self):
+        company_id, existing, job_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        chunk = _frame({
+            "product_id": [str(existing), str(existing), "", str(uuid.uuid4())],
+            "name": ["Café", "Café molido", "Té", "Ajeno"],
+            "price": ["10", "12", "", ""],
+            "variant_name": ["", "", "Verde", ""],
+        })
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            _result(scalars=[existing]),  # product ids of the company
+            _result(rows=[(uuid.uuid5(job_id, "product:2"),)]),  # product insert
+            _result(),  # product update
+            _result(rows=[(uuid.uuid5(job_id, "variant:2"),)]),  # variant insert
+        ])
+
+        with patch("app.services.product_import.mark_counters_stale") as counters, \
+                patch("app.services.product_import.mark_branch_totals_stale") as totals:
+            counts, errors = await ProductImporter(company_id, None, job_id).apply_chunk(db, chunk)
+
+        self.assertEqual(counts, {
+            "count": 3, "products_created": 1, "products_updated": 1, "variants_created": 1, "variants_updated": 0,
+        })
+        self.assertEqual(errors, ["Fila 5: product_id no pertenece a esta empresa o no existe"])
+        insert_sql = str(db.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+        self.assertIn("ON CONFLICT (id) DO NOTHING", insert_sql)
+        update_call = db.execute.await_args_list[2]
+        self.assertIn("coalesce(", str(update_call.args[0].compile(dialect=postgresql.dialect())))
+        # The last row of a product wins.
+        self.assertEqual([params["v_name"] for params in update_call.args[1]], ["Café molido"])
+        variant = db.execute.await_args_list[3].args[1][0]
+        self.assertEqual((variant["product_id"], variant["name"]), (uuid.uuid5(job_id, "product:2"), "Verde"))
+        counters.assert_called_once_with(db, company_id)
+        totals.assert_called_once_with(db, company_id)
+
+    async def test_new_categories_are_created_once_per_name(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=_result(rows=[("Bebidas", uuid.uuid4())]))
+        db.flush = AsyncMock()
+        importer = ProductImporter(uuid.uuid4(), None, uuid.uuid4())
+
+        ids = await importer._category_ids(db, pd.Series(["bebidas", "Snacks", "SNACKS", None]))
+
+        [created] = db.add_all.call_args.args[0]
+        self.assertEqual(created.name, "Snacks")
+        self.assertEqual(ids[1], ids[2])
+        self.assertIsNone(ids[3])
+
+
+class ImportJobTests(unittest.IsolatedAsyncioTestCase):
+    def test_summary_keeps_counting_errors_past_the_reported_ones(self):
+        summary = ImportSummary(("count",), {"count": 3, "errors": ["Fila 2: x"], "error_count": 1})
+
+        with patch.object(import_jobs, "MAX_REPORTED_ERRORS", 2):
+            summary.add({"count": 4}, ["Fila 9: y", "Fila 10: z"])
+
+        self.assertEqual(summary.as_dict(), {"count": 7, "error_count": 3, "errors": ["Fila 2: x", "Fila 9: y"]})
+
+    async def test_interrupted_jobs_resume_after_the_last_committed_chunk(self):
+        job = SimpleNamespace(
+            id=uuid.uuid4(), company_id=uuid.uuid4(), requested_by_user_id=None, resource="products",
+            status="RUNNING", processed_rows=2, total_rows=None, summary={"count": 2}, file_path="x.csv",
+        )
+        db = MagicMock()
+        db.get = AsyncMock(return_value=job)
+        db.commit = AsyncMock()
+        session = MagicMock(__aenter__=AsyncMock(return_value=db), __aexit__=AsyncMock(return_value=False))
+        importer = MagicMock(counters=("count",), apply_chunk=AsyncMock(return_value=({"count": 1}, [])))
+
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(import_jobs.settings, "IMPORTS_DIR", directory), \
+                patch.object(import_jobs, "CHUNK_ROWS", 2), \
+                patch.dict(import_jobs.IMPORTS, {"products": import_jobs.ImportDefinition("products", "x", lambda job: importer)}), \
+                patch.object(import_jobs, "_finish", AsyncMock()) as finish:
+            Path(directory, "x.csv").write_text("name\na\nb\nc\nd\ne\n")
+            with patch.object(import_jobs, "iter_import_chunks", wraps=import_jobs.iter_import_chunks) as chunks:
+                await import_jobs.run_import_job(job.id, session_factory=lambda: session)
+
+        chunks.assert_called_once_with(Path(directory, "x.csv"), 2, 2)
+        applied = [call.args[1]["name"].tolist() for call in importer.apply_chunk.await_args_list]
+        self.assertEqual(applied, [["c", "d"], ["e"]])
+        self.assertEqual((job.processed_rows, job.total_rows, job.summary["count"]), (5, 5, 4))
+        finish.assert_awaited_once_with(db, job, "COMPLETED")
+
+    async def test_file_level_errors_fail_the_job_with_their_message(self):
+        job = SimpleNamespace(
+            id=uuid.uuid4(), resource="products", status="RUNNING", processed_rows=0, total_rows=3,
+            summary={}, file_path="x.csv",
+        )
+        db = MagicMock(get=AsyncMock(return_value=job), commit=AsyncMock(), rollback=AsyncMock())
+        session = MagicMock(__aenter__=AsyncMock(return_value=db), __aexit__=AsyncMock(return_value=False))
+        importer = MagicMock(counters=("count",), apply_chunk=AsyncMock(side_effect=ValueError("Falta una columna")))
+
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(import_jobs.settings, "IMPORTS_DIR", directory), \
+                patch.dict(import_jobs.IMPORTS, {"products": import_jobs.ImportDefinition("products", "x", lambda job: importer)}), \
+                patch.object(import_jobs, "_finish", AsyncMock()) as finish:
+            Path(directory, "x.csv").write_text("name\na\n")
+            await import_jobs.run_import_job(job.id, session_factory=lambda: session)
+
+        finish.assert_awaited_once_with(db, job, "FAILED", "Falta una columna")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.core.cache import TieredCache
+from app.models.product_variant import ProductVariant
+from app.services import product_listing
+
+
+class CachedTotalTests(unittest.IsolatedAsyncioTestCase):
+    async def test_page_flips_with_the_same_filters_count_once(self):
+        company_id = uuid.uuid4()
+        count = AsyncMock(return_value=42)
+        cache = TieredCache(check_interval_seconds=0)
+
+        with patch.object(product_listing, "reference_cache", cache), \
+                patch("app.core.cache.get_redis", side_effect=ConnectionError):
+            first = await product_listing.cached_product_total(company_id, {"search": "Café ", "brand_id": None}, count)
+            second = await product_listing.cached_product_total(company_id, {"search": "café"}, count)
+            other = await product_listing.cached_product_total(company_id, {"search": "té"}, count)
+
+        self.assertEqual((first, second, other), (42, 42, 42))
+        self.assertEqual(count.await_count, 2)
+
+
+class VariantCountTests(unittest.TestCase):
+    def test_flushed_variant_changes_collect_their_products(self):
+        added, removed = uuid.uuid4(), uuid.uuid4()
+        session = SimpleNamespace(
+            new=[ProductVariant(product_id=added, name="Rojo")],
+            deleted=[ProductVariant(product_id=removed, name="Azul")],
+            dirty=[],
+            info={},
+        )
+
+        product_listing._collect_variant_products(session, None)
+
+        self.assertEqual(session.info[product_listing._SESSION_PRODUCTS], {added, removed})
+
+    def test_commit_recounts_the_collected_products_in_one_statement(self):
+        product_id = uuid.uuid4()
+        session = Session()
+        product_listing.mark_variant_counts_stale(session, [product_id])
+
+        with patch.object(session, "execute", return_value=MagicMock(all=MagicMock(return_value=[]))) as execute:
+            product_listing._refresh_variant_counts(session)
+
+        sql = str(execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        self.assertIn(
+            "SET variant_count=(SELECT count(product_variants.id) AS count_1 \n"
+            "FROM product_variants \nWHERE product_variants.product_id = products.id)",
+            sql,
+        )
+        self.assertIn("RETURNING products.id, products.variant_count", sql)
+        self.assertNotIn(product_listing._SESSION_PRODUCTS, session.info)
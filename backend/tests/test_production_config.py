@@ -38,6 +38,13 @@ class ProductionSettingsTests(unittest.TestCase):
         with self.assertRaises(ValidationError):
             production_settings(SECRET_KEY="replace-with-a-long-random-secret")
 
+    def test_pdf_render_pools_leave_a_process_for_single_downloads(self):
+        with self.assertRaises(ValidationError):
+            production_settings(PDF_RENDER_PROCESSES=1)
+
+        self.assertEqual(production_settings(PDF_RENDER_PROCESSES=0).PDF_RENDER_PROCESSES, 0)
+        self.assertEqual(production_settings(PDF_RENDER_PROCESSES=3).PDF_RENDER_PROCESSES, 3)
+
     def test_rejects_conflicting_smtp_tls_modes_in_any_environment(self):
         with self.assertRaises(ValidationError):
             production_settings(MAIL_STARTTLS=True, MAIL_SSL_TLS=True)
@@ -0,0 +1,133 @@
+import unittest
+import uuid
+from unittest.mock import AsyncMock
+
+from app.core.auth import create_access_token
+from app.core.rate_limit import Budget, RateLimitDecision, RateLimitMiddleware, RouteClassifier
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def http_scope(path, method="GET", headers=None, client=("203.0.113.7", 5000)):
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": headers or [],
+        "client": client,
+        "state": {},
+    }
+
+
+class BudgetTests(unittest.TestCase):
+    def test_parses_requests_per_period(self):
+        self.assertEqual(Budget.parse("30/minute"), Budget(30, 60))
+        self.assertEqual(Budget.parse("5 / seconds"), Budget(5, 1))
+        with self.assertRaises(ValueError):
+            Budget.parse("many/minute")
+        with self.assertRaises(ValueError):
+            Budget.parse("10/fortnight")
+
+
+class RouteClassifierTests(unittest.TestCase):
+    def setUp(self):
+        self.classifier = RouteClassifier()
+        self.storefront_id = str(uuid.uuid4())
+
+    def test_catalog_is_charged_per_client_and_per_storefront(self):
+        route_class, buckets = self.classifier.classify(
+            http_scope(f"/api/v1/storefront/public/{self.storefront_id}/products")
+        )
+
+        self.assertEqual(route_class, "catalog")
+        self.assertEqual(
+            [key for key, _ in buckets],
+            [
+                f"catalog:client:{self.storefront_id}:ip:203.0.113.7",
+                f"catalog:storefront:{self.storefront_id}",
+            ],
+        )
+
+    def test_checkout_has_its_own_budget_and_keys_signed_in_shoppers_by_token(self):
+        token = create_access_token({"sub": "buyer@example.com"})
+        route_class, buckets = self.classifier.classify(http_scope(
+            f"/api/v1/storefront/public/{self.storefront_id}/checkout/orders",
+            method="POST",
+            headers=[(b"authorization", f"Bearer {token}".encode())],
+        ))
+
+        self.assertEqual(route_class, "checkout")
+        self.assertIn(":sub:", buckets[0][0])
+        self.assertNotIn("buyer@example.com", buckets[0][0])
+        self.assertIs(buckets[0][1], self.classifier.checkout_client)
+
+    def test_forged_tokens_fall_back_to_the_client_ip(self):
+        route_class, buckets = self.classifier.classify(http_scope(
+            "/api/v1/products",
+            headers=[(b"authorization", b"Bearer not-a-token")],
+        ))
+
+        self.assertEqual(route_class, "anonymous")
+        self.assertEqual(buckets[0][0], "anonymous:ip:203.0.113.7")
+
+    def test_webhooks_are_keyed_by_endpoint(self):
+        route_class, buckets = self.classifier.classify(http_scope(
+            f"/api/v1/storefront/public/payments/payu/webhook/{self.storefront_id}", method="POST"
+        ))
+
+        self.assertEqual(route_class, "webhook")
+        self.assertEqual(buckets[0][0], f"webhook:payu:{self.storefront_id}")
+
+    def test_credential_routes_and_non_api_paths_are_left_to_slowapi(self):
+        self.assertIsNone(self.classifier.classify(http_scope("/api/v1/login/access-token", method="POST")))
+        self.assertIsNone(self.classifier.classify(http_scope("/static/uploads/a.png")))
+        self.assertIsNone(self.classifier.classify(http_scope("/api/v1/products", method="OPTIONS")))
+
+
+class RateLimitMiddlewareTests(unittest.IsolatedAsyncioTestCase):
+    async def invoke(self, backend, path="/api/v1/products"):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        await RateLimitMiddleware(ok_app, backend=backend)(http_scope(path), receive, send)
+        return messages[0]["status"], dict(messages[0]["headers"])
+
+    async def test_rejects_with_retry_after_when_budget_is_exhausted(self):
+        backend = AsyncMock()
+        backend.hit.return_value = RateLimitDecision(False, 0, 7)
+
+        status, headers = await self.invoke(backend)
+
+        self.assertEqual(status, 429)
+        self.assertEqual(headers[b"retry-after"], b"7")
+        self.assertEqual(headers[b"x-ratelimit-class"], b"anonymous")
+
+    async def test_reports_remaining_budget_on_success(self):
+        backend = AsyncMock()
+        backend.hit.return_value = RateLimitDecision(True, 41, 0)
+
+        status, headers = await self.invoke(backend)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"x-ratelimit-remaining"], b"41")
+
+    async def test_fails_open_when_redis_is_unavailable(self):
+        backend = AsyncMock()
+        backend.hit.side_effect = ConnectionError("redis down")
+
+        with self.assertLogs("app.core.rate_limit", level="WARNING"):
+            status, _ = await self.invoke(backend)
+
+        self.assertEqual(status, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import unittest
+import uuid
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core import cache
+from app.core.cache import TieredCache, mark_stale, tenant_tag
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return queue
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio for the cache: strings, counters and one stream."""
+
+    def __init__(self):
+        self.values = {}
+        self.stream = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def incr(self, key):
+        self.values[key] = str(int(self.values.get(key) or 0) + 1)
+        return int(self.values[key])
+
+    async def xadd(self, name, fields, maxlen=None, approximate=True):
+        entry_id = f"{len(self.stream) + 1}-0"
+        self.stream.append((entry_id, fields))
+        return entry_id
+
+    async def xrevrange(self, name, count=None):
+        return self.stream[-1:]
+
+    async def xread(self, streams, count=None):
+        last = int(next(iter(streams.values())).split("-")[0])
+        entries = self.stream[last:last + count]
+        return [(cache.INVALIDATION_STREAM, entries)] if entries else []
+
+
+class TieredCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch("app.core.cache.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tag = tenant_tag(uuid.uuid4(), "brands")
+
+    def _cache(self):
+        return TieredCache(check_interval_seconds=0)
+
+    async def test_second_read_is_served_locally(self):
+        loader = AsyncMock(return_value=[{"name": "Acme"}])
+        local = self._cache()
+
+        first = await local.get_or_load("brands", [self.tag], loader)
+        second = await local.get_or_load("brands", [self.tag], loader)
+
+        self.assertEqual(first, second)
+        loader.assert_awaited_once()
+
+    async def test_other_processes_read_through_redis(self):
+        await self._cache().get_or_load("brands", [self.tag], AsyncMock(return_value=["Acme"]))
+        loader = AsyncMock()
+
+        self.assertEqual(await self._cache().get_or_load("brands", [self.tag], loader), ["Acme"])
+        loader.assert_not_awaited()
+
+    async def test_invalidation_reaches_local_and_shared_entries(self):
+        reader, writer = self._cache(), self._cache()
+        await reader.get_or_load("brands", [self.tag], AsyncMock(return_value=["Acme"]))
+
+        await writer.invalidate([self.tag])
+        fresh = await reader.get_or_load("brands", [self.tag], AsyncMock(return_value=["Acme", "Zeta"]))
+
+        self.assertEqual(fresh, ["Acme", "Zeta"])
+
+    async def test_entry_loaded_during_an_invalidation_is_not_shared(self):
+        reader = self._cache()
+
+        async def slow_loader():
+            # The write commits while this (now outdated) read is running.
+            await self.redis.incr(f"{cache.KEY_PREFIX}:tag:{self.tag}")
+            return ["stale"]
+
+        await reader.get_or_load("brands", [self.tag], slow_loader)
+        loader = AsyncMock(return_value=["fresh"])
+
+        self.assertEqual(await self._cache().get_or_load("brands", [self.tag], loader), ["fresh"])
+
+    async def test_tag_index_only_keeps_entries_still_cached(self):
+        local = TieredCache(check_interval_seconds=0, local_max_entries=2)
+        for index in range(5):
+            await local.get_or_load(f"brands:{index}", [self.tag, f"other:{index}"], AsyncMock(return_value=index))
+
+        self.assertEqual(local._keys_by_tag, {
+            self.tag: {"brands:3", "brands:4"}, "other:3": {"brands:3"}, "other:4": {"brands:4"},
+        })
+        local.evict_local(["other:3"])
+        self.assertEqual(local._keys_by_tag, {self.tag: {"brands:4"}, "other:4": {"brands:4"}})
+        self.assertEqual(set(local._tags_by_key), {"brands:4"})
+
+    async def test_redis_outage_falls_back_to_the_loader(self):
+        with patch("app.core.cache.get_redis", side_effect=ConnectionError("down")):
+            value = await self._cache().get_or_load("brands", [self.tag], AsyncMock(return_value=["Acme"]))
+
+        self.assertEqual(value, ["Acme"])
+
+
+class SessionInvalidationTests(unittest.TestCase):
+    def test_tags_are_published_only_after_commit(self):
+        tag = tenant_tag(uuid.uuid4(), "units")
+        with patch.object(cache.reference_cache, "evict_local") as evict:
+            session = Session()
+            session.begin()
+            mark_stale(session, tag)
+            session.rollback()
+            session.commit()
+            evict.assert_not_called()
+
+            session.begin()
+            mark_stale(session, tag)
+            session.commit()
+
+        evict.assert_called_once_with({tag})
+
+    def test_savepoint_rollbacks_keep_tags_of_the_outer_transaction(self):
+        tag = tenant_tag(uuid.uuid4(), "units")
+        with patch.object(cache.reference_cache, "evict_local") as evict:
+            session = Session(create_engine("sqlite://"))
+            session.begin()
+            mark_stale(session, tag)
+            session.begin_nested().rollback()
+            session.commit()
+
+        evict.assert_called_once_with({tag})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import re
+import unittest
+import uuid
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.sale import SaleStatus
+from app.services.document_renderer import sale_snapshot
+from app.services.pdf_service import render_combined
+from app.services.sale_documents import TooManyDocuments, _group_snapshots, load_sale_snapshots
+
+
+def _row(sale_id, **overrides):
+    values = {
+        "id": sale_id,
+        "status": SaleStatus.PICKING,
+        "payment_method": "CASH",
+        "notes": "Interna",
+        "subtotal": 100.0,
+        "tax": 19.0,
+        "total": 119.0,
+        "storefront_order_id": None,
+        "buyer_note": None,
+        "user_id": uuid.uuid4(),
+        "user_full_name": "Ana Pérez",
+        "client_id": uuid.uuid4(),
+        "client_name": "Cliente",
+        "client_address": "Calle 1",
+        "client_phone": "123",
+        "client_email": "c@example.com",
+        "item_id": uuid.uuid4(),
+        "quantity": 2,
+        "price": 50.0,
+        "item_total": 100.0,
+        "product_id": uuid.uuid4(),
+        "product_name": "Café",
+        "product_sku": "CAF-1",
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class GroupSnapshotTests(unittest.TestCase):
+    def test_rows_become_the_same_snapshot_as_the_single_download(self):
+        sale_id = uuid.uuid4()
+        [snapshot] = _group_snapshots([_row(sale_id)])
+
+        expected = sale_snapshot(SimpleNamespace(
+            id=sale_id,
+            status=SaleStatus.PICKING,
+            payment_method="CASH",
+            notes="Interna",
+            subtotal=100.0,
+            tax=19.0,
+            total=119.0,
+            user=SimpleNamespace(full_name="Ana Pérez"),
+            client=SimpleNamespace(name="Cliente", address="Calle 1", phone="123", email="c@example.com"),
+            items=[SimpleNamespace(quantity=2, price=50.0, total=100.0, product=SimpleNamespace(name="Café", sku="CAF-1"))],
+        ))
+        self.assertEqual(snapshot, expected)
+
+    def test_item_rows_are_grouped_per_sale_in_order(self):
+        first, second = uuid.uuid4(), uuid.uuid4()
+        rows = [
+            _row(first, product_name="A"),
+            _row(first, product_name="B"),
+            _row(second, item_id=None, client_id=None, user_id=None),
+        ]
+
+        snapshots = _group_snapshots(rows)
+
+        self.assertEqual([s["id"] for s in snapshots], [str(first), str(second)])
+        self.assertEqual([i["product"]["name"] for i in snapshots[0]["items"]], ["A", "B"])
+        self.assertEqual((snapshots[1]["items"], snapshots[1]["client"], snapshots[1]["user"]), ([], None, None))
+
+    def test_storefront_orders_print_the_buyer_note(self):
+        [snapshot] = _group_snapshots([_row(uuid.uuid4(), storefront_order_id=uuid.uuid4(), buyer_note="Timbre 2")])
+
+        self.assertEqual(snapshot["notes"], "Timbre 2")
+
+
+class LoadSaleSnapshotsTests(unittest.IsolatedAsyncioTestCase):
+    def _db(self, rows):
+        db = MagicMock()
+        result = MagicMock()
+        result.all.return_value = rows
+        db.execute = AsyncMock(return_value=result)
+        return db
+
+    async def test_loads_every_sale_in_one_query_limited_to_printable_statuses(self):
+        db = self._db([_row(uuid.uuid4())])
+
+        await load_sale_snapshots(db, uuid.uuid4(), "packing", stage=SaleStatus.PACKING)
+
+        db.execute.assert_awaited_once()
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        self.assertIn("LEFT OUTER JOIN sale_items", sql)
+        self.assertNotIn("product_images", sql)
+        self.assertRegex(sql, r"sales\.status IN \(")
+
+    async def test_selections_over_the_limit_are_rejected(self):
+        db = self._db([_row(uuid.uuid4()) for _ in range(3)])
+
+        with self.assertRaises(TooManyDocuments):
+            await load_sale_snapshots(db, uuid.uuid4(), "picking", stage=SaleStatus.CONFIRMED, limit=2)
+
+
+class CombinedPdfTests(unittest.TestCase):
+    def test_each_sale_starts_on_its_own_page(self):
+        snapshots = _group_snapshots([_row(uuid.uuid4()) for _ in range(3)])
+
+        pdf = render_combined("picking", snapshots, printed_on=date(2026, 5, 1))
+
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(len(re.findall(rb"/Type /Page\b", pdf)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import json
+import unittest
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.outbox_event import OutboxEvent
+from app.models.return_order import ReturnOrder, ReturnStatus
+from app.models.sale import Payment, Sale, SaleItem, SaleStatus
+from app.services.sales_rollups import (
+    ROLLUP_EVENT_TYPE,
+    RollupTargets,
+    _enqueue_rollup_event,
+    build_rollup_rows,
+    rollup_targets,
+)
+from app.workers import sales_rollup_worker
+
+
+class RollupTargetTests(unittest.TestCase):
+    def test_sales_map_to_their_creation_day_and_children_to_their_sale(self):
+        company_id, sale_id = uuid.uuid4(), uuid.uuid4()
+        sale = Sale(id=uuid.uuid4(), company_id=company_id, created_at=datetime(2026, 3, 4, 23, 30))
+        item = SaleItem(sale_id=sale_id, quantity=1, price=10, total=10)
+        payment = Payment(sale_id=sale_id, method="CASH", amount=10)
+
+        targets = rollup_targets([sale, item, payment])
+
+        self.assertEqual(targets.days, {(company_id, date(2026, 3, 4))})
+        self.assertEqual(targets.sale_ids, {sale_id})
+
+    def test_returns_count_on_their_utc_approval_day_only_once_approved(self):
+        company_id = uuid.uuid4()
+        bogota = timezone(timedelta(hours=-5))
+        approved = ReturnOrder(
+            company_id=company_id,
+            status=ReturnStatus.APPROVED,
+            approved_at=datetime(2026, 3, 4, 21, 0, tzinfo=bogota),
+        )
+        pending = ReturnOrder(company_id=company_id, status=ReturnStatus.PENDING)
+
+        targets = rollup_targets([approved, pending])
+
+        self.assertEqual(targets.days, {(company_id, date(2026, 3, 5))})
+        self.assertFalse(targets.sale_ids)
+
+    def test_payload_round_trip(self):
+        targets = RollupTargets(days={(uuid.uuid4(), date(2026, 1, 2))}, sale_ids={uuid.uuid4()})
+
+        restored = RollupTargets.from_payload(json.loads(json.dumps(targets.to_payload())))
+
+        self.assertEqual(restored, targets)
+
+
+class EnqueueRollupEventTests(unittest.TestCase):
+    def test_one_event_per_commit_with_collected_targets(self):
+        company_id = uuid.uuid4()
+        session = MagicMock()
+        session.info = {"sales_rollup_targets": RollupTargets(days={(company_id, date(2026, 3, 4))})}
+
+        _enqueue_rollup_event(session)
+
+        session.flush.assert_called_once()
+        [event] = [call.args[0] for call in session.add.call_args_list]
+        self.assertIsInstance(event, OutboxEvent)
+        self.assertEqual(event.event_type, ROLLUP_EVENT_TYPE)
+        self.assertEqual(event.company_id, company_id)
+        self.assertEqual(event.payload["days"], [[str(company_id), "2026-03-04"]])
+        self.assertEqual(session.info, {})
+
+    def test_commits_without_sales_changes_add_nothing(self):
+        session = MagicMock()
+        session.info = {}
+
+        _enqueue_rollup_event(session)
+
+        session.add.assert_not_called()
+
+
+class BuildRollupRowsTests(unittest.TestCase):
+    def test_merges_sales_payments_and_items_per_branch_day_and_status(self):
+        company_id, branch_id, product_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        day = date(2026, 3, 4)
+        key = {"day": day, "branch_id": branch_id, "status": SaleStatus.COMPLETED}
+
+        daily, products, returns = build_rollup_rows(
+            company_id,
+            [SimpleNamespace(**key, sales_count=2, gross_sales=150.0)],
+            [SimpleNamespace(**key, cash=100.0, card=50.0, credit=0.0)],
+            [
+                SimpleNamespace(**key, product_id=product_id, category_id=None, quantity=3, revenue=90.0, cost=60.0),
+                SimpleNamespace(**key, product_id=uuid.uuid4(), category_id=None, quantity=1, revenue=60.0, cost=20.0),
+            ],
+            [SimpleNamespace(day=day, branch_id=branch_id, returns_count=1, total_refunds=30.0)],
+        )
+
+        [row] = daily
+        self.assertEqual(row["status"], "COMPLETED")
+        self.assertEqual((row["sales_count"], row["gross_sales"]), (2, 150.0))
+        self.assertEqual((row["payments_cash"], row["payments_card"]), (100.0, 50.0))
+        self.assertEqual((row["items_revenue"], row["items_cost"]), (150.0, 80.0))
+        self.assertEqual(len(products), 2)
+        self.assertEqual(products[0]["product_id"], product_id)
+        self.assertEqual(returns[0]["total_refunds"], 30.0)
+
+
+class SalesRollupWorkerTests(unittest.IsolatedAsyncioTestCase):
+    @patch("app.workers.sales_rollup_worker.get_redis")
+    @patch("app.workers.sales_rollup_worker.refresh_sales_counters", new_callable=AsyncMock)
+    @patch("app.workers.sales_rollup_worker.refresh_sales_rollups", new_callable=AsyncMock)
+    @patch("app.workers.sales_rollup_worker.resolve_rollup_days", new_callable=AsyncMock)
+    @patch("app.workers.sales_rollup_worker.SessionLocal")
+    async def test_merges_events_and_rebuilds_each_company_once(
+        self, session_local, resolve, refresh, refresh_counters, get_redis
+    ):
+        db = MagicMock()
+        db.commit = AsyncMock()
+        session_local.return_value.__aenter__ = AsyncMock(return_value=db)
+        session_local.return_value.__aexit__ = AsyncMock(return_value=False)
+        company_id = uuid.uuid4()
+        resolve.return_value = {company_id: {date(2026, 3, 4), date(2026, 3, 5)}}
+
+        def rollup_event(day):
+            payload = RollupTargets(days={(company_id, day)}).to_payload()
+            return {"event_type": ROLLUP_EVENT_TYPE, "payload": json.dumps(payload)}
+
+        ack_ids = await sales_rollup_worker.process_batch([
+            ("1-0", rollup_event(date(2026, 3, 4))),
+            ("2-0", {"event_type": "inventory.reserved", "payload": "{}"}),
+            ("3-0", rollup_event(date(2026, 3, 5))),
+        ])
+
+        self.assertEqual(ack_ids, ["1-0", "2-0", "3-0"])
+        [targets] = resolve.await_args.args[1:]
+        self.assertEqual(targets.days, {(company_id, date(2026, 3, 4)), (company_id, date(2026, 3, 5))})
+        refresh.assert_awaited_once_with(db, company_id, {date(2026, 3, 4), date(2026, 3, 5)})
+        db.commit.assert_awaited_once()
+        refresh_counters.assert_awaited_once_with(db, get_redis.return_value, company_id)
+
+    @patch("app.workers.sales_rollup_worker.SessionLocal")
+    async def test_batches_without_rollup_events_skip_the_database(self, session_local):
+        ack_ids = await sales_rollup_worker.process_batch([("1-0", {"event_type": "order.delivered"})])
+
+        self.assertEqual(ack_ids, ["1-0"])
+        session_local.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
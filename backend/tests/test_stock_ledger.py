@@ -0,0 +1,92 @@
+import unittest
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints.inventory import get_ledger_balances
+from app.services.stock_ledger import as_utc, period_balances, stock_at
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class StockLedgerQueryTests(unittest.TestCase):
+    def test_aware_timestamps_are_compared_as_naive_utc(self):
+        bogota = timezone(timedelta(hours=-5))
+
+        self.assertEqual(as_utc(datetime(2026, 5, 1, 19, 0, tzinfo=bogota)), datetime(2026, 5, 2, 0, 0))
+        self.assertEqual(as_utc(datetime(2026, 5, 1, 19, 0)), datetime(2026, 5, 1, 19, 0))
+
+    def test_stock_at_reads_the_latest_running_balance_per_key(self):
+        query = stock_at(uuid.uuid4(), datetime(2026, 5, 1), warehouse_id=uuid.uuid4())
+        sql = _sql(query)
+
+        self.assertIn(
+            "DISTINCT ON (inventory_movements.product_id, inventory_movements.variant_id, "
+            "inventory_movements.branch_id, inventory_movements.warehouse_id)",
+            sql,
+        )
+        self.assertIn("inventory_movements.new_stock AS quantity", sql)
+        self.assertIn("inventory_movements.created_at DESC, inventory_movements.id DESC", sql)
+        self.assertNotIn("sum(", sql)
+
+    def test_period_balances_rank_movements_inside_each_period(self):
+        sql = _sql(period_balances(uuid.uuid4(), datetime(2026, 1, 1), datetime(2026, 4, 1), "week"))
+
+        self.assertIn("date_trunc('week', inventory_movements.created_at)", sql)
+        self.assertIn("row_number() OVER (PARTITION BY", sql)
+        self.assertIn("GROUP BY", sql)
+
+    def test_unknown_periods_are_rejected(self):
+        with self.assertRaises(ValueError):
+            period_balances(uuid.uuid4(), datetime(2026, 1, 1), datetime(2026, 4, 1), "hour")
+
+
+class LedgerBalancesEndpointTests(unittest.IsolatedAsyncioTestCase):
+    async def _balances(self, db, start_date, end_date):
+        return await get_ledger_balances(
+            db=db,
+            start_date=start_date,
+            end_date=end_date,
+            period="month",
+            product_id=None,
+            branch_id=None,
+            warehouse_id=None,
+            skip=0,
+            limit=500,
+            current_user=SimpleNamespace(company_id=uuid.uuid4()),
+        )
+
+    async def test_end_date_is_inclusive_and_rows_carry_names(self):
+        product_id, branch_id = uuid.uuid4(), uuid.uuid4()
+        row = SimpleNamespace(
+            product_id=product_id, product_name="Café", sku="CAF-1", variant_id=None, variant_name=None,
+            branch_id=branch_id, branch_name="Centro", warehouse_id=None, warehouse_name=None,
+            period_start=datetime(2026, 5, 1), opening=10.0, closing=4.0, inflow=2.0, outflow=8.0, movements=3,
+        )
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[row])))
+
+        [balance] = await self._balances(db, date(2026, 5, 1), date(2026, 5, 31))
+
+        params = db.execute.await_args.args[0].compile(dialect=postgresql.dialect()).params
+        self.assertIn(datetime(2026, 6, 1), params.values())
+        self.assertEqual(
+            (balance["period_start"], balance["opening_stock"], balance["closing_stock"], balance["product_name"]),
+            ("2026-05-01", 10.0, 4.0, "Café"),
+        )
+
+    async def test_ranges_over_a_year_are_rejected(self):
+        with self.assertRaises(HTTPException) as raised:
+            await self._balances(MagicMock(), date(2025, 1, 1), date(2026, 5, 1))
+
+        self.assertEqual(raised.exception.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.storefront_publishing import SlugAllocator, publish_products
+
+
+def _result(rows):
+    result = MagicMock()
+    result.all.return_value = list(rows)
+    return result
+
+
+class SlugAllocatorTests(unittest.TestCase):
+    def test_duplicates_take_the_next_free_suffix(self):
+        slugs = SlugAllocator({"cafe", "cafe-2", "cafe-4"})
+
+        allocated = [slugs.allocate(name) for name in ("Cafe", "cafe", "CAFE ", "Te")]
+
+        self.assertEqual(allocated, ["cafe-3", "cafe-5", "cafe-6", "te"])
+
+
+class PublishProductsTests(unittest.IsolatedAsyncioTestCase):
+    async def test_new_and_inactive_publications_are_written_in_one_upsert(self):
+        storefront_id, live, hidden, new, missing = (uuid.uuid4() for _ in range(5))
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            _result([(live, "Cafe"), (hidden, "Te"), (new, "Cafe")]),
+            _result([
+                SimpleNamespace(product_id=live, slug="cafe", is_active=True, is_published=True),
+                SimpleNamespace(product_id=hidden, slug="te", is_active=True, is_published=False),
+            ]),
+            _result([]),
+        ])
+
+        with patch("app.services.storefront_publishing.mark_stale") as mark_stale:
+            outcome = await publish_products(
+                db, company_id=uuid.uuid4(), storefront_id=storefront_id, user_id=None,
+                product_ids=[live, hidden, new, missing],
+            )
+
+        self.assertEqual(
+            (outcome.requested, outcome.published, outcome.reactivated, outcome.already_published, outcome.not_found),
+            (4, 3, 1, 1, [missing]),
+        )
+        statement, records = db.execute.await_args_list[2].args
+        self.assertIn(
+            "ON CONFLICT ON CONSTRAINT uq_published_product_storefront_product DO UPDATE",
+            str(statement.compile(dialect=postgresql.dialect())),
+        )
+        self.assertEqual([(row["product_id"], row["slug"]) for row in records], [(hidden, "te"), (new, "cafe-2")])
+        mark_stale.assert_called_once()
+
+    async def test_nothing_is_written_when_everything_is_live(self):
+        product_id = uuid.uuid4()
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            _result([(product_id, "Cafe")]),
+            _result([SimpleNamespace(product_id=product_id, slug="cafe", is_active=True, is_published=True)]),
+        ])
+
+        with patch("app.services.storefront_publishing.mark_stale") as mark_stale:
+            outcome = await publish_products(db, company_id=uuid.uuid4(), storefront_id=uuid.uuid4(), user_id=None)
+
+        self.assertEqual((outcome.requested, outcome.already_published), (1, 1))
+        self.assertEqual(db.execute.await_count, 2)
+        mark_stale.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,16 @@
 import { Injectable, inject } from '@angular/core';
 import { HttpClient, HttpHeaders, HttpParams } from '@angular/common/http';
-import { Observable } from 'rxjs';
+import { Observable, map } from 'rxjs';
 import { environment } from '../../../environments/environment';
 
 type QueryParams = HttpParams | Record<string, string | number | boolean | null | undefined>;
 
+/** One page of a cursor-paginated list; `nextCursor` is null on the last page. */
+export interface CursorPage<T> {
+    items: T[];
+    nextCursor: string | null;
+}
+
 @Injectable({
     providedIn: 'root'
 })
@@ -48,6 +54,17 @@ export class ApiService {
         return this.http.get<T>(`${environment.apiUrl}${path}`, { headers, params: this.normalizeParams(params) });
     }
 
+    getPage<T>(path: string, params: QueryParams = new HttpParams()): Observable<CursorPage<T>> {
+        return this.http.get<T[]>(`${environment.apiUrl}${path}`, {
+            headers: this.getHeaders(),
+            params: this.normalizeParams(params),
+            observe: 'response'
+        }).pipe(map(response => ({
+            items: response.body ?? [],
+            nextCursor: response.headers.get('X-Next-Cursor')
+        })));
+    }
+
     post<T>(path: string, body: unknown = {}): Observable<T> {
         const isFormData = body instanceof FormData;
         return this.http.post<T>(`${environment.apiUrl}${path}`, body, { headers: this.getHeaders(isFormData) });
@@ -58,6 +75,15 @@ export class ApiService {
         return this.http.put<T>(`${environment.apiUrl}${path}`, body, { headers: this.getHeaders(isFormData) });
     }
 
+    /** PUT of raw bytes, e.g. one piece of a chunked upload, with extra request headers. */
+    putBinary<T>(path: string, body: Blob, headers: Record<string, string> = {}): Observable<T> {
+        let httpHeaders = this.getHeaders(true).set('Content-Type', 'application/octet-stream');
+        Object.entries(headers).forEach(([name, value]) => {
+            httpHeaders = httpHeaders.set(name, value);
+        });
+        return this.http.put<T>(`${environment.apiUrl}${path}`, body, { headers: httpHeaders });
+    }
+
     delete<T>(path: string): Observable<T> {
         return this.http.delete<T>(`${environment.apiUrl}${path}`, { headers: this.getHeaders() });
     }
@@ -130,6 +130,8 @@ export interface BillingSummary {
 
 export interface WebhookTestResponse {
   delivered: boolean;
+  queued?: boolean;
+  webhook_id?: string | null;
   endpoint?: string | null;
   status_code?: number | null;
   signature?: string | null;
@@ -75,6 +75,45 @@ export class DashboardService {
         return this.http.get<DashboardStats>(url);
     }
 
+    /**
+     * Server-sent events of the live counters: `snapshot` on connect, then
+     * `counters` whenever a sale, return, product or user changes them.
+     * Read with fetch because EventSource cannot send the bearer token.
+     */
+    counterEvents(): Observable<{ event: string; data: Record<string, number> }> {
+        return new Observable(subscriber => {
+            const controller = new AbortController();
+            const token = localStorage.getItem('access_token');
+            fetch(`${this.apiUrl}/stream`, {
+                headers: token ? { Authorization: `Bearer ${token}` } : {},
+                signal: controller.signal
+            }).then(async response => {
+                if (!response.ok || !response.body) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                let buffer = '';
+                for (;;) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += value;
+                    const blocks = buffer.split('\n\n');
+                    buffer = blocks.pop() ?? '';
+                    for (const block of blocks) {
+                        const lines = block.split('\n');
+                        const event = lines.find(line => line.startsWith('event: '))?.slice(7);
+                        const data = lines.find(line => line.startsWith('data: '))?.slice(6);
+                        if (event && data) subscriber.next({ event, data: JSON.parse(data) });
+                    }
+                }
+                subscriber.complete();
+            }).catch(error => {
+                if (!controller.signal.aborted) subscriber.error(error);
+            });
+            return () => controller.abort();
+        });
+    }
+
     getHealth(): Observable<DashboardHealth> {
         return this.http.get<DashboardHealth>(`${this.apiUrl}/health`);
     }
@@ -1,40 +1,77 @@
 import { Injectable, inject } from '@angular/core';
-import { HttpClient, HttpHeaders, HttpParams } from '@angular/common/http';
+import { HttpClient, HttpHeaders } from '@angular/common/http';
+import { Observable, exhaustMap, filter, switchMap, take, timer } from 'rxjs';
 import { environment } from '../../../environments/environment';
 
+export type ExportResource = 'products' | 'sales' | 'inventory' | 'clients' | 'purchases';
+
+export interface ExportJob {
+    id: string;
+    resource: ExportResource;
+    format: 'excel' | 'csv';
+    status: 'QUEUED' | 'RUNNING' | 'COMPLETED' | 'FAILED' | 'EXPIRED';
+    total_records: number | null;
+    processed_records: number;
+    rows_written: number | null;
+    percent: number | null;
+    file_name: string | null;
+    error_message: string | null;
+    reused: boolean;
+}
+
+const POLL_INTERVAL_MS = 1500;
+
 @Injectable({
     providedIn: 'root'
 })
 export class ExportService {
     private http = inject(HttpClient);
+    private apiUrl = `${environment.apiUrl}/exports`;
 
     /**
-     * Triggers a file download from an export endpoint.
-     * Opens the URL with the auth token as a query param
-     * so the browser handles the file download natively.
+     * Queues a background export, waits for the worker to produce the file
+     * and hands it to the browser as a download.
      */
-    download(endpoint: string, format: 'excel' | 'csv' = 'excel', params: Record<string, string> = {}): void {
-        const token = localStorage.getItem('access_token');
-        let queryParams = new HttpParams().set('format', format);
-        Object.entries(params).forEach(([key, value]) => {
-            queryParams = queryParams.set(key, value);
+    download(resource: ExportResource, format: 'excel' | 'csv' = 'excel', params: Record<string, string> = {}): void {
+        this.http.post<ExportJob>(`${this.apiUrl}/`, { resource, format, filters: params }, {
+            headers: this.authHeaders()
+        }).pipe(
+            switchMap((job) => this.waitForJob(job))
+        ).subscribe({
+            next: (job) => {
+                if (job.status !== 'COMPLETED') {
+                    alert(job.error_message || 'Error al exportar. Intenta de nuevo.');
+                    return;
+                }
+                this.saveFile(job, format);
+            },
+            error: (err) => {
+                console.error('Export error:', err);
+                alert('Error al exportar. Intenta de nuevo.');
+            }
         });
+    }
 
-        this.http.get(`${environment.apiUrl}${endpoint}`, {
-            headers: token ? new HttpHeaders({ Authorization: `Bearer ${token}` }) : undefined,
-            params: queryParams,
-            observe: 'response',
+    /** Emits the job once it has finished, successfully or not. */
+    waitForJob(job: ExportJob): Observable<ExportJob> {
+        return timer(0, POLL_INTERVAL_MS).pipe(
+            exhaustMap(() => this.http.get<ExportJob>(`${this.apiUrl}/${job.id}`, { headers: this.authHeaders() })),
+            filter((current) => current.status !== 'QUEUED' && current.status !== 'RUNNING'),
+            take(1)
+        );
+    }
+
+    private saveFile(job: ExportJob, format: 'excel' | 'csv'): void {
+        this.http.get(`${this.apiUrl}/${job.id}/download`, {
+            headers: this.authHeaders(),
             responseType: 'blob'
         }).subscribe({
-            next: (response) => {
-                if (!response.body || response.body.size === 0) {
+            next: (body) => {
+                if (!body || body.size === 0) {
                     throw new Error('La exportación devolvió un archivo vacío.');
                 }
-                const filename = this.extractFilename(
-                    response.headers.get('Content-Disposition'),
-                    `export_${Date.now()}.${format === 'csv' ? 'csv' : 'xlsx'}`
-                );
-                const objectUrl = URL.createObjectURL(response.body);
+                const filename = job.file_name || `export_${Date.now()}.${format === 'csv' ? 'csv' : 'xlsx'}`;
+                const objectUrl = URL.createObjectURL(body);
                 const anchor = document.createElement('a');
                 anchor.href = objectUrl;
                 anchor.download = filename;
@@ -51,15 +88,8 @@ export class ExportService {
         });
     }
 
-    private extractFilename(contentDisposition: string | null, fallback: string): string {
-        if (!contentDisposition) {
-            return fallback;
-        }
-        const encoded = contentDisposition.match(/filename\*=UTF-8''([^;]+)/i);
-        if (encoded?.[1]) {
-            return decodeURIComponent(encoded[1]);
-        }
-        const basic = contentDisposition.match(/filename="?([^";]+)"?/i);
-        return basic?.[1] || fallback;
+    private authHeaders(): HttpHeaders | undefined {
+        const token = localStorage.getItem('access_token');
+        return token ? new HttpHeaders({ Authorization: `Bearer ${token}` }) : undefined;
     }
 }
@@ -0,0 +1,87 @@
+import { Injectable, inject } from '@angular/core';
+import { HttpErrorResponse } from '@angular/common/http';
+import { Observable, catchError, concat, exhaustMap, map, of, switchMap, takeWhile, throwError, timer } from 'rxjs';
+import { ApiService } from './api.service';
+
+export interface ImportSummary {
+    count?: number;
+    error_count?: number;
+    errors?: string[];
+    [counter: string]: number | string[] | undefined;
+}
+
+export interface ImportJob {
+    id: string;
+    resource: string;
+    file_name: string;
+    file_size: number | null;
+    received_bytes: number;
+    status: 'UPLOADING' | 'QUEUED' | 'RUNNING' | 'COMPLETED' | 'FAILED';
+    total_rows: number | null;
+    processed_rows: number;
+    percent: number | null;
+    summary: ImportSummary;
+    error_message: string | null;
+}
+
+const POLL_INTERVAL_MS = 1500;
+// Below the server's IMPORT_UPLOAD_CHUNK_BYTES and the proxy's body limit.
+const UPLOAD_CHUNK_BYTES = 5 * 1024 * 1024;
+const UPLOAD_RETRIES = 5;
+const UPLOAD_RETRY_DELAY_MS = 2000;
+
+@Injectable({
+    providedIn: 'root'
+})
+export class ImportService {
+    private apiService = inject(ApiService);
+
+    /**
+     * Uploads a spreadsheet for `resource` (e.g. `products`) in pieces and
+     * emits the job after every piece and on every poll until the import
+     * worker finishes it. A piece that fails is retried from the offset the
+     * server stored, so a dropped connection does not restart the upload.
+     */
+    uploadInChunks(resource: string, file: File, options: Record<string, string> = {}): Observable<ImportJob> {
+        return this.apiService.post<ImportJob>('/imports/uploads', {
+            resource,
+            file_name: file.name,
+            file_size: file.size,
+            options
+        }).pipe(
+            switchMap((job) => concat(of(job), this.sendFrom(job, file, 0)))
+        );
+    }
+
+    watch(job: ImportJob): Observable<ImportJob> {
+        return timer(0, POLL_INTERVAL_MS).pipe(
+            exhaustMap(() => this.apiService.get<ImportJob>(`/imports/${job.id}`)),
+            takeWhile((current) => current.status === 'QUEUED' || current.status === 'RUNNING', true)
+        );
+    }
+
+    private sendFrom(job: ImportJob, file: File, failures: number): Observable<ImportJob> {
+        if (job.received_bytes >= file.size) {
+            return this.apiService.post<ImportJob>(`/imports/${job.id}/complete`).pipe(
+                switchMap((queued) => this.watch(queued))
+            );
+        }
+        const offset = job.received_bytes;
+        const piece = file.slice(offset, Math.min(offset + UPLOAD_CHUNK_BYTES, file.size));
+        return this.apiService.putBinary<ImportJob>(`/imports/${job.id}/content`, piece, { 'Upload-Offset': String(offset) }).pipe(
+            map((stored) => ({ stored, failures: 0 })),
+            catchError((error: HttpErrorResponse) => {
+                const retryable = error.status === 0 || error.status === 409 || error.status >= 500;
+                if (!retryable || failures >= UPLOAD_RETRIES) {
+                    return throwError(() => error);
+                }
+                // Continue from whatever the server stored before the failure.
+                return timer(UPLOAD_RETRY_DELAY_MS * (failures + 1)).pipe(
+                    switchMap(() => this.apiService.get<ImportJob>(`/imports/${job.id}`)),
+                    map((stored) => ({ stored, failures: failures + 1 }))
+                );
+            }),
+            switchMap(({ stored, failures: failed }) => concat(of(stored), this.sendFrom(stored, file, failed)))
+        );
+    }
+}
@@ -3,6 +3,13 @@ import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
 import { environment } from '../../../environments/environment';
 
+export interface ImageDerivative {
+    width: number;
+    height: number;
+    format: string;
+    url: string;
+}
+
 export interface POSProduct {
     id: string;
     name: string;
@@ -13,6 +20,13 @@ export interface POSProduct {
     category_id?: string;
     category_name?: string;
     image_url?: string;
+    // Resized WebP/AVIF copies of image_url, smallest first.
+    image_derivatives?: ImageDerivative[];
+}
+
+export interface POSProductLookup {
+    product: POSProduct;
+    variant_id?: string | null;
 }
 
 export interface POSCartItem {
@@ -176,6 +190,10 @@ export class PosService {
         return this.http.get<POSProduct[]>(`${this.apiUrl}/products`, { params: { branch_id: branchId } });
     }
 
+    lookupProduct(branchId: string, code: string): Observable<POSProductLookup> {
+        return this.http.get<POSProductLookup>(`${this.apiUrl}/products/lookup`, { params: { branch_id: branchId, code } });
+    }
+
     getConfig(): Observable<POSConfig> {
         return this.http.get<POSConfig>(`${this.apiUrl}/config`);
     }
@@ -130,6 +130,11 @@ export class SaleService {
         return this.http.get(`${this.apiUrl}/${id}/pdf/${type}`, { responseType: 'blob' });
     }
 
+    /** One PDF (or zip) with the documents of many sales, e.g. a whole board stage. */
+    downloadBoardDocuments(batch: { doc_type: string; stage?: string; sale_ids?: string[]; format?: 'pdf' | 'zip' }): Observable<Blob> {
+        return this.http.post(`${environment.apiUrl}/logistics/board/documents`, batch, { responseType: 'blob' });
+    }
+
     confirmDelivery(id: string, data: { notes?: string; evidence_url?: string }): Observable<Sale> {
         return this.http.post<Sale>(`${this.apiUrl}/${id}/deliver`, data);
     }
@@ -1,7 +1,8 @@
 import { Injectable, inject } from '@angular/core';
-import { Observable } from 'rxjs';
+import { Observable, last, map } from 'rxjs';
 
 import { ApiService } from './api.service';
+import { ImportService } from './import.service';
 
 export interface StorefrontSocialLinks {
   facebook?: string | null;
@@ -569,6 +570,7 @@ export interface PublicPaymentIntentResponse {
 })
 export class StorefrontAdminService {
   private api = inject(ApiService);
+  private imports = inject(ImportService);
 
   getStorefronts(): Observable<Storefront[]> {
     return this.api.get<Storefront[]>('/storefront/');
@@ -678,10 +680,27 @@ export class StorefrontAdminService {
     return this.api.post<StorefrontShippingDestination>('/storefront/shipping/destinations', payload);
   }
 
+  /** Uploads the file in pieces and emits the result once the import worker applied it. */
   importShippingDestinations(storefrontId: string, file: File): Observable<StorefrontShippingDestinationImportResult> {
-    const formData = new FormData();
-    formData.append('file', file, file.name);
-    return this.api.post<StorefrontShippingDestinationImportResult>(`/storefront/shipping/destinations/import?storefront_id=${encodeURIComponent(storefrontId)}`, formData);
+    return this.imports.uploadInChunks('shipping_destinations', file, { storefront_id: storefrontId }).pipe(
+      last(),
+      map((job) => {
+        if (job.status === 'FAILED') {
+          // Same shape as an HTTP error, so callers read `error.detail` either way.
+          throw { error: { detail: job.error_message } };
+        }
+        const summary = job.summary;
+        return {
+          success: true,
+          count: Number(summary.count || 0),
+          created: Number(summary['created'] || 0),
+          updated: Number(summary['updated'] || 0),
+          skipped: Number(summary['skipped'] || 0),
+          error_count: Number(summary.error_count || 0),
+          errors: summary.errors || []
+        };
+      })
+    );
   }
 
   updateShippingDestination(id: string, payload: Partial<StorefrontShippingDestination>): Observable<StorefrontShippingDestination> {
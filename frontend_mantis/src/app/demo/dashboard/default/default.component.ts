@@ -1,4 +1,5 @@
-import { ChangeDetectorRef, Component, OnInit, inject } from '@angular/core';
+import { ChangeDetectorRef, Component, OnDestroy, OnInit, inject } from '@angular/core';
+import { Subscription, debounceTime, filter, repeat, retry } from 'rxjs';
 import { CommonModule } from '@angular/common';
 import { RouterModule } from '@angular/router';
 import { FormsModule } from '@angular/forms';
@@ -33,7 +34,7 @@ type DashboardFilters = { date_from?: string; date_to?: string; branch_id?: stri
   templateUrl: './default.component.html',
   styleUrls: ['./default.component.scss']
 })
-export class DefaultComponent implements OnInit {
+export class DefaultComponent implements OnInit, OnDestroy {
   private iconService = inject(IconService);
   private dashboardService = inject(DashboardService);
   private apiService = inject(ApiService);
@@ -50,6 +51,7 @@ export class DefaultComponent implements OnInit {
   dateTo = '';
   selectedBranchId = '';
   branches: Branch[] = [];
+  private liveUpdates?: Subscription;
 
   constructor() {
     this.iconService.addIcon(...[RiseOutline, FallOutline, SettingOutline, GiftOutline, MessageOutline]);
@@ -58,6 +60,22 @@ export class DefaultComponent implements OnInit {
   ngOnInit(): void {
     this.loadBranches();
     this.loadDashboard();
+    this.watchCounters();
+  }
+
+  ngOnDestroy(): void {
+    this.liveUpdates?.unsubscribe();
+  }
+
+  /** Reload the unfiltered dashboard when its live counters change; reads are cheap. */
+  watchCounters(): void {
+    this.liveUpdates = this.dashboardService.counterEvents().pipe(
+      filter(({ event }) => event === 'counters'),
+      debounceTime(2000),
+      filter(() => !this.dateFrom && !this.dateTo && !this.selectedBranchId),
+      retry({ delay: 30000 }),
+      repeat({ delay: 30000 })
+    ).subscribe(() => this.loadDashboard(true));
   }
 
   loadBranches(): void {
@@ -70,8 +88,8 @@ export class DefaultComponent implements OnInit {
     });
   }
 
-  loadDashboard(): void {
-    this.isLoading = true;
+  loadDashboard(silent = false): void {
+    this.isLoading = !silent;
     this.errorMessage = '';
     const filters: DashboardFilters = {};
     if (this.dateFrom) filters.date_from = this.dateFrom;
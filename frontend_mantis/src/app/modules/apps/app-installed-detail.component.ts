@@ -206,6 +206,8 @@ export class AppInstalledDetailComponent implements OnInit {
       next: (result) => {
         if (result.delivered) {
           this.swal.success('Webhook enviado', `Status: ${result.status_code || 'ok'}`);
+        } else if (result.queued) {
+          this.swal.success('Webhook en cola', 'Se enviará en segundo plano; revisa el historial de entregas.');
         } else {
           this.swal.warning('Webhook no enviado', result.reason || 'Sin endpoint configurado.');
         }
@@ -224,6 +226,8 @@ export class AppInstalledDetailComponent implements OnInit {
       next: (result) => {
         if (result.delivered) {
           this.swal.success('Retry exitoso', `Status: ${result.status_code || 'ok'}`);
+        } else if (result.queued) {
+          this.swal.success('Retry en cola', 'El reintento se enviará en segundo plano.');
         } else {
           this.swal.warning('Retry fallo', result.reason || 'No se pudo entregar.');
         }
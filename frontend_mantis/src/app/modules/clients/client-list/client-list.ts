@@ -65,6 +65,6 @@ export class ClientListComponent implements OnInit {
   }
 
   exportData(format: 'excel' | 'csv') {
-    this.exportService.download('/clients/export', format);
+    this.exportService.download('clients', format);
   }
 }
@@ -18,6 +18,7 @@ export class InventoryHistoryComponent implements OnInit {
 
     movements: InventoryMovement[] = [];
     isLoading = false;
+    nextCursor: string | null = null;
     productId: string | null = null;
     branchId: string | null = null;
 
@@ -30,11 +31,12 @@ export class InventoryHistoryComponent implements OnInit {
         }
     }
 
-    loadHistory() {
+    loadHistory(cursor?: string) {
         this.isLoading = true;
-        this.inventoryService.getMovements(this.productId!, this.branchId || undefined).subscribe({
-            next: (data) => {
-                this.movements = data;
+        this.inventoryService.getMovements(this.productId!, this.branchId || undefined, cursor).subscribe({
+            next: (page) => {
+                this.movements = cursor ? [...this.movements, ...page.items] : page.items;
+                this.nextCursor = page.nextCursor;
                 this.isLoading = false;
             },
             error: (err) => {
@@ -44,6 +46,12 @@ export class InventoryHistoryComponent implements OnInit {
         });
     }
 
+    loadMore() {
+        if (this.nextCursor && !this.isLoading) {
+            this.loadHistory(this.nextCursor);
+        }
+    }
+
     goBack() {
         this.router.navigate(['/inventory']);
     }
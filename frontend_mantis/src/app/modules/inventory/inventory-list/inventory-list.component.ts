@@ -86,6 +86,6 @@ export class InventoryListComponent implements OnInit {
     exportData(format: 'excel' | 'csv') {
         const params: Record<string, string> = {};
         if (this.selectedBranchId) params['branch_id'] = this.selectedBranchId;
-        this.exportService.download('/inventory/export', format, params);
+        this.exportService.download('inventory', format, params);
     }
 }
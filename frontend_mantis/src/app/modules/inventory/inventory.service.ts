@@ -1,5 +1,5 @@
 import { Injectable, inject } from '@angular/core';
-import { ApiService } from '../../core/services/api.service';
+import { ApiService, CursorPage } from '../../core/services/api.service';
 import { Observable } from 'rxjs';
 import { HttpParams } from '@angular/common/http';
 import { Branch } from 'src/app/core/services/branch.service';
@@ -116,11 +116,12 @@ export class InventoryService {
         return this.api.get<InventoryItem[]>('/inventory', params);
     }
 
-    getMovements(productId?: string, branchId?: string): Observable<InventoryMovement[]> {
+    getMovements(productId?: string, branchId?: string, cursor?: string): Observable<CursorPage<InventoryMovement>> {
         let params = new HttpParams();
         if (branchId) params = params.set('branch_id', branchId);
         if (productId) params = params.set('product_id', productId);
-        return this.api.get<InventoryMovement[]>('/inventory/movements', params);
+        if (cursor) params = params.set('cursor', cursor);
+        return this.api.getPage<InventoryMovement>('/inventory/movements', params);
     }
 
     getReplenishmentSuggestions(branchId?: string): Observable<ReplenishmentSuggestion[]> {
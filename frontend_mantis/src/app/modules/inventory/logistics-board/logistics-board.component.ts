@@ -2,6 +2,7 @@ import { ChangeDetectorRef, Component, OnInit, inject } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { Router } from '@angular/router';
 import { ApiService } from '../../../core/services/api.service';
+import { SaleService } from '../../../core/services/sale.service';
 import { SharedModule } from '../../../theme/shared/shared.module';
 import { SweetAlertService } from '../../../theme/shared/services/sweet-alert.service';
 
@@ -26,6 +27,7 @@ interface BoardColumn {
     color: string;
     nextStatus?: string;
     nextLabel?: string;
+    printDocType?: 'picking' | 'packing';
     cards: BoardCard[];
 }
 
@@ -44,17 +46,19 @@ interface WarehouseMetric {
 })
 export class LogisticsBoardComponent implements OnInit {
     private api = inject(ApiService);
+    private saleService = inject(SaleService);
     private swal = inject(SweetAlertService);
     private router = inject(Router);
     private cdr = inject(ChangeDetectorRef);
 
     columns: BoardColumn[] = [
-        { key: 'CONFIRMED', label: 'Confirmados', icon: 'ti ti-clipboard', color: '#4680ff', nextStatus: 'PICKING', nextLabel: 'Iniciar Picking', cards: [] },
-        { key: 'PICKING', label: 'En Picking', icon: 'ti ti-box', color: '#e58a00', nextStatus: 'PACKING', nextLabel: 'Listo para Empacar', cards: [] },
-        { key: 'PACKING', label: 'Empacando', icon: 'ti ti-box', color: '#2ca87f', nextStatus: 'DISPATCHED', nextLabel: 'Despachar', cards: [] },
+        { key: 'CONFIRMED', label: 'Confirmados', icon: 'ti ti-clipboard', color: '#4680ff', nextStatus: 'PICKING', nextLabel: 'Iniciar Picking', printDocType: 'picking', cards: [] },
+        { key: 'PICKING', label: 'En Picking', icon: 'ti ti-box', color: '#e58a00', nextStatus: 'PACKING', nextLabel: 'Listo para Empacar', printDocType: 'picking', cards: [] },
+        { key: 'PACKING', label: 'Empacando', icon: 'ti ti-box', color: '#2ca87f', nextStatus: 'DISPATCHED', nextLabel: 'Despachar', printDocType: 'packing', cards: [] },
         { key: 'DISPATCHED', label: 'Despachados', icon: 'ti ti-truck', color: '#673ab7', nextStatus: 'DELIVERED', nextLabel: 'Entregado', cards: [] }
     ];
     isLoading = false;
+    printingStage: string | null = null;
     metrics: WarehouseMetric[] = [];
 
     ngOnInit(): void {
@@ -102,6 +106,31 @@ export class LogisticsBoardComponent implements OnInit {
             });
     }
 
+    /** Downloads the picking or packing lists of every sale in the column as one PDF. */
+    printColumn(column: BoardColumn) {
+        if (!column.printDocType || !column.cards.length) return;
+        this.printingStage = column.key;
+        this.saleService.downloadBoardDocuments({ doc_type: column.printDocType, stage: column.key }).subscribe({
+            next: (blob) => {
+                const url = window.URL.createObjectURL(blob);
+                const a = document.createElement('a');
+                a.href = url;
+                a.download = `${column.printDocType}_${column.key.toLowerCase()}.pdf`;
+                document.body.appendChild(a);
+                a.click();
+                document.body.removeChild(a);
+                window.URL.revokeObjectURL(url);
+                this.printingStage = null;
+                this.cdr.detectChanges();
+            },
+            error: () => {
+                this.printingStage = null;
+                this.cdr.detectChanges();
+                this.swal.error('Error', 'No se pudieron generar los documentos');
+            }
+        });
+    }
+
     getColumnLabel(status: string): string {
         const column = this.columns.find((col) => col.key === status);
         return column?.label || status;
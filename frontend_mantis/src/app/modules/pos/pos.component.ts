@@ -45,6 +45,8 @@ interface SessionsOperationalSummary {
 export class PosComponent implements OnInit {
     products: POSProduct[] = [];
     filteredProducts: POSProduct[] = [];
+    // Loaded products by `barcode:<code>` and `sku:<lowercase code>`, so a scan is one lookup.
+    private codeIndex = new Map<string, POSProduct>();
     searchQuery = '';
 
     cart: POSCartItem[] = [];
@@ -200,6 +202,11 @@ export class PosComponent implements OnInit {
     loadProducts() {
         this.posService.getProducts(this.currentBranchId).subscribe((data) => {
             this.products = data;
+            this.codeIndex.clear();
+            for (const product of data) {
+                if (product.barcode?.trim()) this.codeIndex.set(`barcode:${product.barcode.trim()}`, product);
+                if (product.sku?.trim()) this.codeIndex.set(`sku:${product.sku.trim().toLowerCase()}`, product);
+            }
             const cats = data.map((p) => p.category_name).filter((c): c is string => !!c);
             this.categories = [...new Set(cats)].sort();
             this.selectedCategory = '';
@@ -228,6 +235,38 @@ export class PosComponent implements OnInit {
         }
     }
 
+    /** The smallest WebP copy of the product image, enough for a tile. */
+    tileImage(product: POSProduct): string | undefined {
+        return product.image_derivatives?.find((image) => image.format === 'webp')?.url ?? product.image_url;
+    }
+
+    /**
+     * Adds the product whose barcode or SKU was scanned (Enter in the search
+     * box). Codes missing from the loaded catalog, such as variant codes, are
+     * resolved by the server.
+     */
+    scanCode() {
+        const code = this.searchQuery.trim();
+        if (!code || !this.currentBranchId) {
+            return;
+        }
+        const local = this.codeIndex.get(`barcode:${code}`) ?? this.codeIndex.get(`sku:${code.toLowerCase()}`);
+        if (local) {
+            this.addScanned(local);
+            return;
+        }
+        this.posService.lookupProduct(this.currentBranchId, code).subscribe({
+            next: ({ product }) => this.addScanned(this.products.find((p) => p.id === product.id) ?? product),
+            error: () => Swal.fire('Código no encontrado', `No hay un producto activo con el código ${code}.`, 'warning')
+        });
+    }
+
+    private addScanned(product: POSProduct) {
+        this.addToCart(product);
+        this.searchQuery = '';
+        this.filterProducts();
+    }
+
     addToCart(product: POSProduct) {
         if (!this.currentSession) {
             Swal.fire('Caja cerrada', 'Debes abrir caja antes de vender en POS.', 'warning');
@@ -1,20 +1,10 @@
 import { Component, inject } from '@angular/core';
 import { FormsModule } from '@angular/forms';
 import { Router } from '@angular/router';
-import { ApiService } from '../../../core/services/api.service';
+import { ImportJob, ImportService } from '../../../core/services/import.service';
 import { SweetAlertService } from '../../../theme/shared/services/sweet-alert.service';
 import { SharedModule } from '../../../theme/shared/shared.module';
 
-interface ProductImportResponse {
-  success: boolean;
-  count: number;
-  products_created?: number;
-  products_updated?: number;
-  variants_created?: number;
-  variants_updated?: number;
-  errors?: string[];
-}
-
 @Component({
   selector: 'app-product-import',
   templateUrl: './product-import.component.html',
@@ -25,16 +15,16 @@ interface ProductImportResponse {
 export class ProductImportComponent {
   file: File | null = null;
   isLoading = false;
-  importResult: ProductImportResponse | null = null;
+  job: ImportJob | null = null;
 
-  private apiService = inject(ApiService);
+  private importService = inject(ImportService);
   private swal = inject(SweetAlertService);
   private router = inject(Router);
 
   onFileSelected(event: Event): void {
     const input = event.target as HTMLInputElement;
     this.file = input.files && input.files.length > 0 ? input.files[0] : null;
-    this.importResult = null;
+    this.job = null;
   }
 
   uploadFile(): void {
@@ -43,24 +33,26 @@ export class ProductImportComponent {
       return;
     }
 
-    const formData = new FormData();
-    formData.append('file', this.file);
-
     this.isLoading = true;
-    this.apiService.post<ProductImportResponse>('/products/import', formData).subscribe({
-      next: (response) => {
-        this.isLoading = false;
-        if (response.success) {
-          this.importResult = response;
-          const products = (response.products_created || 0) + (response.products_updated || 0);
-          const variants = (response.variants_created || 0) + (response.variants_updated || 0);
+    this.job = null;
+    this.importService.uploadInChunks('products', this.file).subscribe({
+      next: (job) => {
+        this.job = job;
+        if (job.status === 'COMPLETED') {
+          this.isLoading = false;
+          const summary = job.summary;
+          const products = Number(summary['products_created'] || 0) + Number(summary['products_updated'] || 0);
+          const variants = Number(summary['variants_created'] || 0) + Number(summary['variants_updated'] || 0);
           this.swal.success(
             'Importación completada',
-            `${response.count} fila(s) procesada(s): ${products} producto(s) y ${variants} variante(s).`
+            `${summary.count || 0} fila(s) procesada(s): ${products} producto(s) y ${variants} variante(s).`
           );
-          if (response.errors && response.errors.length > 0) {
+          if (summary.error_count) {
             this.swal.error('Advertencia', 'Algunas filas tuvieron errores. Revisa el reporte.');
           }
+        } else if (job.status === 'FAILED') {
+          this.isLoading = false;
+          this.swal.error('Error', job.error_message || 'Falló la importación del archivo.');
         }
       },
       error: (err: unknown) => {
@@ -72,6 +64,10 @@ export class ProductImportComponent {
     });
   }
 
+  uploadPercent(job: ImportJob): number {
+    return job.file_size ? Math.floor((job.received_bytes * 100) / job.file_size) : 0;
+  }
+
   cancel(): void {
     this.router.navigate(['/products']);
   }
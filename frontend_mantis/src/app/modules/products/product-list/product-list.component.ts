@@ -4,6 +4,7 @@ import { SweetAlertService } from '../../../theme/shared/services/sweet-alert.se
 import { AuthService } from '../../../core/services/auth.service';
 import { ExportService } from '../../../core/services/export.service';
 import { Product, productImageUrl } from '../../../core/services/product.service';
+import { Observable, exhaustMap, last, switchMap, takeWhile, timer } from 'rxjs';
 
 interface BulkDeleteBlockedProduct {
     id: string;
@@ -14,13 +15,26 @@ interface BulkDeleteBlockedProduct {
 interface BulkDeleteResponse {
     requested: number;
     deleted: number;
-    deleted_ids: string[];
     archived: number;
-    archived_ids: string[];
     blocked: BulkDeleteBlockedProduct[];
+    // Total kept by the guard; `blocked` lists only the first of them.
+    blocked_count: number;
     not_found: string[];
 }
 
+interface ProductDeletionJob {
+    id: string;
+    scope: 'selected' | 'catalog' | 'archived';
+    status: 'QUEUED' | 'RUNNING' | 'COMPLETED' | 'FAILED';
+    total_products: number | null;
+    processed_products: number;
+    percent: number | null;
+    summary: Partial<BulkDeleteResponse>;
+    error_message: string | null;
+}
+
+const DELETION_POLL_INTERVAL_MS = 1500;
+
 interface BulkRestoreArchivedResponse {
     requested: number;
     restored: number;
@@ -209,94 +223,64 @@ export class ProductListComponent implements OnInit {
                 }
 
                 this.isLoading = true;
-                this.deleteArchivedBatch(
-                    ids.length ? ids : null,
-                    0,
-                    [],
-                    this.emptyBulkDeleteResponse()
-                );
+                const body = ids.length
+                    ? { product_ids: ids, purge_inventory: true }
+                    : { purge_inventory: true };
+                this.runDeletion('/products/bulk-delete-archived', body, 'Eliminación definitiva', 'No se pudieron eliminar definitivamente');
             });
     }
 
-    private emptyBulkDeleteResponse(): BulkDeleteResponse {
-        return {
-            requested: 0,
-            deleted: 0,
-            deleted_ids: [],
-            archived: 0,
-            archived_ids: [],
-            blocked: [],
-            not_found: []
-        };
+    /**
+     * Queues a bulk deletion and polls its job until the deletion worker
+     * finishes it; large catalogs are processed in batches on the server.
+     */
+    private runDeletion(path: string, body: object, partialTitle: string, errorTitle: string, onCompleted?: () => void): void {
+        this.apiService
+            .post<ProductDeletionJob>(path, body)
+            .pipe(
+                switchMap((job) => this.watchDeletion(job)),
+                last()
+            )
+            .subscribe({
+                next: (job) => {
+                    if (job.status === 'FAILED') {
+                        this.swal.error(errorTitle, job.error_message || 'Intenta nuevamente.');
+                        this.isLoading = false;
+                        this.loadProducts();
+                        return;
+                    }
+                    this.clearSelection();
+                    onCompleted?.();
+                    this.showBulkDeleteResult(this.deletionResult(job), partialTitle);
+                },
+                error: (err) => {
+                    console.error('Error deleting products', err);
+                    const detail = err?.error?.detail;
+                    this.swal.error(errorTitle, typeof detail === 'string' ? detail : 'Intenta nuevamente.');
+                    this.isLoading = false;
+                    this.cdr.detectChanges();
+                }
+            });
     }
 
-    private mergeBulkDeleteResponse(target: BulkDeleteResponse, response: BulkDeleteResponse): void {
-        target.requested += response.requested;
-        target.deleted += response.deleted;
-        target.deleted_ids.push(...response.deleted_ids);
-        target.archived += response.archived;
-        target.archived_ids.push(...response.archived_ids);
-        target.blocked.push(...response.blocked);
-        target.not_found.push(...response.not_found);
+    private watchDeletion(job: ProductDeletionJob): Observable<ProductDeletionJob> {
+        return timer(0, DELETION_POLL_INTERVAL_MS).pipe(
+            exhaustMap(() => this.apiService.get<ProductDeletionJob>(`/products/deletion-jobs/${job.id}`)),
+            takeWhile((current) => current.status === 'QUEUED' || current.status === 'RUNNING', true)
+        );
     }
 
-    private deleteArchivedBatch(
-        productIds: string[] | null,
-        offset: number,
-        excludedIds: string[],
-        aggregate: BulkDeleteResponse
-    ): void {
-        const batchSize = 25;
-        const body: {
-            product_ids?: string[];
-            purge_inventory: boolean;
-            exclude_product_ids?: string[];
-            limit?: number;
-        } = { purge_inventory: true };
-
-        if (productIds) {
-            body.product_ids = productIds.slice(offset, offset + batchSize);
-        } else {
-            body.limit = batchSize;
-            if (excludedIds.length) {
-                body.exclude_product_ids = excludedIds;
-            }
-        }
-
-        this.apiService.post<BulkDeleteResponse>('/products/bulk-delete-archived', body).subscribe({
-            next: (response) => {
-                this.mergeBulkDeleteResponse(aggregate, response);
-                const nextExcludedIds = Array.from(new Set([
-                    ...excludedIds,
-                    ...response.blocked.map((item) => item.id),
-                    ...response.not_found
-                ]));
-                const nextOffset = productIds
-                    ? offset + (body.product_ids?.length ?? 0)
-                    : offset;
-                const hasNextBatch = productIds
-                    ? nextOffset < productIds.length
-                    : response.requested > 0;
-
-                if (hasNextBatch) {
-                    this.deleteArchivedBatch(productIds, nextOffset, nextExcludedIds, aggregate);
-                    return;
-                }
-
-                this.clearSelection();
-                this.showBulkDeleteResult(aggregate, 'Eliminación definitiva');
-            },
-            error: (err) => {
-                console.error('Error permanently deleting archived products', err);
-                const detail = err?.error?.detail;
-                this.swal.error(
-                    'No se pudieron eliminar definitivamente',
-                    typeof detail === 'string' ? detail : 'Intenta nuevamente.'
-                );
-                this.isLoading = false;
-                this.cdr.detectChanges();
-            }
-        });
+    private deletionResult(job: ProductDeletionJob): BulkDeleteResponse {
+        const summary = job.summary ?? {};
+        const blocked = summary.blocked ?? [];
+        return {
+            requested: summary.requested ?? 0,
+            deleted: summary.deleted ?? 0,
+            archived: summary.archived ?? 0,
+            blocked,
+            blocked_count: summary.blocked_count ?? blocked.length,
+            not_found: summary.not_found ?? []
+        };
     }
 
     onPageSizeChange(value: number | string): void {
@@ -446,24 +430,7 @@ export class ProductListComponent implements OnInit {
                 }
 
                 this.isLoading = true;
-                this.apiService
-                    .post<BulkDeleteResponse>('/products/bulk-delete', { product_ids: productIds })
-                    .subscribe({
-                        next: (response) => {
-                            this.clearSelection();
-                            this.showBulkDeleteResult(response);
-                        },
-                        error: (err) => {
-                            console.error('Error deleting selected products', err);
-                            const detail = err?.error?.detail;
-                            this.swal.error(
-                                'No se pudo completar el borrado',
-                                typeof detail === 'string' ? detail : 'Intenta nuevamente.'
-                            );
-                            this.isLoading = false;
-                            this.cdr.detectChanges();
-                        }
-                    });
+                this.runDeletion('/products/bulk-delete', { product_ids: productIds }, 'Borrado parcial', 'No se pudo completar el borrado');
             });
     }
 
@@ -486,22 +453,8 @@ export class ProductListComponent implements OnInit {
                 }
 
                 this.isLoading = true;
-                this.apiService.post<BulkDeleteResponse>('/products/bulk-delete-all', { force: true }).subscribe({
-                    next: (response) => {
-                        this.clearSelection();
-                        this.page = 1;
-                        this.showBulkDeleteResult(response, 'Catálogo eliminado');
-                    },
-                    error: (err) => {
-                        console.error('Error deleting all products', err);
-                        const detail = err?.error?.detail;
-                        this.swal.error(
-                            'No se pudo completar el borrado global',
-                            typeof detail === 'string' ? detail : 'Intenta nuevamente.'
-                        );
-                        this.isLoading = false;
-                        this.cdr.detectChanges();
-                    }
+                this.runDeletion('/products/bulk-delete-all', { force: true }, 'Catálogo eliminado', 'No se pudo completar el borrado global', () => {
+                    this.page = 1;
                 });
             });
         }
@@ -641,7 +594,7 @@ export class ProductListComponent implements OnInit {
     }
 
     private showBulkDeleteResult(response: BulkDeleteResponse, partialTitle = 'Borrado parcial'): void {
-        if (response.blocked.length || response.not_found.length) {
+        if (response.blocked_count || response.not_found.length) {
             const examples = response.blocked
                 .slice(0, 3)
                 .map((item) => `${item.name}: ${item.reasons.join(', ')}`)
@@ -649,7 +602,7 @@ export class ProductListComponent implements OnInit {
             const details = [
                 `Eliminados definitivamente: ${response.deleted}.`,
                 response.archived ? `Archivados por historial: ${response.archived}.` : '',
-                `Conservados por seguridad: ${response.blocked.length}.`,
+                `Conservados por seguridad: ${response.blocked_count}.`,
                 response.not_found.length ? `No encontrados: ${response.not_found.length}.` : '',
                 examples ? `Ejemplos: ${examples}.` : ''
             ]
@@ -673,6 +626,6 @@ export class ProductListComponent implements OnInit {
     exportData(format: 'excel' | 'csv') {
         const params: Record<string, string> = {};
         if (this.searchQuery) params['search'] = this.searchQuery;
-        this.exportService.download('/products/export', format, params);
+        this.exportService.download('products', format, params);
     }
 }
@@ -89,6 +89,6 @@ export class PurchaseListComponent implements OnInit {
     }
 
     exportData(format: 'excel' | 'csv') {
-        this.exportService.download('/purchases/export', format);
+        this.exportService.download('purchases', format);
     }
 }
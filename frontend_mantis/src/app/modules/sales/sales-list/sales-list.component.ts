@@ -141,6 +141,6 @@ export class SalesListComponent implements OnInit {
     exportData(format: 'excel' | 'csv') {
         const params: Record<string, string> = {};
         if (this.filterStatus) params['status'] = this.filterStatus;
-        this.exportService.download('/sales/export', format, params);
+        this.exportService.download('sales', format, params);
     }
 }
@@ -4,7 +4,7 @@ import { Product } from "@/types/product";
 import { Testimonial } from "@/types/testimonial";
 import { PublicCollection, PublicProduct } from "@/types/storefront";
 import { getStorefrontBranding } from "./storefront-branding";
-import { storefrontImageUrl } from "./storefront-image";
+import { storefrontDerivativeUrl, storefrontImageUrl } from "./storefront-image";
 import { formatMoney } from "./money";
 
 import {
@@ -28,13 +28,17 @@ function moneyLabel(currency: string, value: number | null | undefined): string
   return formatMoney(value, currency, false);
 }
 
+// Catalog cards render at most about 320 CSS pixels wide; 640 covers 2x screens.
+const CARD_IMAGE_SIZE = 640;
+
 function fallbackImage(_seed: string): string {
   return "/images/home/home-hero-editorial.webp";
 }
 
 function toTemplateProduct(product: PublicProduct): Product {
-  const previewImage = storefrontImageUrl(product.image_url) || storefrontImageUrl(product.gallery[0]) || fallbackImage(product.slug);
-  const secondaryImage = storefrontImageUrl(product.gallery[1]) || storefrontImageUrl(product.image_url) || fallbackImage(`${product.slug}-alt`);
+  const cardImage = (value?: string | null) => storefrontDerivativeUrl(product.image_derivatives, value, CARD_IMAGE_SIZE);
+  const previewImage = cardImage(product.image_url) || cardImage(product.gallery[0]) || fallbackImage(product.slug);
+  const secondaryImage = cardImage(product.gallery[1]) || cardImage(product.image_url) || fallbackImage(`${product.slug}-alt`);
   const compare = product.compare_at_price ?? product.base_price ?? product.price;
 
   return {
@@ -1,6 +1,6 @@
 import { Product } from "@/types/product";
 import { PublicProduct } from "@/types/storefront";
-import { storefrontImageUrl } from "./storefront-image";
+import { storefrontDerivativeUrl } from "./storefront-image";
 
 function numericId(value: string): number {
   let hash = 0;
@@ -10,6 +10,9 @@ function numericId(value: string): number {
   return Math.abs(hash) || 1;
 }
 
+// The largest derivative; enough for the detail gallery and its zoom.
+const GALLERY_IMAGE_SIZE = 1280;
+
 function fallbackImage(seed: string): string {
   return `/images/products/product-${(numericId(seed) % 8) + 1}-bg-1.png`;
 }
@@ -23,7 +26,7 @@ export function toTemplateProduct(product: PublicProduct): Product {
   const galleryImages = Array.from(
     new Set(
       [product.image_url, ...(product.gallery || [])]
-        .map((value) => storefrontImageUrl(value))
+        .map((value) => storefrontDerivativeUrl(product.image_derivatives, value, GALLERY_IMAGE_SIZE))
         .filter((value): value is string => Boolean(value)),
     ),
   );
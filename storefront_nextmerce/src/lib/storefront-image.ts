@@ -1,3 +1,5 @@
+import { ImageDerivative } from "@/types/storefront";
+
 export function storefrontImageUrl(value?: string | null): string | undefined {
   const normalized = value?.trim();
   if (!normalized) return undefined;
@@ -28,3 +30,19 @@ export function storefrontImageUrl(value?: string | null): string | undefined {
   }
   return normalized;
 }
+
+/**
+ * The smallest WebP copy of `value` whose longest side reaches `size`
+ * pixels (the largest one for small originals), or the original when the
+ * API generated none.
+ */
+export function storefrontDerivativeUrl(
+  derivatives: Record<string, ImageDerivative[]> | undefined,
+  value: string | null | undefined,
+  size: number,
+): string | undefined {
+  const original = value?.trim();
+  const webp = (original && derivatives?.[original]?.filter((image) => image.format === "webp")) || [];
+  const fitting = webp.find((image) => Math.max(image.width, image.height) >= size) ?? webp[webp.length - 1];
+  return storefrontImageUrl(fitting?.url ?? original);
+}
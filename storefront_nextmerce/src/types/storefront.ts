@@ -127,6 +127,13 @@ export type PublicCollection = {
   products: PublicProduct[];
 };
 
+export type ImageDerivative = {
+  width: number;
+  height: number;
+  format: string;
+  url: string;
+};
+
 export type PublicProduct = {
   id: string;
   product_id: string;
@@ -141,6 +148,8 @@ export type PublicProduct = {
   variants: PublicProductVariant[];
   image_url?: string | null;
   gallery: string[];
+  // Resized WebP/AVIF copies of image_url and the gallery, by original URL.
+  image_derivatives?: Record<string, ImageDerivative[]>;
   price: number;
   base_price: number;
   compare_at_price?: number | null;